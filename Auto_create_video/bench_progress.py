@@ -0,0 +1,132 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║              BENCHMARK - TIẾN ĐỘ TỪ NHIỀU WORKER VỀ BẢNG VIDEO               ║
+║         Độ trễ event loop: signal mỗi lần báo vs ProgressAggregator          ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Mô phỏng N task chạy song song (mỗi task 1 thread), polling liên tục và báo
+tiến độ qua signal progress(int, str) như VeoWorker. GUI thread có 1 timer
+10ms đo độ trễ event loop (lượt timer đến muộn bao nhiêu).
+
+Đo (mỗi chế độ):
+1. Số lần cập nhật bảng trên GUI thread
+2. Số lượt timer 10ms chạy được + độ trễ event loop trung bình / p99 / lớn nhất
+3. Thời gian từ lúc worker xong tới lúc GUI xử lý hết event còn tồn
+
+Usage:
+    python bench_progress.py [số task] [số giây]
+"""
+
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QApplication
+
+app = QApplication.instance() or QApplication([])
+
+from src.ui.shared import ProgressAggregator
+from src.ui.tabs.video_table import VideoTable
+
+
+class FakeWorker(QObject):
+    """Giống VeoWorker: báo tiến độ (row, message) từ thread nền"""
+    progress = pyqtSignal(int, str)
+
+
+def run_mode(mode: str, tasks: int, seconds: float, poll_interval: float = 0.002) -> dict:
+    table = VideoTable()
+    table.resize(1200, 800)
+    for i in range(tasks):
+        table.add_video_row(i + 1, f"task {i}", "0%")
+    table.show()
+    app.processEvents()
+
+    applied = [0]
+
+    def apply(row: int, message: str):
+        applied[0] += 1
+        table.update_row_progress(row, message)
+
+    worker = FakeWorker()
+    aggregator = None
+    if mode == "signal":
+        worker.progress.connect(apply)
+    else:
+        aggregator = ProgressAggregator()
+        aggregator.updates_ready.connect(
+            lambda updates: [apply(row, message) for row, message in updates.items()]
+        )
+        worker.progress.connect(aggregator.update, Qt.ConnectionType.DirectConnection)
+
+    # Đo độ trễ event loop bằng timer 10ms
+    lateness = []
+    expected = [time.perf_counter() + 0.01]
+
+    def heartbeat():
+        now = time.perf_counter()
+        lateness.append(max(0.0, now - expected[0]))
+        expected[0] = now + 0.01
+
+    timer = QTimer()
+    timer.timeout.connect(heartbeat)
+    timer.start(10)
+
+    stop_at = time.perf_counter() + seconds
+
+    def task(row: int):
+        step = 0
+        while time.perf_counter() < stop_at:
+            step += 1
+            worker.progress.emit(row, f"⏳ Đang tạo video... {step % 100}%")
+            time.sleep(poll_interval)
+
+    threads = [threading.Thread(target=task, args=(i,), daemon=True) for i in range(tasks)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        app.processEvents()
+    workers_done = time.perf_counter()
+
+    # Xử lý nốt event còn tồn
+    app.processEvents()
+    if aggregator is not None:
+        aggregator.flush()
+    drain = time.perf_counter() - workers_done
+    timer.stop()
+    table.close()
+
+    lateness.sort()
+    return {
+        "applied": applied[0],
+        "ticks": len(lateness),
+        "mean_ms": sum(lateness) / max(1, len(lateness)) * 1000,
+        "p99_ms": lateness[int(len(lateness) * 0.99)] * 1000 if lateness else 0.0,
+        "max_ms": lateness[-1] * 1000 if lateness else 0.0,
+        "drain_ms": drain * 1000,
+    }
+
+
+def run_bench(tasks: int = 50, seconds: float = 3.0):
+    print("=" * 60)
+    print(f"BENCHMARK tiến độ: {tasks} task song song, {seconds:.0f}s")
+    print("=" * 60)
+    for mode, label in (("signal", "Signal mỗi lần báo"), ("aggregator", "ProgressAggregator 10Hz")):
+        result = run_mode(mode, tasks, seconds)
+        print(f"\n{label}:")
+        print(f"  Cập nhật bảng        : {result['applied']}")
+        print(f"  Lượt timer 10ms      : {result['ticks']} / {int(seconds * 100)}")
+        print(f"  Độ trễ event loop    : TB {result['mean_ms']:.1f}ms, "
+              f"p99 {result['p99_ms']:.1f}ms, max {result['max_ms']:.1f}ms")
+        print(f"  Xử lý event tồn      : {result['drain_ms']:.0f}ms")
+
+
+if __name__ == "__main__":
+    run_bench(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    )
@@ -0,0 +1,107 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║              BENCHMARK - BẢNG VIDEO VỚI SỐ HÀNG LỚN                          ║
+║         Time-to-interactive + bộ nhớ khi load N hàng (Qt offscreen)          ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Đo:
+1. Thời gian thêm N hàng (add_video_row)
+2. Time-to-interactive: từ lúc bắt đầu tới khi bảng hiện + vẽ xong khung đầu
+3. Thời gian cuộn tới giữa bảng và vẽ lại
+4. RSS tăng thêm (MB)
+
+Usage:
+    python bench_video_table.py [số hàng]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QColor, QImage
+
+app = QApplication.instance() or QApplication([])
+
+from src.ui.shared import thumbnail_service
+from src.ui.shared.thumbnail_service import ThumbnailService
+from src.ui.tabs.video_table import VideoTable
+
+
+def current_rss_mb() -> float:
+    """RSS hiện tại (MB) - Linux đọc /proc, nơi khác dùng peak RSS"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return -1.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def make_images(folder: str, count: int = 20) -> list:
+    paths = []
+    for i in range(count):
+        image = QImage(800, 800, QImage.Format.Format_RGB32)
+        image.fill(QColor((i * 50) % 256, 100, 180))
+        path = os.path.join(folder, f"img_{i}.jpg")
+        image.save(path, "JPG")
+        paths.append(path)
+    return paths
+
+
+def run_bench(rows: int = 10000):
+    root = tempfile.mkdtemp()
+    thumbnail_service._service = ThumbnailService(os.path.join(root, "thumbs"))
+    images = make_images(root)
+
+    print("=" * 60)
+    print(f"BENCHMARK VideoTable: {rows} hàng")
+    print("=" * 60)
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+
+    table = VideoTable()
+    table.resize(1200, 800)
+    for i in range(rows):
+        table.add_video_row(
+            i + 1, f"prompt {i} " * 4, ("0%", "50%", "100%")[i % 3],
+            product_path=images[i % len(images)],
+            ref_path=images[(i + 7) % len(images)]
+        )
+    inserted = time.perf_counter() - start
+
+    table.show()
+    app.processEvents()
+    interactive = time.perf_counter() - start
+
+    scroll_start = time.perf_counter()
+    table.verticalScrollBar().setValue(table.verticalScrollBar().maximum() // 2)
+    app.processEvents()
+    scrolled = time.perf_counter() - scroll_start
+
+    rss_after = current_rss_mb()
+    print(f"Thêm {rows} hàng       : {inserted:.2f}s")
+    print(f"Time-to-interactive   : {interactive:.2f}s")
+    print(f"Cuộn tới giữa + vẽ    : {scrolled * 1000:.0f}ms")
+    print(f"RSS tăng thêm         : {rss_after - rss_before:.1f} MB")
+
+    table.close()
+    thumbnail_service._service.wait_for_done()
+
+
+if __name__ == "__main__":
+    run_bench(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -38,6 +38,12 @@ class Config:
     DEFAULT_VIDEO_RESOLUTION = os.getenv('DEFAULT_VIDEO_RESOLUTION', '720p')
     DEFAULT_VIDEO_DURATION = int(os.getenv('DEFAULT_VIDEO_DURATION', '8'))
     
+    # Browser (Playwright) - profile Chromium giữ lại giữa các lần chạy
+    BROWSER_PROFILE_DIR = os.getenv('BROWSER_PROFILE_DIR', 'browser_profile')
+    
+    # UI - thumbnail ảnh trong bảng video (cache trên đĩa)
+    THUMBNAIL_CACHE_DIR = os.getenv('THUMBNAIL_CACHE_DIR', 'cache/thumbnails')
+    
     @classmethod
     def get_api_key(cls, service: str = 'gemini') -> str:
         """
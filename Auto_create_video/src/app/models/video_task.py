@@ -9,7 +9,7 @@
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
 import uuid
 
@@ -53,6 +53,8 @@ class VideoTask:
         error_message: Thông báo lỗi (nếu có)
         created_at: Thời gian tạo
         progress: Tiến độ xử lý (0-100)
+        operation_name: ID operation Veo đang chạy trên server (resume sau crash)
+        params: Tham số request (prompt EN, output_path, duration...) để resume
     """
     
     # === Thông tin cơ bản ===
@@ -72,6 +74,10 @@ class VideoTask:
     output_path: Optional[str] = None                   # Video đầu ra
     error_message: Optional[str] = None                 # Lỗi nếu có
     
+    # === Resume ===
+    operation_name: Optional[str] = None                # Operation Veo đã submit
+    params: Dict[str, Any] = field(default_factory=dict)
+    
     # === Metadata ===
     created_at: datetime = field(default_factory=datetime.now)
     
@@ -91,7 +97,9 @@ class VideoTask:
             'progress': self.progress,
             'output_path': self.output_path,
             'error_message': self.error_message,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at.isoformat(),
+            'operation_name': self.operation_name,
+            'params': dict(self.params)
         }
     
     @classmethod
@@ -108,6 +116,10 @@ class VideoTask:
         task.progress = data.get('progress', 0)
         task.output_path = data.get('output_path')
         task.error_message = data.get('error_message')
+        task.operation_name = data.get('operation_name')
+        task.params = dict(data.get('params') or {})
+        if data.get('created_at'):
+            task.created_at = datetime.fromisoformat(data['created_at'])
         return task
     
     def is_done(self) -> bool:
@@ -17,6 +17,8 @@ Usage:
 """
 
 import os
+import re
+import copy
 import time
 import json
 from typing import Optional, List
@@ -24,6 +26,7 @@ from dataclasses import dataclass
 from pathlib import Path
 
 from .cookie_utils import parse_cookie_string
+from .video_downloader import VideoDownloadManager
 
 try:
     from playwright.sync_api import sync_playwright, Page, Browser, BrowserContext
@@ -62,6 +65,49 @@ class PlaywrightVeoService:
     GENERATE_BTN_WAIT_TIMEOUT = 10  # 10s to wait for generate button
     ELEMENT_WAIT_TIMEOUT = 5000  # 5s for element visibility
     WAIT_AFTER_CLICK = 500  # 500ms wait after click
+    RENDER_TIMEOUT = 120  # Hạn chót 2 phút nếu không nhận được tín hiệu xong
+    RENDER_CHECK_INTERVAL_MS = 250  # Đọc trạng thái render (do MutationObserver cập nhật)
+    RENDER_SETTLE_MS = 10000  # Không biết Flow trả mấy video → xong nếu 10s không thêm video
+    
+    # Theo dõi render bằng MutationObserver: đếm <video> MỚI có src http,
+    # phát hiện error banner mới xuất hiện. Biết số video (expected) → xong khi đủ;
+    # không biết (null) → "settle" khi số video ngừng tăng.
+    RENDER_WATCH_SCRIPT = """([expected, settleMs, errorSelector]) => {
+        const old = window.__veoRenderWatch;
+        if (old) { old.observer.disconnect(); clearTimeout(old.settleTimer); }
+
+        const videoSrcs = () => Array.from(document.querySelectorAll("video"))
+            .map(v => v.currentSrc || v.src || (v.querySelector("source") || {}).src || "")
+            .filter(src => src.startsWith("http"));
+        const baseline = new Set(videoSrcs());
+        const oldErrors = new Set(document.querySelectorAll(errorSelector));
+
+        const state = { srcs: [], error: null, done: false, settleTimer: null };
+        const check = () => {
+            const srcs = [...new Set(videoSrcs().filter(src => !baseline.has(src)))];
+            const grew = srcs.length > state.srcs.length;
+            state.srcs = srcs;
+
+            const banner = Array.from(document.querySelectorAll(errorSelector))
+                .find(el => !oldErrors.has(el) && el.innerText && el.innerText.trim());
+            if (banner) {
+                state.error = banner.innerText.trim().slice(0, 200);
+                state.done = true;
+            }
+            if (expected) {
+                if (srcs.length >= expected) state.done = true;
+            } else if (grew) {
+                clearTimeout(state.settleTimer);
+                state.settleTimer = setTimeout(() => { state.done = true; }, settleMs);
+            }
+        };
+
+        state.observer = new MutationObserver(check);
+        state.observer.observe(document.body, {
+            childList: true, subtree: true, attributes: true, attributeFilter: ["src"]
+        });
+        window.__veoRenderWatch = state;
+    }"""
     
     # Selectors từ HTML thực tế (user inspect)
     SELECTORS = {
@@ -148,7 +194,9 @@ class PlaywrightVeoService:
         cookie_string: str,
         download_dir: str = "./output/videos",
         headless: bool = True,
-        timeout: int = 300  # 5 phút timeout
+        timeout: int = 300,  # 5 phút timeout
+        flow_url: Optional[str] = None,
+        user_data_dir: Optional[str] = None
     ):
         """
         Khởi tạo service.
@@ -158,6 +206,9 @@ class PlaywrightVeoService:
             download_dir: Thư mục lưu video
             headless: True = chạy ngầm (nhanh), False = hiện browser (debug)
             timeout: Thời gian chờ tối đa (giây)
+            flow_url: URL trang Flow (mặc định FLOW_URL, đổi sang trang giả lập khi test)
+            user_data_dir: Thư mục profile Chromium - giữ cache/session giữa các lần chạy
+                           (None = context tạm, mất khi đóng)
         """
         if not PLAYWRIGHT_AVAILABLE:
             raise ImportError("Playwright chưa được cài. Chạy: pip install playwright && playwright install chromium")
@@ -167,6 +218,18 @@ class PlaywrightVeoService:
         self.download_dir.mkdir(parents=True, exist_ok=True)
         self.headless = headless
         self.timeout = timeout
+        self.flow_url = flow_url or self.FLOW_URL
+        self.user_data_dir = user_data_dir
+        self.slot_name = "p0"  # Tên tab, dùng trong log và tên file
+        
+        # Trạng thái render của prompt hiện tại (xem _arm_render_watch)
+        self._expected_videos: Optional[int] = None
+        self._video_responses: set = set()
+        self._render_error: Optional[str] = None
+        self._response_listener_page = None
+        
+        # Dùng chung cho mọi tab (open_page_slot copy nông) → chống tải trùng giữa các prompt
+        self.downloader = VideoDownloadManager(str(self.download_dir))
         
         self.playwright = None
         self.browser: Optional[Browser] = None
@@ -195,40 +258,94 @@ class PlaywrightVeoService:
         
         self.playwright = sync_playwright().start()
         
-        # Khởi động Chromium headless
-        self.browser = self.playwright.chromium.launch(
-            headless=self.headless,
-            args=[
-                "--disable-blink-features=AutomationControlled",
-                "--no-sandbox",
-                "--start-maximized",
-            ]
-        )
-        
-        # Tạo context với download path - no_viewport để dùng kích thước thực
-        self.context = self.browser.new_context(
+        launch_args = [
+            "--disable-blink-features=AutomationControlled",
+            "--no-sandbox",
+            "--start-maximized",
+        ]
+        context_options = dict(
             accept_downloads=True,
             no_viewport=True,  # Dùng kích thước window thay vì viewport cố định
             ignore_https_errors=True  # Bỏ qua lỗi SSL certificate
         )
         
+        if self.user_data_dir:
+            # Profile cố định → cache HTTP, service worker, session được giữ lại
+            Path(self.user_data_dir).mkdir(parents=True, exist_ok=True)
+            self.browser = None
+            self.context = self.playwright.chromium.launch_persistent_context(
+                self.user_data_dir,
+                headless=self.headless,
+                args=launch_args,
+                **context_options
+            )
+        else:
+            # Khởi động Chromium headless
+            self.browser = self.playwright.chromium.launch(
+                headless=self.headless,
+                args=launch_args
+            )
+            
+            # Tạo context với download path - no_viewport để dùng kích thước thực
+            self.context = self.browser.new_context(**context_options)
+        
         # Set cookies
         cookies = self._parse_cookies()
         if cookies:
             self.context.add_cookies(cookies)
             print(f"[BROWSER] Đã set {len(cookies)} cookies")
         
-        # Tạo page
-        self.page = self.context.new_page()
+        # Tạo page (profile cố định đã có sẵn 1 tab)
+        self.page = self.context.pages[0] if self.context.pages else self.context.new_page()
         
         print("[BROWSER] Browser đã sẵn sàng")
         
         # ✅ Navigate đến Flow URL ngay sau khi browser sẵn sàng
         print("[BROWSER] Đang mở Flow...")
-        self.page.goto(self.FLOW_URL, wait_until="networkidle", timeout=60000)
+        self.page.goto(self.flow_url, wait_until="networkidle", timeout=60000)
         print("[BROWSER] Đã mở Flow")
     
     
+    def open_page_slot(self, slot_name: str) -> "PlaywrightVeoService":
+        """
+        Mở thêm 1 tab trong CÙNG browser/context (dùng chung cookies).
+        
+        Returns:
+            Bản sao service gắn với tab mới - mọi method dùng self.page
+            nên bản sao chạy độc lập trên tab của nó.
+        """
+        slot = copy.copy(self)
+        slot.page = self.context.new_page()
+        slot.slot_name = slot_name
+        slot._video_responses = set()
+        slot._render_error = None
+        slot._response_listener_page = None
+        slot.page.goto(self.flow_url, wait_until="networkidle", timeout=self.PAGE_LOAD_TIMEOUT)
+        print(f"[BROWSER] Đã mở tab {slot_name}")
+        return slot
+    
+    def close_page_slot(self):
+        """Đóng tab của bản sao (không đóng browser)"""
+        try:
+            self.page.close()
+        except Exception as e:
+            print(f"[BROWSER] Lỗi đóng tab {self.slot_name}: {e}")
+    
+    def update_cookies(self, cookie_string: str):
+        """Thay cookies trong context đang chạy (không cần khởi động lại browser)"""
+        self.cookie_string = cookie_string
+        cookies = self._parse_cookies()
+        if cookies:
+            self.context.add_cookies(cookies)
+            print(f"[BROWSER] Đã cập nhật {len(cookies)} cookies")
+    
+    def is_healthy(self) -> bool:
+        """Browser/tab chính còn phản hồi không (dùng để phát hiện crash)"""
+        try:
+            return not self.page.is_closed() and self.page.evaluate("1 + 1") == 2
+        except Exception:
+            return False
+    
     def stop(self):
         """Đóng browser"""
         if self.context:
@@ -237,6 +354,7 @@ class PlaywrightVeoService:
             self.browser.close()
         if self.playwright:
             self.playwright.stop()
+        self.downloader.close()
         print("[BROWSER] Đã đóng browser")
     
     def is_logged_in(self) -> bool:
@@ -244,9 +362,9 @@ class PlaywrightVeoService:
         try:
             # ✅ CHỈ NAVIGATE NẾU CHƯA Ở TRANG FLOW
             current_url = self.page.url
-            if not current_url or self.FLOW_URL not in current_url:
+            if not current_url or self.flow_url not in current_url:
                 print(f"[LOGIN] Đang navigate đến Flow... (hiện tại: {current_url[:50]}...)")
-                self.page.goto(self.FLOW_URL, wait_until="networkidle", timeout=60000)
+                self.page.goto(self.flow_url, wait_until="networkidle", timeout=60000)
             else:
                 print(f"[LOGIN] Đã ở trang Flow, không cần reload")
             
@@ -311,7 +429,8 @@ class PlaywrightVeoService:
             prompt: Prompt tiếng Anh mô tả video
             duration: Thời lượng (8s mặc định)
             aspect_ratio: Tỉ lệ khung hình ("16:9", "9:16", "1:1")
-            output_count: Số lượng video output (1-4)
+            output_count: Số lượng video output (1-4) - chưa áp dụng (settings đang tắt),
+                render được chờ theo số video Flow đang cài
             model: Mô hình ("veo_3_fast", "veo_3_1_fast", "veo_2")
             
         Returns:
@@ -320,96 +439,10 @@ class PlaywrightVeoService:
         start_time = time.time()
         
         try:
-            # 1. Verify on Flow page (already navigated in start())
-            if self.FLOW_URL not in self.page.url:
-                print(f"[VEO] Not on Flow, navigating...")
-                self.page.goto(self.FLOW_URL, wait_until="networkidle", timeout=self.PAGE_LOAD_TIMEOUT)
-            else:
-                print(f"[VEO] Already on Flow page")
-            
-            # 1.5. Đóng popup/modal nếu có
-            self._close_popups()
-            
-            # 2. Kiểm tra đăng nhập
-            if not self._check_logged_in_on_page():
-                return VeoVideoResult(
-                    success=False,
-                    error_message="Cookie hết hạn hoặc chưa đăng nhập. Vui lòng lấy cookie mới."
-                )
-            
-            # 3. Click "New project" hoặc "Dự án mới" để tạo project mới
-            print("[VEO] Đang tạo project mới...")
-            try:
-                new_btn = self.page.wait_for_selector(
-                    'button:has-text("New project"), button:has-text("Dự án mới"), [class*="new"]', 
-                    timeout=5000
-                )
-                if new_btn:
-                    new_btn.click()
-                    print("[VEO] Đã click New project")
-                    time.sleep(2)  # Đợi trang load
-            except Exception as e:
-                print(f"[VEO] Không thấy nút New project, có thể đã ở trang nhập prompt: {e}")
-            
-            # 4. Cấu hình settings (aspect ratio, output count, model)
-            # ⚠️ BỎ QUA - Đang gây lỗi "Element not attached to DOM"
-            # Settings mặc định của Flow đã đủ tốt
-            # self._configure_settings(aspect_ratio, output_count, model)
-            
-            
-            # 5. Tìm và nhập prompt
-            print(f"[VEO] Đang nhập prompt: {prompt[:50]}...")
-            prompt_input = self._find_prompt_input()
-            if not prompt_input:
-                return VeoVideoResult(
-                    success=False,
-                    error_message="Không tìm thấy ô nhập prompt. Trang có thể đã thay đổi."
-                )
-            
-            prompt_input.fill(prompt)
-            time.sleep(0.5)
-            
-            # 4. Đợi và Click Generate button
-            print("[VEO] Đang tìm nút Generate...")
-            generate_btn = self._find_generate_button()
-            if not generate_btn:
-                return VeoVideoResult(
-                    success=False,
-                    error_message="Không tìm thấy nút Generate."
-                )
-            
-            # ✅ ĐỢI NÚT ENABLED (không bị disabled)
-            print("[VEO] Đang đợi nút Generate enabled...")
-            start_wait = time.time()
-            
-            while time.time() - start_wait < self.GENERATE_BTN_WAIT_TIMEOUT:
-                # Tìm lại button (có thể đã re-render)
-                generate_btn = self._find_generate_button()
-                if not generate_btn:
-                    print("[VEO] Mất nút Generate, tìm lại...")
-                    time.sleep(1)
-                    continue
-                
-                # Kiểm tra disabled attribute
-                is_disabled = generate_btn.get_attribute("disabled")
-                if is_disabled is None:  # Không có disabled attribute = enabled
-                    print("[VEO] ✅ Nút Generate đã enabled, sẵn sàng click")
-                    break
-                    
-                elapsed = int(time.time() - start_wait)
-                if elapsed % 5 == 0 and elapsed > 0:
-                    print(f"[VEO] Đang đợi nút enabled... ({elapsed}s)")
-                time.sleep(1)
-            else:
-                return VeoVideoResult(
-                    success=False,
-                    error_message="Timeout: Nút Generate vẫn bị disabled sau 30s"
-                )
-            
-            # Click button
-            print("[VEO] Đang click Generate...")
-            generate_btn.click()
-            
+            # 1-4. Mở project mới, nhập prompt, click Generate
+            error = self.submit_prompt(prompt)
+            if error:
+                return VeoVideoResult(success=False, error_message=error)
             
             # 5. Đợi video render xong
             print("[VEO] Đang đợi video render...")
@@ -421,29 +454,132 @@ class PlaywrightVeoService:
                 )
             
             # 6. Download tất cả video
-            print("[VEO] Đang download TẤT CẢ video...")
-            video_paths = self._download_all_videos_for_prompt(prompt)
-            if not video_paths:
-                return VeoVideoResult(
-                    success=False,
-                    error_message="Không thể download video."
-                )
-            
-            elapsed = time.time() - start_time
-            print(f"[VEO] ✓ Hoàn thành {len(video_paths)} video trong {elapsed:.1f}s")
+            return self.collect_result(prompt, start_time)
             
+        except Exception as e:
             return VeoVideoResult(
-                success=True,
-                video_path=video_paths[0],  # Backward compatible
-                video_paths=video_paths,     # Tất cả video
-                duration_seconds=elapsed
+                success=False,
+                error_message=f"Lỗi: {str(e)}"
             )
-            
+    
+    def submit_prompt(self, prompt: str) -> Optional[str]:
+        """
+        Mở project mới, nhập prompt và click Generate - KHÔNG đợi render.
+        Dùng riêng được để nhiều tab cùng render song song (xem VeoPagePool).
+        
+        Args:
+            prompt: Prompt tiếng Anh
+        
+        Returns:
+            None nếu đã click Generate, ngược lại là thông báo lỗi
+        """
+        # 1. Verify on Flow page (already navigated in start())
+        if self.flow_url not in self.page.url:
+            print(f"[VEO] Not on Flow, navigating...")
+            self.page.goto(self.flow_url, wait_until="networkidle", timeout=self.PAGE_LOAD_TIMEOUT)
+        else:
+            print(f"[VEO] Already on Flow page")
+        
+        # 1.5. Đóng popup/modal nếu có
+        self._close_popups()
+        
+        # 2. Kiểm tra đăng nhập
+        if not self._check_logged_in_on_page():
+            return "Cookie hết hạn hoặc chưa đăng nhập. Vui lòng lấy cookie mới."
+        
+        # 3. Click "New project" hoặc "Dự án mới" để tạo project mới
+        print("[VEO] Đang tạo project mới...")
+        try:
+            new_btn = self.page.wait_for_selector(
+                'button:has-text("New project"), button:has-text("Dự án mới"), [class*="new"]', 
+                timeout=5000
+            )
+            if new_btn:
+                new_btn.click()
+                print("[VEO] Đã click New project")
+                time.sleep(2)  # Đợi trang load
         except Exception as e:
+            print(f"[VEO] Không thấy nút New project, có thể đã ở trang nhập prompt: {e}")
+        
+        # 4. Cấu hình settings (aspect ratio, output count, model)
+        # ⚠️ BỎ QUA - Đang gây lỗi "Element not attached to DOM"
+        # Settings mặc định của Flow đã đủ tốt
+        # self._configure_settings(aspect_ratio, output_count, model)
+        
+        
+        # 5. Tìm và nhập prompt
+        print(f"[VEO] Đang nhập prompt: {prompt[:50]}...")
+        prompt_input = self._find_prompt_input()
+        if not prompt_input:
+            return "Không tìm thấy ô nhập prompt. Trang có thể đã thay đổi."
+        
+        prompt_input.fill(prompt)
+        time.sleep(0.5)
+        
+        # 4. Đợi và Click Generate button
+        print("[VEO] Đang tìm nút Generate...")
+        generate_btn = self._find_generate_button()
+        if not generate_btn:
+            return "Không tìm thấy nút Generate."
+        
+        # ✅ ĐỢI NÚT ENABLED (không bị disabled)
+        print("[VEO] Đang đợi nút Generate enabled...")
+        start_wait = time.time()
+        
+        while time.time() - start_wait < self.GENERATE_BTN_WAIT_TIMEOUT:
+            # Tìm lại button (có thể đã re-render)
+            generate_btn = self._find_generate_button()
+            if not generate_btn:
+                print("[VEO] Mất nút Generate, tìm lại...")
+                time.sleep(1)
+                continue
+            
+            # Kiểm tra disabled attribute
+            is_disabled = generate_btn.get_attribute("disabled")
+            if is_disabled is None:  # Không có disabled attribute = enabled
+                print("[VEO] ✅ Nút Generate đã enabled, sẵn sàng click")
+                break
+                
+            elapsed = int(time.time() - start_wait)
+            if elapsed % 5 == 0 and elapsed > 0:
+                print(f"[VEO] Đang đợi nút enabled... ({elapsed}s)")
+            time.sleep(1)
+        else:
+            return "Timeout: Nút Generate vẫn bị disabled sau 30s"
+        
+        # Gắn bộ theo dõi render TRƯỚC khi click để không lỡ sự kiện nào.
+        # Settings không được cấu hình (xem bước 4) → chờ đúng số video Flow đang cài
+        self._arm_render_watch(self._read_output_count())
+        
+        # Click button
+        print(f"[VEO] [{self.slot_name}] Đang click Generate...")
+        generate_btn.click()
+        return None
+    
+    def collect_result(self, prompt: str, start_time: float, download_dir: Optional[str] = None) -> VeoVideoResult:
+        """
+        Download tất cả video của prompt sau khi render xong.
+        
+        Args:
+            download_dir: Thư mục lưu riêng cho prompt này (None = self.download_dir)
+        """
+        print(f"[VEO] [{self.slot_name}] Đang download TẤT CẢ video...")
+        video_paths = self._download_all_videos_for_prompt(prompt, download_dir)
+        if not video_paths:
             return VeoVideoResult(
                 success=False,
-                error_message=f"Lỗi: {str(e)}"
+                error_message=self._render_error or "Không thể download video."
             )
+        
+        elapsed = time.time() - start_time
+        print(f"[VEO] [{self.slot_name}] ✓ Hoàn thành {len(video_paths)} video trong {elapsed:.1f}s")
+        
+        return VeoVideoResult(
+            success=True,
+            video_path=video_paths[0],  # Backward compatible
+            video_paths=video_paths,     # Tất cả video
+            duration_seconds=elapsed
+        )
     
     def generate_video_with_images(
         self, 
@@ -472,7 +608,7 @@ class PlaywrightVeoService:
         try:
             # 1. Navigate đến trang Flow
             print(f"[VEO] Đang mở trang Flow...")
-            self.page.goto(self.FLOW_URL, wait_until="networkidle", timeout=60000)
+            self.page.goto(self.flow_url, wait_until="networkidle", timeout=60000)
             time.sleep(2)
             
             # 2. Kiểm tra đăng nhập
@@ -539,6 +675,8 @@ class PlaywrightVeoService:
                     error_message="Không tìm thấy nút Generate."
                 )
             
+            # Cấu hình settings có thể không thành công → đọc lại số video Flow thật sự trả
+            self._arm_render_watch(self._read_output_count())
             generate_btn.click()
             
             # 9. Đợi video render xong
@@ -811,102 +949,147 @@ class PlaywrightVeoService:
             print(f"[VEO] Lỗi chọn dropdown: {e}")
         return False
     
+    def _read_output_count(self) -> Optional[int]:
+        """Số video Flow đang cài cho 1 prompt (dropdown "Câu trả lời đầu ra"), None nếu không đọc được"""
+        try:
+            dropdown = self.page.query_selector(self.SELECTORS["output_count_btn"])
+            text = dropdown.inner_text() if dropdown else ""
+        except Exception:
+            return None
+        counts = [int(n) for n in re.findall(r"\d+", text) if int(n) in self.OUTPUT_COUNTS]
+        return counts[-1] if counts else None
+    
+    def _arm_render_watch(self, expected_count: Optional[int]):
+        """
+        Bắt đầu theo dõi render cho prompt sắp submit:
+        - DOM: MutationObserver đếm <video> mới có src, bắt error banner mới
+        - Network: response có content-type video/* trên tab này
+        
+        Args:
+            expected_count: Số video Flow sẽ trả; None = không biết → xong khi
+                số video ngừng tăng RENDER_SETTLE_MS
+        """
+        self._expected_videos = expected_count
+        self._video_responses = set()
+        self._render_error = None
+        
+        if self._response_listener_page is not self.page:
+            self.page.on("response", self._on_response)
+            self._response_listener_page = self.page
+        
+        self.page.evaluate(
+            self.RENDER_WATCH_SCRIPT,
+            [expected_count, self.RENDER_SETTLE_MS, self.SELECTORS["error"]]
+        )
+    
+    def _on_response(self, response):
+        """Ghi nhận response video (chạy trên event loop của Playwright)"""
+        try:
+            content_type = response.headers.get("content-type", "")
+            if content_type.startswith("video/"):
+                self._video_responses.add(response.url.split("#")[0])
+        except Exception:
+            pass
+    
+    def _render_state(self) -> dict:
+        """Đọc trạng thái do RENDER_WATCH_SCRIPT ghi lại"""
+        try:
+            state = self.page.evaluate(
+                "() => { const w = window.__veoRenderWatch;"
+                " return w ? { srcs: w.srcs, error: w.error, done: w.done } : null; }"
+            )
+        except Exception:
+            state = None
+        return state or {"srcs": [], "error": None, "done": False}
+    
+    def is_render_complete(self, started_at: float) -> bool:
+        """
+        Kiểm tra KHÔNG chặn: render của prompt đã xong chưa.
+        
+        Xong khi: đủ số video Flow đang cài (DOM hoặc network), có error banner,
+        số video ngừng tăng RENDER_SETTLE_MS (chỉ khi không đọc được số video),
+        hoặc hết hạn chót RENDER_TIMEOUT.
+        
+        Args:
+            started_at: time.time() lúc click Generate
+        """
+        state = self._render_state()
+        if state.get("error"):
+            self._render_error = f"Flow báo lỗi: {state['error']}"
+        
+        if state.get("done") or (self._expected_videos and len(self._video_responses) >= self._expected_videos):
+            return True
+        
+        if time.time() - started_at >= self.RENDER_TIMEOUT:
+            print(f"[VEO] [{self.slot_name}] ⏱️ Hết hạn {self.RENDER_TIMEOUT}s - tải video hiện có")
+            return True
+        
+        return False
+    
     def _wait_for_video_complete(self) -> bool:
         """
-        Đợi video render - ĐƠN GIẢN:
-        - Timeout: 2 phút (120s)
-        - Không kiểm tra lỗi
-        - Tải mọi video có sẵn khi hết thời gian
+        Đợi video render - trả về NGAY khi có tín hiệu xong
+        (xem is_render_complete), tối đa RENDER_TIMEOUT.
+        
+        Dùng page.wait_for_timeout (không phải time.sleep) để Playwright
+        vẫn xử lý sự kiện network trong lúc đợi.
         """
-        TIMEOUT = 120  # 2 phút
         start = time.time()
         last_video_count = 0
         
-        print(f"[VEO] Đang đợi video render (timeout: {TIMEOUT}s)...")
+        print(f"[VEO] Đang đợi video render (hạn chót: {self.RENDER_TIMEOUT}s)...")
         
-        while time.time() - start < TIMEOUT:
-            try:
-                
-                # Đếm số video hiện tại
-                videos = self.page.query_selector_all("video")
-                current_count = len(videos) if videos else 0
-                
-                # Log khi có video mới
-                if current_count != last_video_count and current_count > 0:
-                    print(f"[VEO] {current_count} video đã render...")
-                    last_video_count = current_count
-                
-                # Log tiến trình
-                elapsed = int(time.time() - start)
-                if elapsed % 15 == 0 and elapsed > 0:  # Log mỗi 15s
-                    print(f"[VEO] Đang render... ({elapsed}s, {current_count} video)")
-                
-            except Exception as e:
-                pass
+        while not self.is_render_complete(start):
+            # Log khi có video mới
+            current_count = len(self._render_state().get("srcs", []))
+            if current_count != last_video_count:
+                print(f"[VEO] {current_count} video đã render...")
+                last_video_count = current_count
             
-            time.sleep(3)
+            self.page.wait_for_timeout(self.RENDER_CHECK_INTERVAL_MS)
         
-        # Timeout - tải mọi video có sẵn
-        final_count = len(self.page.query_selector_all("video") or [])
-        print(f"[VEO] ⏱️ Timeout 2 phút - Tìm thấy {final_count} video")
-        return True  # Luôn return True để tải video
+        final_count = len(self._render_state().get("srcs", []))
+        print(f"[VEO] ✓ Render xong sau {time.time() - start:.1f}s - {final_count} video mới")
+        return True  # Luôn return True để tải video hiện có
     
-    def _download_all_videos_for_prompt(self, prompt: str) -> List[str]:
+    def _download_all_videos_for_prompt(self, prompt: str, download_dir: Optional[str] = None) -> List[str]:
         """
         Download TẤT CẢ video được tạo từ 1 prompt.
         
         Cách hoạt động:
-        1. Tìm button/div chứa text prompt
-        2. Tìm parent container chứa tất cả video của prompt đó
-        3. Lấy tất cả video src và download
+        1. Lấy src các video MỚI của prompt (RENDER_WATCH_SCRIPT ghi lại),
+           không có thì lấy mọi <video> trên trang
+        2. Bỏ URL đã tải ở prompt trước (VideoDownloadManager nhớ URL)
+        3. Tải song song qua session mang cookies hiện tại của browser
         
         Returns:
             List các đường dẫn file video đã download
         """
-        downloaded_paths = []
-        
         try:
-            # Đợi trang load xong
-            time.sleep(2)
-            
-            # Tìm tất cả video elements trên trang
-            # Flow sinh ra 4 video cho mỗi prompt
-            videos = self.page.query_selector_all("video")
-            print(f"[VEO] Tìm thấy {len(videos)} video trên trang")
+            video_srcs = self._render_state().get("srcs") or []
+            if not video_srcs:
+                video_srcs = self.page.evaluate(
+                    "() => Array.from(document.querySelectorAll('video'))"
+                    ".map(v => v.currentSrc || v.src || '')"
+                    ".filter(src => src.startsWith('http'))"
+                )
+            print(f"[VEO] [{self.slot_name}] Tìm thấy {len(video_srcs)} video")
             
-            if not videos:
+            if not video_srcs:
                 print("[VEO] Không tìm thấy video nào!")
                 return []
             
-            # Download từng video
-            import requests
-            for i, video in enumerate(videos):
-                try:
-                    video_src = video.get_attribute("src")
-                    if video_src and video_src.startswith("http"):
-                        print(f"[VEO] Đang download video {i+1}/{len(videos)}...")
-                        response = requests.get(video_src, stream=True, timeout=120)
-                        if response.status_code == 200:
-                            # Tên file unique bằng timestamp + index
-                            filename = f"veo_{int(time.time())}_{i+1}.mp4"
-                            save_path = str(self.download_dir / filename)
-                            with open(save_path, 'wb') as f:
-                                for chunk in response.iter_content(chunk_size=8192):
-                                    f.write(chunk)
-                            downloaded_paths.append(save_path)
-                            print(f"[VEO] ✓ Saved: {save_path}")
-                        else:
-                            print(f"[VEO] ✗ Lỗi download video {i+1}: HTTP {response.status_code}")
-                except Exception as e:
-                    print(f"[VEO] ✗ Lỗi video {i+1}: {e}")
-                    continue
+            # Cookies có thể được làm mới trong phiên → nạp lại trước mỗi lượt tải
+            self.downloader.set_cookies(self.context.cookies())
+            self.downloader.set_user_agent(self.page.evaluate("navigator.userAgent"))
             
-            print(f"[VEO] Đã download {len(downloaded_paths)}/{len(videos)} video")
+            downloaded_paths = self.downloader.download_all(video_srcs, download_dir)
+            print(f"[VEO] [{self.slot_name}] Đã download {len(downloaded_paths)}/{len(video_srcs)} video")
             return downloaded_paths
             
         except Exception as e:
             print(f"[ERROR] Download all videos failed: {e}")
-            return downloaded_paths
+            return []
     
     def _download_video(self) -> Optional[str]:
         """Download 1 video (backward compatible)"""
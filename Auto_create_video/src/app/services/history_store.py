@@ -0,0 +1,293 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                      VIDEO HISTORY STORE                                     ║
+║          Lịch sử video dạng append-only (SQLite), đọc theo trang             ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Cách hoạt động:
+- Mỗi thay đổi của 1 video (tạo, đổi tiến độ, có file video...) = 1 bản ghi
+  mới trong history_events - không bao giờ ghi lại toàn bộ lịch sử
+- Bảng video_history giữ trạng thái mới nhất của mỗi video (cập nhật cùng
+  transaction), có index theo status / ngày tạo → đếm, lọc, phân trang nhanh
+- compact(): xóa các event đã bị event mới hơn thay thế
+- Lần đầu mở: tự import file video_history.json cũ (đổi tên thành .bak)
+
+Usage:
+    store = VideoHistoryStore("./history/video_history.db")
+    video_id = store.new_video_id()
+    store.record(video_id, stt=1, prompt="...", progress="0%")
+    store.record(video_id, progress="100%", video_path="out/veo_ab12.mp4")
+    rows = store.page(offset=0, limit=200)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class VideoHistoryStore:
+    """Lịch sử video: log append-only + bảng trạng thái mới nhất"""
+
+    # Số event trung bình mỗi video vượt mức này → compact khi mở store
+    COMPACT_RATIO = 8
+    DELETED = "deleted"
+
+    def __init__(self, db_path: str, legacy_json_path: Optional[str] = None):
+        """
+        Args:
+            db_path: File SQLite
+            legacy_json_path: File video_history.json cũ cần import (nếu có)
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+        if legacy_json_path and os.path.exists(legacy_json_path):
+            self.import_legacy_json(legacy_json_path)
+
+        events, videos = self.stats()
+        if videos and events > videos * self.COMPACT_RATIO:
+            self.compact()
+
+    def _create_schema(self):
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS history_events (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    video_id TEXT NOT NULL,
+                    recorded_at REAL NOT NULL,
+                    changes TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS video_history (
+                    video_id TEXT PRIMARY KEY,
+                    last_seq INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_history_status
+                    ON video_history(status, created_at);
+                CREATE INDEX IF NOT EXISTS idx_history_created
+                    ON video_history(created_at);
+                CREATE INDEX IF NOT EXISTS idx_history_last_seq
+                    ON video_history(last_seq);
+            """)
+
+    @staticmethod
+    def new_video_id() -> str:
+        return uuid.uuid4().hex
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # GHI
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def record(self, video_id: str, **changes: Any) -> Dict[str, Any]:
+        """
+        Ghi 1 thay đổi của video (chỉ các field đổi) - O(1), không phụ thuộc
+        kích thước lịch sử.
+
+        Field "progress" được dùng làm status để lọc.
+
+        Returns:
+            Dict: Trạng thái đầy đủ mới nhất của video
+        """
+        now = time.time()
+        created_at = changes.pop("created_at", None) or now
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT created_at, data FROM video_history WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            data = json.loads(row["data"]) if row else {}
+            if row:
+                created_at = row["created_at"]
+            data.update(changes)
+
+            cursor = self._conn.execute(
+                "INSERT INTO history_events (video_id, recorded_at, changes) VALUES (?, ?, ?)",
+                (video_id, now, json.dumps(changes, ensure_ascii=False))
+            )
+            self._conn.execute(
+                """
+                INSERT INTO video_history (video_id, last_seq, status, created_at, updated_at, data)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET
+                    last_seq = excluded.last_seq,
+                    status = excluded.status,
+                    updated_at = excluded.updated_at,
+                    data = excluded.data
+                """,
+                (video_id, cursor.lastrowid, str(data.get("progress", "")), created_at, now,
+                 json.dumps(data, ensure_ascii=False))
+            )
+        return self._to_entry(video_id, created_at, now, data)
+
+    def delete(self, video_ids: Iterable[str]):
+        """Xóa video khỏi lịch sử (ghi event xóa, compact sẽ dọn log)"""
+        now = time.time()
+        with self._lock, self._conn:
+            for video_id in video_ids:
+                self._conn.execute(
+                    "INSERT INTO history_events (video_id, recorded_at, changes) VALUES (?, ?, ?)",
+                    (video_id, now, json.dumps({"status": self.DELETED}))
+                )
+                self._conn.execute("DELETE FROM video_history WHERE video_id = ?", (video_id,))
+
+    def clear(self):
+        """Xóa toàn bộ lịch sử"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM history_events")
+            self._conn.execute("DELETE FROM video_history")
+
+    def compact(self) -> int:
+        """
+        Xóa các event đã bị thay thế. Event cuối của mỗi video còn tồn tại được
+        thay bằng snapshot đầy đủ → log sau compact vẫn dựng lại được trạng thái.
+
+        Returns:
+            int: Số event đã xóa
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE history_events SET changes = "
+                    "(SELECT data FROM video_history WHERE last_seq = history_events.seq) "
+                    "WHERE seq IN (SELECT last_seq FROM video_history)"
+                )
+                cursor = self._conn.execute(
+                    "DELETE FROM history_events WHERE seq NOT IN (SELECT last_seq FROM video_history)"
+                )
+            removed = cursor.rowcount
+            if removed:
+                self._conn.execute("VACUUM")
+        if removed:
+            print(f"[HISTORY] Compact: xóa {removed} event cũ")
+        return removed
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # ĐỌC
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def get(self, video_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_id, created_at, updated_at, data FROM video_history WHERE video_id = ?",
+                (video_id,)
+            ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def count(self, status: Optional[str] = None) -> int:
+        where, params = self._filters(status, None, None)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM video_history{where}", params).fetchone()[0]
+
+    def page(
+        self,
+        offset: int = 0,
+        limit: int = 200,
+        status: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        newest_first: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        1 trang lịch sử theo thứ tự tạo.
+
+        Args:
+            offset / limit: Vị trí + số entry của trang
+            status: Chỉ lấy video có tiến độ này (VD: "100%")
+            since / until: Khoảng thời gian tạo (timestamp)
+            newest_first: Mới nhất trước
+
+        Returns:
+            List[Dict]: Entry gồm video_id, created_at, updated_at + các field đã ghi
+        """
+        where, params = self._filters(status, since, until)
+        order = "DESC" if newest_first else "ASC"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT video_id, created_at, updated_at, data FROM video_history{where} "
+                f"ORDER BY created_at {order}, rowid {order} LIMIT ? OFFSET ?",
+                (*params, limit, offset)
+            ).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    def stats(self):
+        """(số event trong log, số video)"""
+        with self._lock:
+            events = self._conn.execute("SELECT COUNT(*) FROM history_events").fetchone()[0]
+            videos = self._conn.execute("SELECT COUNT(*) FROM video_history").fetchone()[0]
+        return events, videos
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _filters(status, since, until):
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return where, params
+
+    @classmethod
+    def _row_to_entry(cls, row) -> Dict[str, Any]:
+        return cls._to_entry(row["video_id"], row["created_at"], row["updated_at"], json.loads(row["data"]))
+
+    @staticmethod
+    def _to_entry(video_id: str, created_at: float, updated_at: float, data: Dict[str, Any]) -> Dict[str, Any]:
+        entry = dict(data)
+        entry.update(video_id=video_id, created_at=created_at, updated_at=updated_at)
+        return entry
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # IMPORT FILE CŨ
+    # ═══════════════════════════════════════════════════════════════════════
+
+    def import_legacy_json(self, json_path: str) -> int:
+        """
+        Import video_history.json (định dạng cũ: list entry) rồi đổi tên thành .bak
+
+        Returns:
+            int: Số entry đã import
+        """
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                history = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[HISTORY] Không đọc được {json_path}: {e}")
+            return 0
+
+        now = time.time()
+        for entry in history:
+            # Cùng created_at → giữ thứ tự ghi (rowid)
+            try:
+                created_at = time.mktime(time.strptime(entry["created_at"], "%Y-%m-%d %H:%M:%S"))
+            except (KeyError, ValueError, TypeError, OverflowError):
+                created_at = now
+            fields = {k: v for k, v in entry.items() if k != "created_at"}
+            self.record(self.new_video_id(), created_at=created_at, **fields)
+
+        os.replace(json_path, json_path + ".bak")
+        print(f"[HISTORY] Đã chuyển {len(history)} entry từ {json_path}")
+        return len(history)
@@ -10,6 +10,8 @@ import os
 from typing import Optional, Dict, Any
 import google.generativeai as genai
 
+from .json_repair import extract_json
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # PROMPT TEMPLATES
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -151,16 +153,8 @@ class ImageAnalysisService:
             # Gọi API
             response = self.model.generate_content([prompt, image])
             
-            # Parse JSON từ response
-            result_text = response.text
-            
-            # Loại bỏ markdown code block nếu có
-            if result_text.startswith("```"):
-                lines = result_text.split("\n")
-                # Bỏ dòng đầu (```json) và dòng cuối (```)
-                result_text = "\n".join(lines[1:-1])
-            
-            return json.loads(result_text.strip())
+            # Parse JSON từ response (bỏ markdown, sửa lỗi nhỏ)
+            return extract_json(response.text, root="{")
             
         except json.JSONDecodeError as e:
             print(f"[ERROR] Lỗi parse JSON: {e}")
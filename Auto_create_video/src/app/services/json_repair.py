@@ -0,0 +1,353 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                    JSON REPAIR - ĐỌC JSON TỪ OUTPUT CỦA LLM                   ║
+║        Bỏ markdown/lời dẫn, sửa lỗi nhỏ, đọc dần theo stream                 ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Sửa được:
+- ```json ... ``` và lời dẫn trước/sau JSON
+- Dấu phẩy thừa trước } / ]
+- Comment // và /* */
+- Xuống dòng / tab nằm trong chuỗi (chưa escape)
+- True / False / None kiểu Python
+- Response bị cắt ngang (hết token): bỏ phần tử dở cuối cùng, tự đóng ngoặc
+
+Cách hoạt động:
+- StreamingJSONParser quét từng ký tự 1 lần (đoạn chuỗi / khoảng trắng dài
+  được nhảy qua bằng regex), ghi ra JSON đã làm sạch
+- feed(chunk) nhận từng phần của stream; phần tử của mảng có key trong
+  item_keys (VD: "canh") được parse + trả về ngay khi đóng ngoặc
+  → kiểm tra cảnh đầu tiên trong khi model vẫn đang viết các cảnh sau
+- close(): sửa đuôi bị cắt rồi json.loads toàn bộ
+
+Usage:
+    data = extract_json(response.text)
+
+    parser = StreamingJSONParser(item_keys=("canh",))
+    for chunk in response:
+        for key, scene in parser.feed(chunk.text):
+            ...
+    data = parser.close()
+"""
+
+import json
+import re
+from typing import Any, Iterable, List, Optional, Tuple
+
+
+_STRING_RUN = re.compile(r'[^"\\\x00-\x1f]+')
+_WHITESPACE_RUN = re.compile(r"\s+")
+_SCALAR_RUN = re.compile(r"[^\s,:\]\}/\"]+")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+class _Frame:
+    """1 cấp object / mảng đang mở"""
+    __slots__ = ("kind", "key", "expect", "safe", "item_start", "last_key")
+
+    def __init__(self, kind: str, key: Optional[str], safe: int):
+        self.kind = kind            # "{" hoặc "["
+        self.key = key              # Key của container này trong object cha
+        self.expect = "key" if kind == "{" else "value"
+        self.safe = safe            # Cắt tới đây nếu đuôi bị cắt ngang
+        self.item_start = -1        # Vị trí bắt đầu phần tử đang đọc (mảng)
+        self.last_key = None        # Key vừa đọc (object)
+
+
+class StreamingJSONParser:
+    """Parser JSON nhận từng phần, chịu lỗi định dạng thường gặp của LLM"""
+
+    def __init__(self, item_keys: Iterable[str] = (), root: Optional[str] = None):
+        """
+        Args:
+            item_keys: Key của các mảng cần trả về từng phần tử khi đọc xong
+            root: "{" / "[" - chỉ nhận JSON gốc kiểu này (None = cái nào đến trước)
+        """
+        self.item_keys = set(item_keys)
+        self.root = root
+        self.done = False
+
+        self._buffer = ""
+        self._pos = 0
+        self._out: List[str] = []
+        self._stack: List[_Frame] = []
+        self._started = False
+        self._in_string = False
+        self._string_is_key = False
+        self._key_chars: List[str] = []
+        self._scalar: Optional[List[str]] = None
+        self._pending_comma = False
+
+    # ===== API =====
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Nhận thêm 1 phần text.
+
+        Returns:
+            List[(key, phần tử)]: Phần tử của mảng trong item_keys vừa đọc xong
+        """
+        if self.done or not chunk:
+            return []
+        self._buffer += chunk
+        items: List[Tuple[str, Any]] = []
+        self._scan(items, final=False)
+        # Bỏ phần buffer đã xử lý
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        return items
+
+    def close(self) -> Any:
+        """
+        Kết thúc stream: sửa đuôi bị cắt ngang rồi parse.
+
+        Raises:
+            json.JSONDecodeError: Không tìm thấy JSON / không sửa được
+        """
+        if not self.done:
+            self._scan([], final=True)
+        if not self._started:
+            raise json.JSONDecodeError("Không tìm thấy JSON trong response", self._buffer, 0)
+        if not self.done:
+            self._repair_tail()
+        text = "".join(self._out)
+        return json.loads(text)
+
+    # ===== QUÉT =====
+
+    def _scan(self, items: List[Tuple[str, Any]], final: bool):
+        buffer = self._buffer
+        length = len(buffer)
+        pos = self._pos
+        out = self._out
+
+        while pos < length and not self.done:
+            if self._in_string:
+                match = _STRING_RUN.match(buffer, pos)
+                if match:
+                    text = match.group()
+                    out.append(text)
+                    if self._string_is_key:
+                        self._key_chars.append(text)
+                    pos = match.end()
+                    continue
+                ch = buffer[pos]
+                if ch == "\\":
+                    if pos + 1 >= length:
+                        if not final:
+                            break   # Chờ ký tự sau dấu \
+                        pos += 1
+                        continue
+                    escaped = buffer[pos:pos + 2]
+                    if buffer[pos + 1] == "u" and pos + 6 > length and not final:
+                        break       # \uXXXX chưa đủ
+                    out.append(escaped)
+                    if self._string_is_key:
+                        self._key_chars.append(escaped)
+                    pos += 2
+                elif ch == '"':
+                    out.append('"')
+                    pos += 1
+                    self._in_string = False
+                    self._end_string(items)
+                else:
+                    # Ký tự điều khiển chưa escape (xuống dòng trong chuỗi)
+                    out.append(_CONTROL_ESCAPES.get(ch, "\\u%04x" % ord(ch)))
+                    pos += 1
+                continue
+
+            if not self._started:
+                pos = self._find_root(buffer, pos)
+                if pos < 0:
+                    pos = length
+                    break
+                continue
+
+            ch = buffer[pos]
+
+            if self._scalar is not None:
+                match = _SCALAR_RUN.match(buffer, pos)
+                if match:
+                    self._scalar.append(match.group())
+                    pos = match.end()
+                    if pos >= length and not final:
+                        break   # Có thể số / literal còn tiếp ở chunk sau
+                    continue
+                self._end_scalar(items)
+                continue
+
+            if ch.isspace():
+                match = _WHITESPACE_RUN.match(buffer, pos)
+                pos = match.end()
+                continue
+
+            if ch == "/":
+                end = self._skip_comment(buffer, pos, final)
+                if end is None:
+                    break       # Comment chưa đủ
+                pos = end
+                continue
+
+            pos += 1
+            if ch == ",":
+                self._pending_comma = True
+                continue
+            if ch in "}]":
+                self._pending_comma = False
+                self._close_container(ch, items)
+                continue
+
+            self._flush_comma()
+            if ch == ":":
+                out.append(":")
+                if self._stack and self._stack[-1].kind == "{":
+                    self._stack[-1].expect = "value"
+            elif ch in "{[":
+                self._begin_value()
+                self._stack.append(_Frame(ch, self._current_key(), len(out) + 1))
+                out.append(ch)
+            elif ch == '"':
+                frame = self._stack[-1]
+                self._string_is_key = frame.kind == "{" and frame.expect == "key"
+                self._key_chars = []
+                if not self._string_is_key:
+                    self._begin_value()
+                out.append('"')
+                self._in_string = True
+            else:
+                # Số / true / false / null (có thể kiểu Python)
+                self._begin_value()
+                self._scalar = [ch]
+
+        if final and self._scalar is not None:
+            # Hết stream giữa số / literal: chỉ giữ nếu đã trọn vẹn (không giữ "tr", "1.")
+            token = "".join(self._scalar)
+            if _PYTHON_LITERALS.get(token, token) in ("true", "false", "null") or _NUMBER.fullmatch(token):
+                self._end_scalar(items)
+        self._pos = pos
+
+    def _find_root(self, buffer: str, pos: int) -> int:
+        """Bỏ qua lời dẫn / ``` cho tới ngoặc mở của JSON gốc (-1 nếu chưa có)"""
+        starts = "{[" if self.root is None else self.root
+        best = -1
+        for ch in starts:
+            index = buffer.find(ch, pos)
+            if index != -1 and (best == -1 or index < best):
+                best = index
+        if best == -1:
+            return -1
+        self._started = True
+        ch = buffer[best]
+        self._stack.append(_Frame(ch, None, 1))
+        self._out.append(ch)
+        return best + 1
+
+    def _skip_comment(self, buffer: str, pos: int, final: bool) -> Optional[int]:
+        """Vị trí sau comment // hoặc /* */ (None nếu comment chưa kết thúc trong buffer)"""
+        nxt = buffer[pos + 1:pos + 2]
+        if nxt == "/":
+            end = buffer.find("\n", pos + 2)
+            if end == -1:
+                return len(buffer) if final else None
+            return end + 1
+        if nxt == "*":
+            end = buffer.find("*/", pos + 2)
+            if end == -1:
+                return len(buffer) if final else None
+            return end + 2
+        if not nxt and not final:
+            return None
+        return pos + 1      # Dấu / lẻ - bỏ qua
+
+    # ===== SỰ KIỆN =====
+
+    def _flush_comma(self):
+        if self._pending_comma:
+            self._out.append(",")
+            self._pending_comma = False
+
+    def _current_key(self) -> Optional[str]:
+        if self._stack and self._stack[-1].kind == "{":
+            return self._stack[-1].last_key
+        return None
+
+    def _begin_value(self):
+        """Bắt đầu 1 giá trị: ghi lại vị trí nếu là phần tử mảng cần theo dõi"""
+        frame = self._stack[-1]
+        if frame.kind == "[":
+            frame.item_start = len(self._out)
+
+    def _end_value(self, items: List[Tuple[str, Any]]):
+        """1 giá trị vừa đọc xong trong container hiện tại"""
+        frame = self._stack[-1]
+        frame.safe = len(self._out)
+        if frame.kind == "{":
+            frame.expect = "key"
+        elif frame.key in self.item_keys and frame.item_start >= 0:
+            text = "".join(self._out[frame.item_start:])
+            try:
+                items.append((frame.key, json.loads(text)))
+            except ValueError:
+                pass
+            frame.item_start = -1
+
+    def _end_string(self, items: List[Tuple[str, Any]]):
+        frame = self._stack[-1]
+        if self._string_is_key:
+            frame.last_key = "".join(self._key_chars)
+            frame.expect = "colon"
+        else:
+            self._end_value(items)
+
+    def _end_scalar(self, items: List[Tuple[str, Any]]):
+        token = "".join(self._scalar)
+        self._scalar = None
+        self._out.append(_PYTHON_LITERALS.get(token, token))
+        self._end_value(items)
+
+    def _close_container(self, ch: str, items: List[Tuple[str, Any]]):
+        frame = self._stack[-1]
+        # Object có key chưa có giá trị ({"a": }) → bỏ key dở
+        if frame.kind == "{" and frame.expect != "key":
+            del self._out[frame.safe:]
+        self._out.append("}" if frame.kind == "{" else "]")
+        self._stack.pop()
+        if not self._stack:
+            self.done = True
+            return
+        self._end_value(items)
+
+    def _repair_tail(self):
+        """Response bị cắt: bỏ giá trị dở của container trong cùng, đóng hết ngoặc"""
+        self._in_string = False
+        self._scalar = None
+        # Phần tử dở của mảng đang theo dõi (VD: cảnh viết được một nửa) → bỏ cả phần tử
+        for depth, frame in enumerate(self._stack):
+            if frame.kind == "[" and frame.key in self.item_keys and frame.item_start >= 0:
+                del self._stack[depth + 1:]
+                break
+        frame = self._stack[-1]
+        del self._out[frame.safe:]
+        while self._stack:
+            frame = self._stack.pop()
+            self._out.append("}" if frame.kind == "{" else "]")
+        self.done = True
+
+
+def extract_json(text: str, root: Optional[str] = None, item_keys: Iterable[str] = ()) -> Any:
+    """
+    Lấy JSON từ response của LLM (markdown, lời dẫn, lỗi nhỏ, bị cắt ngang).
+
+    Args:
+        text: Response text
+        root: "{" / "[" - kiểu JSON gốc mong muốn (None = cái nào đến trước)
+        item_keys: Mảng mà phần tử viết dở (bị cắt) phải bỏ hẳn thay vì giữ nửa object
+
+    Raises:
+        json.JSONDecodeError: Không tìm thấy / không sửa được JSON
+    """
+    parser = StreamingJSONParser(item_keys=item_keys, root=root)
+    parser.feed(text)
+    return parser.close()
@@ -14,9 +14,11 @@ LUỒNG XỬ LÝ:
 """
 
 import json
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 import google.generativeai as genai
 
+from .json_repair import StreamingJSONParser, extract_json
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # PROMPT TEMPLATE CHO KỊch BẢN
@@ -226,6 +228,11 @@ class VideoScene:
         }
 
 
+def is_valid_scene(data: Any) -> bool:
+    """Cảnh đủ thông tin để gửi Veo: object có hanh_dong không rỗng"""
+    return isinstance(data, dict) and isinstance(data.get("hanh_dong"), str) and bool(data["hanh_dong"].strip())
+
+
 class VideoScript:
     """Kịch bản video hoàn chỉnh"""
     
@@ -280,7 +287,8 @@ class ScriptGenerationService:
         user_prompt: str,
         so_video: int = 2,
         thoi_luong_moi_video: int = 8,
-        style: str = "Review"
+        style: str = "Review",
+        on_scene: Optional[Callable[[VideoScene], None]] = None
     ) -> Optional[VideoScript]:
         """
         Tạo kịch bản video từ JSON mô tả + prompt người dùng
@@ -292,11 +300,14 @@ class ScriptGenerationService:
             so_video: Số lượng video cần tạo (default: 2)
             thoi_luong_moi_video: Thời lượng mỗi video tính bằng giây (default: 8)
             style: Style video (Review/Viral/Tutorial/Cinematic) (default: "Review")
+            on_scene: Callback(VideoScene) gọi ngay khi 1 cảnh hợp lệ được stream xong
+                (trước khi model viết hết kịch bản)
             
         Returns:
             VideoScript object hoặc None nếu lỗi
         """
         tong_thoi_luong = so_video * thoi_luong_moi_video
+        raw_text = ""
         
         # Tính mid_time cho timeline (HOOK: 0-2s, MAIN: 2-mid, HERO: mid-end)
         mid_time = max(5, thoi_luong_moi_video - 3)  # VD: 8s -> mid=5, 15s -> mid=12
@@ -313,25 +324,20 @@ class ScriptGenerationService:
                 style=style
             )
             
-            # Gọi Gemini API
-            response = self.model.generate_content(full_prompt)
-            
-            # Parse JSON từ response
-            result_text = response.text.strip()
+            # Gọi Gemini API - có on_scene thì stream, kiểm tra từng cảnh ngay khi viết xong
+            if on_scene is None:
+                response = self.model.generate_content(full_prompt)
+                raw_text = response.text
+                script_data = extract_json(raw_text, root="{", item_keys=("canh",))
+            else:
+                def emit_scene(scene_data: Dict[str, Any]):
+                    scene = VideoScene(scene_data)
+                    scene.reference_json = reference_json
+                    scene.product_json = product_json
+                    on_scene(scene)
+                
+                script_data, raw_text = self._stream_json(full_prompt, "canh", emit_scene)
             
-            # Loại bỏ markdown code block nếu có
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0]
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0]
-            
-            # Tìm JSON object
-            start_idx = result_text.find("{")
-            end_idx = result_text.rfind("}") + 1
-            if start_idx != -1 and end_idx > start_idx:
-                result_text = result_text[start_idx:end_idx]
-            
-            script_data = json.loads(result_text.strip())
             
             # Tạo VideoScript object
             script = VideoScript(script_data)
@@ -343,7 +349,7 @@ class ScriptGenerationService:
             
         except json.JSONDecodeError as e:
             print(f"[ERROR] Lỗi parse JSON kịch bản: {e}")
-            print(f"Raw response: {response.text[:500]}")
+            print(f"Raw response: {raw_text[:500]}")
             return None
         except Exception as e:
             print(f"[ERROR] Lỗi tạo kịch bản: {e}")
@@ -351,13 +357,39 @@ class ScriptGenerationService:
             traceback.print_exc()
             return None
     
+    def _stream_json(
+        self,
+        full_prompt: str,
+        item_key: str,
+        on_item: Callable[[Dict[str, Any]], None]
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Stream response, gọi on_item cho từng phần tử hợp lệ của mảng item_key
+        ngay khi model viết xong phần tử đó.
+        
+        Returns:
+            (JSON đầy đủ, raw text)
+        """
+        parser = StreamingJSONParser(item_keys=(item_key,), root="{")
+        chunks = []
+        for chunk in self.model.generate_content(full_prompt, stream=True):
+            text = chunk.text
+            chunks.append(text)
+            for _, item in parser.feed(text):
+                if not is_valid_scene(item):
+                    print(f"[WARN] Bỏ qua {item_key} không hợp lệ: {str(item)[:200]}")
+                    continue
+                on_item(item)
+        return parser.close(), "".join(chunks)
+    
     def generate_extended_script(
         self,
         reference_json: Dict[str, Any],
         product_json: Dict[str, Any],
         user_prompt: str,
         total_duration: int = 30,
-        segment_duration: int = 8
+        segment_duration: int = 8,
+        on_segment: Optional[Callable[[Dict[str, Any]], None]] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Tạo kịch bản video DÀI từ nhiều segments liên tục.
@@ -368,6 +400,7 @@ class ScriptGenerationService:
             user_prompt: Prompt/yêu cầu từ người dùng
             total_duration: Tổng thời lượng video (15, 30, 60 giây)
             segment_duration: Thời lượng mỗi segment (default: 8 giây, max của Veo)
+            on_segment: Callback(segment dict) gọi ngay khi 1 segment hợp lệ được stream xong
             
         Returns:
             Dict chứa danh sách segments với continuation linking
@@ -392,33 +425,24 @@ class ScriptGenerationService:
                 segment_duration_2x=segment_duration_2x
             )
             
-            # Gọi Gemini API
-            response = self.model.generate_content(full_prompt)
-            
-            # Parse JSON từ response
-            result_text = response.text.strip()
-            
-            # Loại bỏ markdown code block nếu có
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0]
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0]
-            
-            # Tìm JSON object
-            start_idx = result_text.find("{")
-            end_idx = result_text.rfind("}") + 1
-            if start_idx != -1 and end_idx > start_idx:
-                result_text = result_text[start_idx:end_idx]
+            def attach_json(segment: Dict[str, Any]):
+                # Đảm bảo mỗi segment có reference_json và product_json
+                segment.setdefault("reference_json", reference_json)
+                segment.setdefault("product_json", product_json)
             
-            extended_script = json.loads(result_text.strip())
+            # Gọi Gemini API - có on_segment thì stream từng segment
+            if on_segment is None:
+                response = self.model.generate_content(full_prompt)
+                extended_script = extract_json(response.text, root="{", item_keys=("segments",))
+            else:
+                def emit_segment(segment: Dict[str, Any]):
+                    attach_json(segment)
+                    on_segment(segment)
+                
+                extended_script, _ = self._stream_json(full_prompt, "segments", emit_segment)
             
-            # Đảm bảo mỗi segment có reference_json và product_json
-            if "segments" in extended_script:
-                for segment in extended_script["segments"]:
-                    if "reference_json" not in segment:
-                        segment["reference_json"] = reference_json
-                    if "product_json" not in segment:
-                        segment["product_json"] = product_json
+            for segment in extended_script.get("segments", []):
+                attach_json(segment)
             
             print(f"[SUCCESS] Đã tạo kịch bản video {total_duration}s với {num_segments} segments")
             return extended_script
@@ -0,0 +1,192 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                        VIDEO TASK STORE                                      ║
+║       Lưu task tạo video đang chạy (SQLite) để resume khi app bị tắt         ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Cách hoạt động:
+- Mỗi VideoTask được ghi lại (1 hàng, upsert) mỗi khi đổi trạng thái:
+  tạo → submit lên Veo (có operation_name) → tải xong / lỗi
+- App bị tắt giữa batch: task PENDING/PROCESSING vẫn nằm trong DB
+- Lần mở sau, resume_tasks():
+  - Đã có file video (tải xong nhưng chưa kịp ghi trạng thái) → hoàn thành luôn
+  - Có operation_name → gắn lại vào operation đang chạy trên server, chờ + tải về
+    (KHÔNG submit lại → không trả tiền tạo lại video)
+  - Chưa submit → submit bình thường
+
+Usage:
+    store = VideoTaskStore(config.TASK_DB)
+    store.save(task)                      # Sau mỗi lần đổi trạng thái
+    resume_tasks(store, VeoVideoService(api_key), on_done=...)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional
+
+from ..models import VideoTask, TaskStatus
+
+
+class VideoTaskStore:
+    """Task tạo video đang chạy / đã xong - ghi ngay mỗi lần đổi trạng thái"""
+
+    UNFINISHED = (TaskStatus.PENDING.value, TaskStatus.PROCESSING.value)
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS video_tasks (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    operation_name TEXT,
+                    updated_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_video_tasks_status ON video_tasks(status);
+            """)
+
+    def save(self, task: VideoTask):
+        """Ghi trạng thái hiện tại của task (gọi được từ nhiều thread)"""
+        data = json.dumps(task.to_dict(), ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO video_tasks (id, status, operation_name, updated_at, data)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    status = excluded.status,
+                    operation_name = excluded.operation_name,
+                    updated_at = excluded.updated_at,
+                    data = excluded.data
+                """,
+                (task.id, task.status.value, task.operation_name, time.time(), data)
+            )
+
+    def get(self, task_id: str) -> Optional[VideoTask]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM video_tasks WHERE id = ?", (task_id,)).fetchone()
+        return VideoTask.from_dict(json.loads(row[0])) if row else None
+
+    def unfinished(self) -> List[VideoTask]:
+        """Task chưa xong (PENDING / PROCESSING) theo thứ tự ghi"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM video_tasks WHERE status IN (?, ?) ORDER BY rowid",
+                self.UNFINISHED
+            ).fetchall()
+        return [VideoTask.from_dict(json.loads(row[0])) for row in rows]
+
+    def delete(self, task_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM video_tasks WHERE id = ?", (task_id,))
+
+    def purge_finished(self, older_than: float = 7 * 24 * 3600) -> int:
+        """Xóa task đã xong lâu hơn older_than giây - trả về số task đã xóa"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM video_tasks WHERE status NOT IN (?, ?) AND updated_at < ?",
+                (*self.UNFINISHED, time.time() - older_than)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RESUME SAU KHI APP BỊ TẮT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def resume_tasks(
+    store: VideoTaskStore,
+    video_service,
+    on_progress: Optional[Callable[[VideoTask, str], None]] = None,
+    on_done: Optional[Callable[[VideoTask], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None
+) -> List[VideoTask]:
+    """
+    Chạy tiếp các task chưa xong trong store (tuần tự).
+
+    Args:
+        store: VideoTaskStore
+        video_service: VeoVideoService (cần resume_short_video + generate_short_video)
+        on_progress: Callback(task, message)
+        on_done: Callback(task) khi task xong (COMPLETED hoặc ERROR)
+        should_stop: Trả về True để dừng giữa chừng (task còn lại giữ nguyên trong store)
+
+    Returns:
+        List[VideoTask]: Các task đã xử lý
+    """
+    from .video_generation import VideoGenerationRequest
+
+    def report(task: VideoTask, message: str):
+        if on_progress:
+            on_progress(task, message)
+
+    handled = []
+    for task in store.unfinished():
+        if should_stop and should_stop():
+            break
+
+        params = task.params
+        output_path = params.get("output_path") or task.output_path
+        if not output_path or "prompt" not in params:
+            task.set_error("Task không đủ thông tin để resume")
+        elif params.get("is_extended"):
+            # Video dài = chuỗi nhiều operation nối nhau, chưa hỗ trợ gắn lại giữa chừng
+            task.set_error("Video dài bị gián đoạn - cần tạo lại")
+        elif os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            # Đã tải xong trước khi app tắt
+            report(task, "Video đã có sẵn")
+            task.set_completed(output_path)
+        else:
+            request = VideoGenerationRequest(
+                prompt=params["prompt"],
+                person_image_path=params.get("person_image_path", ""),
+                product_image_path=params.get("product_image_path", ""),
+                output_path=output_path,
+                duration=params.get("duration", 8),
+                resolution=params.get("resolution", "720p"),
+                aspect_ratio=params.get("aspect_ratio", "9:16")
+            )
+            if task.operation_name:
+                report(task, f"Gắn lại operation {task.operation_name}")
+                result = video_service.resume_short_video(
+                    task.operation_name, request, on_progress=lambda message: report(task, message)
+                )
+            else:
+                report(task, "Task chưa được submit - submit lại")
+                task.status = TaskStatus.PROCESSING
+
+                def on_operation(name: str):
+                    task.operation_name = name
+                    store.save(task)
+
+                result = video_service.generate_short_video(
+                    request, on_progress=lambda message: report(task, message), on_operation=on_operation
+                )
+
+            if result.success:
+                task.set_completed(result.video_path)
+            else:
+                task.set_error(result.error_message or "Lỗi resume")
+
+        store.save(task)
+        handled.append(task)
+        print(f"[TASKS] Resume {task.id}: {task.status.value}")
+        if on_done:
+            on_done(task)
+    return handled
@@ -0,0 +1,300 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                      VEO BROWSER HOST                                        ║
+║          1 Chromium sống lâu, dùng chung cho mọi worker của UI               ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Vấn đề: mỗi batch khởi động Playwright + Chromium, nạp cookie, đợi networkidle
+trước khi gửi được prompt đầu tiên.
+
+Cách hoạt động:
+- 1 thread riêng sở hữu Playwright (sync API chỉ chạy trên thread tạo ra nó)
+- Profile Chromium cố định (Config.BROWSER_PROFILE_DIR) → cache/session giữ lại
+- Browser + các tab của VeoPagePool được giữ ấm giữa các batch
+- Worker gửi batch qua hàng đợi; nhiều batch dùng chung pool tab
+- Kiểm tra sức khỏe khi rảnh và trước mỗi yêu cầu; crash → khởi động lại
+
+Usage:
+    host = get_browser_host()
+    results = host.render(cookie, [VeoPageTask(0, "A girl dancing")])
+"""
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config import Config
+from .browser_veo_service import PlaywrightVeoService, VeoVideoResult
+from .veo_page_pool import VeoPagePool, VeoPageTask
+
+
+@dataclass
+class _RenderBatch:
+    """1 lượt render do 1 worker gửi"""
+    cookie_string: str
+    tasks: List[VeoPageTask]
+    num_pages: int
+    on_progress: Optional[Callable[[VeoPageTask, str], None]]
+    on_result: Optional[Callable[[VeoPageTask, VeoVideoResult], None]]
+    should_stop: Optional[Callable[[], bool]]
+    future: Future = field(default_factory=Future)
+    results: Dict[Any, VeoVideoResult] = field(default_factory=dict)
+    requested_at: float = field(default_factory=time.time)
+    first_prompt_logged: bool = False
+
+
+class VeoBrowserHost:
+    """Giữ 1 PlaywrightVeoService + VeoPagePool sống trên thread riêng"""
+
+    HEALTH_CHECK_INTERVAL = 30  # Giây - kiểm tra browser khi rảnh
+    SHUTDOWN_TIMEOUT = 30
+
+    def __init__(
+        self,
+        profile_dir: Optional[str] = None,
+        headless: bool = False,
+        download_dir: str = "./output/videos",
+        flow_url: Optional[str] = None
+    ):
+        """
+        Args:
+            profile_dir: Thư mục profile Chromium (None = context tạm)
+            headless: True = chạy ngầm
+            download_dir: Thư mục lưu video mặc định
+            flow_url: URL trang Flow (None = PlaywrightVeoService.FLOW_URL)
+        """
+        self.profile_dir = profile_dir
+        self.headless = headless
+        self.download_dir = download_dir
+        self.flow_url = flow_url
+
+        self.service: Optional[PlaywrightVeoService] = None
+        self.pool: Optional[VeoPagePool] = None
+        self.launch_count = 0  # Số lần khởi động Chromium (cold start)
+
+        self._cookie_string: Optional[str] = None
+        self._logged_in = False
+        self._inbox: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # API - gọi từ thread bất kỳ
+    # ═══════════════════════════════════════════════════════════════════════════
+
+    def render(
+        self,
+        cookie_string: str,
+        tasks: List[VeoPageTask],
+        num_pages: int = 3,
+        on_progress: Callable[[VeoPageTask, str], None] = None,
+        on_result: Callable[[VeoPageTask, VeoVideoResult], None] = None,
+        should_stop: Callable[[], bool] = None
+    ) -> Dict[Any, VeoVideoResult]:
+        """
+        Render danh sách task trên browser dùng chung - chặn đến khi xong.
+        Callback được gọi trên thread của browser.
+
+        Returns:
+            Dict {task_id: VeoVideoResult}
+        """
+        if not tasks:
+            return {}
+        batch = _RenderBatch(cookie_string, list(tasks), num_pages, on_progress, on_result, should_stop)
+        self._post(("render", batch))
+        return batch.future.result()
+
+    def check_login(self, cookie_string: str) -> bool:
+        """Nạp cookie vào browser dùng chung và kiểm tra đăng nhập (khởi động browser nếu cần)"""
+        return self.call(lambda: self._prepare(cookie_string))
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """Chạy fn() trên thread của browser (sau khi đảm bảo browser sống)"""
+        future = Future()
+        self._post(("call", fn, future))
+        return future.result()
+
+    def shutdown(self):
+        """Đóng browser và dừng thread"""
+        if not self._thread or not self._thread.is_alive():
+            return
+        future = Future()
+        self._inbox.put(("shutdown", future))
+        try:
+            future.result(timeout=self.SHUTDOWN_TIMEOUT)
+        except Exception as e:
+            print(f"[HOST] Lỗi đóng browser: {e}")
+
+    def _post(self, item):
+        with self._thread_lock:
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="VeoBrowserHost", daemon=True)
+                self._thread.start()
+        self._inbox.put(item)
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # THREAD CỦA BROWSER
+    # ═══════════════════════════════════════════════════════════════════════════
+
+    def _loop(self):
+        while True:
+            busy = self.pool is not None and self.pool.busy
+            try:
+                if busy:
+                    item = self._inbox.get_nowait()
+                else:
+                    item = self._inbox.get(timeout=self.HEALTH_CHECK_INTERVAL)
+            except queue.Empty:
+                item = None
+
+            if item is not None:
+                if item[0] == "shutdown":
+                    self._stop_browser()
+                    item[1].set_result(None)
+                    return
+                self._handle(item)
+                continue
+
+            if not busy:
+                # Rảnh → kiểm tra sức khỏe, crash thì khởi động lại ngay để giữ ấm
+                if self.service and not self.service.is_healthy():
+                    self._restart("health check thất bại")
+                continue
+
+            try:
+                self.pool.step()
+                if self.pool.busy:
+                    self.service.page.wait_for_timeout(VeoPagePool.POLL_INTERVAL_MS)
+            except Exception as e:
+                print(f"[HOST] ❌ Browser lỗi khi render: {e}")
+                self.pool.fail_all(f"Browser bị lỗi: {str(e)}")
+                self._restart("crash khi render")
+
+    def _handle(self, item):
+        kind = item[0]
+        if kind == "call":
+            _, fn, future = item
+            try:
+                self._ensure_browser()
+                future.set_result(fn())
+            except Exception as e:
+                future.set_exception(e)
+        elif kind == "render":
+            self._start_batch(item[1])
+
+    def _start_batch(self, batch: _RenderBatch):
+        """Nạp task của batch vào pool dùng chung"""
+        def fail_batch(message: str):
+            for task in batch.tasks:
+                on_result(task, VeoVideoResult(success=False, error_message=message))
+
+        def on_progress(task: VeoPageTask, message: str):
+            if task.submitted_at and not batch.first_prompt_logged:
+                batch.first_prompt_logged = True
+                print(f"[HOST] ⏱️ Time-to-first-prompt: {task.submitted_at - batch.requested_at:.1f}s")
+            if batch.on_progress:
+                batch.on_progress(task, message)
+
+        def on_result(task: VeoPageTask, result: VeoVideoResult):
+            batch.results[task.task_id] = result
+            if batch.on_result:
+                try:
+                    batch.on_result(task, result)
+                except Exception as e:
+                    print(f"[HOST] Lỗi callback: {e}")
+            if len(batch.results) >= len(batch.tasks) and not batch.future.done():
+                batch.future.set_result(batch.results)
+
+        try:
+            self._ensure_browser()
+            logged_in = self._prepare(batch.cookie_string)
+        except Exception as e:
+            print(f"[HOST] ❌ Không khởi động được browser: {e}")
+            self._stop_browser()
+            fail_batch(f"Không khởi động được browser: {str(e)}")
+            return
+
+        if not logged_in:
+            fail_batch("Cookie hết hạn hoặc không hợp lệ!")
+            return
+
+        self.pool.num_pages = max(1, batch.num_pages)
+        for task in batch.tasks:
+            self.pool.submit(task, on_progress, on_result, batch.should_stop)
+        print(f"[HOST] Nhận {len(batch.tasks)} task (browser ấm: {self.launch_count} lần khởi động)")
+
+    def _prepare(self, cookie_string: str) -> bool:
+        """Nạp cookie mới (nếu đổi) và kiểm tra đăng nhập - kết quả được nhớ đến khi đổi cookie"""
+        self._ensure_browser()
+        if cookie_string != self._cookie_string:
+            self.service.update_cookies(cookie_string)
+            self._cookie_string = cookie_string
+            self._logged_in = False
+        if not self._logged_in:
+            self._logged_in = self.service.is_logged_in()
+        return self._logged_in
+
+    def _ensure_browser(self):
+        """Khởi động browser nếu chưa có hoặc đã chết"""
+        if self.service and self.service.is_healthy():
+            return
+        if self.service:
+            self._stop_browser()
+
+        started = time.time()
+        service = PlaywrightVeoService(
+            cookie_string=self._cookie_string or "",
+            download_dir=self.download_dir,
+            headless=self.headless,
+            flow_url=self.flow_url,
+            user_data_dir=self.profile_dir
+        )
+        service.start()
+        self.service = service
+        self.pool = VeoPagePool(service)
+        self._logged_in = False
+        self.launch_count += 1
+        print(f"[HOST] Browser sẵn sàng sau {time.time() - started:.1f}s (lần {self.launch_count})")
+
+    def _restart(self, reason: str):
+        print(f"[HOST] 🔄 Khởi động lại browser: {reason}")
+        self._stop_browser()
+        try:
+            self._ensure_browser()
+        except Exception as e:
+            print(f"[HOST] ❌ Khởi động lại thất bại: {e}")
+            self._stop_browser()
+
+    def _stop_browser(self):
+        if self.pool and self.pool.busy:
+            self.pool.fail_all("Browser đã đóng")
+        if self.service:
+            try:
+                self.service.stop()
+            except Exception as e:
+                print(f"[HOST] Lỗi đóng browser: {e}")
+        self.service = None
+        self.pool = None
+        self._logged_in = False
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HOST DÙNG CHUNG
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_shared_host: Optional[VeoBrowserHost] = None
+_shared_lock = threading.Lock()
+
+
+def get_browser_host() -> VeoBrowserHost:
+    """Host dùng chung cho cả ứng dụng (tạo lần đầu, đóng khi thoát)"""
+    global _shared_host
+    with _shared_lock:
+        if _shared_host is None:
+            _shared_host = VeoBrowserHost(profile_dir=Config.BROWSER_PROFILE_DIR, headless=False)
+            atexit.register(_shared_host.shutdown)
+        return _shared_host
@@ -0,0 +1,215 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                      VEO PAGE POOL                                           ║
+║          Render nhiều prompt song song trên nhiều tab cùng 1 Chromium        ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Cách hoạt động:
+- 1 browser + 1 context (dùng chung cookies), N tab
+- Hàng đợi task: tab nào rảnh thì nhận prompt tiếp theo
+- Playwright sync API chỉ chạy trên 1 thread → pool điều phối tuần tự:
+  submit prompt trên tab rảnh, rồi vòng lặp kiểm tra tab nào render xong
+  để download và giao task mới. Thời gian render của các tab chồng lên nhau.
+- run() chạy hết 1 danh sách task; submit() + step() cho phép nạp thêm task
+  trong lúc đang render (xem VeoBrowserHost)
+
+Usage:
+    service = PlaywrightVeoService(cookie_string)
+    service.start()
+    pool = VeoPagePool(service, num_pages=3)
+    results = pool.run([VeoPageTask("row_1", "A girl dancing"), ...])
+    service.stop()
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from .browser_veo_service import PlaywrightVeoService, VeoVideoResult
+
+
+@dataclass
+class VeoPageTask:
+    """1 prompt cần render"""
+    task_id: Any               # ID do caller đặt (VD: row index trong bảng)
+    prompt: str                # Prompt tiếng Anh
+    download_dir: Optional[str] = None    # Thư mục lưu video (None = của service)
+    submitted_at: Optional[float] = None  # time.time() lúc click Generate (pool ghi)
+
+
+@dataclass
+class _PoolEntry:
+    """Task + callbacks của người gửi"""
+    task: VeoPageTask
+    on_progress: Optional[Callable[[VeoPageTask, str], None]] = None
+    on_result: Optional[Callable[[VeoPageTask, VeoVideoResult], None]] = None
+    should_stop: Optional[Callable[[], bool]] = None
+
+
+class VeoPagePool:
+    """Pool N tab trong 1 Chromium, xử lý hàng đợi prompt song song"""
+
+    POLL_INTERVAL_MS = 250  # Đọc trạng thái render các tab mỗi 250ms
+    STOPPED_MESSAGE = "Đã dừng"
+
+    def __init__(self, service: PlaywrightVeoService, num_pages: int = 3):
+        """
+        Args:
+            service: Service đã start() - tab chính của nó là tab đầu tiên trong pool
+            num_pages: Số tab render song song tối đa
+        """
+        if num_pages < 1:
+            raise ValueError(f"num_pages phải >= 1: {num_pages}")
+
+        self.service = service
+        self.num_pages = num_pages
+        self._slots: List[PlaywrightVeoService] = [service]
+        self._queue: deque = deque()
+        self._active: Dict[int, _PoolEntry] = {}  # slot index → entry đang render
+
+    @property
+    def busy(self) -> bool:
+        """Còn task đang chờ hoặc đang render"""
+        return bool(self._queue or self._active)
+
+    def _ensure_slots(self, count: int):
+        """Mở thêm tab cho đủ `count` (không vượt num_pages)"""
+        count = min(count, self.num_pages)
+        while len(self._slots) < count:
+            slot_name = f"p{len(self._slots)}"
+            try:
+                self._slots.append(self.service.open_page_slot(slot_name))
+            except Exception as e:
+                # Không mở thêm được tab → chạy với số tab hiện có
+                print(f"[POOL] Không mở được tab {slot_name}: {e}")
+                break
+
+    def close(self):
+        """Đóng các tab phụ (tab chính do service quản lý)"""
+        for slot in self._slots[1:]:
+            slot.close_page_slot()
+        self._slots = [self.service]
+
+    @staticmethod
+    def _finish(entry: _PoolEntry, result: VeoVideoResult):
+        if entry.on_result:
+            entry.on_result(entry.task, result)
+
+    def submit(
+        self,
+        task: VeoPageTask,
+        on_progress: Callable[[VeoPageTask, str], None] = None,
+        on_result: Callable[[VeoPageTask, VeoVideoResult], None] = None,
+        should_stop: Callable[[], bool] = None
+    ):
+        """Thêm task vào hàng đợi - được render ở các lần step() sau"""
+        self._queue.append(_PoolEntry(task, on_progress, on_result, should_stop))
+
+    def step(self):
+        """
+        1 vòng điều phối KHÔNG chặn: giao task cho tab rảnh, thu kết quả tab đã xong.
+        Caller tự nhường event loop giữa các lần gọi (page.wait_for_timeout).
+        """
+        self._ensure_slots(len(self._queue) + len(self._active))
+
+        # 1. Giao task cho tab rảnh (tab đã mở vượt num_pages thì để nghỉ)
+        usable = min(len(self._slots), self.num_pages)
+        for idx in range(usable):
+            if idx in self._active:
+                continue
+            entry = self._next_entry()
+            if entry is None:
+                break
+
+            slot = self._slots[idx]
+            task = entry.task
+            if entry.on_progress:
+                entry.on_progress(task, "🎬 Đang gửi prompt...")
+            try:
+                error = slot.submit_prompt(task.prompt)
+            except Exception as e:
+                error = f"Lỗi: {str(e)}"
+
+            if error:
+                self._finish(entry, VeoVideoResult(success=False, error_message=error))
+                continue
+
+            task.submitted_at = time.time()
+            self._active[idx] = entry
+            if entry.on_progress:
+                entry.on_progress(task, "⏳ Đang render...")
+
+        # 2. Thu kết quả các tab đã render xong
+        for idx, entry in list(self._active.items()):
+            slot = self._slots[idx]
+            task = entry.task
+            if not slot.is_render_complete(task.submitted_at):
+                continue
+
+            del self._active[idx]
+            if entry.on_progress:
+                entry.on_progress(task, "⬇️ Đang tải video...")
+            try:
+                result = slot.collect_result(task.prompt, task.submitted_at, task.download_dir)
+            except Exception as e:
+                result = VeoVideoResult(success=False, error_message=f"Lỗi: {str(e)}")
+            self._finish(entry, result)
+
+    def _next_entry(self) -> Optional[_PoolEntry]:
+        """Lấy task chờ tiếp theo, bỏ task của người gửi đã yêu cầu dừng"""
+        while self._queue:
+            entry = self._queue.popleft()
+            if entry.should_stop and entry.should_stop():
+                self._finish(entry, VeoVideoResult(success=False, error_message=self.STOPPED_MESSAGE))
+                continue
+            return entry
+        return None
+
+    def fail_all(self, message: str):
+        """Trả lỗi cho mọi task đang chờ/đang render (VD: browser crash)"""
+        entries = list(self._active.values()) + list(self._queue)
+        self._active.clear()
+        self._queue.clear()
+        for entry in entries:
+            self._finish(entry, VeoVideoResult(success=False, error_message=message))
+
+    def run(
+        self,
+        tasks: List[VeoPageTask],
+        on_progress: Callable[[VeoPageTask, str], None] = None,
+        on_result: Callable[[VeoPageTask, VeoVideoResult], None] = None,
+        should_stop: Callable[[], bool] = None
+    ) -> Dict[Any, VeoVideoResult]:
+        """
+        Render tất cả task, tối đa num_pages task cùng lúc.
+
+        Args:
+            tasks: Danh sách VeoPageTask
+            on_progress: Callback(task, message) khi task đổi trạng thái
+            on_result: Callback(task, result) ngay khi 1 task xong
+            should_stop: Trả True để dừng nhận task mới (task đang render vẫn được thu,
+                         task chưa gửi nhận kết quả lỗi STOPPED_MESSAGE)
+
+        Returns:
+            Dict {task_id: VeoVideoResult}
+        """
+        results: Dict[Any, VeoVideoResult] = {}
+
+        def record(task: VeoPageTask, result: VeoVideoResult):
+            results[task.task_id] = result
+            if on_result:
+                on_result(task, result)
+
+        for task in tasks:
+            self.submit(task, on_progress, record, should_stop)
+
+        print(f"[POOL] {len(tasks)} task / tối đa {min(len(tasks), self.num_pages)} tab")
+
+        while self.busy:
+            self.step()
+            # Nhường event loop của Playwright (không dùng time.sleep)
+            if self._active:
+                self.service.page.wait_for_timeout(self.POLL_INTERVAL_MS)
+
+        return results
@@ -0,0 +1,210 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                      VIDEO DOWNLOAD MANAGER                                  ║
+║          Tải video song song, resume bằng Range, chống tải trùng             ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Cách hoạt động:
+- 1 requests.Session dùng chung (connection pool) mang cookies của browser
+- Nhiều video tải song song, stream với buffer lớn (CHUNK_SIZE)
+- Đứt kết nối → tải tiếp từ file .part bằng header Range
+- URL đã tải (kể cả từ prompt trước) → bỏ qua
+- Tên file = hash nội dung → không trùng tên, cùng nội dung chỉ lưu 1 lần
+
+Usage:
+    downloader = VideoDownloadManager("./output/videos")
+    downloader.set_cookies(context.cookies())
+    paths = downloader.download_all([url1, url2])
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class VideoDownloadManager:
+    """Tải nhiều video song song qua 1 session dùng chung"""
+
+    MAX_WORKERS = 4              # Số video tải cùng lúc
+    CHUNK_SIZE = 1024 * 1024     # Buffer 1MB mỗi lần đọc/ghi
+    MAX_RETRIES = 3              # Số lần tải tiếp (Range) khi đứt kết nối
+    CONNECT_TIMEOUT = 10
+    READ_TIMEOUT = 120
+
+    def __init__(self, download_dir: str, max_workers: Optional[int] = None, prefix: str = "veo"):
+        """
+        Args:
+            download_dir: Thư mục lưu video
+            max_workers: Số video tải song song (mặc định MAX_WORKERS)
+            prefix: Tiền tố tên file (VD: veo_<hash>.mp4)
+        """
+        self.download_dir = Path(download_dir)
+        self.download_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self.prefix = prefix
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._downloaded: Dict[str, str] = {}  # URL → file đã lưu
+        self._in_progress: Dict[str, threading.Event] = {}
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # SESSION
+    # ═══════════════════════════════════════════════════════════════════════════
+
+    def set_cookies(self, cookies: List[dict]):
+        """Nạp cookies từ browser (định dạng BrowserContext.cookies() của Playwright)"""
+        for c in cookies:
+            name = c.get("name")
+            if not name:
+                continue
+            self.session.cookies.set(
+                name, c.get("value", ""),
+                domain=c.get("domain", ""), path=c.get("path", "/")
+            )
+
+    def set_user_agent(self, user_agent: str):
+        """Dùng cùng User-Agent với browser"""
+        if user_agent:
+            self.session.headers["User-Agent"] = user_agent
+
+    def close(self):
+        self.session.close()
+
+    # ═══════════════════════════════════════════════════════════════════════════
+    # DOWNLOAD
+    # ═══════════════════════════════════════════════════════════════════════════
+
+    def is_downloaded(self, url: str) -> bool:
+        with self._lock:
+            return url in self._downloaded
+
+    def download_all(self, urls: List[str], download_dir: Optional[str] = None) -> List[str]:
+        """
+        Tải song song các URL CHƯA từng tải.
+
+        Args:
+            download_dir: Thư mục lưu (None = thư mục của manager)
+
+        Returns:
+            Đường dẫn file theo đúng thứ tự URL (bỏ URL trùng/đã tải/lỗi)
+        """
+        new_urls = []
+        for url in urls:
+            if url and url not in new_urls and not self.is_downloaded(url):
+                new_urls.append(url)
+
+        skipped = len(urls) - len(new_urls)
+        if skipped:
+            print(f"[DOWNLOAD] Bỏ qua {skipped} video đã tải")
+        if not new_urls:
+            return []
+
+        workers = min(self.max_workers, len(new_urls))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            paths = list(executor.map(lambda u: self.download(u, download_dir), new_urls))
+
+        return [p for p in paths if p]
+
+    def download(self, url: str, download_dir: Optional[str] = None) -> Optional[str]:
+        """Tải 1 URL (an toàn khi nhiều thread cùng tải 1 URL) → đường dẫn file hoặc None"""
+        with self._lock:
+            if url in self._downloaded:
+                return self._downloaded[url]
+            event = self._in_progress.get(url)
+            owner = event is None
+            if owner:
+                event = self._in_progress[url] = threading.Event()
+
+        if not owner:
+            event.wait()
+            with self._lock:
+                return self._downloaded.get(url)
+
+        try:
+            target_dir = Path(download_dir) if download_dir else self.download_dir
+            target_dir.mkdir(parents=True, exist_ok=True)
+            path = self._download_with_resume(url, target_dir)
+            if path:
+                with self._lock:
+                    self._downloaded[url] = path
+            return path
+        finally:
+            with self._lock:
+                self._in_progress.pop(url, None)
+            event.set()
+
+    def _download_with_resume(self, url: str, target_dir: Path) -> Optional[str]:
+        """Stream về file .part, đứt giữa chừng thì tải tiếp bằng Range"""
+        url_key = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+        part_path = target_dir / f".{self.prefix}_{url_key}.part"
+
+        for attempt in range(1, self.MAX_RETRIES + 2):
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            try:
+                with self.session.get(
+                    url, headers=headers, stream=True,
+                    timeout=(self.CONNECT_TIMEOUT, self.READ_TIMEOUT)
+                ) as response:
+                    if response.status_code == 416 and offset:
+                        # File .part đã đủ
+                        return self._finalize(part_path)
+                    if response.status_code not in (200, 206):
+                        print(f"[DOWNLOAD] ✗ HTTP {response.status_code}: {url[:80]}")
+                        return None
+
+                    # Server bỏ qua Range → tải lại từ đầu
+                    mode = "ab" if response.status_code == 206 else "wb"
+                    with open(part_path, mode) as f:
+                        for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                            f.write(chunk)
+
+                    expected = self._expected_size(response, offset)
+                    if expected is None or part_path.stat().st_size >= expected:
+                        return self._finalize(part_path)
+                    print(f"[DOWNLOAD] Thiếu dữ liệu ({part_path.stat().st_size}/{expected})")
+            except requests.RequestException as e:
+                print(f"[DOWNLOAD] Lần {attempt} lỗi: {e}")
+
+        print(f"[DOWNLOAD] ✗ Bỏ cuộc sau {self.MAX_RETRIES + 1} lần: {url[:80]}")
+        return None
+
+    @staticmethod
+    def _expected_size(response, offset: int) -> Optional[int]:
+        """Tổng kích thước file theo Content-Range / Content-Length"""
+        content_range = response.headers.get("Content-Range", "")
+        if "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+            if total.isdigit():
+                return int(total)
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit():
+            return int(length) + (offset if response.status_code == 206 else 0)
+        return None
+
+    def _finalize(self, part_path: Path) -> str:
+        """Đổi tên .part → <prefix>_<sha256>.mp4; nội dung đã có thì dùng file cũ"""
+        sha = hashlib.sha256()
+        with open(part_path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b""):
+                sha.update(chunk)
+
+        final_path = part_path.parent / f"{self.prefix}_{sha.hexdigest()[:16]}.mp4"
+        if final_path.exists():
+            part_path.unlink()
+        else:
+            os.replace(part_path, final_path)
+
+        print(f"[DOWNLOAD] ✓ Saved: {final_path}")
+        return str(final_path)
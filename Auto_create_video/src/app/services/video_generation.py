@@ -12,15 +12,20 @@ TÍNH NĂNG CHÍNH:
 
 import time
 import os
-from typing import Optional, List, Dict, Any
+import json
+from typing import Optional, List, Dict, Any, Callable
 from dataclasses import dataclass
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
 import random
+import threading
 
 # Google Generative AI
 from google import genai
 from google.genai import types
 
+from .json_repair import extract_json
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # RETRY UTILITY - Tự động retry khi API fail
@@ -179,7 +184,8 @@ class VeoVideoService:
     def generate_short_video(
         self,
         request: VideoGenerationRequest,
-        on_progress: callable = None
+        on_progress: callable = None,
+        on_operation: callable = None
     ) -> VideoGenerationResult:
         """
         Tạo video short (8 giây) chỉ dùng prompt
@@ -187,6 +193,8 @@ class VeoVideoService:
         Args:
             request: VideoGenerationRequest object
             on_progress: Callback function(message: str)
+            on_operation: Callback function(operation_name: str) ngay sau khi submit -
+                lưu lại để resume_short_video() nếu app bị tắt khi đang chờ
             
         Returns:
             VideoGenerationResult
@@ -203,28 +211,10 @@ class VeoVideoService:
                 number_of_videos=1
             )
             operation = self._generate_videos_with_retry(request.prompt, config)
+            if on_operation and operation.name:
+                on_operation(operation.name)
             
-            # Poll cho đến khi hoàn thành
-            video = self._poll_operation(operation)
-            
-            if video is None:
-                return VideoGenerationResult(
-                    success=False,
-                    error_message="Timeout hoặc lỗi khi tạo video"
-                )
-            
-            # Download video
-            if on_progress:
-                on_progress("Đang tải video...")
-            
-            self.client.files.download(file=video.video)
-            video.video.save(request.output_path)
-            
-            return VideoGenerationResult(
-                success=True,
-                video_path=request.output_path,
-                duration=request.duration
-            )
+            return self._finish_operation(operation, request, on_progress)
             
         except FileNotFoundError as e:
             return VideoGenerationResult(
@@ -237,6 +227,67 @@ class VeoVideoService:
                 error_message=f"Lỗi Veo API: {str(e)}"
             )
     
+    def resume_short_video(
+        self,
+        operation_name: str,
+        request: VideoGenerationRequest,
+        on_progress: callable = None
+    ) -> VideoGenerationResult:
+        """
+        Gắn lại vào operation đã submit trước đó (VD: app bị tắt khi đang chờ)
+        - chờ xong rồi tải video, không submit lại.
+        
+        Args:
+            operation_name: Tên operation (từ on_operation của generate_short_video)
+            request: Request ban đầu (dùng output_path, duration)
+            on_progress: Callback function(message: str)
+        """
+        try:
+            operation = self.client.operations.get(types.GenerateVideosOperation(name=operation_name))
+            return self._finish_operation(operation, request, on_progress)
+        except Exception as e:
+            return VideoGenerationResult(
+                success=False,
+                error_message=f"Lỗi Veo API: {str(e)}"
+            )
+    
+    def _finish_operation(
+        self,
+        operation,
+        request: VideoGenerationRequest,
+        on_progress: callable = None
+    ) -> VideoGenerationResult:
+        """Poll operation tới khi xong rồi tải video về request.output_path"""
+        video = self._poll_operation(operation)
+        
+        if video is None:
+            return VideoGenerationResult(
+                success=False,
+                error_message="Timeout hoặc lỗi khi tạo video"
+            )
+        
+        # Download video
+        if on_progress:
+            on_progress("Đang tải video...")
+        
+        self.client.files.download(file=video.video)
+        
+        # Ghi file tạm rồi đổi tên: app tắt giữa lúc ghi không để lại mp4 dở
+        # (resume_tasks coi file output đã có là video tải xong)
+        tmp_path = f"{request.output_path}.part"
+        try:
+            video.video.save(tmp_path)
+            os.replace(tmp_path, request.output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        return VideoGenerationResult(
+            success=True,
+            video_path=request.output_path,
+            duration=request.duration
+        )
+    
     def generate_extended_video(
         self,
         request: VideoGenerationRequest,
@@ -413,6 +464,43 @@ CRITICAL: Professional, cinematic quality. Character wears the PRODUCT, not orig
 
 OUTPUT: Only the English prompt, nothing else. Under 500 words."""
 
+    BATCH_CONVERSION_PROMPT = """You are a professional video prompt engineer for Veo 3.1.
+Create one optimized English video prompt for EACH scene below. All scenes belong to the same product advertisement.
+
+═══════════════════════════════════════════════════════════════
+CHARACTER PHYSICAL APPEARANCE (from reference photo):
+═══════════════════════════════════════════════════════════════
+{reference_json}
+
+⚠️ IMPORTANT: Only use PHYSICAL APPEARANCE from above (face, hair, body, skin).
+DO NOT use the clothing from reference - the character will wear the PRODUCT below.
+
+═══════════════════════════════════════════════════════════════
+PRODUCT/CLOTHING (character will WEAR this):
+═══════════════════════════════════════════════════════════════
+{product_json}
+
+═══════════════════════════════════════════════════════════════
+SCENE SCRIPTS:
+═══════════════════════════════════════════════════════════════
+{scenes_block}
+
+═══════════════════════════════════════════════════════════════
+RULES FOR EVERY PROMPT:
+═══════════════════════════════════════════════════════════════
+- SMOOTH CAMERA MOTION: "steady tracking shot", "smooth dolly in", "gentle pan", "cinematic steadicam"
+- NATURAL MOTION: vary speed, micro-movements (head tilt, hair flowing), breathing, dynamic turns
+- 8-SECOND STRUCTURE: OPENING (0-2s) → ACTION (2-6s) → ENDING (6-8s) that ends naturally for editing
+- Character wears the PRODUCT, not original clothes. Professional, cinematic quality.
+- Each prompt is self-contained (repeat character + product details), under 500 words.
+
+OUTPUT: JSON only, exactly one entry per scene, same scene numbers as above:
+{{"prompts": [{{"scene": <scene number>, "en_prompt": "<English prompt>"}}]}}"""
+
+    # Số cảnh tối đa trong 1 request batch - nhiều hơn sẽ chia nhỏ và gọi song song
+    MAX_BATCH_SCENES = 6
+    MAX_BATCH_WORKERS = 4
+
     def __init__(self, api_key: str):
         # Use google.generativeai for text generation (not google.genai which is for video)
         import google.generativeai as genai_text
@@ -475,7 +563,151 @@ OUTPUT: Only the English prompt, nothing else. Under 500 words."""
         
         response = self.model.generate_content(prompt)
         return response.text.strip()
-    
+
+    def convert_batch(
+        self,
+        scenes: List[Any],
+        reference_json: dict = None,
+        product_json: dict = None,
+        on_scene_done: Callable[[Dict[str, Any]], None] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Chuyển TẤT CẢ cảnh của kịch bản sang prompt EN với ít request nhất.
+
+        - <= MAX_BATCH_SCENES cảnh: 1 request JSON duy nhất
+        - Nhiều hơn: chia nhóm, gọi song song tối đa MAX_BATCH_WORKERS request
+        - Cảnh nào parse lỗi / thiếu → fallback gọi convert() cho riêng cảnh đó
+
+        Args:
+            scenes: List VideoScene hoặc dict (segment) có hanh_dong, boi_canh
+            reference_json: JSON mô tả nhân vật
+            product_json: JSON mô tả sản phẩm
+            on_scene_done: Callback(prompt_data) khi mỗi cảnh chuyển xong
+
+        Returns:
+            List dict {"scene": số thứ tự, "en_prompt": prompt EN}, đúng thứ tự input
+        """
+        items = [self._scene_fields(scene, i) for i, scene in enumerate(scenes, 1)]
+        if not items:
+            return []
+
+        chunks = [
+            items[i:i + self.MAX_BATCH_SCENES]
+            for i in range(0, len(items), self.MAX_BATCH_SCENES)
+        ]
+
+        if len(chunks) == 1:
+            chunk_results = [self._convert_chunk(chunks[0], reference_json, product_json, on_scene_done)]
+        else:
+            workers = min(self.MAX_BATCH_WORKERS, len(chunks))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                chunk_results = list(executor.map(
+                    lambda chunk: self._convert_chunk(chunk, reference_json, product_json, on_scene_done),
+                    chunks
+                ))
+
+        return [prompt_data for chunk in chunk_results for prompt_data in chunk]
+
+    @staticmethod
+    def _scene_fields(scene: Any, index: int) -> Dict[str, Any]:
+        """Chuẩn hóa VideoScene / dict segment về {scene, hanh_dong, boi_canh}"""
+        if isinstance(scene, dict):
+            scene_id = scene.get("so_thu_tu") or scene.get("segment_id") or scene.get("scene_id") or index
+            return {
+                "scene": scene_id,
+                "hanh_dong": scene.get("hanh_dong", ""),
+                "boi_canh": scene.get("boi_canh", "")
+            }
+        return {
+            "scene": getattr(scene, "so_thu_tu", index),
+            "hanh_dong": getattr(scene, "hanh_dong", ""),
+            "boi_canh": getattr(scene, "boi_canh", "")
+        }
+
+    def _convert_chunk(
+        self,
+        items: List[Dict[str, Any]],
+        reference_json: dict,
+        product_json: dict,
+        on_scene_done: Callable[[Dict[str, Any]], None] = None
+    ) -> List[Dict[str, Any]]:
+        """Chuyển 1 nhóm cảnh bằng 1 request, fallback từng cảnh nếu kết quả không hợp lệ"""
+        batch_prompts = {}
+
+        if len(items) > 1:
+            try:
+                batch_prompts = self._request_batch(items, reference_json, product_json)
+            except Exception as e:
+                print(f"[CONVERTER] Batch {len(items)} cảnh lỗi, chuyển từng cảnh: {e}")
+
+        results = []
+        for item in items:
+            en_prompt = batch_prompts.get(str(item["scene"]))
+            if not en_prompt:
+                if len(items) > 1:
+                    print(f"[CONVERTER] Cảnh {item['scene']} không có trong batch → convert riêng")
+                en_prompt = self.convert(
+                    hanh_dong=item["hanh_dong"],
+                    boi_canh=item["boi_canh"],
+                    reference_json=reference_json,
+                    product_json=product_json
+                )
+
+            prompt_data = {"scene": item["scene"], "en_prompt": en_prompt}
+            results.append(prompt_data)
+            if on_scene_done:
+                on_scene_done(prompt_data)
+
+        return results
+
+    def _request_batch(
+        self,
+        items: List[Dict[str, Any]],
+        reference_json: dict,
+        product_json: dict
+    ) -> Dict[str, str]:
+        """
+        Gọi 1 request cho cả nhóm cảnh.
+
+        Returns:
+            Dict {str(scene): en_prompt} chỉ gồm các cảnh hợp lệ
+        """
+        ref_str = json.dumps(reference_json, ensure_ascii=False, indent=2) if reference_json else "{}"
+        prod_str = json.dumps(product_json, ensure_ascii=False, indent=2) if product_json else "{}"
+        scenes_block = "\n".join(
+            f"Scene {item['scene']}:\n- Action: {item['hanh_dong']}\n- Setting: {item['boi_canh']}"
+            for item in items
+        )
+
+        prompt = self.BATCH_CONVERSION_PROMPT.format(
+            reference_json=ref_str,
+            product_json=prod_str,
+            scenes_block=scenes_block
+        )
+
+        response = self.model.generate_content(
+            prompt,
+            generation_config={"response_mime_type": "application/json"}
+        )
+
+        # Response bị cắt giữa chừng vẫn giữ được các cảnh đã viết xong
+        data = extract_json(response.text, item_keys=("prompts",))
+
+        entries = data.get("prompts", []) if isinstance(data, dict) else data
+        expected = {str(item["scene"]) for item in items}
+
+        # Validate từng cảnh: đúng số cảnh, prompt là chuỗi không rỗng
+        valid = {}
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict):
+                continue
+            scene_key = str(entry.get("scene", ""))
+            en_prompt = entry.get("en_prompt")
+            if scene_key in expected and isinstance(en_prompt, str) and en_prompt.strip():
+                valid[scene_key] = en_prompt.strip()
+
+        return valid
+
     def convert_affiliate_clean(self, scene_data: dict) -> str:
         """
         Chuyển đổi JSON Affiliate sang Visual Prompt sạch cho Veo.
@@ -524,3 +756,106 @@ OUTPUT: Only the English prompt, nothing else. Under 500 words."""
         return " ".join(prompt_parts)
 
 
+
+class ScenePromptStream:
+    """
+    Chuyển prompt cho cảnh đến dần (kịch bản đang stream).
+
+    - Cảnh đầu tiên được chuyển ngay (không chờ cả kịch bản)
+    - Cảnh đến trong lúc đang có request chạy → gom lại, chuyển chung 1 lô
+      (tối đa MAX_BATCH_SCENES) như convert_batch → không tăng số request
+    - on_prompt(prompt_data, index) gọi ngay khi mỗi cảnh chuyển xong
+    - Cảnh không chuyển được (kể cả khi thử lại từng cảnh) nằm trong `failed`;
+      lỗi của on_prompt được raise lại ở close()
+    """
+
+    def __init__(
+        self,
+        converter: VeoPromptConverter,
+        reference_json: dict = None,
+        product_json: dict = None,
+        on_prompt: Callable[[Dict[str, Any], int], None] = None
+    ):
+        self.converter = converter
+        self.reference_json = reference_json
+        self.product_json = product_json
+        self.on_prompt = on_prompt
+
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []     # (index, item)
+        self._count = 0
+        self._running = False
+        self._results: Dict[int, Dict[str, Any]] = {}
+        self._error: Optional[BaseException] = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.failed: List[Any] = []         # số thứ tự cảnh không chuyển được
+
+    def add(self, scene: Any) -> int:
+        """Thêm 1 cảnh vừa viết xong - trả về index (0, 1, 2... theo thứ tự đến)"""
+        with self._lock:
+            index = self._count
+            self._count += 1
+            self._pending.append((index, self.converter._scene_fields(scene, index + 1)))
+            # on_prompt đã lỗi → không chạy tiếp, close() sẽ raise
+            if not self._running and self._error is None:
+                self._running = True
+                self._executor.submit(self._drain)
+        return index
+
+    def _drain(self):
+        """Chuyển hết cảnh đang chờ, mỗi lần 1 lô"""
+        try:
+            while True:
+                with self._lock:
+                    batch = self._pending[:self.converter.MAX_BATCH_SCENES]
+                    del self._pending[:len(batch)]
+                    if not batch:
+                        return
+
+                try:
+                    results = self.converter._convert_chunk(
+                        [item for _, item in batch], self.reference_json, self.product_json
+                    )
+                except Exception as e:
+                    print(f"[CONVERTER] Lỗi chuyển {len(batch)} cảnh: {e} → thử lại từng cảnh")
+                    results = [self._convert_single(item) for _, item in batch]
+
+                for (index, _), prompt_data in zip(batch, results):
+                    if prompt_data is None:
+                        continue
+                    self._results[index] = prompt_data
+                    if self.on_prompt:
+                        self.on_prompt(prompt_data, index)
+        except BaseException as e:
+            self._error = e
+        finally:
+            with self._lock:
+                self._running = False
+
+    def _convert_single(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fallback convert() cho 1 cảnh - None (và ghi vào failed) nếu vẫn lỗi"""
+        try:
+            en_prompt = self.converter.convert(
+                hanh_dong=item["hanh_dong"],
+                boi_canh=item["boi_canh"],
+                reference_json=self.reference_json,
+                product_json=self.product_json
+            )
+            return {"scene": item["scene"], "en_prompt": en_prompt}
+        except Exception as e:
+            print(f"[CONVERTER] Cảnh {item['scene']} chuyển lỗi: {e}")
+            self.failed.append(item["scene"])
+            return None
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        Chờ chuyển xong tất cả cảnh đã add - trả về prompt theo thứ tự cảnh.
+        Cảnh lỗi không có trong kết quả mà nằm trong `failed`.
+
+        Raises:
+            Lỗi của on_prompt, nếu có
+        """
+        self._executor.shutdown(wait=True)
+        if self._error is not None:
+            raise self._error
+        return [self._results[index] for index in sorted(self._results)]
@@ -128,16 +128,21 @@ class VideoWorkflowOrchestrator:
                 # Tạo nhiều video short
                 total_scenes = len(script.scenes)
                 
-                for i, scene in enumerate(script.scenes):
+                # Chuyển toàn bộ kịch bản sang prompt EN (1 request cho cả kịch bản)
+                if on_progress:
+                    on_progress("Đang chuyển prompt sang tiếng Anh...", 30)
+                prompts = self.prompt_converter.convert_batch(
+                    script.scenes,
+                    reference_json=reference_json,
+                    product_json=product_json
+                )
+                
+                for i, prompt_data in enumerate(prompts):
                     progress = 30 + int((i / total_scenes) * 60)
                     if on_progress:
                         on_progress(f"Đang tạo video {i+1}/{total_scenes}...", progress)
                     
-                    # Chuyển kịch bản sang prompt EN
-                    en_prompt = self.prompt_converter.convert(
-                        hanh_dong=scene.hanh_dong,
-                        boi_canh=scene.boi_canh
-                    )
+                    en_prompt = prompt_data["en_prompt"]
                     
                     # Tạo request
                     output_path = os.path.join(
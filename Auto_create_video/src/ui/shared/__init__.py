@@ -9,6 +9,8 @@
 from .ui_config import UIConfig
 from .panel_mixins import BasePanelMixin
 from .file_utils import browse_folder, browse_image, browse_media
+from .thumbnail_service import ThumbnailService, get_thumbnail_service
+from .progress_aggregator import ProgressAggregator
 
 __all__ = [
     'UIConfig',
@@ -16,4 +18,7 @@ __all__ = [
     'browse_folder',
     'browse_image',
     'browse_media',
+    'ThumbnailService',
+    'get_thumbnail_service',
+    'ProgressAggregator',
 ]
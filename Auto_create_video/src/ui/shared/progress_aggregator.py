@@ -0,0 +1,105 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║              PROGRESS AGGREGATOR - GOM TIẾN ĐỘ TỪ WORKER VỀ UI                ║
+║                                                                               ║
+║  Worker báo tiến độ bao nhiêu lần cũng được, UI chỉ nhận tối đa 10 lần/giây  ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Cách hoạt động:
+- update(key, value): gọi được từ thread bất kỳ, chỉ ghi vào dict (có lock) -
+  giá trị mới thay giá trị cũ chưa flush của cùng key (trạng thái trung gian bị bỏ)
+- log(message, level): dòng log giữ nguyên thứ tự, không bỏ dòng nào
+- GUI thread flush theo nhịp FLUSH_HZ: 1 signal updates_ready (dict key → giá trị
+  mới nhất) + 1 signal logs_ready (list dòng log) cho cả đợt
+- Chỉ lần update đầu tiên sau mỗi đợt flush mới gửi event sang GUI thread
+  (để hẹn giờ flush) → 16 luồng x polling liên tục vẫn chỉ ~10 event/giây
+
+Usage:
+    aggregator = ProgressAggregator()
+    aggregator.updates_ready.connect(self._on_progress_batch)   # {row: message}
+    # DirectConnection: chạy ngay trong thread worker, không tạo event Qt mỗi lần emit
+    worker.progress.connect(aggregator.update, Qt.ConnectionType.DirectConnection)
+"""
+
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Tuple
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+
+class ProgressAggregator(QObject):
+    """Gom update tiến độ theo key, flush về GUI thread theo nhịp cố định"""
+
+    FLUSH_HZ = 10
+
+    updates_ready = pyqtSignal(dict)   # {key: giá trị mới nhất}
+    logs_ready = pyqtSignal(list)      # [(message, level), ...] theo thứ tự
+
+    _wake = pyqtSignal()               # Worker → GUI thread: có dữ liệu mới
+
+    def __init__(self, flush_hz: float = None, parent=None):
+        """
+        Args:
+            flush_hz: Số lần flush tối đa mỗi giây (mặc định FLUSH_HZ)
+        """
+        super().__init__(parent)
+        self.interval = 1.0 / (flush_hz or self.FLUSH_HZ)
+        self._lock = threading.Lock()
+        self._updates: Dict[Hashable, Any] = {}
+        self._logs: List[Tuple[str, str]] = []
+        self._scheduled = False
+        self._last_flush = 0.0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._wake.connect(self._schedule)
+
+    # ===== GỌI TỪ WORKER (thread bất kỳ) =====
+
+    def update(self, key: Hashable, value: Any):
+        """Ghi giá trị mới nhất của key (thay giá trị chưa flush)"""
+        with self._lock:
+            self._updates[key] = value
+            wake = not self._scheduled
+            self._scheduled = True
+        if wake:
+            self._wake.emit()
+
+    def log(self, message: str, level: str = "INFO"):
+        """Thêm 1 dòng log (không bị gộp)"""
+        with self._lock:
+            self._logs.append((message, level))
+            wake = not self._scheduled
+            self._scheduled = True
+        if wake:
+            self._wake.emit()
+
+    def discard(self, key: Hashable):
+        """Bỏ update chưa flush của key (VD: task đã xong, không ghi đè trạng thái cuối)"""
+        with self._lock:
+            self._updates.pop(key, None)
+
+    # ===== GUI THREAD =====
+
+    def _schedule(self):
+        """Hẹn flush: ngay nếu đợt trước đã quá 1 nhịp, không thì chờ hết nhịp"""
+        if self._timer.isActive():
+            return
+        wait = self.interval - (time.monotonic() - self._last_flush)
+        self._timer.start(max(0, int(wait * 1000)))
+
+    def flush(self):
+        """Phát toàn bộ update + log đang chờ (gọi tay được, VD: trước khi đóng tab)"""
+        self._timer.stop()
+        with self._lock:
+            updates, self._updates = self._updates, {}
+            logs, self._logs = self._logs, []
+            self._scheduled = False
+        self._last_flush = time.monotonic()
+
+        if logs:
+            self.logs_ready.emit(logs)
+        if updates:
+            self.updates_ready.emit(updates)
@@ -0,0 +1,208 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                 THUMBNAIL SERVICE - THUMBNAIL ẢNH BẤT ĐỒNG BỘ                 ║
+║                                                                               ║
+║  Decode ảnh trong thread pool, cache thumbnail trên đĩa, trả về GUI thread   ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Cách hoạt động:
+- request(path, size, callback): có trong RAM → gọi callback ngay,
+  chưa có → giao cho QThreadPool, callback được gọi trên GUI thread khi xong
+- Worker đọc cache đĩa trước (key = path + mtime + kích thước file + size),
+  miss thì decode bằng QImageReader.setScaledSize (JPEG decode thu nhỏ,
+  không giải mã ảnh full-res) rồi ghi PNG vào cache
+- Worker chỉ dùng QImage (an toàn giữa các thread), QPixmap tạo trên GUI thread
+- Nhiều request cùng ảnh + size khi đang decode → chỉ decode 1 lần
+
+Usage:
+    service = get_thumbnail_service()
+    service.request(path, 32, lambda pixmap: button.setIcon(QIcon(pixmap)))
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from PyQt6.QtCore import QObject, QRunnable, Qt, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPixmap
+
+
+# Kích thước thumbnail hỗ trợ (64 cho màn hình HiDPI)
+THUMBNAIL_SIZES = (32, 64)
+
+ThumbnailCallback = Callable[[Optional[QPixmap]], None]
+
+
+def thumbnail_key(path: str, size: int) -> Optional[str]:
+    """Key cache: đổi nội dung file (mtime/kích thước) → key mới. None nếu file không tồn tại"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    raw = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{size}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def decode_thumbnail(path: str, size: int) -> QImage:
+    """Decode ảnh thẳng về size x size (giữ tỷ lệ) - chạy được ở thread bất kỳ"""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid():
+        reader.setScaledSize(original.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return image
+    # Một số định dạng bỏ qua setScaledSize
+    if image.width() > size or image.height() > size:
+        image = image.scaled(
+            size, size,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation
+        )
+    return image
+
+
+class _ThumbnailSignals(QObject):
+    """Signal từ worker về GUI thread (QRunnable không có signal)"""
+    done = pyqtSignal(str, QImage)  # (key, ảnh - null nếu lỗi)
+
+
+class _ThumbnailJob(QRunnable):
+    """Đọc thumbnail từ cache đĩa hoặc decode ảnh gốc"""
+
+    def __init__(self, key: str, path: str, size: int, cache_dir: str, signals: _ThumbnailSignals):
+        super().__init__()
+        self.key = key
+        self.path = path
+        self.size = size
+        self.cache_dir = cache_dir
+        self.signals = signals
+
+    def run(self):
+        cache_file = os.path.join(self.cache_dir, f"{self.key}.png")
+        image = QImage(cache_file) if os.path.exists(cache_file) else QImage()
+
+        if image.isNull():
+            image = decode_thumbnail(self.path, self.size)
+            if not image.isNull():
+                # Ghi file tạm rồi đổi tên → không có file cache dở dang
+                tmp_file = f"{cache_file}.{id(self)}.tmp"
+                try:
+                    if image.save(tmp_file, "PNG"):
+                        os.replace(tmp_file, cache_file)
+                except OSError as e:
+                    print(f"[THUMBNAIL] Không ghi được cache: {e}")
+                finally:
+                    if os.path.exists(tmp_file):
+                        os.remove(tmp_file)
+
+        self.signals.done.emit(self.key, image)
+
+
+class ThumbnailService(QObject):
+    """
+    Cung cấp thumbnail 32/64px cho UI mà không decode ảnh trên GUI thread
+
+    Attributes:
+        cache_dir (str): Thư mục cache thumbnail trên đĩa
+        pool (QThreadPool): Thread pool decode ảnh
+    """
+
+    MEMORY_CACHE_SIZE = 4096  # Số QPixmap giữ trong RAM
+
+    def __init__(self, cache_dir: str, max_threads: Optional[int] = None, parent: QObject = None):
+        """
+        Args:
+            cache_dir: Thư mục cache thumbnail
+            max_threads: Số thread decode (None = mặc định của Qt theo số CPU)
+        """
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.pool = QThreadPool(self)
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+
+        self._memory: "OrderedDict[str, QPixmap]" = OrderedDict()
+        self._waiters: Dict[str, List[ThumbnailCallback]] = {}
+        self._signals = _ThumbnailSignals()
+        self._signals.done.connect(self._on_done)
+
+    @staticmethod
+    def size_for(device_pixel_ratio: float) -> int:
+        """Chọn size thumbnail theo mật độ điểm ảnh của màn hình"""
+        return THUMBNAIL_SIZES[1] if device_pixel_ratio > 1.0 else THUMBNAIL_SIZES[0]
+
+    def request(self, path: str, size: int, callback: ThumbnailCallback) -> bool:
+        """
+        Lấy thumbnail của ảnh.
+
+        Args:
+            path: Đường dẫn ảnh gốc
+            size: Cạnh dài tối đa (THUMBNAIL_SIZES)
+            callback: Nhận QPixmap (None nếu không đọc được ảnh), luôn chạy trên GUI thread
+
+        Returns:
+            bool: True nếu callback đã được gọi ngay (có sẵn trong RAM)
+        """
+        key = thumbnail_key(path, size) if path else None
+        if key is None:
+            callback(None)
+            return True
+
+        pixmap = self._memory.get(key)
+        if pixmap is not None:
+            self._memory.move_to_end(key)
+            callback(pixmap)
+            return True
+
+        if key in self._waiters:
+            self._waiters[key].append(callback)
+            return False
+
+        self._waiters[key] = [callback]
+        self.pool.start(_ThumbnailJob(key, path, size, self.cache_dir, self._signals))
+        return False
+
+    def pending(self) -> int:
+        """Số thumbnail đang chờ decode"""
+        return len(self._waiters)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """Chờ thread pool xong (dùng cho test/thoát app)"""
+        return self.pool.waitForDone(msecs)
+
+    def _on_done(self, key: str, image: QImage):
+        """GUI thread: đổi QImage → QPixmap, lưu RAM, gọi các callback đang chờ"""
+        pixmap = None
+        if not image.isNull():
+            pixmap = QPixmap.fromImage(image)
+            self._memory[key] = pixmap
+            while len(self._memory) > self.MEMORY_CACHE_SIZE:
+                self._memory.popitem(last=False)
+
+        for callback in self._waiters.pop(key, []):
+            try:
+                callback(pixmap)
+            except RuntimeError:
+                # Widget đã bị xóa trước khi thumbnail xong
+                pass
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# INSTANCE DÙNG CHUNG
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_service: Optional[ThumbnailService] = None
+
+
+def get_thumbnail_service() -> ThumbnailService:
+    """ThumbnailService dùng chung cho toàn app (tạo lần đầu gọi, cần QApplication)"""
+    global _service
+    if _service is None:
+        from src.app.config import Config
+        _service = ThumbnailService(Config.THUMBNAIL_CACHE_DIR)
+    return _service
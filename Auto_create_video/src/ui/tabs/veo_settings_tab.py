@@ -11,13 +11,13 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
     QPushButton, QFrame, QLineEdit, QTextEdit,
-    QComboBox, QCheckBox, QSpinBox, QScrollArea,
+    QComboBox, QSpinBox, QScrollArea,
     QFileDialog, QMessageBox
 )
 from PyQt6.QtCore import Qt, pyqtSignal, QThread
 
 # Import shared UI components
-from src.ui.shared import UIConfig, BasePanelMixin
+from src.ui.shared import UIConfig, BasePanelMixin, ProgressAggregator
 
 # Import table components từ video_table
 from src.ui.tabs.video_table import VideoTable, BottomToolbar
@@ -51,25 +51,33 @@ class CookieCheckWorker(QThread):
                     name, value = pair.strip().split('=', 1)
                     cookies[name] = value
             
-            # Gửi request check
-            url = "https://labs.google/fx/tools/flow"
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            }
-            
-            response = requests.get(url, cookies=cookies, headers=headers, timeout=10, allow_redirects=True)
-            
-            # Nếu không bị redirect đến login page → Live
-            if "accounts.google.com" not in response.url:
-                # Đếm số lượng cookie (tạm thời coi như tất cả live nếu vào được flow)
-                count = len(cookies)
-                self.finished.emit(count)
+            from src.app.services.browser_veo_service import PLAYWRIGHT_AVAILABLE
+            if PLAYWRIGHT_AVAILABLE:
+                # Check trên browser dùng chung → browser được khởi động sẵn cho batch sau
+                from src.app.services.veo_browser_host import get_browser_host
+                is_live = get_browser_host().check_login(self.cookie_string)
             else:
-                self.finished.emit(0)
+                is_live = self._check_with_requests(cookies)
+            
+            # Đếm số lượng cookie (tạm thời coi như tất cả live nếu vào được flow)
+            self.finished.emit(len(cookies) if is_live else 0)
                 
         except Exception as e:
             print(f"[COOKIE CHECK] Lỗi: {e}")
             self.finished.emit(-1)  # Lỗi kỹ thuật
+    
+    @staticmethod
+    def _check_with_requests(cookies: dict) -> bool:
+        """Fallback khi chưa cài Playwright: gửi request thẳng đến Flow"""
+        url = "https://labs.google/fx/tools/flow"
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        }
+        
+        response = requests.get(url, cookies=cookies, headers=headers, timeout=10, allow_redirects=True)
+        
+        # Nếu không bị redirect đến login page → Live
+        return "accounts.google.com" not in response.url
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -100,7 +108,9 @@ class VeoWorker(QThread):
         """Chạy trong background thread"""
         try:
             import os
-            from src.app.services.browser_veo_service import PlaywrightVeoService, PLAYWRIGHT_AVAILABLE
+            from src.app.services.browser_veo_service import PLAYWRIGHT_AVAILABLE
+            from src.app.services.veo_page_pool import VeoPageTask
+            from src.app.services.veo_browser_host import get_browser_host
             from src.app.services.image_analysis import ImageAnalysisService
             from src.app.services.video_generation import VeoPromptConverter
             
@@ -161,51 +171,32 @@ class VeoWorker(QThread):
                 })
             
             # ═══════════════════════════════════════════════════════════
-            # BƯỚC 2: MỞ BROWSER VÀ TẠO VIDEO
+            # BƯỚC 2: TẠO VIDEO TRÊN BROWSER DÙNG CHUNG
             # ═══════════════════════════════════════════════════════════
-            print("[WORKER] ✅ Đã xử lý xong tất cả prompt, bắt đầu mở browser...")
+            # Browser được giữ ấm giữa các batch (không khởi động lại Chromium),
+            # host tự nạp cookie, kiểm tra đăng nhập và khởi động lại nếu crash
+            print("[WORKER] ✅ Đã xử lý xong tất cả prompt, gửi sang browser...")
             
-            service = PlaywrightVeoService(
-                cookie_string=self.global_config.get('cookie', ''),
-                download_dir=self.global_config.get('output_dir') or './output/videos',
-                headless=False,  # Tắt headless để debug
-                timeout=300
-            )
-            
-            # Khởi chạy browser
-            service.start()
-            
-            # Kiểm tra đăng nhập
-            if not service.is_logged_in():
-                service.stop()
-                for task in processed_tasks:
-                    self.error.emit(task['row'], "Cookie hết hạn hoặc không hợp lệ!")
-                return
-
-            # Tạo video cho từng task
-            for task in processed_tasks:
-                if not self.is_running:
-                    break
-                
-                row_idx = task['row']
-                final_prompt = task['final_prompt']
-                
-                self.progress.emit(row_idx, "🎬 Đang tạo video...")
-                
-                result = service.generate_video(
-                    prompt=final_prompt,
-                    aspect_ratio=self.global_config.get('aspect_ratio', '16:9'),
-                    output_count=self.global_config.get('output_count', 1),
-                    model=self.global_config.get('model', 'veo_3_1_fast')
-                )
-                
+            def on_result(page_task, result):
                 if result.success:
-                    self.finished.emit(row_idx, result)
+                    self.finished.emit(page_task.task_id, result)
                 else:
-                    self.error.emit(row_idx, result.error_message)
+                    self.error.emit(page_task.task_id, result.error_message)
+            
+            output_dir = self.global_config.get('output_dir') or './output/videos'
+            get_browser_host().render(
+                self.global_config.get('cookie', ''),
+                [
+                    VeoPageTask(task['row'], task['final_prompt'], download_dir=output_dir)
+                    for task in processed_tasks
+                ],
+                num_pages=self.global_config.get('parallel_pages', 3),
+                on_progress=lambda page_task, message: self.progress.emit(page_task.task_id, message),
+                on_result=on_result,
+                should_stop=lambda: not self.is_running
+            )
             
             # Kết thúc
-            service.stop()
             self.all_finished.emit()
             
         except Exception as e:
@@ -464,6 +455,24 @@ class VeoSettingsPanel(QFrame, BasePanelMixin):
         col2.addWidget(self.output_count_spin)
         row.addLayout(col2)
         
+        # Số tab render song song
+        col3 = QVBoxLayout()
+        lbl3 = QLabel("Số tab:")
+        lbl3.setStyleSheet(f"color: {UIConfig.COLORS['text_muted']}; font-size: 11px;")
+        col3.addWidget(lbl3)
+        self.parallel_pages_spin = QSpinBox()
+        self.parallel_pages_spin.setRange(1, 8)
+        self.parallel_pages_spin.setValue(3)
+        self.parallel_pages_spin.setToolTip("Số prompt render cùng lúc (mỗi prompt 1 tab trong cùng browser)")
+        self.parallel_pages_spin.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.parallel_pages_spin.wheelEvent = lambda e: e.ignore()
+        self.parallel_pages_spin.setStyleSheet("""
+            QSpinBox { background: #2d2d2d; color: #e0e0e0;
+                border: 1px solid #444; padding: 6px; border-radius: 4px; }
+        """)
+        col3.addWidget(self.parallel_pages_spin)
+        row.addLayout(col3)
+        
         container = QWidget()
         container.setLayout(row)
         self.content_layout.addWidget(container)
@@ -607,6 +616,7 @@ class VeoSettingsPanel(QFrame, BasePanelMixin):
             "video_type": self.video_type_combo.currentData(),
             "aspect_ratio": self.aspect_ratio_combo.currentData(),
             "output_count": self.output_count_spin.value(),
+            "parallel_pages": self.parallel_pages_spin.value(),
             "product_image": self.product_path_input.text(),
             "character_ref": self.character_path_input.text(),
             "output_dir": self.output_path_input.text(),
@@ -647,6 +657,8 @@ class VeoSettingsTab(QWidget):
     
     def __init__(self):
         super().__init__()
+        # Tiến độ từ worker được gom theo hàng, cập nhật bảng tối đa 10 lần/giây
+        self.progress_aggregator = ProgressAggregator(parent=self)
         self._init_layout()
         self._connect_signals()
         self.active_workers = []  # Lưu tất cả workers đang chạy để tránh garbage collection
@@ -680,6 +692,7 @@ class VeoSettingsTab(QWidget):
     def _connect_signals(self):
         """Kết nối các signals với slots"""
         self.veo_panel.start_clicked.connect(self._on_start_veo_clicked)
+        self.progress_aggregator.updates_ready.connect(self._on_veo_progress_batch)
         
         self.toolbar.add_clicked.connect(self._on_add_clicked)
         self.toolbar.delete_clicked.connect(self._on_delete_clicked)
@@ -753,7 +766,8 @@ class VeoSettingsTab(QWidget):
         
         # Tạo worker mới và thêm vào list để giữ reference
         worker = VeoWorker([task], veo_config)
-        worker.progress.connect(self._on_veo_progress)
+        # Chạy trong thread worker: chỉ ghi vào aggregator, không tạo event Qt mỗi lần báo
+        worker.progress.connect(self.progress_aggregator.update, Qt.ConnectionType.DirectConnection)
         worker.finished.connect(self._on_veo_finished)
         worker.error.connect(self._on_veo_error)
         worker.all_finished.connect(lambda w=worker: self._on_veo_all_finished(w))
@@ -762,6 +776,11 @@ class VeoSettingsTab(QWidget):
         self.active_workers.append(worker)
         worker.start()
     
+    def _on_veo_progress_batch(self, updates: dict):
+        """Cập nhật 1 đợt tiến độ đã gom ({row_idx: message mới nhất})"""
+        for row_idx, message in updates.items():
+            self._on_veo_progress(row_idx, message)
+    
     def _on_veo_progress(self, row_idx: int, message: str):
         """Cập nhật trạng thái tiến trình cho một hàng"""
         print(f"[VEO] Row {row_idx}: {message}")
@@ -770,6 +789,9 @@ class VeoSettingsTab(QWidget):
     
     def _on_veo_finished(self, row_idx: int, result):
         """Xử lý khi một task hoàn thành"""
+        # Tiến độ chưa flush của hàng đã cũ, không ghi đè trạng thái cuối
+        self.progress_aggregator.discard(row_idx)
+        
         # Cập nhật trạng thái hoàn thành
         self.table.update_row_progress(row_idx, "✅ 100%")
         
@@ -779,6 +801,7 @@ class VeoSettingsTab(QWidget):
     
     def _on_veo_error(self, row_idx: int, error_message: str):
         """Xử lý khi một task có lỗi"""
+        self.progress_aggregator.discard(row_idx)
         print(f"[VEO] Lỗi hàng {row_idx}: {error_message}")
         # Cập nhật trạng thái lỗi cho row
         self.table.update_row_progress(row_idx, f"❌ Lỗi: {error_message[:20]}...")
@@ -797,35 +820,13 @@ class VeoSettingsTab(QWidget):
     
     def _on_delete_clicked(self):
         """Xóa các hàng được chọn"""
-        rows_to_delete = []
-        for row in range(self.table.rowCount()):
-            widget = self.table.cellWidget(row, 0)
-            if widget:
-                checkbox = widget.findChild(QCheckBox)
-                if checkbox and checkbox.isChecked():
-                    rows_to_delete.append(row)
-        
-        for row in sorted(rows_to_delete, reverse=True):
+        for row in reversed(self.table.checked_rows()):
             self.table.removeRow(row)
     
     def _on_select_all(self):
         """Toggle chọn/bỏ chọn tất cả"""
-        all_checked = True
-        for row in range(self.table.rowCount()):
-            widget = self.table.cellWidget(row, 0)
-            if widget:
-                checkbox = widget.findChild(QCheckBox)
-                if checkbox and not checkbox.isChecked():
-                    all_checked = False
-                    break
-        
-        new_state = not all_checked
-        for row in range(self.table.rowCount()):
-            widget = self.table.cellWidget(row, 0)
-            if widget:
-                checkbox = widget.findChild(QCheckBox)
-                if checkbox:
-                    checkbox.setChecked(new_state)
+        all_checked = len(self.table.checked_rows()) == self.table.rowCount()
+        self.table.set_all_checked(not all_checked)
     
     def _on_import_images(self):
         """Import ảnh sản phẩm từ file dialog"""
@@ -889,7 +890,8 @@ class VeoSettingsTab(QWidget):
         # Tạo worker mới cho batch này
         print(f"[BATCH] Bắt đầu {action_name.lower()} {len(tasks)} tasks")
         worker = VeoWorker(tasks, veo_config)
-        worker.progress.connect(self._on_veo_progress)
+        # Chạy trong thread worker: chỉ ghi vào aggregator, không tạo event Qt mỗi lần báo
+        worker.progress.connect(self.progress_aggregator.update, Qt.ConnectionType.DirectConnection)
         worker.finished.connect(self._on_veo_finished)
         worker.error.connect(self._on_veo_error)
         worker.all_finished.connect(lambda w=worker: self._on_veo_all_finished(w))
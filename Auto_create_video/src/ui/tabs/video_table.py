@@ -12,22 +12,30 @@
 # PHẦN 1: IMPORT THƯ VIỆN
 # ═══════════════════════════════════════════════════════════════════════════════
 import os
+from collections import deque
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
     QPushButton, QFrame, QLineEdit, QTextEdit,
-    QComboBox, QCheckBox, QSpinBox, QTableWidget,
-    QTableWidgetItem, QHeaderView, QScrollArea,
+    QComboBox, QSpinBox, QTableView,
+    QHeaderView, QScrollArea,
     QFileDialog, QMessageBox, QRadioButton
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QSize
-from PyQt6.QtGui import QFont, QColor, QPixmap, QIcon
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
+from PyQt6.QtGui import QFont
 
 # Import worker cho video generation
-from src.ui.workers.video_worker import VideoWorker, VideoWorkflowConfig
+from src.ui.workers.video_worker import VideoWorker, VideoWorkflowConfig, TaskResumeWorker
 from src.app.config import config as app_config
+from src.app.services.history_store import VideoHistoryStore
+from src.app.services.task_store import VideoTaskStore
+from src.app.models import TaskStatus
 
 # Import shared components
-from src.ui.shared import UIConfig, BasePanelMixin, browse_folder, browse_image, browse_media
+from src.ui.shared import UIConfig, BasePanelMixin, ProgressAggregator, browse_folder, browse_image, browse_media
+from src.ui.tabs.video_table_model import (
+    COL_CHECK, COL_STT, COL_IMAGE, COL_PROMPT, COL_PROGRESS, COL_VIDEOS,
+    VideoRow, VideoTableModel, VideoTableDelegate
+)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -962,9 +970,9 @@ class VeoSettingsPanel(QFrame):
 # ═══════════════════════════════════════════════════════════════════════════════
 # PHẦN 4: BẢNG VIDEO (Bên trái)
 # ═══════════════════════════════════════════════════════════════════════════════
-class VideoTable(QTableWidget):
+class VideoTable(QTableView):
     """
-    Bảng hiển thị danh sách video.
+    Bảng hiển thị danh sách video (model/view - không có widget mỗi hàng).
     
     Cột:
     - Checkbox: Chọn video
@@ -973,51 +981,73 @@ class VideoTable(QTableWidget):
     - Prompt: Nội dung prompt
     - Tiến độ: Trạng thái xử lý
     - Video kết quả: Các nút phát video + Tạo lại
+    
+    Dữ liệu nằm trong VideoTableModel, ô ảnh/tiến độ/video do VideoTableDelegate
+    vẽ → chỉ các hàng đang hiện được vẽ, 10.000 hàng vẫn mở ngay.
     """
     
+    retry_clicked = pyqtSignal(int)   # row
+    row_edited = pyqtSignal(int, dict)  # row, {field: giá trị} - người dùng sửa trong bảng
+    
     def __init__(self):
         super().__init__()
+        self.video_model = VideoTableModel(self)
+        self.setModel(self.video_model)
+        self.video_model.dataChanged.connect(self._on_model_data_changed)
+        self.delegate = VideoTableDelegate(self)
+        self.setItemDelegate(self.delegate)
         self._init_columns()
         self._init_style()
+        
+        self.delegate.image_clicked.connect(self._on_image_click)
+        self.delegate.video_clicked.connect(self._open_video_file)
+        self.delegate.retry_clicked.connect(self.retry_clicked)
     
     def _init_columns(self):
         """Thiết lập các cột của bảng"""
-        self.setColumnCount(6)
-        self.setHorizontalHeaderLabels(["", "STT", "Image", "Prompt", "Tiến độ", "Video kết quả"])
+        # Hàng cao cố định → view không cần đo từng hàng
+        vertical = self.verticalHeader()
+        vertical.setVisible(False)
+        vertical.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical.setDefaultSectionSize(UIConfig.TABLE_ROW_HEIGHT)
         
-        self.verticalHeader().setVisible(False)
         header = self.horizontalHeader()
         
         # Thiết lập resize mode cho từng cột
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)
-        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Fixed)
-        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)  # Prompt co giãn
-        header.setSectionResizeMode(4, QHeaderView.ResizeMode.Fixed)
-        header.setSectionResizeMode(5, QHeaderView.ResizeMode.Fixed)
+        header.setSectionResizeMode(COL_CHECK, QHeaderView.ResizeMode.Fixed)
+        header.setSectionResizeMode(COL_STT, QHeaderView.ResizeMode.Fixed)
+        header.setSectionResizeMode(COL_IMAGE, QHeaderView.ResizeMode.Fixed)
+        header.setSectionResizeMode(COL_PROMPT, QHeaderView.ResizeMode.Stretch)  # Prompt co giãn
+        header.setSectionResizeMode(COL_PROGRESS, QHeaderView.ResizeMode.Fixed)
+        header.setSectionResizeMode(COL_VIDEOS, QHeaderView.ResizeMode.Fixed)
         
         # Thiết lập width cố định
         widths = UIConfig.TABLE_COLUMN_WIDTHS
-        self.setColumnWidth(0, widths['checkbox'])
-        self.setColumnWidth(1, widths['stt'])
-        self.setColumnWidth(2, widths['image'])
-        self.setColumnWidth(4, widths['status'])
-        self.setColumnWidth(5, widths['video_buttons'])
+        self.setColumnWidth(COL_CHECK, widths['checkbox'])
+        self.setColumnWidth(COL_STT, widths['stt'])
+        self.setColumnWidth(COL_IMAGE, widths['image'])
+        self.setColumnWidth(COL_PROGRESS, widths['status'])
+        self.setColumnWidth(COL_VIDEOS, widths['video_buttons'])
+        
+        self.setWordWrap(False)
+        self.setEditTriggers(
+            QTableView.EditTrigger.DoubleClicked | QTableView.EditTrigger.EditKeyPressed
+        )
     
     def _init_style(self):
         """Thiết lập style cho bảng"""
         self.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #1a1a1a;
                 border: none;
                 gridline-color: #333;
                 color: #e0e0e0;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
                 border-bottom: 1px solid #2a2a2a;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #333;
             }
             QHeaderView::section {
@@ -1030,8 +1060,12 @@ class VideoTable(QTableWidget):
             }
         """)
     
+    # ─────────────────────────────────────────────────────────────────────────
+    # Thêm / xóa hàng
+    # ─────────────────────────────────────────────────────────────────────────
     def add_video_row(self, stt: int, prompt: str = "...", status: str = "0%", 
-                       product_path: str = "", ref_path: str = "", num_slots: int = 4):
+                       product_path: str = "", ref_path: str = "", num_slots: int = 4,
+                       video_id: str = "", position: int = None):
         """
         Thêm một hàng video mới vào bảng.
         
@@ -1042,225 +1076,61 @@ class VideoTable(QTableWidget):
             product_path: Đường dẫn ảnh sản phẩm
             ref_path: Đường dẫn ảnh nhân vật
             num_slots: Số ô video (4 cho Flow, 5 cho API)
-        """
-        row = self.rowCount()
-        self.insertRow(row)
-        self.setRowHeight(row, UIConfig.TABLE_ROW_HEIGHT)
-        
-        # Cột 0: Checkbox
-        self._add_checkbox_cell(row, 0)
-        
-        # Cột 1: STT
-        self._add_stt_cell(row, 1, stt)
+            video_id: ID của video trong lịch sử (xem get_row_video_id)
+            position: Chèn vào vị trí này (None = cuối bảng)
         
-        # Cột 2: Image (hiện cả 2 ảnh)
-        self._add_image_cell(row, 2, product_path, ref_path)
-        
-        # Cột 3: Prompt
-        self.setItem(row, 3, QTableWidgetItem(prompt))
-        
-        # Cột 4: Tiến độ
-        self._add_progress_cell(row, 4, status)
-        
-        # Cột 5: Video buttons
-        self._add_video_buttons_cell(row, 5, "Đang chờ", num_slots=num_slots)
-        
-        return row
+        Returns:
+            int: Index của hàng vừa thêm
+        """
+        return self.video_model.insert_row(
+            VideoRow(
+                stt=stt, prompt=prompt, status=status,
+                product_path=product_path or "", ref_path=ref_path or "",
+                num_slots=num_slots, video_id=video_id
+            ),
+            position
+        )
+    
+    def add_video_rows(self, rows: list, position: int = None) -> int:
+        """Thêm nhiều VideoRow trong 1 lần (load lịch sử) - trả về index hàng đầu"""
+        return self.video_model.insert_rows(rows, position)
+    
+    def rowCount(self) -> int:
+        return self.video_model.rowCount()
+    
+    def removeRow(self, row: int):
+        if 0 <= row < self.rowCount():
+            self.video_model.remove_row(row)
+    
+    def setRowCount(self, count: int):
+        """Chỉ hỗ trợ xóa hết (count=0) hoặc cắt bớt hàng cuối"""
+        if count <= 0:
+            self.video_model.clear()
+        else:
+            for row in reversed(range(count, self.rowCount())):
+                self.video_model.remove_row(row)
+    
+    # ─────────────────────────────────────────────────────────────────────────
+    # Đọc / sửa dữ liệu hàng
+    # ─────────────────────────────────────────────────────────────────────────
+    def row_data(self, row: int) -> VideoRow:
+        return self.video_model.row(row)
+    
+    def row_prompt(self, row: int) -> str:
+        return self.video_model.row(row).prompt
+    
+    def set_stt(self, row: int, stt: int):
+        self.video_model.update_row(row, stt=stt)
     
     def update_row_progress(self, row: int, progress: str, prompt: str = None):
         """Cập nhật tiến độ và prompt của một hàng"""
         if row >= self.rowCount():
             return
         
-        # Cập nhật progress cell
-        progress_widget = self.cellWidget(row, 4)
-        if progress_widget:
-            label = progress_widget.findChild(QLabel)
-            if label:
-                label.setText(progress)
-                # Đổi màu theo progress
-                if progress == "100%":
-                    label.setStyleSheet("color: #4CAF50; font-size: 11px; font-weight: bold;")
-                elif "%" in progress:
-                    label.setStyleSheet("color: #ffcc00; font-size: 11px;")
-                else:
-                    label.setStyleSheet("color: #888; font-size: 11px;")
-        
-        # Cập nhật prompt nếu có
+        changes = {"status": progress}
         if prompt is not None:
-            item = self.item(row, 3)
-            if item:
-                item.setText(prompt[:100] + "..." if len(prompt) > 100 else prompt)
-    
-    def _add_progress_cell(self, row: int, col: int, progress: str):
-        """Thêm ô tiến độ với percentage"""
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(4, 0, 4, 0)
-        
-        label = QLabel(progress)
-        label.setStyleSheet("color: #888; font-size: 11px;")
-        layout.addWidget(label)
-        self.setCellWidget(row, col, widget)
-    
-    def _add_checkbox_cell(self, row: int, col: int):
-        """Thêm ô checkbox"""
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.addWidget(QCheckBox(), alignment=Qt.AlignmentFlag.AlignCenter)
-        self.setCellWidget(row, col, widget)
-    
-    def _add_stt_cell(self, row: int, col: int, stt: int):
-        """Thêm ô số thứ tự"""
-        item = QTableWidgetItem(str(stt))
-        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        item.setForeground(QColor(UIConfig.COLORS['accent_yellow']))
-        self.setItem(row, col, item)
-    
-    def _add_image_cell(self, row: int, col: int, product_path: str = "", ref_path: str = ""):
-        """Thêm ô hình ảnh với thumbnail clickable để upload"""
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(4, 4, 4, 4)
-        layout.setSpacing(4)
-        
-        # Thumbnail sản phẩm (clickable)
-        img1_btn = QPushButton()
-        img1_btn.setFixedSize(32, 32)
-        img1_btn.setProperty("row", row)
-        img1_btn.setProperty("type", "product")
-        img1_btn.setProperty("path", product_path)
-        img1_btn.setToolTip("Click để chọn ảnh sản phẩm")
-        
-        if product_path and os.path.exists(product_path):
-            icon = QIcon(QPixmap(product_path).scaled(32, 32, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-            img1_btn.setIcon(icon)
-            img1_btn.setIconSize(QSize(28, 28))
-            img1_btn.setStyleSheet("QPushButton { border: 1px solid #3d7a3d; border-radius: 3px; } QPushButton:hover { border: 2px solid #4d9a4d; }")
-        else:
-            img1_btn.setText("+")
-            img1_btn.setStyleSheet("QPushButton { background: #3d7a3d; border-radius: 3px; color: white; font-size: 16px; font-weight: bold; } QPushButton:hover { background: #4d9a4d; }")
-        
-        img1_btn.clicked.connect(lambda: self._on_image_click(row, "product"))
-        
-        # Thumbnail nhân vật (clickable)
-        img2_btn = QPushButton()
-        img2_btn.setFixedSize(32, 32)
-        img2_btn.setProperty("row", row)
-        img2_btn.setProperty("type", "ref")
-        img2_btn.setProperty("path", ref_path)
-        img2_btn.setToolTip("Click để chọn ảnh nhân vật")
-        
-        if ref_path and os.path.exists(ref_path):
-            icon = QIcon(QPixmap(ref_path).scaled(32, 32, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-            img2_btn.setIcon(icon)
-            img2_btn.setIconSize(QSize(28, 28))
-            img2_btn.setStyleSheet("QPushButton { border: 1px solid #2563eb; border-radius: 3px; } QPushButton:hover { border: 2px solid #3b82f6; }")
-        else:
-            img2_btn.setText("+")
-            img2_btn.setStyleSheet("QPushButton { background: #2563eb; border-radius: 3px; color: white; font-size: 16px; font-weight: bold; } QPushButton:hover { background: #3b82f6; }")
-        
-        img2_btn.clicked.connect(lambda: self._on_image_click(row, "ref"))
-        
-        layout.addWidget(img1_btn)
-        layout.addWidget(img2_btn)
-        layout.addStretch()
-        self.setCellWidget(row, col, widget)
-    
-    def _on_image_click(self, row: int, img_type: str):
-        """Xử lý khi click vào thumbnail để chọn ảnh"""
-        from PyQt6.QtWidgets import QFileDialog
-        file_path, _ = QFileDialog.getOpenFileName(
-            self,
-            f"Chọn ảnh {'sản phẩm' if img_type == 'product' else 'nhân vật'}",
-            "",
-            "Image Files (*.png *.jpg *.jpeg *.webp *.gif)"
-        )
-        if file_path:
-            # Cập nhật lại cell với ảnh mới
-            widget = self.cellWidget(row, 2)
-            if widget:
-                layout = widget.layout()
-                if layout:
-                    # Tìm nút tương ứng
-                    btn_idx = 0 if img_type == "product" else 1
-                    btn = layout.itemAt(btn_idx).widget()
-                    if btn and isinstance(btn, QPushButton):
-                        btn.setProperty("path", file_path)
-                        icon = QIcon(QPixmap(file_path).scaled(36, 36, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-                        btn.setIcon(icon)
-                        btn.setIconSize(QSize(32, 32))
-                        btn.setText("")
-                        if img_type == "product":
-                            btn.setStyleSheet("QPushButton { border: 1px solid #3d7a3d; border-radius: 4px; } QPushButton:hover { border: 2px solid #4d9a4d; }")
-                        else:
-                            btn.setStyleSheet("QPushButton { border: 1px solid #2563eb; border-radius: 4px; } QPushButton:hover { border: 2px solid #3b82f6; }")
-    
-    def _add_status_cell(self, row: int, col: int, status: str):
-        """Thêm ô trạng thái"""
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(4, 0, 4, 0)
-        
-        label = QLabel(status)
-        color = UIConfig.COLORS['success'] if status == "Hoàn thành" else "#666"
-        label.setStyleSheet(f"color: {color}; font-size: 10px;")
-        layout.addWidget(label)
-        self.setCellWidget(row, col, widget)
-    
-    def _add_video_buttons_cell(self, row: int, col: int, status: str, num_slots: int = 4):
-        """
-        Thêm ô kết quả video với các ô placeholder.
-        
-        Args:
-            row: Số hàng
-            col: Số cột
-            status: Trạng thái (Đang chờ, 100%...)
-            num_slots: Số ô video (4 cho Flow, 5 cho API)
-        """
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(4, 2, 4, 2)
-        layout.setSpacing(4)
-        
-        # Tạo các ô video placeholder
-        for i in range(num_slots):
-            slot_btn = QPushButton(f"{i+1}")
-            slot_btn.setFixedSize(36, 36)
-            slot_btn.setObjectName(f"video_slot_{i}")
-            slot_btn.setToolTip(f"Video {i+1}: Chưa có")
-            slot_btn.setEnabled(False)  # Disable khi chưa có video
-            slot_btn.setStyleSheet("""
-                QPushButton { 
-                    background: #333; 
-                    color: #666; 
-                    font-size: 12px; 
-                    font-weight: bold;
-                    border-radius: 4px;
-                    border: 1px dashed #555;
-                }
-                QPushButton:disabled { 
-                    background: #2a2a2a; 
-                    color: #555;
-                }
-            """)
-            layout.addWidget(slot_btn)
-        
-        layout.addStretch()
-        
-        # Nút Tạo lại (ẩn mặc định)
-        retry_btn = QPushButton("Tạo lại")
-        retry_btn.setObjectName("retry_btn")
-        retry_btn.setVisible(False)
-        retry_btn.setStyleSheet("""
-            QPushButton { background: #444; color: #ccc; padding: 4px 8px; 
-                border-radius: 3px; font-size: 10px; }
-            QPushButton:hover { background: #555; }
-        """)
-        layout.addWidget(retry_btn)
-        
-        self.setCellWidget(row, col, widget)
+            changes["prompt"] = prompt[:100] + "..." if len(prompt) > 100 else prompt
+        self.video_model.update_row(row, **changes)
     
     def update_video_results(self, row: int, video_paths: list, num_slots: int = 4):
         """
@@ -1273,70 +1143,71 @@ class VideoTable(QTableWidget):
         """
         if row >= self.rowCount():
             return
-        
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(4, 2, 4, 2)
-        layout.setSpacing(4)
-        
-        # Tạo các slot - có video thì hiện ▶ xanh, không có thì placeholder
-        for i in range(num_slots):
-            if i < len(video_paths) and video_paths[i]:
-                # Có video - nút play màu xanh
-                video_path = video_paths[i]
-                play_btn = QPushButton("▶")
-                play_btn.setFixedSize(32, 32)
-                play_btn.setToolTip(f"Video {i+1}: {os.path.basename(video_path)}")
-                play_btn.setProperty("video_path", video_path)
-                play_btn.setStyleSheet("""
-                    QPushButton { 
-                        background: #22c55e; 
-                        color: white; 
-                        font-size: 14px; 
-                        font-weight: bold;
-                        border-radius: 4px;
-                        border: none;
-                    }
-                    QPushButton:hover { background: #16a34a; }
-                    QPushButton:pressed { background: #14532d; }
-                """)
-                play_btn.clicked.connect(lambda checked, path=video_path: self._open_video_file(path))
-                layout.addWidget(play_btn)
-            else:
-                # Chưa có video - placeholder
-                slot_btn = QPushButton(f"{i+1}")
-                slot_btn.setFixedSize(36, 36)
-                slot_btn.setToolTip(f"Video {i+1}: Chưa có")
-                slot_btn.setEnabled(False)
-                slot_btn.setStyleSheet("""
-                    QPushButton { 
-                        background: #333; 
-                        color: #666; 
-                        font-size: 12px; 
-                        font-weight: bold;
-                        border-radius: 4px;
-                        border: 1px dashed #555;
-                    }
-                    QPushButton:disabled { 
-                        background: #2a2a2a; 
-                        color: #555;
-                    }
-                """)
-                layout.addWidget(slot_btn)
-        
-        layout.addStretch()
-        
-        # Nút Tạo lại (hiện khi có ít nhất 1 video)
-        if video_paths:
-            retry_btn = QPushButton("Tạo lại")
-            retry_btn.setStyleSheet("""
-                QPushButton { background: #444; color: #ccc; padding: 4px 8px; 
-                    border-radius: 3px; font-size: 10px; }
-                QPushButton:hover { background: #555; }
-            """)
-            layout.addWidget(retry_btn)
-        
-        self.setCellWidget(row, 5, widget)
+        self.video_model.update_row(
+            row, video_paths=list(video_paths), num_slots=num_slots, show_retry=True
+        )
+    
+    def set_row_video(self, row: int, video_path: str):
+        """Gắn video vào ô đầu tiên của hàng (mỗi hàng 1 video)"""
+        if row >= self.rowCount():
+            return
+        video_paths = list(self.video_model.row(row).video_paths) or [""]
+        video_paths[0] = video_path
+        self.video_model.update_row(row, video_paths=video_paths)
+    
+    def get_row_video_id(self, row: int) -> str:
+        """ID lịch sử của hàng ("" nếu hàng không có trong lịch sử)"""
+        if 0 <= row < self.rowCount():
+            return self.video_model.row(row).video_id
+        return ""
+    
+    def find_row(self, video_id: str) -> int:
+        """Hàng hiện tại của video (-1 nếu không còn trong bảng)"""
+        for row, video_row in enumerate(self.video_model.rows()):
+            if video_row.video_id == video_id:
+                return row
+        return -1
+    
+    def get_row_image_paths(self, row: int) -> tuple:
+        """Đường dẫn (ảnh sản phẩm, ảnh nhân vật) của 1 hàng, "" nếu chưa chọn"""
+        video_row = self.video_model.row(row)
+        return video_row.product_path, video_row.ref_path
+    
+    # ─────────────────────────────────────────────────────────────────────────
+    # Checkbox
+    # ─────────────────────────────────────────────────────────────────────────
+    def is_row_checked(self, row: int) -> bool:
+        return self.video_model.row(row).checked
+    
+    def checked_rows(self) -> list:
+        """Index các hàng đang được tick"""
+        return [row for row, video_row in enumerate(self.video_model.rows()) if video_row.checked]
+    
+    def set_all_checked(self, checked: bool):
+        self.video_model.set_all_checked(checked)
+    
+    # ─────────────────────────────────────────────────────────────────────────
+    # Click
+    # ─────────────────────────────────────────────────────────────────────────
+    def _on_image_click(self, row: int, img_type: str):
+        """Xử lý khi click vào thumbnail để chọn ảnh"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            f"Chọn ảnh {'sản phẩm' if img_type == 'product' else 'nhân vật'}",
+            "",
+            "Image Files (*.png *.jpg *.jpeg *.webp *.gif)"
+        )
+        if file_path and row < self.rowCount():
+            field = "product_path" if img_type == "product" else "ref_path"
+            self.video_model.update_row(row, **{field: file_path})
+            self.row_edited.emit(row, {field: file_path})
+    
+    def _on_model_data_changed(self, top_left, bottom_right, roles=()):
+        """Sửa prompt trực tiếp trong bảng (setData → đúng 1 ô cột Prompt)"""
+        # update_row báo cả hàng → không nhầm với cập nhật tiến độ
+        if top_left == bottom_right and top_left.column() == COL_PROMPT:
+            row = top_left.row()
+            self.row_edited.emit(row, {"prompt": self.video_model.row(row).prompt})
     
     def _open_video_file(self, video_path: str):
         """Mở file video với ứng dụng mặc định"""
@@ -1350,7 +1221,6 @@ class VideoTable(QTableWidget):
                     import subprocess
                     subprocess.run(['xdg-open' if os.name == 'posix' else 'open', video_path])
             else:
-                from PyQt6.QtWidgets import QMessageBox
                 QMessageBox.warning(self, "Lỗi", f"File không tồn tại:\n{video_path}")
         except Exception as e:
             print(f"[VIDEO] Lỗi mở video: {e}")
@@ -1362,46 +1232,18 @@ class VideoTable(QTableWidget):
         Returns:
             list: Danh sách dict chứa data {row, stt, prompt, product_path, ref_path, status}
         """
-        selected_data = []
-        for row in range(self.rowCount()):
-            # Kiểm tra checkbox ở cột 0
-            cb_widget = self.cellWidget(row, 0)
-            if cb_widget:
-                cb = cb_widget.findChild(QCheckBox)
-                if cb and cb.isChecked():
-                    # Lấy STT
-                    stt_item = self.item(row, 1)
-                    stt = int(stt_item.text()) if stt_item else row + 1
-                    
-                    # Lấy Prompt
-                    prompt_item = self.item(row, 3)
-                    prompt = prompt_item.text() if prompt_item else ""
-                    
-                    # Lấy Image Paths từ widget ở cột 2
-                    img_widget = self.cellWidget(row, 2)
-                    product_path = ""
-                    ref_path = ""
-                    if img_widget:
-                        btns = img_widget.findChildren(QPushButton)
-                        for btn in btns:
-                            if btn.property("type") == "product":
-                                product_path = btn.property("path") or ""
-                            elif btn.property("type") == "ref":
-                                ref_path = btn.property("path") or ""
-                    
-                    # Lấy Status
-                    status_item = self.item(row, 4)
-                    status = status_item.text() if status_item else "Đang chờ"
-                    
-                    selected_data.append({
-                        "row": row,
-                        "stt": stt,
-                        "prompt": prompt,
-                        "product_path": product_path,
-                        "ref_path": ref_path,
-                        "status": status
-                    })
-        return selected_data
+        return [
+            {
+                "row": row,
+                "stt": video_row.stt,
+                "prompt": video_row.prompt,
+                "product_path": video_row.product_path,
+                "ref_path": video_row.ref_path,
+                "status": video_row.status
+            }
+            for row, video_row in enumerate(self.video_model.rows())
+            if video_row.checked
+        ]
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1502,6 +1344,16 @@ class VideoTableTab(QWidget):
     
     def __init__(self):
         super().__init__()
+        self.history = VideoHistoryStore(self.HISTORY_DB, legacy_json_path=self.HISTORY_FILE)
+        self.tasks = VideoTaskStore(self.TASK_DB)   # Task đã submit - resume nếu app bị tắt
+        self.resume_worker = None
+        self._history_queue = deque()  # Entry lịch sử chưa thêm vào bảng
+        self._history_loaded = 0       # Số hàng lịch sử đã có trong bảng (ở đầu bảng)
+        self._history_total = 0        # Số entry lịch sử lúc mở app
+        self._current_video_ids = []   # Hàng của lần tạo video đang chạy
+        # Log từ worker (nhiều luồng) được gom, đẩy lên UI tối đa 10 lần/giây
+        self.progress_aggregator = ProgressAggregator(parent=self)
+        self.progress_aggregator.logs_ready.connect(self._on_worker_logs)
         self._init_layout()
         self._connect_signals()
         # Bảng bắt đầu trống - người dùng sẽ thêm ảnh bằng nút "📷 Ảnh"
@@ -1544,94 +1396,178 @@ class VideoTableTab(QWidget):
         self.toolbar.import_images_clicked.connect(self._on_import_images)
         self.toolbar.open_video_clicked.connect(self._on_open_video_folder)
         
+        # Sửa prompt / đổi ảnh trong bảng → ghi vào lịch sử
+        self.table.row_edited.connect(self._on_row_edited)
+        
         # Double-click vào video cell để phát video
-        self.table.cellDoubleClicked.connect(self._on_play_video)
+        self.table.doubleClicked.connect(self._on_play_video)
         
-        # Load lịch sử khi khởi động
+        # Load lịch sử khi khởi động (trang sau load khi cuộn xuống)
+        self.table.verticalScrollBar().valueChanged.connect(self._on_table_scrolled)
         self._load_history()
+        
+        # Task còn dở từ lần chạy trước → chạy tiếp sau khi UI đã hiện
+        QTimer.singleShot(0, self._resume_unfinished_tasks)
     
     # ─────────────────────────────────────────────────────────────────────────
     # 6.0.1: Lưu/Load Lịch Sử Video
     # ─────────────────────────────────────────────────────────────────────────
-    HISTORY_FILE = "./history/video_history.json"
+    HISTORY_DB = "./history/video_history.db"
+    HISTORY_FILE = "./history/video_history.json"  # Định dạng cũ - tự chuyển sang HISTORY_DB
+    HISTORY_PAGE_SIZE = 200   # Số entry mỗi trang lịch sử (trang sau load khi cuộn xuống)
+    HISTORY_CHUNK_SIZE = 200  # Số hàng thêm mỗi lượt event loop khi load lịch sử
+    TASK_DB = "./history/video_tasks.db"
+    
+    def _new_row(self, prompt: str, status: str, product_path: str = "", ref_path: str = "") -> int:
+        """Thêm hàng mới (cuối bảng) và ghi vào lịch sử"""
+        video_id = self.history.new_video_id()
+        stt = self.history.count() + 1
+        row = self.table.add_video_row(
+            stt=stt, prompt=prompt, status=status,
+            product_path=product_path, ref_path=ref_path, video_id=video_id
+        )
+        self.history.record(
+            video_id, stt=str(stt), prompt=prompt, progress=status,
+            product_path=product_path, ref_path=ref_path
+        )
+        return row
     
-    def _save_history(self):
-        """Lưu lịch sử tất cả videos đã tạo ra file JSON"""
-        import json
-        from datetime import datetime
-        
-        history = []
-        for row in range(self.table.rowCount()):
-            # Lấy thông tin từ mỗi row
-            stt_item = self.table.item(row, 1)
-            prompt_item = self.table.item(row, 3)
-            progress_item = self.table.item(row, 4)
-            video_item = self.table.item(row, 5)
-            
-            entry = {
-                "stt": stt_item.text() if stt_item else str(row + 1),
-                "prompt": prompt_item.text() if prompt_item else "",
-                "progress": progress_item.text() if progress_item else "0%",
-                "video_path": video_item.data(Qt.ItemDataRole.UserRole) if video_item else None,
-                "video_name": video_item.text() if video_item else "",
-                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            history.append(entry)
+    def _record_row(self, row: int, **changes):
+        """Ghi thay đổi của 1 hàng vào lịch sử (1 bản ghi, không ghi lại cả bảng)"""
+        video_id = self.table.get_row_video_id(row)
+        if video_id:
+            self.history.record(video_id, **changes)
+    
+    def _on_row_edited(self, row: int, changes: dict):
+        """Người dùng sửa prompt / ảnh của hàng trong bảng"""
+        self._record_row(row, **changes)
+    
+    def _load_history(self):
+        """
+        Load trang lịch sử đầu tiên khi app khởi động.
         
-        # Tạo thư mục nếu chưa có
-        os.makedirs(os.path.dirname(self.HISTORY_FILE), exist_ok=True)
+        Các trang sau chỉ load khi cuộn tới cuối phần lịch sử. Mỗi trang được thêm
+        theo từng đợt HISTORY_CHUNK_SIZE giữa các lượt event loop (UI không bị treo),
+        thumbnail tự điền sau.
+        """
+        self._history_queue.clear()
+        self._history_loaded = 0
+        self._history_total = self.history.count()
+        if not self._history_total:
+            print("[HISTORY] No history, starting fresh")
+            return
         
-        try:
-            with open(self.HISTORY_FILE, 'w', encoding='utf-8') as f:
-                json.dump(history, f, ensure_ascii=False, indent=2)
-            print(f"[HISTORY] Saved {len(history)} entries to {self.HISTORY_FILE}")
-        except Exception as e:
-            print(f"[HISTORY] Error saving: {e}")
+        print(f"[HISTORY] {self._history_total} entries, loading first page...")
+        self._load_history_page()
     
-    def _load_history(self):
-        """Load lịch sử videos từ file JSON khi app khởi động"""
-        import json
+    def _load_history_page(self):
+        """Đưa trang lịch sử tiếp theo vào hàng đợi thêm hàng"""
+        if self._history_queue:
+            return  # Trang trước chưa thêm xong
         
-        if not os.path.exists(self.HISTORY_FILE):
-            print("[HISTORY] No history file found, starting fresh")
+        offset = self._history_loaded
+        limit = min(self.HISTORY_PAGE_SIZE, self._history_total - offset)
+        if limit <= 0:
+            return
+        
+        self._history_queue.extend(self.history.page(offset=offset, limit=limit))
+        self._load_history_chunk()
+    
+    def _load_history_chunk(self):
+        """Thêm tối đa HISTORY_CHUNK_SIZE hàng lịch sử đang chờ (trước các hàng mới tạo)"""
+        queue = self._history_queue
+        if not queue:
             return
         
         try:
-            with open(self.HISTORY_FILE, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-            
-            print(f"[HISTORY] Loading {len(history)} entries...")
-            
-            for entry in history:
-                # Thêm row vào bảng
-                row = self.table.rowCount()
-                self.table.add_video_row(
-                    stt=int(entry.get("stt", row + 1)),
-                    prompt=entry.get("prompt", "..."),
-                    status=entry.get("progress", "0%"),
-                    product_path="",  # Không lưu ảnh trong history
-                    ref_path=""
-                )
-                
-                # Restore video path nếu có
-                video_path = entry.get("video_path")
-                if video_path:
-                    video_item = self.table.item(row, 5)
-                    if video_item:
-                        video_item.setText(entry.get("video_name", ""))
-                        video_item.setData(Qt.ItemDataRole.UserRole, video_path)
-                        video_item.setToolTip(f"Double-click để xem: {video_path}")
-            
-            print(f"[HISTORY] Loaded {len(history)} entries successfully")
+            entries = [queue.popleft() for _ in range(min(self.HISTORY_CHUNK_SIZE, len(queue)))]
+            self._add_history_rows(entries, self._history_loaded)
+            self._history_loaded += len(entries)
         except Exception as e:
             print(f"[HISTORY] Error loading: {e}")
+            queue.clear()
+        
+        if queue:
+            QTimer.singleShot(0, self._load_history_chunk)
+        else:
+            print(f"[HISTORY] Loaded {self._history_loaded}/{self._history_total} entries")
+    
+    def _on_table_scrolled(self, value: int):
+        """Cuộn gần tới cuối phần lịch sử đã load → load trang tiếp theo"""
+        if self._history_loaded >= self._history_total:
+            return
+        
+        # Vị trí hàng lịch sử cuối cùng trong viewport (không phụ thuộc chế độ cuộn)
+        last_row_y = self.table.rowViewportPosition(self._history_loaded - 1)
+        margin = UIConfig.TABLE_ROW_HEIGHT * self.HISTORY_CHUNK_SIZE
+        if last_row_y < self.table.viewport().height() + margin:
+            self._load_history_page()
+    
+    def _add_history_rows(self, entries: list, position: int):
+        """Chèn các hàng từ entry lịch sử vào vị trí position (1 lần báo cho view)"""
+        rows = []
+        for offset, entry in enumerate(entries):
+            video_path = entry.get("video_path")  # Restore video nếu có
+            rows.append(VideoRow(
+                stt=int(entry.get("stt") or position + offset + 1),
+                prompt=entry.get("prompt", "..."),
+                status=entry.get("progress", "0%"),
+                product_path=entry.get("product_path") or "",
+                ref_path=entry.get("ref_path") or "",
+                video_id=entry["video_id"],
+                video_paths=[video_path] if video_path else []
+            ))
+        self.table.add_video_rows(rows, position)
+    
+    def _resume_unfinished_tasks(self):
+        """Gắn lại vào các video đang tạo dở khi app bị tắt (không submit lại)"""
+        unfinished = self.tasks.unfinished()
+        if not unfinished:
+            return
+        
+        api_key = self.config_panel.get_config().get('api_key', '') or app_config.GEMINI_API_KEY
+        if not api_key:
+            print(f"[TASKS] {len(unfinished)} task chưa xong nhưng chưa có API key - bỏ qua resume")
+            return
+        
+        print(f"[TASKS] Resume {len(unfinished)} task chưa xong từ lần chạy trước")
+        self.resume_worker = TaskResumeWorker(api_key, self.tasks)
+        self.resume_worker.progress.connect(self.progress_aggregator.log, Qt.ConnectionType.DirectConnection)
+        self.resume_worker.task_done.connect(self._on_resumed_task_done)
+        self.resume_worker.start()
+    
+    def _on_resumed_task_done(self, task):
+        """Task resume xong → cập nhật hàng + lịch sử theo video_id của task"""
+        video_id = task.params.get("video_id")
+        if not video_id:
+            return
+        
+        row = self.table.find_row(video_id)
+        if task.status == TaskStatus.COMPLETED:
+            changes = dict(
+                progress="100%", video_path=task.output_path,
+                video_name=os.path.basename(task.output_path)
+            )
+            if row >= 0:
+                self.table.update_row_progress(row, "100%")
+                self._set_video_button(row, task.output_path)
+        else:
+            changes = dict(progress="Lỗi")
+            if row >= 0:
+                self.table.update_row_progress(row, "Lỗi")
+        
+        # Hàng có thể chưa load (trang lịch sử sau) → ghi thẳng theo video_id
+        if self.history.get(video_id) is not None:
+            self.history.record(video_id, **changes)
     
     def _clear_history(self):
         """Xóa toàn bộ lịch sử"""
+        self._history_queue.clear()
+        self._history_loaded = 0
+        self._history_total = 0
         self.table.setRowCount(0)
-        if os.path.exists(self.HISTORY_FILE):
-            os.remove(self.HISTORY_FILE)
-            print("[HISTORY] History cleared")
+        self.history.clear()
+        print("[HISTORY] History cleared")
     
     def _load_sample_data(self):
         """Tải dữ liệu mẫu (sẽ thay bằng dữ liệu thật sau)"""
@@ -1700,34 +1636,37 @@ class VideoTableTab(QWidget):
         self.config_panel.start_btn.setText("⏳ Đang xử lý...")
         
         # GIỮ LẠI LỊCH SỬ - Không xóa bảng cũ, thêm rows mới vào cuối
-        # Lấy STT tiếp theo từ số hàng hiện tại
-        current_row_count = self.table.rowCount()
         video_count = ui_config.get('videos_per_prompt', 2)
         
         # Lưu paths để dùng trong progress updates
         self._current_product_path = ui_config['product_image_path']
         self._current_ref_path = ui_config['ref_path']
         
-        # Lưu index của rows mới để update progress
-        self._new_row_start = current_row_count
-        
-        # Tạo rows MỚI với ảnh và prompt "..." - thêm vào cuối
+        # Tạo rows MỚI với ảnh và prompt "..." - thêm vào cuối, ghi vào lịch sử
+        # Giữ video_id (không giữ index hàng - lịch sử load sau sẽ chèn phía trên)
+        self._current_video_ids = []
         for i in range(video_count):
-            self.table.add_video_row(
-                stt=current_row_count + i + 1,  # STT tiếp theo
+            row = self._new_row(
                 prompt="...",
                 status="0%",
                 product_path=self._current_product_path,
                 ref_path=self._current_ref_path
             )
+            self._current_video_ids.append(self.table.get_row_video_id(row))
         
-        # Tạo và chạy worker
-        self.video_worker = VideoWorker(workflow_config)
-        self.video_worker.progress.connect(self._on_worker_progress)
+        # Tạo và chạy worker (task được lưu để resume nếu app bị tắt giữa chừng)
+        workflow_config.video_ids = list(self._current_video_ids)
+        self.video_worker = VideoWorker(workflow_config, task_store=self.tasks)
+        self.video_worker.progress.connect(self.progress_aggregator.log, Qt.ConnectionType.DirectConnection)
         self.video_worker.step_completed.connect(self._on_step_completed)
         self.video_worker.finished_all.connect(self._on_worker_finished)
         self.video_worker.start()
     
+    def _on_worker_logs(self, logs: list):
+        """Xử lý 1 đợt log đã gom [(message, level), ...]"""
+        for message, level in logs:
+            self._on_worker_progress(message, level)
+    
     def _on_worker_progress(self, message: str, level: str):
         """Xử lý log từ worker"""
         # Tìm MainWindow để log
@@ -1741,82 +1680,60 @@ class VideoTableTab(QWidget):
         """Xử lý khi hoàn thành một bước - cập nhật tiến độ theo %"""
         print(f"[STEP COMPLETED] {step_name}")
         
+        current_rows = [self.table.find_row(video_id) for video_id in self._current_video_ids]
+        
         if step_name == "image_analysis":
             # 25% - Phân tích ảnh hoàn tất - chỉ update rows MỚI
-            start_row = getattr(self, '_new_row_start', 0)
-            for row in range(start_row, self.table.rowCount()):
-                self.table.update_row_progress(row, "25%")
+            for row in current_rows:
+                if row >= 0:
+                    self.table.update_row_progress(row, "25%")
+                    self._record_row(row, progress="25%")
         
         elif step_name == "script_generation":
             # 50% - Kịch bản hoàn tất, cập nhật prompt tiếng Việt
             # Cấu trúc script: {"tong_quan": {...}, "canh": [...]}
             scenes = result.get("canh", [])
             print(f"[DEBUG] Found {len(scenes)} scenes in script")
-            start_row = getattr(self, '_new_row_start', 0)
-            for i, scene in enumerate(scenes):
-                row_idx = start_row + i
-                if row_idx < self.table.rowCount():
+            for row_idx, scene in zip(current_rows, scenes):
+                if row_idx >= 0:
                     # Hiển thị mô tả tiếng Việt: hành động + bối cảnh
                     hanh_dong = scene.get("hanh_dong", "")
                     boi_canh = scene.get("boi_canh", "")
                     prompt_vn = f"{hanh_dong}"
                     self.table.update_row_progress(row=row_idx, progress="50%", prompt=prompt_vn)
+                    self._record_row(row_idx, progress="50%", prompt=prompt_vn)
         
         elif step_name == "prompt_conversion":
             # 75% - Prompt Veo hoàn tất - chỉ update rows MỚI
-            start_row = getattr(self, '_new_row_start', 0)
-            for row in range(start_row, self.table.rowCount()):
-                self.table.update_row_progress(row, "75%")
+            for row in current_rows:
+                if row >= 0:
+                    self.table.update_row_progress(row, "75%")
+                    self._record_row(row, progress="75%")
         
         elif step_name == "video_generation":
             # 100% - Video hoàn tất - CẬP NHẬT VIDEO BUTTONS
             videos = result.get("videos", [])
-            start_row = getattr(self, '_new_row_start', 0)
             
-            print(f"[VIDEO] Got {len(videos)} videos, starting from row {start_row}")
+            print(f"[VIDEO] Got {len(videos)} videos for {len(current_rows)} rows")
             
-            for i, video_path in enumerate(videos):
-                row_idx = start_row + i
-                if row_idx < self.table.rowCount():
+            for row_idx, video_path in zip(current_rows, videos):
+                if row_idx >= 0:
                     # Update progress to 100%
                     self.table.update_row_progress(row=row_idx, progress="100%")
                     
-                    # ✅ CẬP NHẬT VIDEO BUTTON trong slot
-                    video_widget = self.table.cellWidget(row_idx, 5)
-                    if video_widget and video_path:
-                        # Tìm button slot đầu tiên (i=0 vì mỗi row có 1 video)
-                        video_btn = video_widget.findChild(QPushButton, f"video_slot_0")
-                        
-                        if video_btn:
-                            video_filename = os.path.basename(video_path)
-                            
-                            # Enable button
-                            video_btn.setEnabled(True)
-                            video_btn.setText("▶")
-                            video_btn.setToolTip(f"Click để xem: {video_filename}")
-                            
-                            # Update style - video available
-                            video_btn.setStyleSheet("""
-                                QPushButton { 
-                                    background: #4CAF50; 
-                                    color: white; 
-                                    font-size: 14px; 
-                                    font-weight: bold;
-                                    border-radius: 4px;
-                                    border: none;
-                                }
-                                QPushButton:hover { 
-                                    background: #45a049;
-                                }
-                                QPushButton:pressed {
-                                    background: #3d8b40;
-                                }
-                            """)
-                            
-                            # Connect click handler to open video
-                            video_btn.clicked.connect(lambda checked, path=video_path: self._open_video(path))
-                            
-                            print(f"[VIDEO] Updated button for row {row_idx}: {video_filename}")
+                    if video_path:
+                        self._set_video_button(row_idx, video_path)
+                        self._record_row(
+                            row_idx, progress="100%",
+                            video_path=video_path, video_name=os.path.basename(video_path)
+                        )
+                    else:
+                        self._record_row(row_idx, progress="100%")
+    
+    def _set_video_button(self, row_idx: int, video_path: str):
+        """Bật nút phát video ở ô kết quả của hàng"""
+        self.table.set_row_video(row_idx, video_path)
+        print(f"[VIDEO] Updated button for row {row_idx}: {os.path.basename(video_path)}")
     
     def _open_video(self, video_path: str):
         """Helper: Mở video với default player"""
@@ -1841,13 +1758,12 @@ class VideoTableTab(QWidget):
     
     def _on_worker_finished(self, success: bool, message: str):
         """Xử lý khi worker hoàn thành"""
+        self.progress_aggregator.flush()  # Log còn chờ hiện trước thông báo
+        
         # Enable lại nút
         self.config_panel.start_btn.setEnabled(True)
         self.config_panel.start_btn.setText("▶ BẮT ĐẦU TẠO VIDEO")
         
-        # Lưu lịch sử sau khi hoàn tất
-        self._save_history()
-        
         if success:
             QMessageBox.information(self, "Hoàn tất", message)
         else:
@@ -1855,71 +1771,52 @@ class VideoTableTab(QWidget):
     
     def _on_add_clicked(self):
         """Xử lý khi nhấn nút Thêm"""
-        row_count = self.table.rowCount()
-        self.table.add_video_row(row_count + 1, "", "Đang chờ")
+        self._new_row("", "Đang chờ")
     
-    def _on_play_video(self, row: int, column: int):
+    def _on_play_video(self, index):
         """
         Xử lý khi double-click vào cell - mở video nếu cột Video kết quả
         """
-        # Cột 5 là Video kết quả
-        if column == 5:
-            video_item = self.table.item(row, 5)
-            if video_item:
-                video_path = video_item.data(Qt.ItemDataRole.UserRole)
-                if video_path and os.path.exists(video_path):
-                    # Dùng shared helper
-                    self._open_video(video_path)
-                else:
-                    QMessageBox.information(self, "Thông báo", "Video chưa được tạo hoặc không tồn tại!")
+        if index.column() == COL_VIDEOS:
+            video_paths = self.table.row_data(index.row()).video_paths
+            video_path = video_paths[0] if video_paths else ""
+            if video_path and os.path.exists(video_path):
+                # Dùng shared helper
+                self._open_video(video_path)
+            else:
+                QMessageBox.information(self, "Thông báo", "Video chưa được tạo hoặc không tồn tại!")
     
     
     def _on_delete_clicked(self):
         """Xử lý khi nhấn nút Xóa - Xóa các hàng được chọn"""
-        rows_to_delete = []
-        
         # Tìm các hàng được chọn (checkbox)
-        for row in range(self.table.rowCount()):
-            widget = self.table.cellWidget(row, 0)
-            if widget:
-                checkbox = widget.findChild(QCheckBox)
-                if checkbox and checkbox.isChecked():
-                    rows_to_delete.append(row)
+        rows_to_delete = self.table.checked_rows()
         
         if not rows_to_delete:
             QMessageBox.information(self, "Thông báo", "Vui lòng chọn ít nhất một hàng để xóa!")
             return
         
+        # Xóa khỏi lịch sử (hàng lịch sử đã load nằm ở đầu bảng)
+        self.history.delete(self.table.get_row_video_id(row) for row in rows_to_delete)
+        removed_history = sum(1 for row in rows_to_delete if row < self._history_loaded)
+        self._history_loaded -= removed_history
+        self._history_total -= removed_history
+        
         # Xóa từ cuối lên để không bị lỗi index
         for row in reversed(rows_to_delete):
             self.table.removeRow(row)
         
-        # Cập nhật lại STT
+        # Cập nhật lại STT (chỉ ghi lịch sử các hàng bị đổi số)
         for row in range(self.table.rowCount()):
-            stt_item = self.table.item(row, 1)
-            if stt_item:
-                stt_item.setText(str(row + 1))
+            if self.table.row_data(row).stt != row + 1:
+                self.table.set_stt(row, row + 1)
+                self._record_row(row, stt=str(row + 1))
     
     def _on_select_all(self):
         """Toggle chọn/bỏ chọn tất cả"""
-        # Đếm số hàng đang được chọn
-        selected_count = 0
-        for row in range(self.table.rowCount()):
-            widget = self.table.cellWidget(row, 0)
-            if widget:
-                checkbox = widget.findChild(QCheckBox)
-                if checkbox and checkbox.isChecked():
-                    selected_count += 1
-        
         # Nếu tất cả đang chọn -> bỏ chọn, ngược lại -> chọn tất cả
-        new_state = selected_count != self.table.rowCount()
-        
-        for row in range(self.table.rowCount()):
-            widget = self.table.cellWidget(row, 0)
-            if widget:
-                checkbox = widget.findChild(QCheckBox)
-                if checkbox:
-                    checkbox.setChecked(new_state)
+        selected_count = len(self.table.checked_rows())
+        self.table.set_all_checked(selected_count != self.table.rowCount())
     
     def _on_import_images(self):
         """Import ảnh sản phẩm từ file dialog"""
@@ -1933,9 +1830,8 @@ class VideoTableTab(QWidget):
         if files:
             prompt = self.config_panel.prompt_text.toPlainText()
             for file_path in files:
-                row_count = self.table.rowCount()
                 # Thêm hàng mới với ảnh đã chọn
-                self.table.add_video_row(row_count + 1, prompt or os.path.basename(file_path), "Đang chờ")
+                self._new_row(prompt or os.path.basename(file_path), "Đang chờ")
             
             QMessageBox.information(
                 self, 
@@ -2079,35 +1975,13 @@ class VeoSettingsTab(QWidget):
     
     def _on_delete_clicked(self):
         """Xóa các hàng được chọn"""
-        rows_to_delete = []
-        for row in range(self.table.rowCount()):
-            widget = self.table.cellWidget(row, 0)
-            if widget:
-                checkbox = widget.findChild(QCheckBox)
-                if checkbox and checkbox.isChecked():
-                    rows_to_delete.append(row)
-        
-        for row in sorted(rows_to_delete, reverse=True):
+        for row in reversed(self.table.checked_rows()):
             self.table.removeRow(row)
     
     def _on_select_all(self):
         """Toggle chọn/bỏ chọn tất cả"""
-        all_checked = True
-        for row in range(self.table.rowCount()):
-            widget = self.table.cellWidget(row, 0)
-            if widget:
-                checkbox = widget.findChild(QCheckBox)
-                if checkbox and not checkbox.isChecked():
-                    all_checked = False
-                    break
-        
-        new_state = not all_checked
-        for row in range(self.table.rowCount()):
-            widget = self.table.cellWidget(row, 0)
-            if widget:
-                checkbox = widget.findChild(QCheckBox)
-                if checkbox:
-                    checkbox.setChecked(new_state)
+        all_checked = len(self.table.checked_rows()) == self.table.rowCount()
+        self.table.set_all_checked(not all_checked)
     
     def _on_import_images(self):
         """Import ảnh sản phẩm từ file dialog"""
@@ -0,0 +1,406 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                  VIDEO TABLE MODEL + DELEGATE                                ║
+║      Dữ liệu bảng video (model) + vẽ ô ảnh/tiến độ/video (không widget)     ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Cách hoạt động:
+- VideoTableModel giữ list VideoRow - thêm/xóa/sửa hàng chỉ đổi dữ liệu,
+  không tạo widget nào (QTableWidget + setCellWidget tạo ~15 widget mỗi hàng)
+- VideoTableDelegate vẽ thumbnail, thanh tiến độ, ô video bằng QPainter
+  - Qt chỉ gọi paint() cho hàng đang hiện → 10.000 hàng vẫn nhẹ
+  - Thumbnail lấy từ ThumbnailService khi hàng được vẽ lần đầu
+  - Click ô ảnh / nút ▶ / "Tạo lại" được xử lý trong editorEvent()
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QRect, QRectF, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QPainter, QPen
+from PyQt6.QtWidgets import QStyle, QStyledItemDelegate
+
+from src.ui.shared import UIConfig, get_thumbnail_service
+
+
+# Thứ tự cột
+COL_CHECK, COL_STT, COL_IMAGE, COL_PROMPT, COL_PROGRESS, COL_VIDEOS = range(6)
+COLUMN_TITLES = ["", "STT", "Image", "Prompt", "Tiến độ", "Video kết quả"]
+
+# Role riêng: lấy VideoRow của hàng
+ROW_ROLE = Qt.ItemDataRole.UserRole + 1
+
+_PERCENT_RE = re.compile(r"(\d{1,3})\s*%")
+
+
+@dataclass
+class VideoRow:
+    """Dữ liệu 1 hàng trong bảng video"""
+    stt: int
+    prompt: str = "..."
+    status: str = "0%"
+    product_path: str = ""
+    ref_path: str = ""
+    num_slots: int = 4
+    video_id: str = ""
+    video_paths: List[str] = field(default_factory=list)
+    show_retry: bool = False     # Hiện nút "Tạo lại" (khi đã có video)
+    checked: bool = False
+
+    def percent(self) -> Optional[int]:
+        """Tiến độ dạng số (None nếu status không phải %)"""
+        match = _PERCENT_RE.search(self.status)
+        return min(100, int(match.group(1))) if match else None
+
+
+class VideoTableModel(QAbstractTableModel):
+    """Model của bảng video - 1 VideoRow mỗi hàng"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[VideoRow] = []
+
+    # ===== QAbstractTableModel =====
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMN_TITLES)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return COLUMN_TITLES[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        col = index.column()
+
+        if role == ROW_ROLE:
+            return row
+        if role == Qt.ItemDataRole.CheckStateRole and col == COL_CHECK:
+            return Qt.CheckState.Checked if row.checked else Qt.CheckState.Unchecked
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if col == COL_STT:
+                return str(row.stt)
+            if col == COL_PROMPT:
+                return row.prompt
+            if col == COL_PROGRESS:
+                return row.status
+            return None
+        if role == Qt.ItemDataRole.ForegroundRole and col == COL_STT:
+            return QColor(UIConfig.COLORS['accent_yellow'])
+        if role == Qt.ItemDataRole.TextAlignmentRole and col == COL_STT:
+            return Qt.AlignmentFlag.AlignCenter
+        if role == Qt.ItemDataRole.ToolTipRole:
+            if col == COL_IMAGE:
+                return "Click để chọn ảnh sản phẩm / nhân vật"
+            if col == COL_VIDEOS and row.video_paths:
+                return "\n".join(os.path.basename(p) for p in row.video_paths if p)
+        return None
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid():
+            return False
+        row = self._rows[index.row()]
+        if role == Qt.ItemDataRole.CheckStateRole and index.column() == COL_CHECK:
+            row.checked = Qt.CheckState(value) == Qt.CheckState.Checked
+        elif role == Qt.ItemDataRole.EditRole and index.column() == COL_PROMPT:
+            row.prompt = str(value)
+        else:
+            return False
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        base = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() == COL_CHECK:
+            return base | Qt.ItemFlag.ItemIsUserCheckable
+        if index.column() == COL_PROMPT:
+            return base | Qt.ItemFlag.ItemIsEditable
+        return base
+
+    # ===== API =====
+
+    def row(self, row: int) -> VideoRow:
+        return self._rows[row]
+
+    def rows(self) -> List[VideoRow]:
+        return self._rows
+
+    def insert_row(self, video_row: VideoRow, position: Optional[int] = None) -> int:
+        position = len(self._rows) if position is None else max(0, min(position, len(self._rows)))
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._rows.insert(position, video_row)
+        self.endInsertRows()
+        return position
+
+    def insert_rows(self, video_rows: List[VideoRow], position: Optional[int] = None) -> int:
+        """Chèn nhiều hàng trong 1 lần báo cho view (nhanh hơn gọi insert_row từng hàng)"""
+        if not video_rows:
+            return len(self._rows)
+        position = len(self._rows) if position is None else max(0, min(position, len(self._rows)))
+        self.beginInsertRows(QModelIndex(), position, position + len(video_rows) - 1)
+        self._rows[position:position] = video_rows
+        self.endInsertRows()
+        return position
+
+    def remove_row(self, row: int):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows.clear()
+        self.endResetModel()
+
+    def update_row(self, row: int, **changes):
+        """Đổi field của hàng rồi báo view vẽ lại đúng hàng đó"""
+        video_row = self._rows[row]
+        for name, value in changes.items():
+            setattr(video_row, name, value)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMN_TITLES) - 1))
+
+    def set_all_checked(self, checked: bool):
+        for video_row in self._rows:
+            video_row.checked = checked
+        if self._rows:
+            self.dataChanged.emit(self.index(0, COL_CHECK), self.index(len(self._rows) - 1, COL_CHECK))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DELEGATE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+IMAGE_BOX = 32        # Ô thumbnail (px)
+SLOT_BOX = 36         # Ô video (px)
+SPACING = 4
+
+_PRODUCT_COLORS = ("#3d7a3d", "#4d9a4d")
+_REF_COLORS = ("#2563eb", "#3b82f6")
+
+
+def image_rects(cell: QRect) -> List[QRect]:
+    """Vị trí 2 ô ảnh (sản phẩm, nhân vật) trong ô Image"""
+    top = cell.top() + (cell.height() - IMAGE_BOX) // 2
+    left = cell.left() + SPACING
+    return [QRect(left + i * (IMAGE_BOX + SPACING), top, IMAGE_BOX, IMAGE_BOX) for i in range(2)]
+
+
+def slot_rects(cell: QRect, num_slots: int) -> List[QRect]:
+    """Vị trí các ô video trong ô Video kết quả"""
+    top = cell.top() + (cell.height() - SLOT_BOX) // 2
+    left = cell.left() + SPACING
+    return [QRect(left + i * (SLOT_BOX + SPACING), top, SLOT_BOX, SLOT_BOX) for i in range(num_slots)]
+
+
+def retry_rect(cell: QRect, num_slots: int) -> QRect:
+    """Vị trí nút "Tạo lại" (sau các ô video)"""
+    left = cell.left() + SPACING + num_slots * (SLOT_BOX + SPACING)
+    width = max(0, min(56, cell.right() - left - SPACING))
+    return QRect(left, cell.top() + (cell.height() - 24) // 2, width, 24)
+
+
+class VideoTableDelegate(QStyledItemDelegate):
+    """Vẽ ô ảnh / tiến độ / video và nhận click trên các ô đó"""
+
+    image_clicked = pyqtSignal(int, str)   # (row, "product" | "ref")
+    video_clicked = pyqtSignal(str)        # đường dẫn video
+    retry_clicked = pyqtSignal(int)        # row
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending = set()   # Ảnh đang chờ ThumbnailService
+        self._failed = set()    # Ảnh không đọc được (không yêu cầu lại)
+        self._slot_font = QFont()
+        self._slot_font.setPixelSize(12)
+        self._slot_font.setBold(True)
+        self._small_font = QFont()
+        self._small_font.setPixelSize(10)
+
+    # ===== THUMBNAIL =====
+
+    def thumbnail(self, path: str):
+        """
+        QPixmap của ảnh nếu đã có trong RAM cache của ThumbnailService, None nếu đang load.
+        Chưa có → yêu cầu load, xong thì vẽ lại view (delegate không giữ pixmap riêng).
+        """
+        if path in self._pending or path in self._failed:
+            return None
+
+        view = self.parent()
+        ratio = view.devicePixelRatioF() if view is not None else 1.0
+        service = get_thumbnail_service()
+
+        # Có sẵn trong RAM → callback chạy ngay trong request() (không vẽ lại view)
+        immediate = []
+        in_request = True
+
+        def deliver(pixmap):
+            if in_request:
+                immediate.append(pixmap)
+            else:
+                self._on_thumbnail(path, pixmap)
+
+        self._pending.add(path)
+        service.request(path, service.size_for(ratio), deliver)
+        in_request = False
+
+        if immediate:
+            self._pending.discard(path)
+            if immediate[0] is None:
+                self._failed.add(path)
+            return immediate[0]
+        return None
+
+    def _on_thumbnail(self, path: str, pixmap):
+        self._pending.discard(path)
+        if pixmap is None:
+            self._failed.add(path)
+        view = self.parent()
+        if view is not None and hasattr(view, "viewport"):
+            view.viewport().update()
+
+    # ===== PAINT =====
+
+    def paint(self, painter: QPainter, option, index: QModelIndex):
+        col = index.column()
+        if col not in (COL_IMAGE, COL_PROGRESS, COL_VIDEOS):
+            super().paint(painter, option, index)
+            return
+
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, QColor("#333"))
+
+        video_row: VideoRow = index.data(ROW_ROLE)
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if col == COL_IMAGE:
+            self._paint_images(painter, option.rect, video_row)
+        elif col == COL_PROGRESS:
+            self._paint_progress(painter, option.rect, video_row)
+        else:
+            self._paint_videos(painter, option.rect, video_row)
+        painter.restore()
+
+    def _paint_images(self, painter: QPainter, cell: QRect, video_row: VideoRow):
+        for rect, path, colors in zip(
+            image_rects(cell),
+            (video_row.product_path, video_row.ref_path),
+            (_PRODUCT_COLORS, _REF_COLORS)
+        ):
+            pixmap = self.thumbnail(path) if path else None
+            if path and pixmap is not None:
+                target = rect.adjusted(2, 2, -2, -2)
+                scaled = pixmap.size().scaled(target.size(), Qt.AspectRatioMode.KeepAspectRatio)
+                x = target.left() + (target.width() - scaled.width()) // 2
+                y = target.top() + (target.height() - scaled.height()) // 2
+                painter.drawPixmap(QRect(x, y, scaled.width(), scaled.height()), pixmap)
+                painter.setPen(QPen(QColor(colors[0]), 1))
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+                painter.drawRoundedRect(QRectF(rect).adjusted(0.5, 0.5, -0.5, -0.5), 3, 3)
+            elif path:
+                # Đang load thumbnail
+                painter.setPen(QPen(QColor(colors[0]), 1))
+                painter.setBrush(QColor("#2a2a2a"))
+                painter.drawRoundedRect(QRectF(rect).adjusted(0.5, 0.5, -0.5, -0.5), 3, 3)
+            else:
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.setBrush(QColor(colors[0]))
+                painter.drawRoundedRect(QRectF(rect), 3, 3)
+                painter.setPen(QColor("white"))
+                font = QFont(self._slot_font)
+                font.setPixelSize(16)
+                painter.setFont(font)
+                painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, "+")
+
+    def _paint_progress(self, painter: QPainter, cell: QRect, video_row: VideoRow):
+        status = video_row.status
+        percent = video_row.percent()
+        text_rect = cell.adjusted(4, 0, -4, 0)
+
+        if percent is not None and status.strip().endswith("%"):
+            bar = QRect(text_rect.left(), cell.center().y() + 7, text_rect.width(), 4)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#2a2a2a"))
+            painter.drawRoundedRect(QRectF(bar), 2, 2)
+            done = QRect(bar.left(), bar.top(), bar.width() * percent // 100, bar.height())
+            painter.setBrush(QColor("#4CAF50" if percent == 100 else "#ffcc00"))
+            painter.drawRoundedRect(QRectF(done), 2, 2)
+            text_rect.setBottom(cell.center().y() + 4)
+
+        if status == "100%":
+            color = "#4CAF50"
+        elif "%" in status:
+            color = "#ffcc00"
+        else:
+            color = "#888"
+        font = QFont(self._small_font)
+        font.setPixelSize(11)
+        font.setBold(status == "100%")
+        painter.setFont(font)
+        painter.setPen(QColor(color))
+        painter.drawText(
+            text_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
+            painter.fontMetrics().elidedText(status, Qt.TextElideMode.ElideRight, text_rect.width())
+        )
+
+    def _paint_videos(self, painter: QPainter, cell: QRect, video_row: VideoRow):
+        painter.setFont(self._slot_font)
+        for i, rect in enumerate(slot_rects(cell, video_row.num_slots)):
+            has_video = i < len(video_row.video_paths) and video_row.video_paths[i]
+            if has_video:
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.setBrush(QColor("#22c55e"))
+                painter.drawRoundedRect(QRectF(rect), 4, 4)
+                painter.setPen(QColor("white"))
+                painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, "▶")
+            else:
+                painter.setPen(QPen(QColor("#555"), 1, Qt.PenStyle.DashLine))
+                painter.setBrush(QColor("#2a2a2a"))
+                painter.drawRoundedRect(QRectF(rect).adjusted(0.5, 0.5, -0.5, -0.5), 4, 4)
+                painter.setPen(QColor("#555"))
+                painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, str(i + 1))
+
+        if video_row.show_retry and video_row.video_paths:
+            rect = retry_rect(cell, video_row.num_slots)
+            if rect.width() > 0:
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.setBrush(QColor("#444"))
+                painter.drawRoundedRect(QRectF(rect), 3, 3)
+                painter.setFont(self._small_font)
+                painter.setPen(QColor("#ccc"))
+                painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, "Tạo lại")
+
+    # ===== CLICK =====
+
+    def editorEvent(self, event, model, option, index: QModelIndex) -> bool:
+        if event.type() != event.Type.MouseButtonRelease or event.button() != Qt.MouseButton.LeftButton:
+            return super().editorEvent(event, model, option, index)
+
+        pos = event.position().toPoint()
+        video_row: VideoRow = index.data(ROW_ROLE)
+        col = index.column()
+
+        if col == COL_IMAGE:
+            for rect, img_type in zip(image_rects(option.rect), ("product", "ref")):
+                if rect.contains(pos):
+                    self.image_clicked.emit(index.row(), img_type)
+                    return True
+        elif col == COL_VIDEOS:
+            for i, rect in enumerate(slot_rects(option.rect, video_row.num_slots)):
+                if rect.contains(pos) and i < len(video_row.video_paths) and video_row.video_paths[i]:
+                    self.video_clicked.emit(video_row.video_paths[i])
+                    return True
+            if video_row.show_retry and video_row.video_paths and \
+                    retry_rect(option.rect, video_row.num_slots).contains(pos):
+                self.retry_clicked.emit(index.row())
+                return True
+
+        return super().editorEvent(event, model, option, index)
@@ -1,2 +1,2 @@
 """Workers package for background processing"""
-from .video_worker import VideoWorker, VideoWorkflowConfig
+from .video_worker import VideoWorker, VideoWorkflowConfig, TaskResumeWorker
@@ -6,8 +6,8 @@
 """
 
 from PyQt6.QtCore import QThread, pyqtSignal
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 import json
 
 
@@ -25,6 +25,8 @@ class VideoWorkflowConfig:
     model: str = "veo-3.1-fast-generate-preview"  # Model Veo
     threads: int = 1                  # Số luồng (chưa implement multi-thread)
     is_extended: bool = False         # True = video dài (15s+), False = video short (8s)
+    video_ids: List[str] = field(default_factory=list)  # ID lịch sử của từng hàng (theo thứ tự video)
+    stream_scenes: bool = True        # True = stream kịch bản, cảnh nào xong tạo video ngay
 
 
 
@@ -39,9 +41,15 @@ class VideoWorker(QThread):
     step_completed = pyqtSignal(str, dict)  # (step_name, result_data)
     finished_all = pyqtSignal(bool, str)  # (success, message)
     
-    def __init__(self, config: VideoWorkflowConfig):
+    def __init__(self, config: VideoWorkflowConfig, task_store=None):
+        """
+        Args:
+            config: Cấu hình workflow
+            task_store: VideoTaskStore - lưu task đã submit để resume nếu app bị tắt
+        """
         super().__init__()
         self.config = config
+        self.task_store = task_store
         self._is_cancelled = False
     
     def cancel(self):
@@ -55,7 +63,7 @@ class VideoWorker(QThread):
             from src.app.services.image_analysis import ImageAnalysisService
             from src.app.services.script_generation import ScriptGenerationService
             from src.app.services.video_generation import (
-                VeoVideoService, VeoPromptConverter, VideoGenerationRequest
+                VeoVideoService, VeoPromptConverter, VideoGenerationRequest, ScenePromptStream
             )
             
             # ═══════════════════════════════════════════════════════════════
@@ -114,88 +122,7 @@ class VideoWorker(QThread):
                 return
             
             script_service = ScriptGenerationService(self.config.api_key)
-            
-            # ═══════════════════════════════════════════════════════════════
-            # PHÂN NHÁNH: VIDEO NGẮN vs VIDEO DÀI
-            # ═══════════════════════════════════════════════════════════════
-            if self.config.is_extended:
-                # VIDEO DÀI: Tạo nhiều segments liên tục
-                extended_script = script_service.generate_extended_script(
-                    reference_json=reference_json,
-                    product_json=product_json,
-                    user_prompt=self.config.prompt,
-                    total_duration=self.config.video_duration,
-                    segment_duration=8  # Mỗi segment 8s (max của Veo)
-                )
-                
-                if not extended_script:
-                    self.finished_all.emit(False, "Lỗi tạo kịch bản video dài")
-                    return
-                
-                num_segments = len(extended_script.get("segments", []))
-                self.progress.emit(f"   ✓ Đã tạo kịch bản với {num_segments} segments", "SUCCESS")
-                self.step_completed.emit("script_generation", extended_script)
-                
-                # Chuyển extended_script thành các scenes để xử lý tiếp
-                # Mỗi segment sẽ được convert sang Veo prompt riêng
-                script_scenes = extended_script.get("segments", [])
-                is_extended_mode = True
-            else:
-                # VIDEO NGẮN: Flow cũ
-                script = script_service.generate_script(
-                    reference_json=reference_json,
-                    product_json=product_json,
-                    user_prompt=self.config.prompt,
-                    so_video=self.config.video_count,
-                    thoi_luong_moi_video=self.config.video_duration
-                )
-                
-                if not script:
-                    self.finished_all.emit(False, "Lỗi tạo kịch bản")
-                    return
-                
-                self.progress.emit(f"   ✓ Đã tạo kịch bản với {len(script.scenes)} cảnh", "SUCCESS")
-                self.step_completed.emit("script_generation", script.to_dict())
-                script_scenes = script.scenes
-                is_extended_mode = False
-            
-            # ═══════════════════════════════════════════════════════════════
-            # BƯỚC 3: CHUYỂN PROMPT TIẾNG ANH
-            # ═══════════════════════════════════════════════════════════════
-            self.progress.emit("🔄 BƯỚC 3: Đang chuyển prompt sang tiếng Anh...", "INFO")
-            
-            if self._is_cancelled:
-                self.finished_all.emit(False, "Đã hủy")
-                return
-            
             converter = VeoPromptConverter(self.config.api_key)
-            prompts = []
-            
-            for scene in script.scenes:
-                en_prompt = converter.convert(
-                    hanh_dong=scene.hanh_dong,
-                    boi_canh=scene.boi_canh,
-                    reference_json=reference_json,
-                    product_json=product_json
-                )
-                prompts.append({
-                    "scene": scene.so_thu_tu,
-                    "en_prompt": en_prompt
-                })
-                self.progress.emit(f"   ✓ Chuyển xong cảnh {scene.so_thu_tu}", "SUCCESS")
-            
-            self.step_completed.emit("prompt_conversion", {"prompts": prompts})
-            
-            # ═══════════════════════════════════════════════════════════════
-            # BƯỚC 4: TẠO VIDEO (SONG SONG THEO SỐ LUỒNG)
-            # ═══════════════════════════════════════════════════════════════
-            num_threads = self.config.threads
-            self.progress.emit(f"🎬 BƯỚC 4: Đang tạo {len(prompts)} video với {num_threads} luồng...", "INFO")
-            
-            if self._is_cancelled:
-                self.finished_all.emit(False, "Đã hủy")
-                return
-            
             video_service = VeoVideoService(self.config.api_key)
             video_paths = []
             
@@ -205,6 +132,11 @@ class VideoWorker(QThread):
             
             os.makedirs(self.config.output_dir, exist_ok=True)
             
+            # Pool tạo video mở từ trước BƯỚC 2: chế độ stream đưa cảnh vào ngay khi có prompt
+            num_threads = self.config.threads
+            video_executor = ThreadPoolExecutor(max_workers=num_threads)
+            video_futures = []
+            
             # Lock để thread-safe khi emit signals
             results_lock = threading.Lock()
             completed_count = [0]  # Mutable để update trong closure
@@ -228,6 +160,13 @@ class VideoWorker(QThread):
                     resolution="720p",
                     aspect_ratio=self.config.aspect_ratio
                 )
+                task = self._create_task(request, index)
+                
+                def on_operation(name):
+                    # Ghi ngay operation đã submit → app tắt giữa chừng vẫn gắn lại được
+                    if task is not None:
+                        task.operation_name = name
+                        self.task_store.save(task)
                 
                 # Gọi API tạo video - phân nhánh theo loại video
                 if self.config.is_extended:
@@ -236,40 +175,148 @@ class VideoWorker(QThread):
                         target_duration=self.config.video_duration
                     )
                 else:
-                    result = video_service.generate_short_video(request)
+                    result = video_service.generate_short_video(request, on_operation=on_operation)
+                
+                if task is not None:
+                    if result.success:
+                        task.set_completed(result.video_path)
+                    else:
+                        task.set_error(result.error_message or "Không thể tạo video")
+                    self.task_store.save(task)
                 
                 # DEBUG: In kết quả chi tiết
                 print(f"[DEBUG] Video result: success={result.success}, path={result.video_path}, error={result.error_message}")
                 
-                # Update progress (thread-safe)
+                # Update progress (thread-safe) - chế độ stream: tổng = số cảnh đã đưa vào pool
                 with results_lock:
                     completed_count[0] += 1
+                    total = len(video_futures)
                     if result.success:
-                        self.progress.emit(f"   ✓ [{completed_count[0]}/{len(prompts)}] Video {prompt_data['scene']} hoàn thành", "SUCCESS")
+                        self.progress.emit(f"   ✓ [{completed_count[0]}/{total}] Video {prompt_data['scene']} hoàn thành", "SUCCESS")
                         print(f"[DEBUG] Returning video_path: {result.video_path}")
                         return result.video_path
                     else:
-                        self.progress.emit(f"   ✗ [{completed_count[0]}/{len(prompts)}] Lỗi video {prompt_data['scene']}: {result.error_message}", "ERROR")
+                        self.progress.emit(f"   ✗ [{completed_count[0]}/{total}] Lỗi video {prompt_data['scene']}: {result.error_message}", "ERROR")
                         return None
             
-            # Chạy song song với ThreadPoolExecutor
-            with ThreadPoolExecutor(max_workers=num_threads) as executor:
-                # Submit tất cả tasks
-                future_to_prompt = {
-                    executor.submit(generate_single_video, p, i): p 
-                    for i, p in enumerate(prompts)
-                }
+            def start_video(prompt_data, index):
+                """Đưa 1 cảnh đã có prompt EN vào pool tạo video"""
+                if self._is_cancelled:
+                    return
+                with results_lock:
+                    video_futures.append(video_executor.submit(generate_single_video, prompt_data, index))
+            
+            try:
+                # Chế độ stream: cảnh viết xong → chuyển prompt → tạo video, song song với LLM
+                prompt_stream = None
+                failed_count = 0           # cảnh không chuyển được prompt (chế độ stream)
+                if self.config.stream_scenes:
+                    def on_prompt(prompt_data, index):
+                        self.progress.emit(f"   ✓ Chuyển xong cảnh {prompt_data['scene']} → bắt đầu tạo video", "SUCCESS")
+                        start_video(prompt_data, index)
+                    
+                    prompt_stream = ScenePromptStream(converter, reference_json, product_json, on_prompt)
+                    self.progress.emit("   Stream kịch bản: cảnh nào viết xong sẽ được tạo video ngay", "INFO")
+                
+                # ═══════════════════════════════════════════════════════════════
+                # PHÂN NHÁNH: VIDEO NGẮN vs VIDEO DÀI
+                # ═══════════════════════════════════════════════════════════════
+                if self.config.is_extended:
+                    # VIDEO DÀI: Tạo nhiều segments liên tục
+                    extended_script = script_service.generate_extended_script(
+                        reference_json=reference_json,
+                        product_json=product_json,
+                        user_prompt=self.config.prompt,
+                        total_duration=self.config.video_duration,
+                        segment_duration=8,  # Mỗi segment 8s (max của Veo)
+                        on_segment=prompt_stream.add if prompt_stream else None
+                    )
+                    
+                    if extended_script:
+                        num_segments = len(extended_script.get("segments", []))
+                        self.progress.emit(f"   ✓ Đã tạo kịch bản với {num_segments} segments", "SUCCESS")
+                        self.step_completed.emit("script_generation", extended_script)
+                        
+                        # Chuyển extended_script thành các scenes để xử lý tiếp
+                        # Mỗi segment sẽ được convert sang Veo prompt riêng
+                        script_scenes = extended_script.get("segments", [])
+                    script_result = extended_script
+                else:
+                    # VIDEO NGẮN: Flow cũ
+                    script = script_service.generate_script(
+                        reference_json=reference_json,
+                        product_json=product_json,
+                        user_prompt=self.config.prompt,
+                        so_video=self.config.video_count,
+                        thoi_luong_moi_video=self.config.video_duration,
+                        on_scene=prompt_stream.add if prompt_stream else None
+                    )
+                    
+                    if script:
+                        self.progress.emit(f"   ✓ Đã tạo kịch bản với {len(script.scenes)} cảnh", "SUCCESS")
+                        self.step_completed.emit("script_generation", script.to_dict())
+                        script_scenes = script.scenes
+                    script_result = script
+                
+                # ═══════════════════════════════════════════════════════════════
+                # BƯỚC 3: CHUYỂN PROMPT TIẾNG ANH
+                # ═══════════════════════════════════════════════════════════════
+                if prompt_stream is not None:
+                    # Các cảnh đã được chuyển dần trong lúc stream - chờ lô cuối
+                    prompts = prompt_stream.close()
+                    failed_count = len(prompt_stream.failed)
+                    if failed_count:
+                        self.progress.emit(f"   ✗ Không chuyển được prompt cảnh {', '.join(map(str, prompt_stream.failed))}", "ERROR")
+                    if not script_result:
+                        if not prompts:
+                            self.finished_all.emit(False, "Lỗi tạo kịch bản")
+                            return
+                        self.progress.emit(f"   ⚠ Kịch bản bị lỗi giữa chừng - giữ {len(prompts)} cảnh đã nhận", "WARNING")
+                else:
+                    if not script_result:
+                        self.finished_all.emit(False, "Lỗi tạo kịch bản video dài" if self.config.is_extended else "Lỗi tạo kịch bản")
+                        return
+                    
+                    self.progress.emit("🔄 BƯỚC 3: Đang chuyển prompt sang tiếng Anh...", "INFO")
+                    
+                    if self._is_cancelled:
+                        self.finished_all.emit(False, "Đã hủy")
+                        return
+                    
+                    # Chuyển tất cả cảnh trong 1 request (fallback từng cảnh nếu lỗi)
+                    prompts = converter.convert_batch(
+                        script_scenes,
+                        reference_json=reference_json,
+                        product_json=product_json,
+                        on_scene_done=lambda p: self.progress.emit(f"   ✓ Chuyển xong cảnh {p['scene']}", "SUCCESS")
+                    )
+                    for index, prompt_data in enumerate(prompts):
+                        start_video(prompt_data, index)
+                
+                self.step_completed.emit("prompt_conversion", {"prompts": prompts})
+                
+                # ═══════════════════════════════════════════════════════════════
+                # BƯỚC 4: TẠO VIDEO (SONG SONG THEO SỐ LUỒNG)
+                # ═══════════════════════════════════════════════════════════════
+                self.progress.emit(f"🎬 BƯỚC 4: Đang tạo {len(prompts)} video với {num_threads} luồng...", "INFO")
+                
+                if self._is_cancelled:
+                    self.finished_all.emit(False, "Đã hủy")
+                    return
                 
                 # Thu thập kết quả khi hoàn thành
-                for future in as_completed(future_to_prompt):
+                with results_lock:
+                    futures = list(video_futures)
+                for future in as_completed(futures):
                     if self._is_cancelled:
-                        executor.shutdown(wait=False, cancel_futures=True)
                         self.finished_all.emit(False, "Đã hủy")
                         return
                     
                     result_path = future.result()
                     if result_path:
                         video_paths.append(result_path)
+            finally:
+                video_executor.shutdown(wait=False, cancel_futures=True)
             
             self.step_completed.emit("video_generation", {"videos": video_paths})
             
@@ -277,7 +324,7 @@ class VideoWorker(QThread):
             # HOÀN TẤT
             # ═══════════════════════════════════════════════════════════════
             success_count = len(video_paths)
-            total_count = len(prompts)
+            total_count = len(prompts) + failed_count
             
             if success_count == total_count:
                 self.finished_all.emit(True, f"Hoàn tất! Đã tạo {success_count} video")
@@ -289,3 +336,68 @@ class VideoWorker(QThread):
         except Exception as e:
             self.progress.emit(f"❌ Lỗi: {str(e)}", "ERROR")
             self.finished_all.emit(False, str(e))
+    
+    def _create_task(self, request, index: int):
+        """Ghi task PROCESSING vào task_store trước khi submit (None nếu không có store)"""
+        if self.task_store is None:
+            return None
+        from src.app.models import VideoTask, TaskStatus
+        
+        video_ids = self.config.video_ids
+        task = VideoTask(
+            prompt=request.prompt,
+            image_path=request.product_image_path,
+            ref_image_path=request.person_image_path,
+            status=TaskStatus.PROCESSING,
+            output_path=request.output_path,
+            params={
+                "prompt": request.prompt,
+                "person_image_path": request.person_image_path,
+                "product_image_path": request.product_image_path,
+                "output_path": request.output_path,
+                "duration": request.duration,
+                "resolution": request.resolution,
+                "aspect_ratio": request.aspect_ratio,
+                "is_extended": self.config.is_extended,
+                "video_id": video_ids[index] if index < len(video_ids) else ""
+            }
+        )
+        self.task_store.save(task)
+        return task
+
+
+class TaskResumeWorker(QThread):
+    """
+    Chạy tiếp các task tạo video còn dở từ lần chạy trước (app bị tắt giữa batch).
+    Task đã submit được gắn lại vào operation trên server, không submit lại.
+    """
+    
+    progress = pyqtSignal(str, str)        # (message, level)
+    task_done = pyqtSignal(object)         # VideoTask (COMPLETED / ERROR)
+    finished_all = pyqtSignal(int)         # Số task đã xử lý
+    
+    def __init__(self, api_key: str, task_store):
+        super().__init__()
+        self.api_key = api_key
+        self.task_store = task_store
+        self._is_cancelled = False
+    
+    def cancel(self):
+        self._is_cancelled = True
+    
+    def run(self):
+        handled = []
+        try:
+            from src.app.services.video_generation import VeoVideoService
+            from src.app.services.task_store import resume_tasks
+            
+            handled = resume_tasks(
+                self.task_store,
+                VeoVideoService(self.api_key),
+                on_progress=lambda task, message: self.progress.emit(f"   [{task.id}] {message}", "INFO"),
+                on_done=self.task_done.emit,
+                should_stop=lambda: self._is_cancelled
+            )
+        except Exception as e:
+            self.progress.emit(f"❌ Lỗi resume task: {str(e)}", "ERROR")
+        self.finished_all.emit(len(handled))
@@ -0,0 +1,177 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║              TEST SCRIPT - BATCH PROMPT CONVERSION                           ║
+║         Kiểm tra VeoPromptConverter.convert_batch() với model giả lập        ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Mục đích:
+1. N cảnh → 1 request JSON duy nhất
+2. Cảnh thiếu/không hợp lệ trong batch → fallback convert() riêng cảnh đó
+3. JSON hỏng → fallback toàn bộ nhóm
+4. Kịch bản lớn → chia nhóm MAX_BATCH_SCENES
+5. ScenePromptStream: lô lỗi → thử lại từng cảnh, cảnh vẫn lỗi nằm trong failed,
+   lỗi on_prompt được raise lại ở close()
+"""
+
+import json
+import threading
+
+from src.app.services.video_generation import VeoPromptConverter, ScenePromptStream
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FAKE MODEL - Không gọi API thật
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeModel:
+    """Trả JSON batch hoặc prompt đơn tùy theo request"""
+
+    def __init__(self, drop_scenes=(), broken_json=False, single_failures=None):
+        self.drop_scenes = set(drop_scenes)
+        self.broken_json = broken_json
+        # {hanh_dong: số lần convert() riêng cảnh đó bị lỗi trước khi thành công}
+        self.single_failures = dict(single_failures or {})
+        self.batch_calls = 0
+        self.single_calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None):
+        with self._lock:
+            if generation_config:
+                self.batch_calls += 1
+            else:
+                self.single_calls += 1
+
+        if not generation_config:
+            with self._lock:
+                for hanh_dong, remaining in self.single_failures.items():
+                    if hanh_dong in prompt and remaining > 0:
+                        self.single_failures[hanh_dong] = remaining - 1
+                        raise RuntimeError("quota")
+            return FakeResponse("single prompt")
+
+        if self.broken_json:
+            return FakeResponse('{"prompts": [{"scene": 1, "en_prompt": "cut off')
+
+        scene_ids = [
+            int(line.split()[1].rstrip(":"))
+            for line in prompt.splitlines() if line.startswith("Scene ")
+        ]
+        prompts = [
+            {"scene": sid, "en_prompt": f"batch prompt {sid}"}
+            for sid in scene_ids if sid not in self.drop_scenes
+        ]
+        return FakeResponse("```json\n" + json.dumps({"prompts": prompts}) + "\n```")
+
+
+def make_converter(model: FakeModel) -> VeoPromptConverter:
+    converter = VeoPromptConverter.__new__(VeoPromptConverter)
+    converter.model = model
+    return converter
+
+
+def make_scenes(count: int) -> list:
+    return [
+        {"so_thu_tu": i, "hanh_dong": f"Hành động {i}", "boi_canh": "Studio"}
+        for i in range(1, count + 1)
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TESTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def test_single_request_for_script():
+    """3 cảnh → 1 request, không gọi convert() riêng"""
+    model = FakeModel()
+    prompts = make_converter(model).convert_batch(make_scenes(3))
+
+    assert model.batch_calls == 1
+    assert model.single_calls == 0
+    assert [p["scene"] for p in prompts] == [1, 2, 3]
+    assert prompts[1]["en_prompt"] == "batch prompt 2"
+    print("✓ 3 cảnh → 1 request")
+
+
+def test_missing_scene_falls_back():
+    """Cảnh bị thiếu trong JSON → convert() riêng cảnh đó"""
+    model = FakeModel(drop_scenes={2})
+    done = []
+    prompts = make_converter(model).convert_batch(make_scenes(3), on_scene_done=done.append)
+
+    assert model.batch_calls == 1
+    assert model.single_calls == 1
+    assert prompts[1] == {"scene": 2, "en_prompt": "single prompt"}
+    assert len(done) == 3
+    print("✓ Fallback cảnh thiếu")
+
+
+def test_broken_json_falls_back():
+    """JSON hỏng → fallback toàn bộ nhóm"""
+    model = FakeModel(broken_json=True)
+    prompts = make_converter(model).convert_batch(make_scenes(3))
+
+    assert model.single_calls == 3
+    assert all(p["en_prompt"] == "single prompt" for p in prompts)
+    print("✓ Fallback JSON hỏng")
+
+
+def test_large_script_is_chunked():
+    """Kịch bản lớn → chia nhóm, giữ đúng thứ tự"""
+    model = FakeModel()
+    count = VeoPromptConverter.MAX_BATCH_SCENES * 2 + 1
+    prompts = make_converter(model).convert_batch(make_scenes(count))
+
+    # 2 nhóm đầy đủ dùng batch, nhóm cuối chỉ 1 cảnh → convert() trực tiếp
+    assert model.batch_calls == 2
+    assert model.single_calls == 1
+    assert [p["scene"] for p in prompts] == list(range(1, count + 1))
+    print(f"✓ {count} cảnh → {model.batch_calls + model.single_calls} request")
+
+
+def test_stream_retries_and_reports_failed_scenes():
+    """Cảnh lỗi 1 lần được thử lại, cảnh lỗi hẳn nằm trong failed thay vì mất im lặng"""
+    model = FakeModel(drop_scenes={2, 3}, single_failures={"Hành động 2": 1, "Hành động 3": 99})
+    received = []
+    stream = ScenePromptStream(make_converter(model), on_prompt=lambda p, i: received.append(p["scene"]))
+    for scene in make_scenes(3):
+        stream.add(scene)
+    prompts = stream.close()
+
+    assert [p["scene"] for p in prompts] == [1, 2]
+    assert sorted(received) == [1, 2]
+    assert stream.failed == [3]
+    print("✓ Stream: cảnh lỗi được thử lại, cảnh lỗi hẳn được báo")
+
+
+def test_stream_surfaces_callback_error():
+    """on_prompt lỗi → close() raise, add() sau đó không treo"""
+    def on_prompt(prompt_data, index):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+    stream = ScenePromptStream(make_converter(FakeModel()), on_prompt=on_prompt)
+    stream.add(make_scenes(1)[0])
+    stream._executor.submit(lambda: None).result()
+    assert not stream._running
+    stream.add(make_scenes(2)[1])
+    try:
+        stream.close()
+        assert False, "close() phải raise lỗi của on_prompt"
+    except RuntimeError as e:
+        assert "shutdown" in str(e)
+    print("✓ Stream: lỗi on_prompt được raise ở close()")
+
+
+if __name__ == "__main__":
+    test_single_request_for_script()
+    test_missing_scene_falls_back()
+    test_broken_json_falls_back()
+    test_large_script_is_chunked()
+    test_stream_retries_and_reports_failed_scenes()
+    test_stream_surfaces_callback_error()
+    print("\n✅ TẤT CẢ TESTS PASS!")
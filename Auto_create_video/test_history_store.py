@@ -0,0 +1,257 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║              TEST SCRIPT - VIDEO HISTORY STORE                               ║
+║         Lịch sử append-only (SQLite) + load theo trang trong bảng video      ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Mục đích:
+1. Mỗi thay đổi = 1 bản ghi, trạng thái mới nhất gộp đúng, lọc theo status/ngày
+2. Thời gian ghi không tăng theo kích thước lịch sử (20.000 video)
+3. Compact giữ snapshot cuối của mỗi video, xóa event cũ + video đã xóa
+4. Chuyển file video_history.json cũ
+5. Bảng video: trang lịch sử sau chèn phía trên hàng mới tạo khi cuộn xuống
+6. Sửa prompt / đổi ảnh / đánh lại STT sau khi xóa trong bảng được lưu lại
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from src.app.services.history_store import VideoHistoryStore
+
+
+def test_record_and_query():
+    """Ghi thay đổi, đọc trạng thái, lọc + phân trang"""
+    root = tempfile.mkdtemp()
+    store = VideoHistoryStore(os.path.join(root, "history.db"))
+    try:
+        ids = [store.new_video_id() for _ in range(5)]
+        for i, video_id in enumerate(ids):
+            store.record(video_id, stt=str(i + 1), prompt=f"prompt {i}", progress="0%", created_at=1000 + i)
+        store.record(ids[1], progress="50%", prompt="đã đổi")
+        store.record(ids[1], progress="100%", video_path="out/a.mp4")
+
+        entry = store.get(ids[1])
+        assert entry["prompt"] == "đã đổi" and entry["progress"] == "100%"
+        assert entry["video_path"] == "out/a.mp4" and entry["created_at"] == 1001
+
+        assert store.count() == 5
+        assert store.count(status="100%") == 1
+        assert [e["video_id"] for e in store.page(status="0%")] == [ids[0], ids[2], ids[3], ids[4]]
+        assert [e["stt"] for e in store.page(offset=1, limit=2)] == ["2", "3"]
+        assert [e["stt"] for e in store.page(limit=2, newest_first=True)] == ["5", "4"]
+        assert [e["stt"] for e in store.page(since=1002, until=1004)] == ["3", "4"]
+        assert store.stats() == (7, 5)
+        print("✓ Ghi + lọc + phân trang")
+    finally:
+        store.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_constant_save_latency():
+    """Ghi 1 thay đổi khi có 20.000 video không chậm hơn khi có 1.000"""
+    root = tempfile.mkdtemp()
+    store = VideoHistoryStore(os.path.join(root, "history.db"))
+    try:
+        def timed_records(count: int) -> float:
+            start = time.perf_counter()
+            for _ in range(count):
+                store.record(store.new_video_id(), prompt="p", progress="0%")
+            return (time.perf_counter() - start) / count
+
+        early = timed_records(1000)
+        timed_records(18000)
+        late = timed_records(1000)
+
+        assert store.count() == 20000
+        assert late < early * 3, f"Ghi chậm dần: {early * 1e6:.0f}µs → {late * 1e6:.0f}µs"
+        print(f"✓ Thời gian ghi: {early * 1e6:.0f}µs (1k video) → {late * 1e6:.0f}µs (20k video)")
+    finally:
+        store.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_compact():
+    """Compact: còn 1 event (snapshot đầy đủ) mỗi video"""
+    root = tempfile.mkdtemp()
+    db_path = os.path.join(root, "history.db")
+    store = VideoHistoryStore(db_path)
+    try:
+        ids = [store.new_video_id() for _ in range(10)]
+        for video_id in ids:
+            store.record(video_id, prompt="p", progress="0%")
+            for progress in ("25%", "50%", "75%", "100%"):
+                store.record(video_id, progress=progress)
+        store.delete(ids[:2])
+
+        assert store.stats() == (52, 8)
+        assert store.compact() == 44
+        assert store.stats() == (8, 8)
+
+        # Event còn lại là snapshot đầy đủ
+        changes = store._conn.execute("SELECT changes FROM history_events").fetchall()
+        assert all(json.loads(row[0]) == {"prompt": "p", "progress": "100%"} for row in changes)
+        assert store.get(ids[5])["progress"] == "100%"
+        print("✓ Compact")
+    finally:
+        store.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_legacy_json_import():
+    """video_history.json cũ được chuyển sang store, giữ thứ tự"""
+    root = tempfile.mkdtemp()
+    legacy = os.path.join(root, "video_history.json")
+    with open(legacy, "w", encoding="utf-8") as f:
+        json.dump([
+            {"stt": str(i + 1), "prompt": f"p{i}", "progress": "100%",
+             "video_path": None, "video_name": "", "created_at": "2025-01-01 10:00:00"}
+            for i in range(30)
+        ], f)
+
+    store = VideoHistoryStore(os.path.join(root, "history.db"), legacy_json_path=legacy)
+    try:
+        assert store.count() == 30
+        assert [e["prompt"] for e in store.page(limit=3)] == ["p0", "p1", "p2"]
+        assert not os.path.exists(legacy) and os.path.exists(legacy + ".bak")
+        print("✓ Chuyển file JSON cũ")
+    finally:
+        store.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_table_lazy_pages():
+    """Trang lịch sử sau load khi cuộn, chèn phía trên hàng mới tạo"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    from src.ui.tabs.video_table import VideoTableTab
+
+    root = tempfile.mkdtemp()
+    original = (
+        VideoTableTab.HISTORY_FILE, VideoTableTab.HISTORY_DB, VideoTableTab.HISTORY_PAGE_SIZE,
+        VideoTableTab.TASK_DB
+    )
+    VideoTableTab.HISTORY_FILE = os.path.join(root, "video_history.json")
+    VideoTableTab.HISTORY_DB = os.path.join(root, "history.db")
+    VideoTableTab.TASK_DB = os.path.join(root, "tasks.db")
+    VideoTableTab.HISTORY_PAGE_SIZE = 50
+
+    store = VideoHistoryStore(VideoTableTab.HISTORY_DB)
+    for i in range(120):
+        store.record(store.new_video_id(), stt=str(i + 1), prompt=f"old {i}", progress="100%")
+    store.close()
+
+    tab = VideoTableTab()
+    try:
+        def pump():
+            deadline = time.time() + 20
+            while tab._history_queue:
+                assert time.time() < deadline
+                app.processEvents()
+
+        pump()
+        assert tab.table.rowCount() == 50
+
+        # Hàng mới tạo → cuối bảng, ghi ngay vào lịch sử
+        row = tab._new_row("new prompt", "Đang chờ")
+        new_id = tab.table.get_row_video_id(row)
+        assert tab.history.get(new_id)["prompt"] == "new prompt"
+
+        # Cuộn xuống cuối → trang tiếp theo chèn trước hàng mới
+        tab.resize(1200, 600)
+        tab.show()
+        app.processEvents()
+        scrollbar = tab.table.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+        pump()
+        assert tab.table.rowCount() == 101
+        assert tab.table.row_prompt(99) == "old 99"
+        assert tab.table.find_row(new_id) == 100
+
+        # Ghi tiến độ theo video_id, không theo index hàng
+        tab._current_video_ids = [new_id]
+        tab._on_step_completed("image_analysis", {})
+        assert tab.history.get(new_id)["progress"] == "25%"
+        print("✓ Bảng load lịch sử theo trang")
+    finally:
+        tab.history.close()
+        tab.tasks.close()
+        (VideoTableTab.HISTORY_FILE, VideoTableTab.HISTORY_DB, VideoTableTab.HISTORY_PAGE_SIZE,
+         VideoTableTab.TASK_DB) = original
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_table_edits_persisted():
+    """Sửa trong bảng (prompt, ảnh, STT sau khi xóa) còn sau khi mở lại app"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtWidgets import QApplication, QFileDialog
+    app = QApplication.instance() or QApplication([])
+    from src.ui.tabs.video_table import VideoTableTab
+    from src.ui.tabs.video_table_model import COL_PROMPT
+
+    root = tempfile.mkdtemp()
+    original = (VideoTableTab.HISTORY_FILE, VideoTableTab.HISTORY_DB, VideoTableTab.TASK_DB)
+    original_dialog = QFileDialog.getOpenFileName
+    VideoTableTab.HISTORY_FILE = os.path.join(root, "video_history.json")
+    VideoTableTab.HISTORY_DB = os.path.join(root, "history.db")
+    VideoTableTab.TASK_DB = os.path.join(root, "tasks.db")
+
+    store = VideoHistoryStore(VideoTableTab.HISTORY_DB)
+    ids = [store.new_video_id() for _ in range(3)]
+    for i, video_id in enumerate(ids):
+        store.record(video_id, stt=str(i + 1), prompt=f"prompt {i}", progress="100%")
+    store.close()
+
+    tab = VideoTableTab()
+    try:
+        while tab._history_queue:
+            app.processEvents()
+        table = tab.table
+
+        # Sửa prompt trực tiếp trong ô
+        table.video_model.setData(table.video_model.index(1, COL_PROMPT), "edited prompt", Qt.ItemDataRole.EditRole)
+
+        # Chọn ảnh sản phẩm mới
+        product = os.path.join(root, "shoe.png")
+        QFileDialog.getOpenFileName = staticmethod(lambda *args, **kwargs: (product, ""))
+        table._on_image_click(2, "product")
+
+        # Cập nhật tiến độ (cả hàng) không bị ghi như sửa prompt
+        events_before = tab.history.stats()
+        table.update_row_progress(1, "50%")
+        assert tab.history.stats() == events_before
+
+        # Xóa hàng đầu → 2 hàng còn lại đánh số lại 1, 2
+        table.video_model.update_row(0, checked=True)
+        tab._on_delete_clicked()
+        tab.history.close()
+        tab.tasks.close()
+
+        reopened = VideoHistoryStore(VideoTableTab.HISTORY_DB)
+        assert reopened.get(ids[0]) is None
+        assert reopened.get(ids[1])["prompt"] == "edited prompt"
+        assert reopened.get(ids[1])["stt"] == "1"
+        assert reopened.get(ids[2])["product_path"] == product
+        assert reopened.get(ids[2])["stt"] == "2"
+        reopened.close()
+        print("✓ Sửa trong bảng được lưu vào lịch sử")
+    finally:
+        QFileDialog.getOpenFileName = original_dialog
+        tab.history.close()
+        tab.tasks.close()
+        (VideoTableTab.HISTORY_FILE, VideoTableTab.HISTORY_DB, VideoTableTab.TASK_DB) = original
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_record_and_query()
+    test_constant_save_latency()
+    test_compact()
+    test_legacy_json_import()
+    test_table_lazy_pages()
+    test_table_edits_persisted()
+    print("\n✅ TẤT CẢ TESTS PASS!")
@@ -0,0 +1,159 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║              TEST SCRIPT - JSON REPAIR / STREAMING PARSER                    ║
+║         Đọc JSON kịch bản từ output LLM lỗi định dạng / bị cắt / stream      ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Mục đích:
+1. Bộ mẫu response lỗi thường gặp (```json, lời dẫn, dấu phẩy thừa, comment,
+   xuống dòng trong chuỗi, True/None, bị cắt ngang) → đọc đúng
+2. Stream từng mẩu nhỏ: cảnh được trả về ngay khi viết xong, trước khi hết response
+3. Kết quả giống hệt dù chia chunk kiểu nào
+4. Thời gian đọc kịch bản lớn (1000 cảnh) so với json.loads
+"""
+
+import json
+import random
+import time
+
+from src.app.services.json_repair import StreamingJSONParser, extract_json
+from src.app.services.script_generation import VideoScript, is_valid_scene
+
+
+SCRIPT = {
+    "phan_tich_y_tuong": "Review {áo} \"khoác\" mùa đông",
+    "boi_canh_chung": "Phòng khách",
+    "so_video": 2,
+    "thoi_luong_moi_video": 8,
+    "canh": [
+        {"so_thu_tu": 1, "thoi_luong": 8, "hanh_dong": "Cầm áo lên [cận cảnh]", "boi_canh": "Sofa"},
+        {"so_thu_tu": 2, "thoi_luong": 8, "hanh_dong": "Mặc thử, xoay người", "boi_canh": "Gương"},
+    ]
+}
+SCRIPT_TEXT = json.dumps(SCRIPT, ensure_ascii=False, indent=2)
+
+# (tên, response, kết quả mong đợi)
+CORPUS = [
+    ("json thuần", SCRIPT_TEXT, SCRIPT),
+    ("```json fence", f"```json\n{SCRIPT_TEXT}\n```", SCRIPT),
+    ("``` fence không ghi ngôn ngữ", f"```\n{SCRIPT_TEXT}\n```", SCRIPT),
+    ("lời dẫn trước/sau", f"Đây là kịch bản:\n```json\n{SCRIPT_TEXT}\n```\nChúc bạn thành công!", SCRIPT),
+    ("dấu phẩy thừa", '{"a": [1, 2, 3,], "b": {"c": 1,},}', {"a": [1, 2, 3], "b": {"c": 1}}),
+    ("comment", '{\n  // ghi chú\n  "a": 1, /* khối */ "b": 2\n}', {"a": 1, "b": 2}),
+    ("xuống dòng trong chuỗi", '{"a": "dòng 1\ndòng 2\tx"}', {"a": "dòng 1\ndòng 2\tx"}),
+    ("True/False/None", '{"a": True, "b": False, "c": None}', {"a": True, "b": False, "c": None}),
+    ("ngoặc + escape trong chuỗi", r'{"a": "x}]{[\" y", "b": "\u00e1"}', {"a": 'x}]{[" y', "b": "á"}),
+    ("cắt giữa chuỗi", '{"a": 1, "b": "chưa xong', {"a": 1}),
+    ("cắt sau dấu :", '{"a": 1, "b": ', {"a": 1}),
+    ("cắt giữa key", '{"a": 1, "bb', {"a": 1}),
+    ("cắt giữa literal", '{"a": [1, 2], "b": tr', {"a": [1, 2]}),
+    ("cắt sau số", '{"a": [1, 25', {"a": [1, 25]}),
+    ("cắt giữa số thập phân", '{"a": 1, "b": 2.', {"a": 1}),
+    ("key thiếu giá trị", '{"a": 1, "b": }', {"a": 1}),
+    ("mảng gốc", 'Kết quả: [{"scene": 1, "en_prompt": "x"},]', [{"scene": 1, "en_prompt": "x"}]),
+]
+
+
+def test_corpus():
+    """Mỗi mẫu trong bộ response lỗi đều đọc đúng"""
+    for name, text, expected in CORPUS:
+        assert extract_json(text) == expected, name
+    print(f"✓ {len(CORPUS)} mẫu response lỗi định dạng đọc đúng")
+
+
+def test_truncated_script_keeps_finished_scenes():
+    """Hết token giữa cảnh 2 → giữ cảnh 1, bỏ cảnh viết dở"""
+    cut = SCRIPT_TEXT.index("Mặc thử")
+    data = extract_json("```json\n" + SCRIPT_TEXT[:cut], item_keys=("canh",))
+    assert data["canh"] == SCRIPT["canh"][:1]
+    assert data["so_video"] == 2
+
+    # Không có item_keys → object dở vẫn được giữ phần đã xong
+    data = extract_json('{"x": [{"a": 1, "b": "dở')
+    assert data == {"x": [{"a": 1}]}
+
+    try:
+        extract_json("Xin lỗi, tôi không thể tạo kịch bản này.")
+        raise AssertionError("Phải báo lỗi khi không có JSON")
+    except json.JSONDecodeError:
+        pass
+    print("✓ Response bị cắt: giữ cảnh đã xong, bỏ cảnh dở")
+
+
+def test_streaming_scenes_arrive_early():
+    """Cảnh 1 được trả về khi cảnh 2 còn chưa được viết"""
+    text = f"```json\n{SCRIPT_TEXT}\n```"
+    parser = StreamingJSONParser(item_keys=("canh",), root="{")
+    arrivals = []
+    for pos in range(0, len(text), 7):
+        for key, scene in parser.feed(text[pos:pos + 7]):
+            arrivals.append((pos + 7, scene))
+
+    assert [scene for _, scene in arrivals] == SCRIPT["canh"]
+    assert arrivals[0][0] < text.index('"so_thu_tu": 2'), "Cảnh 1 phải có trước khi cảnh 2 bắt đầu"
+    assert all(is_valid_scene(scene) for _, scene in arrivals)
+    assert parser.close() == SCRIPT
+    assert len(VideoScript(SCRIPT).scenes) == 2
+    print(f"✓ Stream: cảnh 1 có ở ký tự {arrivals[0][0]}/{len(text)}")
+
+
+def test_chunking_invariance():
+    """Chia chunk ngẫu nhiên (cắt giữa escape, comment, số...) → cùng kết quả"""
+    text = ('Kịch bản:\n```json\n{"canh": [{"hanh_dong": "a\\"b\\u00e1", "n": 12.5e3},'
+            ' // c\n {"hanh_dong": "x\ny", "ok": True,},], "tong": 1234}\n```')
+    expected = extract_json(text)
+    assert expected == {"canh": [{"hanh_dong": 'a"bá', "n": 12500.0}, {"hanh_dong": "x\ny", "ok": True}], "tong": 1234}
+
+    rng = random.Random(1)
+    for _ in range(200):
+        parser = StreamingJSONParser(item_keys=("canh",))
+        pos, scenes = 0, []
+        while pos < len(text):
+            size = rng.randint(1, 6)
+            scenes.extend(scene for _, scene in parser.feed(text[pos:pos + size]))
+            pos += size
+        assert parser.close() == expected
+        assert scenes == expected["canh"]
+    print("✓ 200 cách chia chunk ngẫu nhiên cho cùng kết quả")
+
+
+def test_large_script_timing():
+    """Kịch bản 1000 cảnh: đo thời gian so với json.loads"""
+    big = dict(SCRIPT)
+    big["canh"] = [
+        {"so_thu_tu": i, "thoi_luong": 8, "hanh_dong": f"Hành động {i} " * 20, "boi_canh": f"Bối cảnh {i} " * 10}
+        for i in range(1, 1001)
+    ]
+    text = "```json\n" + json.dumps(big, ensure_ascii=False, indent=2) + "\n```"
+
+    start = time.perf_counter()
+    json.loads(text[8:-4])
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert extract_json(text) == big
+    whole = time.perf_counter() - start
+
+    parser = StreamingJSONParser(item_keys=("canh",))
+    count = 0
+    start = time.perf_counter()
+    for pos in range(0, len(text), 64):
+        count += len(parser.feed(text[pos:pos + 64]))
+    parser.close()
+    streamed = time.perf_counter() - start
+
+    assert count == 1000
+    assert whole < 2.0 and streamed < 2.0
+    print(
+        f"✓ {len(text) // 1024}KB / 1000 cảnh: json.loads {baseline * 1000:.1f}ms, "
+        f"extract_json {whole * 1000:.1f}ms, stream chunk 64 ký tự {streamed * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    test_corpus()
+    test_truncated_script_keeps_finished_scenes()
+    test_streaming_scenes_arrive_early()
+    test_chunking_invariance()
+    test_large_script_timing()
+    print("\n✅ TẤT CẢ TESTS PASS!")
@@ -0,0 +1,122 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║              TEST SCRIPT - PROGRESS AGGREGATOR                               ║
+║         Gom tiến độ từ nhiều thread, flush về GUI thread theo nhịp 10Hz      ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Mục đích:
+1. Cùng key → chỉ giữ giá trị mới nhất, log giữ đủ + đúng thứ tự, discard bỏ update chờ
+2. 50 task báo tiến độ liên tục: số lần flush ≤ 10/giây, giá trị cuối mỗi hàng đúng,
+   event loop không bị nghẽn
+"""
+
+import os
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QApplication
+
+app = QApplication.instance() or QApplication([])
+
+from src.ui.shared import ProgressAggregator
+
+
+def pump(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def test_coalesce_and_logs():
+    """Giá trị trung gian bị bỏ, log không bị gộp"""
+    aggregator = ProgressAggregator()
+    batches, logs = [], []
+    aggregator.updates_ready.connect(batches.append)
+    aggregator.logs_ready.connect(logs.extend)
+
+    def worker():
+        for i in range(100):
+            aggregator.update(1, f"{i}%")
+            aggregator.update(2, f"row2 {i}")
+            aggregator.log(f"line {i}", "INFO")
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    aggregator.discard(2)
+    pump(0.3)
+
+    assert batches == [{1: "99%"}], batches
+    assert logs == [(f"line {i}", "INFO") for i in range(100)]
+
+    # Không có gì mới → không flush thêm
+    pump(0.2)
+    assert len(batches) == 1
+    print("✓ Gộp theo key + log đủ thứ tự + discard")
+
+
+def test_50_concurrent_tasks():
+    """50 thread polling liên tục: UI nhận ≤ 10 đợt/giây, event loop vẫn chạy đều"""
+    class Worker(QObject):
+        progress = pyqtSignal(int, str)
+
+    worker = Worker()
+    aggregator = ProgressAggregator()
+    worker.progress.connect(aggregator.update, Qt.ConnectionType.DirectConnection)
+
+    latest = {}
+    flush_count = [0]
+
+    def on_updates(updates):
+        flush_count[0] += 1
+        latest.update(updates)
+
+    aggregator.updates_ready.connect(on_updates)
+
+    ticks = []
+    timer = QTimer()
+    timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    timer.start(10)
+
+    seconds = 2.0
+    stop_at = time.perf_counter() + seconds
+    emitted = [0] * 50
+
+    def task(row):
+        step = 0
+        while time.perf_counter() < stop_at:
+            step += 1
+            worker.progress.emit(row, f"{step}")
+            time.sleep(0.002)
+        emitted[row] = step
+
+    threads = [threading.Thread(target=task, args=(row,)) for row in range(50)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    pump(0.3)
+    timer.stop()
+
+    assert flush_count[0] <= elapsed * ProgressAggregator.FLUSH_HZ + 3, flush_count[0]
+    assert latest == {row: str(emitted[row]) for row in range(50)}
+
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    longest_gap = max(gaps)
+    assert longest_gap < 0.25, f"Event loop bị nghẽn {longest_gap * 1000:.0f}ms"
+    print(
+        f"✓ 50 task: {sum(emitted)} lần báo → {flush_count[0]} đợt flush, "
+        f"lượt timer 10ms cách nhau tối đa {longest_gap * 1000:.0f}ms"
+    )
+
+
+if __name__ == "__main__":
+    test_coalesce_and_logs()
+    test_50_concurrent_tasks()
+    print("\n✅ TẤT CẢ TESTS PASS!")
@@ -0,0 +1,241 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║              TEST SCRIPT - STREAM KỊCH BẢN → TẠO VIDEO NGAY                  ║
+║         VideoWorker chạy với model / Veo giả lập, đo thời gian 2 chế độ      ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Mục đích:
+1. stream_scenes=True: video đầu tiên bắt đầu khi LLM còn đang viết kịch bản,
+   đủ video, cảnh đến dồn được chuyển prompt chung 1 lô
+2. Tổng thời gian stream < chờ hết kịch bản rồi mới tạo video
+3. Kịch bản bị cắt giữa chừng → giữ các cảnh đã nhận
+4. Cảnh không chuyển được prompt vẫn được tính vào tổng số video
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+
+app = QApplication.instance() or QApplication([])
+
+from src.app.services import image_analysis, script_generation, video_generation
+from src.app.services.script_generation import ScriptGenerationService
+from src.app.services.video_generation import VeoPromptConverter, VideoGenerationResult
+from src.ui.workers.video_worker import VideoWorker, VideoWorkflowConfig
+
+
+SCENES = 5
+SCENE_WRITE_TIME = 0.2     # LLM viết mỗi cảnh mất 0.2s
+VIDEO_TIME = 0.5           # Veo tạo mỗi video mất 0.5s
+THREADS = 2                # Số luồng tạo video
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FAKE SERVICES - Không gọi API thật
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeScriptModel:
+    """Viết kịch bản từng cảnh một (stream) hoặc trả cả cục sau khi viết xong"""
+
+    def __init__(self, truncate_after: int = None):
+        self.truncate_after = truncate_after
+        self.finished_at = None
+
+    def _pieces(self):
+        scenes = [
+            {"so_thu_tu": i, "thoi_luong": 8, "hanh_dong": f"Hành động {i}", "boi_canh": "Studio"}
+            for i in range(1, SCENES + 1)
+        ]
+        yield '```json\n{"phan_tich_y_tuong": "test", "canh": ['
+        for i, scene in enumerate(scenes):
+            if self.truncate_after is not None and i >= self.truncate_after:
+                yield '{"so_thu_tu": %d, "hanh_dong": "Hành đ' % (i + 1)
+                return
+            time.sleep(SCENE_WRITE_TIME)
+            text = json.dumps(scene, ensure_ascii=False) + ("," if i < len(scenes) - 1 else "")
+            # Chia nhỏ như token stream
+            for pos in range(0, len(text), 16):
+                yield text[pos:pos + 16]
+        yield ']}\n```'
+
+    def _stream(self):
+        for piece in self._pieces():
+            yield FakeResponse(piece)
+        self.finished_at = time.perf_counter()
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return self._stream()
+        text = "".join(self._pieces())
+        self.finished_at = time.perf_counter()
+        return FakeResponse(text)
+
+
+class FakeConverterModel:
+    """Batch JSON prompt, ghi lại kích thước từng lô"""
+
+    def __init__(self, fail_scene: int = None):
+        self.fail_scene = fail_scene
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None):
+        time.sleep(0.05)
+        if not generation_config:
+            if self.fail_scene is not None and f"Hành động {self.fail_scene}" in prompt:
+                raise RuntimeError("quota")
+            with self._lock:
+                self.batches.append(1)
+            return FakeResponse("single prompt")
+        scene_ids = [
+            int(line.split()[1].rstrip(":"))
+            for line in prompt.splitlines() if line.startswith("Scene ")
+        ]
+        with self._lock:
+            self.batches.append(len(scene_ids))
+        prompts = [{"scene": sid, "en_prompt": f"batch prompt {sid}"} for sid in scene_ids if sid != self.fail_scene]
+        return FakeResponse(json.dumps({"prompts": prompts}))
+
+
+class FakeImageService:
+    def __init__(self, api_key):
+        pass
+
+    def analyze_reference_image(self, path):
+        return {"khuon_mat": "test"}
+
+    def analyze_product_image(self, path):
+        return {"san_pham": "test"}
+
+
+class FakeVeoService:
+    starts = []
+
+    def __init__(self, api_key):
+        pass
+
+    def generate_short_video(self, request, on_progress=None, on_operation=None):
+        FakeVeoService.starts.append(time.perf_counter())
+        time.sleep(VIDEO_TIME)
+        with open(request.output_path, "wb") as f:
+            f.write(b"video")
+        return VideoGenerationResult(success=True, video_path=request.output_path)
+
+
+def run_worker(stream: bool, truncate_after: int = None, fail_scene: int = None) -> dict:
+    """Chạy VideoWorker.run() với service giả lập - trả về mốc thời gian"""
+    script_model = FakeScriptModel(truncate_after)
+    converter_model = FakeConverterModel(fail_scene)
+
+    def make_script_service(api_key):
+        service = ScriptGenerationService.__new__(ScriptGenerationService)
+        service.model = script_model
+        return service
+
+    def make_converter(api_key):
+        converter = VeoPromptConverter.__new__(VeoPromptConverter)
+        converter.model = converter_model
+        return converter
+
+    originals = (
+        image_analysis.ImageAnalysisService,
+        script_generation.ScriptGenerationService,
+        video_generation.VeoPromptConverter,
+        video_generation.VeoVideoService,
+    )
+    image_analysis.ImageAnalysisService = FakeImageService
+    script_generation.ScriptGenerationService = make_script_service
+    video_generation.VeoPromptConverter = make_converter
+    video_generation.VeoVideoService = FakeVeoService
+    FakeVeoService.starts = []
+
+    output_dir = tempfile.mkdtemp()
+    try:
+        config = VideoWorkflowConfig(
+            api_key="test", product_image="product.png", ref_image="ref.png", prompt="test",
+            output_dir=output_dir, video_count=SCENES, threads=THREADS, stream_scenes=stream
+        )
+        worker = VideoWorker(config)
+        finished = []
+        videos = []
+        worker.finished_all.connect(lambda ok, message: finished.append((ok, message)))
+        worker.step_completed.connect(
+            lambda step, data: videos.extend(data["videos"]) if step == "video_generation" else None
+        )
+
+        start = time.perf_counter()
+        worker.run()
+        end = time.perf_counter()
+    finally:
+        (
+            image_analysis.ImageAnalysisService,
+            script_generation.ScriptGenerationService,
+            video_generation.VeoPromptConverter,
+            video_generation.VeoVideoService,
+        ) = originals
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        "finished": finished,
+        "videos": len(videos),
+        "first_video": min(FakeVeoService.starts) - start,
+        "script_done": script_model.finished_at - start,
+        "total": end - start,
+        "batches": converter_model.batches,
+    }
+
+
+def test_stream_starts_videos_early():
+    """Video đầu tiên bắt đầu trước khi LLM viết xong, tổng thời gian ngắn hơn"""
+    streamed = run_worker(stream=True)
+    waited = run_worker(stream=False)
+
+    for result in (streamed, waited):
+        assert result["finished"] == [(True, f"Hoàn tất! Đã tạo {SCENES} video")], result["finished"]
+        assert result["videos"] == SCENES
+
+    assert streamed["first_video"] < streamed["script_done"], "Video đầu phải chạy trong lúc LLM còn viết"
+    assert waited["first_video"] > waited["script_done"]
+    assert streamed["total"] < waited["total"]
+    # Cảnh đến dồn được gộp lô → không nhiều request hơn số cảnh
+    assert sum(streamed["batches"]) == SCENES
+    print(
+        f"✓ {SCENES} cảnh: stream xong sau {streamed['total']:.2f}s "
+        f"(video đầu ở {streamed['first_video']:.2f}s, kịch bản xong ở {streamed['script_done']:.2f}s), "
+        f"chờ hết kịch bản {waited['total']:.2f}s"
+    )
+
+
+def test_truncated_stream_keeps_received_scenes():
+    """LLM dừng giữa cảnh 4 → 3 cảnh đã nhận vẫn được tạo video"""
+    result = run_worker(stream=True, truncate_after=3)
+    assert result["videos"] == 3
+    assert result["finished"] and result["finished"][0][0]
+    print("✓ Kịch bản bị cắt: tạo đủ 3 video từ cảnh đã nhận")
+
+
+def test_failed_conversion_counts_against_total():
+    """Cảnh 3 không chuyển được prompt → báo 4/5 video, không báo hoàn tất"""
+    result = run_worker(stream=True, fail_scene=3)
+    assert result["videos"] == SCENES - 1
+    assert result["finished"] == [(True, f"Đã tạo {SCENES - 1}/{SCENES} video")], result["finished"]
+    print(f"✓ Cảnh chuyển lỗi được tính vào tổng: {result['finished'][0][1]}")
+
+
+if __name__ == "__main__":
+    test_stream_starts_videos_early()
+    test_truncated_stream_keeps_received_scenes()
+    test_failed_conversion_counts_against_total()
+    print("\n✅ TẤT CẢ TESTS PASS!")
@@ -0,0 +1,173 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║              TEST SCRIPT - VIDEO TASK STORE + RESUME                         ║
+║         Task đang tạo video được lưu lại, app mở lại thì chạy tiếp           ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Mục đích:
+1. VideoTask lưu/đọc đủ trạng thái (operation_name, params)
+2. Resume sau crash:
+   - Task đã submit → gắn lại operation cũ, KHÔNG submit lại
+   - Task chưa submit → submit, operation mới được ghi ngay
+   - Video đã tải xong trước khi tắt → hoàn thành, không gọi API
+   - Video dài bị gián đoạn → báo lỗi
+3. App tắt giữa lúc ghi video → không để lại mp4 dở bị coi là đã xong
+"""
+
+import os
+import shutil
+import tempfile
+
+from src.app.models import VideoTask, TaskStatus
+from src.app.services.task_store import VideoTaskStore, resume_tasks
+from src.app.services.video_generation import VideoGenerationResult, VideoGenerationRequest, VeoVideoService
+
+
+class RecordingVeoService:
+    """Thay VeoVideoService: ghi lại lời gọi, tạo file video giả"""
+
+    def __init__(self):
+        self.resumed = []
+        self.submitted = []
+
+    def resume_short_video(self, operation_name, request, on_progress=None):
+        self.resumed.append(operation_name)
+        with open(request.output_path, "wb") as f:
+            f.write(b"video")
+        return VideoGenerationResult(success=True, video_path=request.output_path)
+
+    def generate_short_video(self, request, on_progress=None, on_operation=None):
+        self.submitted.append(request.prompt)
+        if on_operation:
+            on_operation(f"operations/new-{len(self.submitted)}")
+        with open(request.output_path, "wb") as f:
+            f.write(b"video")
+        return VideoGenerationResult(success=True, video_path=request.output_path)
+
+
+def make_task(root: str, name: str, **kwargs) -> VideoTask:
+    task = VideoTask(prompt=f"prompt {name}", image_path="product.png", status=TaskStatus.PROCESSING)
+    task.params = {
+        "prompt": f"en prompt {name}",
+        "output_path": os.path.join(root, f"{name}.mp4"),
+        "duration": 8,
+        "video_id": f"vid-{name}"
+    }
+    for key, value in kwargs.items():
+        setattr(task, key, value)
+    return task
+
+
+def test_round_trip():
+    """Lưu / đọc đủ field, chỉ task chưa xong nằm trong unfinished()"""
+    root = tempfile.mkdtemp()
+    store = VideoTaskStore(os.path.join(root, "tasks.db"))
+    try:
+        task = make_task(root, "a", operation_name="operations/abc")
+        store.save(task)
+        done = make_task(root, "b")
+        done.set_completed("b.mp4")
+        store.save(done)
+
+        loaded = store.get(task.id)
+        assert loaded.to_dict() == task.to_dict()
+        assert [t.id for t in store.unfinished()] == [task.id]
+        print("✓ Lưu / đọc task")
+    finally:
+        store.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_resume_after_crash():
+    """Mở lại store (như app khởi động lại) → resume đúng từng loại task"""
+    root = tempfile.mkdtemp()
+    db_path = os.path.join(root, "tasks.db")
+    store = VideoTaskStore(db_path)
+    submitted = make_task(root, "submitted", operation_name="operations/running-1")
+    not_submitted = make_task(root, "pending", status=TaskStatus.PENDING)
+    downloaded = make_task(root, "downloaded", operation_name="operations/done-1")
+    extended = make_task(root, "extended", operation_name="operations/ext-1")
+    extended.params["is_extended"] = True
+    for task in (submitted, not_submitted, downloaded, extended):
+        store.save(task)
+    with open(downloaded.params["output_path"], "wb") as f:
+        f.write(b"video")
+    store.close()  # App bị tắt
+
+    store = VideoTaskStore(db_path)
+    service = RecordingVeoService()
+    done = []
+    try:
+        handled = resume_tasks(store, service, on_done=done.append)
+
+        assert service.resumed == ["operations/running-1"], "Task đã submit phải được gắn lại"
+        assert service.submitted == ["en prompt pending"], "Chỉ task chưa submit mới được submit"
+        assert len(handled) == 4 and [t.id for t in done] == [t.id for t in handled]
+
+        status = {task.params["video_id"]: task.status for task in handled}
+        assert status == {
+            "vid-submitted": TaskStatus.COMPLETED,
+            "vid-pending": TaskStatus.COMPLETED,
+            "vid-downloaded": TaskStatus.COMPLETED,
+            "vid-extended": TaskStatus.ERROR,
+        }
+        assert store.get(not_submitted.id).operation_name == "operations/new-1"
+        assert store.unfinished() == []
+
+        # Chạy lại resume → không còn gì để làm
+        assert resume_tasks(store, service) == []
+        assert len(service.resumed) == 1 and len(service.submitted) == 1
+        print("✓ Resume: gắn lại 1, submit 1, bỏ qua 1 đã tải, báo lỗi 1 video dài")
+    finally:
+        store.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_interrupted_save_leaves_no_output():
+    """Ghi video bị ngắt giữa chừng → không có file output, resume gắn lại operation"""
+    root = tempfile.mkdtemp()
+    output_path = os.path.join(root, "crashed.mp4")
+
+    class CrashingVideo:
+        def save(self, path):
+            with open(path, "wb") as f:
+                f.write(b"half a vid")
+            raise KeyboardInterrupt  # App bị tắt giữa lúc ghi
+
+    class FakeOperationVideo:
+        video = CrashingVideo()
+
+    class FakeFiles:
+        def download(self, file):
+            pass
+
+    service = VeoVideoService.__new__(VeoVideoService)
+    service.client = type("FakeClient", (), {"files": FakeFiles()})()
+    service._poll_operation = lambda operation: FakeOperationVideo()
+    request = VideoGenerationRequest(prompt="p", person_image_path="", product_image_path="", output_path=output_path)
+
+    store = VideoTaskStore(os.path.join(root, "tasks.db"))
+    try:
+        try:
+            service._finish_operation(object(), request)
+            assert False, "expected KeyboardInterrupt"
+        except KeyboardInterrupt:
+            pass
+        assert not [name for name in os.listdir(root) if name.startswith("crashed")], os.listdir(root)
+
+        task = make_task(root, "crashed", operation_name="operations/crashed-1")
+        store.save(task)
+        recording = RecordingVeoService()
+        resume_tasks(store, recording)
+        assert recording.resumed == ["operations/crashed-1"], "Phải tải lại qua operation, không coi là đã xong"
+        print("✓ Ghi video bị ngắt: không có mp4 dở, resume tải lại")
+    finally:
+        store.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_resume_after_crash()
+    test_interrupted_save_leaves_no_output()
+    print("\n✅ TẤT CẢ TESTS PASS!")
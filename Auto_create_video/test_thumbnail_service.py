@@ -0,0 +1,175 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║              TEST SCRIPT - THUMBNAIL SERVICE                                 ║
+║         Thumbnail bất đồng bộ + cache đĩa cho bảng video (Qt offscreen)      ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Mục đích:
+1. Thumbnail decode ngoài GUI thread, ghi cache đĩa, lần sau đọc từ cache
+2. Ảnh đổi nội dung (mtime) → decode lại
+3. Mở tab với 2.000 hàng lịch sử có ảnh: load trang đầu từng đợt, chỉ hàng đang hiện
+   mới yêu cầu thumbnail, thumbnail tự điền sau
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QColor, QImage
+
+app = QApplication.instance() or QApplication([])
+
+from src.ui.shared import thumbnail_service
+from src.ui.shared.thumbnail_service import ThumbnailService
+
+
+def make_images(folder: str, count: int, size=(2400, 1800)) -> list:
+    """Ảnh JPEG lớn, mỗi ảnh 1 màu"""
+    paths = []
+    for i in range(count):
+        image = QImage(size[0], size[1], QImage.Format.Format_RGB32)
+        image.fill(QColor((i * 40) % 256, 120, 200))
+        path = os.path.join(folder, f"img_{i}.jpg")
+        image.save(path, "JPG")
+        paths.append(path)
+    return paths
+
+
+def pump_until(predicate, timeout: float = 20.0):
+    """Chạy event loop cho tới khi predicate() đúng"""
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "Hết thời gian chờ thumbnail"
+        app.processEvents()
+        time.sleep(0.01)
+
+
+def test_disk_cache():
+    """Decode 1 lần, lần sau (service mới) đọc từ cache đĩa"""
+    root = tempfile.mkdtemp()
+    original_decode = thumbnail_service.decode_thumbnail
+    decoded = []
+
+    def counting_decode(path, size):
+        decoded.append(path)
+        return original_decode(path, size)
+
+    thumbnail_service.decode_thumbnail = counting_decode
+    try:
+        paths = make_images(root, 6)
+        cache_dir = os.path.join(root, "thumbs")
+
+        service = ThumbnailService(cache_dir)
+        results = {}
+        for path in paths:
+            service.request(path, 32, lambda pixmap, p=path: results.__setitem__(p, pixmap))
+        pump_until(lambda: len(results) == len(paths))
+
+        assert all(p is not None and max(p.width(), p.height()) == 32 for p in results.values())
+        assert len(decoded) == len(paths)
+        assert len([f for f in os.listdir(cache_dir) if f.endswith(".png")]) == len(paths)
+
+        # Service mới (như lần mở app sau) → không decode lại
+        decoded.clear()
+        service = ThumbnailService(cache_dir)
+        results.clear()
+        for path in paths:
+            service.request(path, 32, lambda pixmap, p=path: results.__setitem__(p, pixmap))
+        pump_until(lambda: len(results) == len(paths))
+        assert decoded == [], "Thumbnail không được đọc từ cache đĩa"
+
+        # Ảnh bị thay → key mới → decode lại
+        stat = os.stat(paths[0])
+        os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        done = []
+        service.request(paths[0], 32, done.append)
+        pump_until(lambda: done)
+        assert decoded == [paths[0]]
+        print("✓ Cache đĩa + mtime")
+    finally:
+        thumbnail_service.decode_thumbnail = original_decode
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_table_with_2000_history_rows():
+    """Mở tab với 2.000 hàng lịch sử có ảnh: UI không bị treo, chỉ hàng đang hiện load thumbnail"""
+    import json
+    from src.ui.tabs.video_table import VideoTableTab
+
+    root = tempfile.mkdtemp()
+    service = ThumbnailService(os.path.join(root, "thumbs"))
+    thumbnail_service._service = service
+    requested = set()
+    original_request = service.request
+
+    def recording_request(path, size, callback):
+        requested.add(path)
+        return original_request(path, size, callback)
+
+    service.request = recording_request
+    original_history = (VideoTableTab.HISTORY_FILE, VideoTableTab.HISTORY_DB, VideoTableTab.TASK_DB)
+    VideoTableTab.HISTORY_FILE = os.path.join(root, "video_history.json")
+    VideoTableTab.HISTORY_DB = os.path.join(root, "video_history.db")
+    VideoTableTab.TASK_DB = os.path.join(root, "video_tasks.db")
+    try:
+        paths = make_images(root, 40)
+        history = [
+            {"stt": str(i + 1), "prompt": f"prompt {i}", "progress": "100%",
+             "product_path": paths[i % 40], "ref_path": paths[(i + 1) % 40]}
+            for i in range(2000)
+        ]
+        with open(VideoTableTab.HISTORY_FILE, "w", encoding="utf-8") as f:
+            json.dump(history, f)
+
+        start = time.perf_counter()
+        tab = VideoTableTab()
+        opened = time.perf_counter() - start
+        assert tab.table.rowCount() == VideoTableTab.HISTORY_CHUNK_SIZE
+
+        # Đo lượt event loop dài nhất trong lúc hiện bảng + load thumbnail
+        tab.resize(1200, 600)
+        tab.show()
+        page_size = VideoTableTab.HISTORY_PAGE_SIZE
+        longest = 0.0
+        start = time.perf_counter()
+        while tab.table.rowCount() < page_size or not requested or service.pending():
+            assert time.perf_counter() - start < 120, "Hết thời gian chờ load lịch sử"
+            tick = time.perf_counter()
+            app.processEvents()
+            longest = max(longest, time.perf_counter() - tick)
+        loaded = time.perf_counter() - start
+
+        # Chỉ các hàng đang hiện yêu cầu thumbnail
+        table = tab.table
+        first = table.rowAt(0)
+        last = table.rowAt(table.viewport().height() - 1)
+        last = table.rowCount() - 1 if last < 0 else last
+        visible = {p for row in range(first, last + 1) for p in table.get_row_image_paths(row)}
+        assert requested <= visible, "Thumbnail của hàng không hiện bị load"
+
+        product_path, ref_path = table.get_row_image_paths(last)
+        assert (product_path, ref_path) == (paths[last % 40], paths[(last + 1) % 40])
+        assert all(table.delegate.thumbnail(p) is not None for p in (product_path, ref_path)), \
+            "Thumbnail chưa được điền"
+        print(
+            f"✓ 2000 hàng: mở tab {opened:.2f}s, hiện + thumbnail xong sau {loaded:.2f}s "
+            f"({len(requested)} ảnh), "
+            f"lượt event loop dài nhất {longest * 1000:.0f}ms"
+        )
+    finally:
+        tab.history.close()
+        tab.tasks.close()
+        VideoTableTab.HISTORY_FILE, VideoTableTab.HISTORY_DB, VideoTableTab.TASK_DB = original_history
+        thumbnail_service._service.wait_for_done()
+        thumbnail_service._service = None
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_disk_cache()
+    test_table_with_2000_history_rows()
+    print("\n✅ TẤT CẢ TESTS PASS!")
@@ -0,0 +1,96 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║              TEST SCRIPT - VEO BROWSER HOST (HEADLESS)                       ║
+║         Browser dùng chung trên trang Flow giả lập ở localhost               ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Mục đích:
+1. Đo time-to-first-prompt: batch đầu (cold start) vs batch sau (browser ấm)
+2. Batch sau không khởi động lại Chromium
+3. Browser crash → batch tiếp theo tự khởi động lại
+
+Yêu cầu: pip install playwright && playwright install chromium
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+from src.app.services.veo_browser_host import VeoBrowserHost
+from src.app.services.veo_page_pool import VeoPageTask
+from test_veo_page_pool import chromium_available, start_standin_server
+
+
+def run_batch(host: VeoBrowserHost, name: str, count: int = 2):
+    """Render 1 batch → (results, time-to-first-prompt)"""
+    tasks = [VeoPageTask(i, f"{name} prompt {i}") for i in range(count)]
+    requested_at = time.time()
+    results = host.render("", tasks, num_pages=count)
+    first_prompt = min(t.submitted_at for t in tasks if t.submitted_at) - requested_at
+    return results, first_prompt
+
+
+def test_warm_browser_between_batches():
+    """Batch 2 dùng lại browser của batch 1"""
+    if not chromium_available():
+        print("⚠️  Chưa cài Playwright Chromium - bỏ qua test")
+        return
+
+    root = tempfile.mkdtemp()
+    server = start_standin_server(root)
+    host = VeoBrowserHost(
+        profile_dir=os.path.join(root, "profile"),
+        headless=True,
+        download_dir=os.path.join(root, "downloads"),
+        flow_url=f"http://127.0.0.1:{server.server_port}/flow.html"
+    )
+
+    try:
+        cold_results, cold = run_batch(host, "cold")
+        warm_results, warm = run_batch(host, "warm")
+
+        assert all(r.success for r in cold_results.values())
+        assert all(r.success for r in warm_results.values())
+        assert host.launch_count == 1, "Batch sau không được khởi động lại Chromium"
+        assert warm < cold, f"Browser ấm không nhanh hơn: {warm:.2f}s vs {cold:.2f}s"
+        print(f"✓ Time-to-first-prompt: cold {cold:.2f}s → warm {warm:.2f}s")
+    finally:
+        host.shutdown()
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_restart_after_crash():
+    """Đóng context (giả lập crash) → batch sau vẫn chạy"""
+    if not chromium_available():
+        print("⚠️  Chưa cài Playwright Chromium - bỏ qua test")
+        return
+
+    root = tempfile.mkdtemp()
+    server = start_standin_server(root)
+    host = VeoBrowserHost(
+        profile_dir=os.path.join(root, "profile"),
+        headless=True,
+        download_dir=os.path.join(root, "downloads"),
+        flow_url=f"http://127.0.0.1:{server.server_port}/flow.html"
+    )
+
+    try:
+        run_batch(host, "before", count=1)
+        host.call(lambda: host.service.context.close())
+
+        results, _ = run_batch(host, "after", count=1)
+        assert results[0].success, results[0].error_message
+        assert host.launch_count == 2
+        print("✓ Tự khởi động lại sau crash")
+    finally:
+        host.shutdown()
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_warm_browser_between_batches()
+    test_restart_after_crash()
+    print("\n✅ TẤT CẢ TESTS PASS!")
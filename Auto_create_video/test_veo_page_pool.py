@@ -0,0 +1,233 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║              TEST SCRIPT - VEO PAGE POOL (HEADLESS)                          ║
+║         Chạy VeoPagePool trên trang Flow giả lập ở localhost                 ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Mục đích:
+1. Nhiều prompt render song song trên nhiều tab trong cùng 1 Chromium
+2. Phát hiện render xong theo sự kiện DOM, không đợi hết RENDER_TIMEOUT
+3. Error banner → task lỗi ngay, không đợi hạn chót
+4. Mỗi task nhận đúng video của tab mình
+5. Video ra cách nhau lâu hơn RENDER_SETTLE_MS → vẫn chờ đủ số video Flow đang cài
+
+Yêu cầu: pip install playwright && playwright install chromium
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from src.app.services.browser_veo_service import PlaywrightVeoService, PLAYWRIGHT_AVAILABLE
+from src.app.services.veo_page_pool import VeoPagePool, VeoPageTask
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TRANG FLOW GIẢ LẬP
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Ô prompt + nút arrow_forward giống Flow; click → sau RENDER_DELAY_MS thêm số <video>
+# theo dropdown "Câu trả lời đầu ra", prompt có "slow" → mỗi video cách nhau SLOW_GAP_MS
+FLOW_STANDIN_HTML = """<!DOCTYPE html>
+<html>
+<body>
+  <button id="new-project">New project</button>
+  <button id="output-count" role="combobox">Câu trả lời đầu ra cho mỗi câu lệnh 2</button>
+  <textarea id="PINHOLE_TEXT_AREA_ELEMENT_ID"></textarea>
+  <button id="submit"><i class="google-symbols">arrow_forward</i></button>
+  <div id="results"></div>
+  <script>
+    const RENDER_DELAY_MS = 300;
+    const SLOW_GAP_MS = 1500;
+    document.getElementById("submit").addEventListener("click", () => {
+      const prompt = document.getElementById("PINHOLE_TEXT_AREA_ELEMENT_ID").value;
+      setTimeout(() => {
+        if (prompt.includes("unsafe")) {
+          const banner = document.createElement("div");
+          banner.setAttribute("role", "alert");
+          banner.innerText = "Prompt violates policy";
+          document.body.appendChild(banner);
+          return;
+        }
+        const count = parseInt(document.getElementById("output-count").innerText.match(/\\d+$/)[0]);
+        const gap = prompt.includes("slow") ? SLOW_GAP_MS : 0;
+        for (let i = 1; i <= count; i++) {
+          setTimeout(() => {
+            const video = document.createElement("video");
+            video.src = location.origin + "/video.mp4?prompt=" + encodeURIComponent(prompt) + "&i=" + i;
+            document.getElementById("results").appendChild(video);
+          }, gap * (i - 1));
+        }
+      }, RENDER_DELAY_MS);
+    });
+  </script>
+</body>
+</html>
+"""
+
+
+class FastVeoService(PlaywrightVeoService):
+    """Hạn chót dài, settle ngắn - test chỉ nhanh nếu phát hiện xong theo sự kiện"""
+    RENDER_TIMEOUT = 30
+    RENDER_SETTLE_MS = 1000
+
+
+class StandinHandler(SimpleHTTPRequestHandler):
+    """flow.html từ thư mục tạm; /video.mp4?... → nội dung riêng cho mỗi URL"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if not self.path.startswith("/video.mp4"):
+            return super().do_GET()
+        data = self.path.encode("utf-8") * 4096
+        self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_standin_server(root: str) -> ThreadingHTTPServer:
+    """Phục vụ flow.html + video.mp4 từ thư mục tạm"""
+    with open(os.path.join(root, "flow.html"), "w", encoding="utf-8") as f:
+        f.write(FLOW_STANDIN_HTML)
+
+    handler = partial(StandinHandler, directory=root)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def chromium_available() -> bool:
+    """Playwright + Chromium đã cài chưa"""
+    if not PLAYWRIGHT_AVAILABLE:
+        return False
+    from playwright.sync_api import sync_playwright
+    try:
+        with sync_playwright() as p:
+            p.chromium.launch(headless=True).close()
+        return True
+    except Exception:
+        return False
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TESTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def test_pool_renders_prompts_concurrently():
+    """3 prompt / 3 tab → xong trong ~1 lượt render"""
+    if not chromium_available():
+        print("⚠️  Chưa cài Playwright Chromium - bỏ qua test")
+        return
+
+    root = tempfile.mkdtemp()
+    server = start_standin_server(root)
+    service = FastVeoService(
+        cookie_string="",
+        download_dir=os.path.join(root, "downloads"),
+        headless=True,
+        flow_url=f"http://127.0.0.1:{server.server_port}/flow.html"
+    )
+
+    try:
+        service.start()
+        pool = VeoPagePool(service, num_pages=3)
+        tasks = [VeoPageTask(i, f"prompt number {i}") for i in range(3)]
+
+        started = time.time()
+        results = pool.run(tasks)
+        elapsed = time.time() - started
+        pool.close()
+
+        assert set(results) == {0, 1, 2}
+        for task_id, result in results.items():
+            assert result.success, result.error_message
+            assert len(result.video_paths) == 2
+
+        all_paths = [p for r in results.values() for p in r.video_paths]
+        assert len(set(all_paths)) == len(all_paths), "Tên file bị trùng giữa các tab"
+
+        # Đợi cố định sẽ mất >= RENDER_TIMEOUT
+        assert elapsed < FastVeoService.RENDER_TIMEOUT / 2, f"Không phát hiện xong sớm: {elapsed:.1f}s"
+        print(f"✓ 3 prompt / 3 tab trong {elapsed:.1f}s")
+    finally:
+        service.stop()
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_error_banner_finishes_early():
+    """Flow hiện error banner → trả lỗi ngay, không đợi hạn chót"""
+    if not chromium_available():
+        print("⚠️  Chưa cài Playwright Chromium - bỏ qua test")
+        return
+
+    root = tempfile.mkdtemp()
+    server = start_standin_server(root)
+    service = FastVeoService(
+        cookie_string="",
+        download_dir=os.path.join(root, "downloads"),
+        headless=True,
+        flow_url=f"http://127.0.0.1:{server.server_port}/flow.html"
+    )
+
+    try:
+        service.start()
+        started = time.time()
+        result = service.generate_video("an unsafe prompt")
+        elapsed = time.time() - started
+
+        assert not result.success
+        assert "violates policy" in result.error_message
+        assert elapsed < FastVeoService.RENDER_TIMEOUT / 2
+        print(f"✓ Error banner sau {elapsed:.1f}s: {result.error_message}")
+    finally:
+        service.stop()
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_slow_videos_wait_for_flow_output_count():
+    """Flow cài 3 video, video ra cách nhau > RENDER_SETTLE_MS → vẫn tải đủ 3"""
+    if not chromium_available():
+        print("⚠️  Chưa cài Playwright Chromium - bỏ qua test")
+        return
+
+    root = tempfile.mkdtemp()
+    server = start_standin_server(root)
+    service = FastVeoService(
+        cookie_string="",
+        download_dir=os.path.join(root, "downloads"),
+        headless=True,
+        flow_url=f"http://127.0.0.1:{server.server_port}/flow.html"
+    )
+
+    try:
+        service.start()
+        service.page.evaluate(
+            "() => { document.getElementById('output-count').innerText = 'Câu trả lời đầu ra cho mỗi câu lệnh 3'; }"
+        )
+        # Cài đặt trên UI khác với Flow → không được dùng
+        result = service.generate_video("a slow prompt", output_count=4)
+
+        assert result.success, result.error_message
+        assert len(result.video_paths) == 3, result.video_paths
+        print(f"✓ 3 video cách nhau 1.5s (settle {FastVeoService.RENDER_SETTLE_MS}ms): tải đủ {len(result.video_paths)}")
+    finally:
+        service.stop()
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_pool_renders_prompts_concurrently()
+    test_error_banner_finishes_early()
+    test_slow_videos_wait_for_flow_output_count()
+    print("\n✅ TẤT CẢ TESTS PASS!")
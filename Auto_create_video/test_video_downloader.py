@@ -0,0 +1,182 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║              TEST SCRIPT - VIDEO DOWNLOAD MANAGER                            ║
+║         Tải file lớn từ HTTP server ở localhost (hỗ trợ Range)               ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+Mục đích:
+1. Nhiều video tải song song, đúng nội dung, tên file theo hash nội dung
+2. Đứt kết nối giữa chừng → tải tiếp bằng Range, không tải lại từ đầu
+3. URL đã tải ở prompt trước → bỏ qua
+4. Cookies của browser được gửi kèm request
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.app.services.video_downloader import VideoDownloadManager
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HTTP SERVER GIẢ LẬP
+# ═══════════════════════════════════════════════════════════════════════════════
+
+FILE_SIZE = 8 * 1024 * 1024  # 8MB mỗi video
+SERVE_DELAY = 0.3            # Giả lập độ trễ mạng mỗi request
+
+
+class VideoHandler(BaseHTTPRequestHandler):
+    """Phục vụ /<name>.mp4 từ server.files, hỗ trợ Range, có thể cắt kết nối"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        name = self.path.lstrip("/").split("?")[0]
+        data = server.files.get(name)
+        if data is None:
+            self.send_error(404)
+            return
+
+        with server.lock:
+            server.requests.append((name, self.headers.get("Range"), self.headers.get("Cookie")))
+            drop = name in server.drop_once
+            server.drop_once.discard(name)
+
+        time.sleep(SERVE_DELAY)
+
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header.split("=")[1].split("-")[0])
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(len(data) - start))
+        self.end_headers()
+
+        if drop:
+            # Gửi 1/4 file rồi đóng kết nối
+            self.wfile.write(data[start:start + len(data) // 4])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(data[start:])
+
+
+def start_server(files: dict) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), VideoHandler)
+    server.files = files
+    server.lock = threading.Lock()
+    server.requests = []
+    server.drop_once = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def url(server, name: str) -> str:
+    return f"http://127.0.0.1:{server.server_port}/{name}"
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TESTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def test_parallel_download_content_hash_names():
+    """4 video tải song song → đúng nội dung, tên theo hash"""
+    files = {f"v{i}.mp4": os.urandom(FILE_SIZE) for i in range(4)}
+    server = start_server(files)
+    root = tempfile.mkdtemp()
+    try:
+        downloader = VideoDownloadManager(root)
+        started = time.time()
+        paths = downloader.download_all([url(server, name) for name in files])
+        elapsed = time.time() - started
+
+        assert len(paths) == 4
+        for name, path in zip(files, paths):
+            with open(path, "rb") as f:
+                assert f.read() == files[name]
+            assert hashlib.sha256(files[name]).hexdigest()[:16] in os.path.basename(path)
+
+        # Tuần tự sẽ mất >= 4 * SERVE_DELAY
+        assert elapsed < 4 * SERVE_DELAY, f"Không song song: {elapsed:.2f}s"
+        assert not [f for f in os.listdir(root) if f.endswith(".part")]
+        print(f"✓ 4 x {FILE_SIZE // (1024 * 1024)}MB trong {elapsed:.2f}s")
+    finally:
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_resume_after_dropped_connection():
+    """Đứt kết nối → request sau dùng Range từ byte đã có"""
+    files = {"big.mp4": os.urandom(FILE_SIZE)}
+    server = start_server(files)
+    server.drop_once.add("big.mp4")
+    root = tempfile.mkdtemp()
+    try:
+        paths = VideoDownloadManager(root).download_all([url(server, "big.mp4")])
+
+        assert len(paths) == 1
+        with open(paths[0], "rb") as f:
+            assert f.read() == files["big.mp4"]
+
+        ranges = [r for _, r, _ in server.requests]
+        assert ranges[0] is None
+        assert ranges[1] == f"bytes={FILE_SIZE // 4}-", ranges
+        print(f"✓ Resume từ byte {FILE_SIZE // 4}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_skip_urls_from_previous_prompt():
+    """Prompt 2 thấy lại video của prompt 1 → chỉ tải video mới"""
+    files = {f"v{i}.mp4": os.urandom(1024) for i in range(3)}
+    server = start_server(files)
+    root = tempfile.mkdtemp()
+    try:
+        downloader = VideoDownloadManager(root)
+        first = downloader.download_all([url(server, "v0.mp4"), url(server, "v1.mp4")])
+        second = downloader.download_all([url(server, n) for n in ("v0.mp4", "v1.mp4", "v2.mp4")])
+
+        assert len(first) == 2
+        assert len(second) == 1
+        assert len(server.requests) == 3
+        print("✓ Bỏ qua URL đã tải")
+    finally:
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_browser_cookies_are_sent():
+    """Cookies từ BrowserContext.cookies() được gửi kèm"""
+    files = {"v.mp4": os.urandom(1024)}
+    server = start_server(files)
+    root = tempfile.mkdtemp()
+    try:
+        downloader = VideoDownloadManager(root)
+        downloader.set_cookies([{"name": "SID", "value": "abc", "domain": "127.0.0.1", "path": "/"}])
+        downloader.download_all([url(server, "v.mp4")])
+
+        assert server.requests[0][2] == "SID=abc"
+        print("✓ Gửi kèm cookies")
+    finally:
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_parallel_download_content_hash_names()
+    test_resume_after_dropped_connection()
+    test_skip_urls_from_previous_prompt()
+    test_browser_cookies_are_sent()
+    print("\n✅ TẤT CẢ TESTS PASS!")
@@ -4,6 +4,7 @@ from .assets.camera_image_generator import CameraImageGenerator
 from .extraction.character_extractor import CharacterExtractor
 from .assets.character_portraits_generator import CharacterPortraitsGenerator
 from .assets.reference_image_selector import ReferenceImageSelector
+from .assets.best_image_selector import BestImageSelector
 
 __all__ = [
     "Screenwriter",
@@ -12,4 +13,5 @@ __all__ = [
     "CharacterExtractor",
     "CharacterPortraitsGenerator",
     "ReferenceImageSelector",
+    "BestImageSelector",
 ]
\ No newline at end of file
@@ -1,11 +1,12 @@
 import logging
-from typing import List, Tuple
+import asyncio
+from typing import List, Optional, Tuple
 from pydantic import BaseModel, Field
 from tenacity import retry, stop_after_attempt
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain.chat_models import init_chat_model
-from utils.image import image_path_to_b64
+from utils.image import ImagePayloadEncoder, get_image_encoder
 
 
 
@@ -34,6 +35,7 @@ The user will provide the following content:
 - Focus on Spatial Consistency: Verify whether the relative positions of characters, object arrangements, and perspectives align logically with the reference image (e.g., if Character A is on the left and Character B is on the right in the reference image, the generated image should not reverse this).
 - Strictly Compare with Text Description: The generated image must adhere to key elements in the text description (e.g., actions, scenes, objects, etc.), while disregarding parts related to editing instructions (as the input description reflects the expected outcome rather than directives).
 - If multiple images partially meet the criteria, select the one with the highest overall consistency; if none are ideal, choose the relatively best option and explain its shortcomings.
+- Score every candidate image on its own from 0 to 10 (10: fully consistent with the reference images and the description; 5: noticeable inconsistencies; 0: unusable). Scores are compared across calls, so do not rescale them relative to the other candidates.
 - Ensure the key elements described in the text are present in the selected image.
 - Avoid subjective preferences; base all analysis on objective comparisons.
 - Prioritize images without white borders, black edges, or any additional framing.
@@ -56,34 +58,42 @@ class BestImageResponse(BaseModel):
         ...,
         description="The reason why the image is the best."
     )
+    scores: List[float] = Field(
+        default_factory=list,
+        description="The score (0-10) of each candidate image, in candidate order."
+    )
 
 
 class BestImageSelector:
     def __init__(
         self,
-        base_url: str,
-        api_key: str,
-        chat_model: str,
+        chat_model,
+        image_encoder: Optional[ImagePayloadEncoder] = None,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
     ):
-        
-        self.chat_model = init_chat_model(
-            model=chat_model,
-            model_provider="openai",
-            base_url=base_url,
-            api_key=api_key,
-        )
+        # a chat model instance like the other agents, or an OpenAI-compatible model name
+        if isinstance(chat_model, str):
+            chat_model = init_chat_model(
+                model=chat_model,
+                model_provider="openai",
+                base_url=base_url,
+                api_key=api_key,
+            )
+        self.chat_model = chat_model
+        self.image_encoder = image_encoder or get_image_encoder()
 
 
     @retry(
         stop=stop_after_attempt(3),
         after=lambda retry_state: logging.warning(f"Retrying best image selection due to {retry_state.outcome.exception()}"),
     )
-    async def __call__(
+    async def select(
         self,
         reference_image_path_and_text_pairs: List[Tuple[str, str]],
         target_description: str,
         candidate_image_paths: List[str],
-    ) -> str:
+    ) -> BestImageResponse:
         """
         Args:
             ref_image_path_and_text_pairs:
@@ -102,25 +112,32 @@ class BestImageSelector:
 
         logging.info(f"Selecting the best image from candidates: {candidate_image_paths}")
 
+        reference_image_paths = [path for path, _ in reference_image_path_and_text_pairs]
+        image_urls = await asyncio.gather(*[
+            asyncio.to_thread(self.image_encoder.to_b64, image_path)
+            for image_path in reference_image_paths + candidate_image_paths
+        ])
+        reference_image_urls, candidate_image_urls = image_urls[:len(reference_image_paths)], image_urls[len(reference_image_paths):]
+
         human_content = []
-        for idx, (ref_image_path, text) in enumerate(reference_image_path_and_text_pairs):
+        for idx, ((_, text), image_url) in enumerate(zip(reference_image_path_and_text_pairs, reference_image_urls)):
             human_content.append({
                 "type": "text",
                 "text": f"Reference Image {idx}: {text}"
             })
             human_content.append({
                 "type": "image_url",
-                "image_url": {"url": image_path_to_b64(ref_image_path, mime=True)}
+                "image_url": {"url": image_url}
             })
 
-        for idx, candidate_image_path in enumerate(candidate_image_paths):
+        for idx, image_url in enumerate(candidate_image_urls):
             human_content.append({
                 "type": "text",
                 "text": f"Candidate Image {idx}"
             })
             human_content.append({
                 "type": "image_url",
-                "image_url": {"url": image_path_to_b64(candidate_image_path, mime=True)}
+                "image_url": {"url": image_url}
             })
         human_content.append({
             "type": "text",
@@ -140,8 +157,37 @@ class BestImageSelector:
         idx = response.best_image_index
         if not isinstance(idx, int) or idx < 0 or idx >= len(candidate_image_paths):
             logging.warning(f"Received invalid best_image_index={idx}; defaulting to 0")
-            idx = 0
-        best_image_path = candidate_image_paths[idx]
-        logging.info(f"Best image selected: {best_image_path}")
+            response.best_image_index = 0
+        if len(response.scores) != len(candidate_image_paths):
+            logging.warning(f"Received {len(response.scores)} scores for {len(candidate_image_paths)} candidates; ignoring them")
+            response.scores = []
+        logging.info(f"Best image selected: {candidate_image_paths[response.best_image_index]}")
         logging.info(f"Selection reason: {response.reason}")
-        return best_image_path
+        return response
+
+
+    async def score_candidates(
+        self,
+        reference_image_path_and_text_pairs: List[Tuple[str, str]],
+        target_description: str,
+        candidate_image_paths: List[str],
+    ) -> List[float]:
+        """Scores (0-10) of all candidates, from one batched call."""
+        response = await self.select(reference_image_path_and_text_pairs, target_description, candidate_image_paths)
+        if response.scores:
+            return response.scores
+        if len(candidate_image_paths) < 2:
+            # nothing to compare it with: no score, so it is never accepted early
+            return []
+        # no usable scores: rank the selected image first
+        return [10.0 if idx == response.best_image_index else 0.0 for idx in range(len(candidate_image_paths))]
+
+
+    async def __call__(
+        self,
+        reference_image_path_and_text_pairs: List[Tuple[str, str]],
+        target_description: str,
+        candidate_image_paths: List[str],
+    ) -> str:
+        response = await self.select(reference_image_path_and_text_pairs, target_description, candidate_image_paths)
+        return candidate_image_paths[response.best_image_index]
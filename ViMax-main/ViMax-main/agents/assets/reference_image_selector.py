@@ -1,11 +1,12 @@
 import logging
-from typing import List, Tuple
+import asyncio
+from typing import List, Optional, Tuple
 from tenacity import retry, stop_after_attempt
 from pydantic import BaseModel, Field
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain.chat_models import init_chat_model
-from utils.image import image_path_to_b64
+from utils.image import ImagePayloadEncoder, get_image_encoder
 
 from utils.retry import after_func
 
@@ -139,9 +140,12 @@ class ReferenceImageSelector:
     def __init__(
         self,
         chat_model,
+        image_encoder: Optional[ImagePayloadEncoder] = None,
     ):
 
         self.chat_model = chat_model
+        # downscaled JPEG payloads, shared by every selection in the run
+        self.image_encoder = image_encoder or get_image_encoder()
 
 
     @retry(
@@ -186,15 +190,19 @@ class ReferenceImageSelector:
                 raise e
 
         # 2. filter images using multimodal model
+        image_urls = await asyncio.gather(*[
+            asyncio.to_thread(self.image_encoder.to_b64, image_path)
+            for image_path, _ in filtered_image_path_and_text_pairs
+        ])
         human_content = []
-        for idx, (image_path, text) in enumerate(filtered_image_path_and_text_pairs):
+        for idx, ((image_path, text), image_url) in enumerate(zip(filtered_image_path_and_text_pairs, image_urls)):
             human_content.append({
                 "type": "text",
                 "text": f"Image {idx}: {text}"
             })
             human_content.append({
                 "type": "image_url",
-                "image_url": {"url": image_path_to_b64(image_path)}
+                "image_url": {"url": image_url}
             })
         human_content.append({
             "type": "text",
@@ -1,9 +1,11 @@
 import base64
+import asyncio
 import cv2
 from typing import List, Literal, Optional, Union
 from PIL import Image
 
 from utils.image import download_image
+from utils.download import download_file
 
 
 
@@ -58,4 +60,17 @@ class ImageOutput:
 
     def save(self, path: str) -> None:
         save_func = getattr(self, f"save_{self.fmt}")
-        save_func(path)
\ No newline at end of file
+        save_func(path)
+
+    async def asave(self, path: str, sha256: Optional[str] = None) -> None:
+        """Save without blocking the event loop: URLs are streamed over the shared
+        aiohttp session, other formats are written from a worker thread.
+
+        Args:
+            path (str): Path where the image will be saved.
+            sha256 (Optional[str]): Expected checksum of a downloaded image.
+        """
+        if self.fmt == "url":
+            await download_file(self.data, path, sha256=sha256)
+        else:
+            await asyncio.to_thread(self.save, path)
@@ -3,6 +3,7 @@ from typing import List, Literal, Optional, Union
 from PIL import Image
 
 from utils.video import download_video
+from utils.download import download_file
 
 
 class VideoOutput:
@@ -41,3 +42,15 @@ class VideoOutput:
         save_func = getattr(self, f"save_{self.fmt}")
         save_func(path)
 
+    async def asave(self, path: str, sha256: Optional[str] = None) -> None:
+        """Save without blocking the event loop: URLs are streamed over the shared
+        aiohttp session, bytes are written from a worker thread.
+
+        Args:
+            path (str): Path where the video will be saved.
+            sha256 (Optional[str]): Expected checksum of a downloaded video.
+        """
+        if self.fmt == "url":
+            await download_file(self.data, path, sha256=sha256)
+        else:
+            await asyncio.to_thread(self.save, path)
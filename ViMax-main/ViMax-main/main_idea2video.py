@@ -1,5 +1,6 @@
 import asyncio
 from pipelines.idea2video_pipeline import Idea2VideoPipeline
+from utils.download import close_session
 
 
 # SET YOUR OWN IDEA, USER REQUIREMENT, AND STYLE HERE
@@ -16,7 +17,10 @@ style = "Cartoon"
 
 async def main():
     pipeline = Idea2VideoPipeline.init_from_config(config_path="configs/idea2video.yaml")
-    await pipeline(idea=idea, user_requirement=user_requirement, style=style)
+    try:
+        await pipeline(idea=idea, user_requirement=user_requirement, style=style)
+    finally:
+        await close_session()
 
 if __name__ == "__main__":
     asyncio.run(main())
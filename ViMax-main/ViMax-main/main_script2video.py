@@ -1,5 +1,6 @@
 import asyncio
 from pipelines.script2video_pipeline import Script2VideoPipeline
+from utils.download import close_session
 
 
 # SET YOUR OWN SCRIPT, USER REQUIREMENT, AND STYLE HERE
@@ -27,7 +28,10 @@ style = "Anime Style"
 
 async def main():
     pipeline = Script2VideoPipeline.init_from_config(config_path="configs/script2video.yaml")
-    await pipeline(script=script, user_requirement=user_requirement, style=style)
+    try:
+        await pipeline(script=script, user_requirement=user_requirement, style=style)
+    finally:
+        await close_session()
 
 
 if __name__ == "__main__":
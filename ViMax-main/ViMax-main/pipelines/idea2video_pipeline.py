@@ -5,11 +5,15 @@ from pipelines.script2video_pipeline import Script2VideoPipeline
 from interfaces import CharacterInScene
 from typing import List, Dict, Optional
 import asyncio
+import time
 import json
-from moviepy import VideoFileClip, concatenate_videoclips
 import yaml
 from langchain.chat_models import init_chat_model
 import importlib
+from utils.rate_limiter import scheduler, current_priority
+from utils.video_concat import concat_videos
+from utils.artifact_store import DEFAULT_MAX_CACHE_GB, ArtifactStore, model_id, atomic_write_json
+from utils.best_of_n import CandidateBudget
 
 class Idea2VideoPipeline:
     def __init__(
@@ -18,13 +22,24 @@ class Idea2VideoPipeline:
         image_generator: str,
         video_generator: str,
         working_dir: str,
+        max_concurrent_scenes: int = 3,
+        artifact_cache_dir: Optional[str] = None,
+        artifact_cache_max_gb: Optional[float] = DEFAULT_MAX_CACHE_GB,
+        candidate_budget: Optional[CandidateBudget] = None,
     ):
         self.chat_model = chat_model
         self.image_generator = image_generator
         self.video_generator = video_generator
         self.working_dir = working_dir
+        self.max_concurrent_scenes = max_concurrent_scenes
+        # one best-of-N budget for every scene of the run
+        self.candidate_budget = candidate_budget or CandidateBudget()
         os.makedirs(self.working_dir, exist_ok=True)
 
+        # step outputs keyed on their inputs; scenes share the same cache directory
+        self.artifacts = ArtifactStore(self.working_dir, artifact_cache_dir, artifact_cache_max_gb)
+        self.portrait_timings = []
+
         self.screenwriter = Screenwriter(chat_model=self.chat_model)
         self.character_extractor = CharacterExtractor(chat_model=self.chat_model)
         self.character_portraits_generator = CharacterPortraitsGenerator(image_generator=self.image_generator)
@@ -50,11 +65,21 @@ class Idea2VideoPipeline:
         video_generator_args = config["video_generator"]["init_args"]
         video_generator = video_generator_cls(**video_generator_args)
 
+        # all pipelines share one limiter per provider/model (see utils/rate_limiter.py)
+        scheduler.configure(config.get("rate_limits"))
+        chat_model = scheduler.wrap_chat_model(chat_model, config["chat_model"])
+        image_generator = scheduler.wrap_tool(image_generator, "image", config["image_generator"])
+        video_generator = scheduler.wrap_tool(video_generator, "video", config["video_generator"])
+
         return cls(
             chat_model=chat_model,
             image_generator=image_generator,
             video_generator=video_generator,
             working_dir=config["working_dir"],
+            max_concurrent_scenes=config.get("max_concurrent_scenes", 3),
+            artifact_cache_dir=config.get("artifact_cache_dir"),
+            artifact_cache_max_gb=config.get("artifact_cache_max_gb", DEFAULT_MAX_CACHE_GB),
+            candidate_budget=CandidateBudget(**config.get("best_of_n", {})),
         )
 
     async def extract_characters(
@@ -62,16 +87,15 @@ class Idea2VideoPipeline:
         story: str,
     ):
         save_path = os.path.join(self.working_dir, "characters.json")
+        save_key = self.artifacts.key("characters", script=story, model=model_id(self.chat_model))
 
-        if os.path.exists(save_path):
-            with open(save_path, "r", encoding="utf-8") as f:
-                characters = json.load(f)
+        characters = self.artifacts.load_json(save_key, save_path)
+        if characters is not None:
             characters = [CharacterInScene.model_validate(character) for character in characters]
             print(f"🚀 Loaded {len(characters)} characters from existing file.")
         else:
             characters = await self.character_extractor.extract_characters(story)
-            with open(save_path, "w", encoding="utf-8") as f:
-                json.dump([character.model_dump() for character in characters], f, ensure_ascii=False, indent=4)
+            self.artifacts.save_json(save_key, save_path, [character.model_dump() for character in characters])
             print(f"✅ Extracted {len(characters)} characters from story and saved to {save_path}.")
 
         return characters
@@ -85,11 +109,7 @@ class Idea2VideoPipeline:
     ):
         character_portraits_registry_path = os.path.join(self.working_dir, "character_portraits_registry.json")
         if character_portraits_registry is None:
-            if os.path.exists(character_portraits_registry_path):
-                with open(character_portraits_registry_path, 'r', encoding='utf-8') as f:
-                    character_portraits_registry = json.load(f)
-            else:
-                character_portraits_registry = {}
+            character_portraits_registry = {}
 
 
         tasks = [
@@ -98,11 +118,16 @@ class Idea2VideoPipeline:
             if character.identifier_in_scene not in character_portraits_registry
         ]
         if tasks:
+            self.portrait_timings = []
             for future in asyncio.as_completed(tasks):
                 character_portraits_registry.update(await future)
-                with open(character_portraits_registry_path, 'w', encoding='utf-8') as f:
-                    json.dump(character_portraits_registry, f, ensure_ascii=False, indent=4)
+                atomic_write_json(character_portraits_registry_path, character_portraits_registry)
 
+            for view in ("front", "side", "back"):
+                seconds = [timing["seconds"] for timing in self.portrait_timings if timing["view"] == view]
+                if seconds:
+                    logging.info(f"{view} portraits: {len(seconds)} generated, mean {sum(seconds) / len(seconds):.1f}s, max {max(seconds):.1f}s")
+            atomic_write_json(os.path.join(self.working_dir, "portrait_timings.json"), self.portrait_timings)
             print(f"✅ Completed character portrait generation for {len(characters)} characters.")
         else:
             print("🚀 All characters already have portraits, skipping portrait generation.")
@@ -117,7 +142,8 @@ class Idea2VideoPipeline:
         user_requirement: str,
     ):
         save_path = os.path.join(self.working_dir, "story.txt")
-        if os.path.exists(save_path):
+        save_key = self.artifacts.key("story", idea=idea, user_requirement=user_requirement, model=model_id(self.chat_model))
+        if self.artifacts.restore(save_key, save_path):
             with open(save_path, "r", encoding="utf-8") as f:
                 story = f.read()
             print(f"🚀 Loaded story from existing file.")
@@ -126,6 +152,7 @@ class Idea2VideoPipeline:
             story = await self.screenwriter.develop_story(idea=idea, user_requirement=user_requirement)
             with open(save_path, "w", encoding="utf-8") as f:
                 f.write(story)
+            self.artifacts.put(save_key, save_path)
             print(f"✅ Developed story and saved to {save_path}.")
 
         return story
@@ -137,15 +164,14 @@ class Idea2VideoPipeline:
         user_requirement: str,
     ):
         save_path = os.path.join(self.working_dir, "script.json")
-        if os.path.exists(save_path):
-            with open(save_path, "r", encoding="utf-8") as f:
-                script = json.load(f)
+        save_key = self.artifacts.key("scene_scripts", story=story, user_requirement=user_requirement, model=model_id(self.chat_model))
+        script = self.artifacts.load_json(save_key, save_path)
+        if script is not None:
             print(f"🚀 Loaded script from existing file.")
         else:
             print("🧠 Writing script based on story...")
             script = await self.screenwriter.write_script_based_on_story(story=story, user_requirement=user_requirement)
-            with open(save_path, "w", encoding="utf-8") as f:
-                json.dump(script, f, ensure_ascii=False, indent=4)
+            self.artifacts.save_json(save_key, save_path, script)
             print(f"✅ Written script based on story and saved to {save_path}.")
         return script
 
@@ -158,27 +184,34 @@ class Idea2VideoPipeline:
         character_dir = os.path.join(self.working_dir, "character_portraits", f"{character.idx}_{character.identifier_in_scene}")
         os.makedirs(character_dir, exist_ok=True)
 
+        # keyed on the character and style, not on the project: portraits are reused across projects
+        model = model_id(self.image_generator)
         front_portrait_path = os.path.join(character_dir, "front.png")
-        if os.path.exists(front_portrait_path):
-            pass
-        else:
-            front_portrait_output = await self.character_portraits_generator.generate_front_portrait(character, style)
-            front_portrait_output.save(front_portrait_path)
-
+        front_key = self.artifacts.key("front_portrait", character=character.model_dump(), style=style, model=model)
+        # side and back only need the front, so every character's front is queued ahead of them
+        token = current_priority.set(1.0)
+        try:
+            await self.generate_portrait_view(
+                character, "front", front_key, front_portrait_path,
+                lambda: self.character_portraits_generator.generate_front_portrait(character, style),
+            )
+        finally:
+            current_priority.reset(token)
 
         side_portrait_path = os.path.join(character_dir, "side.png")
-        if os.path.exists(side_portrait_path):
-            pass
-        else:
-            side_portrait_output = await self.character_portraits_generator.generate_side_portrait(character, front_portrait_path)
-            side_portrait_output.save(side_portrait_path)
-
+        side_key = await self.artifacts.akey("side_portrait", character=character.model_dump(), files=[front_portrait_path], model=model)
         back_portrait_path = os.path.join(character_dir, "back.png")
-        if os.path.exists(back_portrait_path):
-            pass
-        else:
-            back_portrait_output = await self.character_portraits_generator.generate_back_portrait(character, front_portrait_path)
-            back_portrait_output.save(back_portrait_path)
+        back_key = await self.artifacts.akey("back_portrait", character=character.model_dump(), files=[front_portrait_path], model=model)
+        await asyncio.gather(
+            self.generate_portrait_view(
+                character, "side", side_key, side_portrait_path,
+                lambda: self.character_portraits_generator.generate_side_portrait(character, front_portrait_path),
+            ),
+            self.generate_portrait_view(
+                character, "back", back_key, back_portrait_path,
+                lambda: self.character_portraits_generator.generate_back_portrait(character, front_portrait_path),
+            ),
+        )
 
         print(f"☑️ Completed character portrait generation for {character.identifier_in_scene}.")
 
@@ -199,6 +232,26 @@ class Idea2VideoPipeline:
             }
         }
 
+
+    async def generate_portrait_view(
+        self,
+        character: CharacterInScene,
+        view: str,
+        key: str,
+        path: str,
+        generate,
+    ):
+        if self.artifacts.restore(key, path):
+            return
+        start = time.perf_counter()
+        output = await generate()
+        await output.asave(path)
+        self.artifacts.put(key, path)
+        # wall time including the wait for an image slot
+        seconds = time.perf_counter() - start
+        self.portrait_timings.append({"character": character.identifier_in_scene, "view": view, "seconds": round(seconds, 2)})
+        print(f"☑️ Generated {view} portrait for {character.identifier_in_scene} in {seconds:.1f}s.")
+
     async def __call__(
         self,
         idea: str,
@@ -218,33 +271,46 @@ class Idea2VideoPipeline:
 
         scene_scripts = await self.write_script_based_on_story(story=story, user_requirement=user_requirement)
 
-        all_video_paths = []
-
-        for idx, scene_script in enumerate(scene_scripts):
-            scene_working_dir = os.path.join(self.working_dir, f"scene_{idx}")
-            os.makedirs(scene_working_dir, exist_ok=True)
-            script2video_pipeline = Script2VideoPipeline(
-                chat_model=self.chat_model,
-                image_generator=self.image_generator,
-                video_generator=self.video_generator,
-                working_dir=scene_working_dir,
-            )
-            final_video_path = await script2video_pipeline(
-                script=scene_script,
-                user_requirement=user_requirement,
-                style=style,
-                characters=characters,
-                character_portraits_registry=character_portraits_registry,
-            )
-            all_video_paths.append(final_video_path)
+        # scenes only share the (read-only) portrait registry, so they run together;
+        # provider limits still apply through the shared image/video/chat limiters
+        scene_semaphore = asyncio.Semaphore(self.max_concurrent_scenes)
+
+        async def render_scene(idx: int, scene_script: str) -> str:
+            async with scene_semaphore:
+                scene_working_dir = os.path.join(self.working_dir, f"scene_{idx}")
+                os.makedirs(scene_working_dir, exist_ok=True)
+                script2video_pipeline = Script2VideoPipeline(
+                    chat_model=self.chat_model,
+                    image_generator=self.image_generator,
+                    video_generator=self.video_generator,
+                    working_dir=scene_working_dir,
+                    artifact_cache_dir=self.artifacts.cache_dir,
+                    artifact_cache_max_gb=self.artifacts.max_cache_gb,
+                    candidate_budget=self.candidate_budget,
+                )
+                print(f"🎬 Starting scene {idx}...")
+                final_video_path = await script2video_pipeline(
+                    script=scene_script,
+                    user_requirement=user_requirement,
+                    style=style,
+                    characters=characters,
+                    character_portraits_registry=character_portraits_registry,
+                )
+                print(f"☑️ Completed scene {idx}, saved to {final_video_path}.")
+                return final_video_path
+
+        all_video_paths = await asyncio.gather(*[
+            render_scene(idx, scene_script)
+            for idx, scene_script in enumerate(scene_scripts)
+        ])
 
         final_video_path = os.path.join(self.working_dir, "final_video.mp4")
-        if os.path.exists(final_video_path):
+        final_video_key = await self.artifacts.akey("final_video", files=all_video_paths)
+        if self.artifacts.restore(final_video_key, final_video_path):
             print(f"🚀 Skipped concatenating videos, already exists.")
         else:
             print(f"🎬 Starting concatenating videos...")
-            video_clips = [VideoFileClip(final_video_path) for final_video_path in all_video_paths]
-            final_video = concatenate_videoclips(video_clips)
-            final_video.write_videofile(final_video_path)
-            print(f"☑️ Concatenated videos, saved to {final_video_path}.")
+            mode = await asyncio.to_thread(concat_videos, all_video_paths, final_video_path)
+            self.artifacts.put(final_video_key, final_video_path)
+            print(f"☑️ Concatenated videos ({mode}), saved to {final_video_path}.")
         return final_video_path
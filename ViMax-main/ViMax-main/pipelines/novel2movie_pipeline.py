@@ -17,6 +17,7 @@ from components.event import Event
 from components.scene import Scene
 from components.character import CharacterInScene, CharacterInNovel, CharacterInEvent
 from pipelines.base import BasePipeline
+from utils.rate_limiter import scheduler
 from tenacity import retry
 
 class Novel2MoviePipeline(BasePipeline):
@@ -58,7 +59,7 @@ class Novel2MoviePipeline(BasePipeline):
             else:
                 index_chunk_pairs_unfinished.append((index, novel_chunk))
 
-        sem = asyncio.Semaphore(5)
+        sem = scheduler.limiter("chat")
         tasks = [
             self.novel_compressor.compress_single_novel_chunk(sem, index, novel_chunk)
             for index, novel_chunk in index_chunk_pairs_unfinished
@@ -193,7 +194,7 @@ class Novel2MoviePipeline(BasePipeline):
 
         event_idx_to_relevant_chunk_score_dict = {}
 
-        sem = asyncio.Semaphore(10)
+        sem = scheduler.limiter("rerank")
         tasks = []
         for event in extracted_events:
             chunks_dir = os.path.join(working_dir_retrieve, f"event_{event.index}")
@@ -279,7 +280,7 @@ class Novel2MoviePipeline(BasePipeline):
             return event.index, previous_scenes
 
 
-        sem = asyncio.Semaphore(8)
+        sem = scheduler.limiter("chat")
         for event_index in unfinished_event_indices:
             relevant_chunks = list(event_idx_to_relevant_chunk_score_dict[event_index].keys())
             tasks.append(extract_scenes_for_event(sem, relevant_chunks, extracted_events[event_index], event_idx_to_scenes[event_index]))
@@ -322,7 +323,7 @@ class Novel2MoviePipeline(BasePipeline):
 
         event_idx_to_characters_in_event = {}
 
-        sem = asyncio.Semaphore(8)
+        sem = scheduler.limiter("chat")
         tasks = []
         for event in extracted_events:
             path = os.path.join(working_dir_characters, "event_level", f"event_{event.index}_characters.json")
@@ -416,11 +417,11 @@ class Novel2MoviePipeline(BasePipeline):
                     prompt=prompt,
                     size="512x512",
                 )
-                image.save(image_path)
+                await image.asave(image_path)
                 print(f"✅ Generated portrait for character {character.index} ({character.identifier_in_novel}), saved to {image_path}")
 
 
-        sem = asyncio.Semaphore(5)
+        sem = scheduler.limiter("image")
         tasks = [
             generate_portrait_for_character(sem, character)
             for character in characters_in_novel
@@ -475,11 +476,11 @@ class Novel2MoviePipeline(BasePipeline):
                     reference_image_paths=[base_character_image_path],
                     size="512x512",
                 )
-                image.save(image_path)
+                await image.asave(image_path)
                 print(f"✅ For event {event_idx}, scene {scene_idx}, generated portrait for character {character.index} ({character.identifier_in_scene}), saved to {image_path}")
 
 
-        sem = asyncio.Semaphore(3)
+        sem = scheduler.limiter("image")
         tasks = []
         for character in characters_in_novel:
             character_base_image_path = os.path.join(base_character_portrait_dir, f"character_{character.index}_{character.identifier_in_novel}.png")
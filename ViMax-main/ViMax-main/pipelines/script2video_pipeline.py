@@ -5,7 +5,6 @@ import logging
 import asyncio
 import time
 from typing import Optional, Dict, List, Tuple, Literal
-from moviepy import VideoFileClip, concatenate_videoclips
 from PIL import Image
 from pipelines.base import BasePipeline
 from agents import *
@@ -13,22 +12,25 @@ import yaml
 from interfaces import *
 from langchain.chat_models import init_chat_model
 from utils.timer import Timer
+from utils.rate_limiter import scheduler, current_priority
+from utils.critical_path import CriticalPathScheduler, task_key
+from utils.video_concat import concat_videos
+from utils.artifact_store import DEFAULT_MAX_CACHE_GB, ArtifactStore, model_id, atomic_write_json
+from utils.image import get_image_encoder
+from utils.best_of_n import CandidateBudget, best_of_n
 import importlib
 
 class Script2VideoPipeline:
 
-    # events
-    character_portrait_events = {}
-    shot_desc_events = {}
-    frame_events = {}
-
-
     def __init__(
         self,
         chat_model: str,
         image_generator,
         video_generator,
         working_dir: str,
+        artifact_cache_dir: Optional[str] = None,
+        artifact_cache_max_gb: Optional[float] = DEFAULT_MAX_CACHE_GB,
+        candidate_budget: Optional[CandidateBudget] = None,
     ):
 
         self.chat_model = chat_model
@@ -39,11 +41,27 @@ class Script2VideoPipeline:
         self.character_portraits_generator = CharacterPortraitsGenerator(image_generator=self.image_generator)
         self.storyboard_artist = StoryboardArtist(chat_model=self.chat_model)
         self.camera_image_generator = CameraImageGenerator(chat_model=self.chat_model, image_generator=self.image_generator, video_generator=self.video_generator)
-        self.reference_image_selector = ReferenceImageSelector(chat_model=self.chat_model)
 
         self.working_dir = working_dir
         os.makedirs(self.working_dir, exist_ok=True)
 
+        # step outputs keyed on their inputs, shared across runs through artifact_cache_dir
+        self.artifacts = ArtifactStore(self.working_dir, artifact_cache_dir, artifact_cache_max_gb)
+
+        # lightweight image payloads for the selector, cached next to the artifacts
+        image_encoder = get_image_encoder(os.path.join(self.artifacts.cache_dir, "llm_images"))
+        self.reference_image_selector = ReferenceImageSelector(chat_model=self.chat_model, image_encoder=image_encoder)
+
+        # best-of-N frames (off unless configured); the budget may be shared with other scenes
+        self.candidate_budget = candidate_budget or CandidateBudget()
+        self.best_image_selector = BestImageSelector(chat_model=self.chat_model, image_encoder=image_encoder)
+
+        # events, per instance so several scenes can run concurrently
+        self.character_portrait_events = {}
+        self.portrait_timings = []
+        self.shot_desc_events = {}
+        self.frame_events = {}
+
 
 
     @classmethod
@@ -67,11 +85,20 @@ class Script2VideoPipeline:
         video_generator_args = config["video_generator"]["init_args"]
         video_generator = video_generator_cls(**video_generator_args)
 
+        # all pipelines share one limiter per provider/model (see utils/rate_limiter.py)
+        scheduler.configure(config.get("rate_limits"))
+        chat_model = scheduler.wrap_chat_model(chat_model, config["chat_model"])
+        image_generator = scheduler.wrap_tool(image_generator, "image", config["image_generator"])
+        video_generator = scheduler.wrap_tool(video_generator, "video", config["video_generator"])
+
         return cls(
             chat_model=chat_model,
             image_generator=image_generator,
             video_generator=video_generator,
             working_dir=config["working_dir"],
+            artifact_cache_dir=config.get("artifact_cache_dir"),
+            artifact_cache_max_gb=config.get("artifact_cache_max_gb", DEFAULT_MAX_CACHE_GB),
+            candidate_budget=CandidateBudget(**config.get("best_of_n", {})),
         )
 
     async def __call__(
@@ -98,22 +125,13 @@ class Script2VideoPipeline:
             #     print(f"☑️ Extracted {len(characters)} characters from script and saved to {characters_path}.")
 
         if character_portraits_registry is None:
-            character_portraits_registry_path = os.path.join(self.working_dir, "character_portraits_registry.json")
-            if os.path.exists(character_portraits_registry_path):
-                with open(character_portraits_registry_path, "r", encoding="utf-8") as f:
-                    character_portraits_registry = json.load(f)
-                print(f"🚀 Loaded {len(character_portraits_registry)} character portraits from existing file.")
-            else:
-                print(f"🔍 Generating character portraits...")
-                character_portraits_registry = await self.generate_character_portraits(
-                    characters=characters,
-                    character_portraits_registry=None,
-                    style=style,
-                )
-
-                with open(character_portraits_registry_path, "w", encoding="utf-8") as f:
-                    json.dump(character_portraits_registry, f, ensure_ascii=False, indent=4)
-                print(f"☑️ Generated {len(character_portraits_registry)} character portraits and saved to {character_portraits_registry_path}.")
+            # portraits are checked against the artifact store, unchanged ones are not regenerated
+            print(f"🔍 Generating character portraits...")
+            character_portraits_registry = await self.generate_character_portraits(
+                characters=characters,
+                character_portraits_registry=None,
+                style=style,
+            )
 
 
 
@@ -135,14 +153,17 @@ class Script2VideoPipeline:
             shot_descriptions=shot_descriptions,
         )
 
-        priority_shot_idxs = [camera.parent_cam_idx for camera in camera_tree if camera.parent_cam_idx is not None]
+        # rank every frame / transition / video task by the work it unblocks;
+        # the shared rate limiters then serve the critical path first
+        # (planning hashes the outputs already on disk, so it runs off the event loop)
+        self.critical_path = await asyncio.to_thread(self.plan_schedule, camera_tree, shot_descriptions)
+
         tasks = [
             self.generate_frames_for_single_camera(
                 camera=camera,
                 shot_descriptions=shot_descriptions,
                 characters=characters,
                 character_portraits_registry=character_portraits_registry,
-                priority_shot_idxs=priority_shot_idxs,
             )
             for camera in camera_tree
         ]
@@ -156,18 +177,23 @@ class Script2VideoPipeline:
         tasks.extend(video_tasks)
         await asyncio.gather(*tasks)
 
+        schedule = self.critical_path.save(os.path.join(self.working_dir, "schedule.json"))
+        print(f"⏱️ Frames and videos finished in {schedule['actual_makespan']:.0f}s (planned {schedule['planned_makespan']:.0f}s).")
+
         final_video_path = os.path.join(self.working_dir, "final_video.mp4")
-        if os.path.exists(final_video_path):
+        video_paths = [
+            os.path.join(self.working_dir, "shots", f"{shot_description.idx}", "video.mp4")
+            for shot_description in shot_descriptions
+        ]
+        final_video_key = await self.artifacts.akey("final_video", files=video_paths)
+        if self.artifacts.restore(final_video_key, final_video_path):
             print(f"🚀 Skipped concatenating videos, already exists.")
         else:
             print(f"🎬 Starting concatenating videos...")
-            video_clips = [
-                VideoFileClip(os.path.join(self.working_dir, "shots", f"{shot_description.idx}", "video.mp4"))
-                for shot_description in shot_descriptions
-            ]
-            final_video = concatenate_videoclips(video_clips)
-            final_video.write_videofile(final_video_path, codec="libx264", preset="medium")
-            print(f"☑️ Concatenated videos, saved to {final_video_path}.")
+            # stream copy when all shots share codec parameters, re-encode only if needed
+            mode = await asyncio.to_thread(concat_videos, video_paths, final_video_path)
+            self.artifacts.put(final_video_key, final_video_path)
+            print(f"☑️ Concatenated videos ({mode}), saved to {final_video_path}.")
 
         return final_video_path
 
@@ -178,104 +204,91 @@ class Script2VideoPipeline:
         shot_descriptions: List[ShotDescription],
         characters: List[CharacterInScene],
         character_portraits_registry: Dict[str, Dict[str, Dict[str, str]]],
-        priority_shot_idxs: List[int],
     ):
         # 1. generate the first_frame of the first shot of the camera
         first_shot_idx = camera.active_shot_idxs[0]
         first_shot_ff_path = os.path.join(self.working_dir, "shots", f"{first_shot_idx}", "first_frame.png")
 
-        if os.path.exists(first_shot_ff_path):
-            print(f"🚀 Skipped generating first_frame for shot {first_shot_idx}, already exists.")
-            self.frame_events[first_shot_idx]["first_frame"].set()
-
-        else:
-            print(f"🖼️ Starting first_frame generation for shot {first_shot_idx}...")
-            available_image_path_and_text_pairs = []
-
-            for character_idx in shot_descriptions[first_shot_idx].ff_vis_char_idxs:
-                identifier_in_scene = characters[character_idx].identifier_in_scene
-                registry_item = character_portraits_registry[identifier_in_scene]
-                for view, item in registry_item.items():
-                    available_image_path_and_text_pairs.append((item["path"], item["description"]))
-            
-            # generate the first_frame based on the shot_description.ff_desc
-            if camera.parent_shot_idx is not None:
-                # generate the first_frame based on the transition video
-                parent_shot_idx = camera.parent_shot_idx
-                await self.frame_events[parent_shot_idx]["first_frame"].wait()
-                parent_shot_ff_path = os.path.join(self.working_dir, "shots", f"{parent_shot_idx}", "first_frame.png")
-                transition_video_path = os.path.join(self.working_dir, "shots", f"{first_shot_idx}", f"transition_video_from_shot_{parent_shot_idx}.mp4")
-
-                if os.path.exists(transition_video_path):
-                    print(f"🚀 Skipped generating transition video for shot {first_shot_idx} from shot {parent_shot_idx}, already exists.")
-                else:
-                    print(f"🖼️ Starting transition video generation for shot {first_shot_idx} from shot {parent_shot_idx}...")
+        available_image_path_and_text_pairs = []
+        for character_idx in shot_descriptions[first_shot_idx].ff_vis_char_idxs:
+            identifier_in_scene = characters[character_idx].identifier_in_scene
+            registry_item = character_portraits_registry[identifier_in_scene]
+            for view, item in registry_item.items():
+                available_image_path_and_text_pairs.append((item["path"], item["description"]))
+
+        # generate the first_frame based on the shot_description.ff_desc
+        if camera.parent_shot_idx is not None:
+            # generate the first_frame based on the transition video
+            parent_shot_idx = camera.parent_shot_idx
+            await self.frame_events[parent_shot_idx]["first_frame"].wait()
+            parent_shot_ff_path = os.path.join(self.working_dir, "shots", f"{parent_shot_idx}", "first_frame.png")
+            transition_video_path = os.path.join(self.working_dir, "shots", f"{first_shot_idx}", f"transition_video_from_shot_{parent_shot_idx}.mp4")
+
+            transition_key = await self.artifacts.akey(
+                "transition_video",
+                first_shot_visual_desc=shot_descriptions[parent_shot_idx].visual_desc,
+                second_shot_visual_desc=shot_descriptions[first_shot_idx].visual_desc,
+                files=[
+                    parent_shot_ff_path,
+                    os.path.join(self.working_dir, "shots", f"{parent_shot_idx}", "shot_description.json"),
+                    os.path.join(self.working_dir, "shots", f"{first_shot_idx}", "shot_description.json"),
+                ],
+                model=model_id(self.video_generator),
+            )
+            if self.artifacts.restore(transition_key, transition_video_path):
+                print(f"🚀 Skipped generating transition video for shot {first_shot_idx} from shot {parent_shot_idx}, already exists.")
+            else:
+                print(f"🖼️ Starting transition video generation for shot {first_shot_idx} from shot {parent_shot_idx}...")
+                async with self.critical_path.run(task_key(first_shot_idx, "transition")):
                     transition_video_output = await self.camera_image_generator.generate_transition_video(
                         first_shot_visual_desc=shot_descriptions[parent_shot_idx].visual_desc,
                         second_shot_visual_desc=shot_descriptions[first_shot_idx].visual_desc,
                         first_shot_ff_path=parent_shot_ff_path,
                     )
-                    transition_video_output.save(transition_video_path)
-                    print(f"☑️ Generated transition video for shot {first_shot_idx} from shot {parent_shot_idx}, saved to {transition_video_path}.")
-
-                new_camera_image_path = os.path.join(self.working_dir, "shots", f"{first_shot_idx}", f"new_camera_{camera.idx}.png")
-                if os.path.exists(new_camera_image_path):
-                    print(f"🚀 Skipped generating new camera image for shot {first_shot_idx}, already exists.")
-                else:
-                    print(f"🖼️ Starting new camera image generation for shot {first_shot_idx}...")
-                    new_camera_image = self.camera_image_generator.get_new_camera_image(transition_video_path)
-                    new_camera_image.save(new_camera_image_path)
-                    print(f"☑️ Generated new camera image for shot {first_shot_idx} (not completed), saved to {new_camera_image_path}.")
-
-                    available_image_path_and_text_pairs.append(
-                        (
-                            new_camera_image_path,
-                            f"The composition and background are correct but some elements may be wrong. The wrong elements should be replaced.\nWrong elements: {camera.missing_info}.\nYou must select this image as the main reference and replace the characters in the image with the provided character portraits. Don't change the background."
-                        )
-                    )
+                    await transition_video_output.asave(transition_video_path)
+                    self.artifacts.put(transition_key, transition_video_path)
+                print(f"☑️ Generated transition video for shot {first_shot_idx} from shot {parent_shot_idx}, saved to {transition_video_path}.")
+
+            new_camera_image_path = os.path.join(self.working_dir, "shots", f"{first_shot_idx}", f"new_camera_{camera.idx}.png")
+            new_camera_key = await self.artifacts.akey("new_camera_image", files=[transition_video_path])
+            if self.artifacts.restore(new_camera_key, new_camera_image_path):
+                print(f"🚀 Skipped generating new camera image for shot {first_shot_idx}, already exists.")
+            else:
+                print(f"🖼️ Starting new camera image generation for shot {first_shot_idx}...")
+                new_camera_image = self.camera_image_generator.get_new_camera_image(transition_video_path)
+                new_camera_image.save(new_camera_image_path)
+                self.artifacts.put(new_camera_key, new_camera_image_path)
+                print(f"☑️ Generated new camera image for shot {first_shot_idx} (not completed), saved to {new_camera_image_path}.")
+
+            available_image_path_and_text_pairs.append(
+                (
+                    new_camera_image_path,
+                    f"The composition and background are correct but some elements may be wrong. The wrong elements should be replaced.\nWrong elements: {camera.missing_info}.\nYou must select this image as the main reference and replace the characters in the image with the provided character portraits. Don't change the background."
+                )
+            )
 
 
-            # 如果子镜头缺少信息，则需要选择参考图像生成
-            if camera.parent_shot_idx is None or camera.missing_info is not None:
-                ff_selector_output_path = os.path.join(self.working_dir, "shots", f"{first_shot_idx}", "first_frame_selector_output.json")
-                if os.path.exists(ff_selector_output_path):
-                    with open(ff_selector_output_path, 'r', encoding='utf-8') as f:
-                        ff_selector_output = json.load(f)
-                    print(f"🚀 Loaded existing reference image selection and prompt for first_frame of shot {first_shot_idx} from {ff_selector_output_path}.")
-                else:
-                    print(f"🔍 Selecting reference images and generating prompt for first_frame of shot {first_shot_idx}...")
-                    ff_selector_output = await self.reference_image_selector.select_reference_images_and_generate_prompt(
-                        available_image_path_and_text_pairs=available_image_path_and_text_pairs,
-                        frame_description=shot_descriptions[first_shot_idx].ff_desc
-                    )
-                    with open(ff_selector_output_path, 'w', encoding='utf-8') as f:
-                        json.dump(ff_selector_output, f, ensure_ascii=False, indent=4)
-
-                    print(f"☑️ Selected reference images and generated prompt for first_frame of shot {first_shot_idx}, saved to {ff_selector_output_path}.")
-
-                reference_image_path_and_text_pairs, prompt = ff_selector_output["reference_image_path_and_text_pairs"], ff_selector_output["text_prompt"]
-                prefix_prompt = ""
-                for i, (image_path, text) in enumerate(reference_image_path_and_text_pairs):
-                    prefix_prompt += f"Image {i}: {text}\n"
-                prompt = f"{prefix_prompt}\n{prompt}"
-                reference_image_paths = [item[0] for item in reference_image_path_and_text_pairs]
-                ff_image: ImageOutput = await self.image_generator.generate_single_image(
-                    prompt=prompt,
-                    reference_image_paths=reference_image_paths,
-                    size="1600x900",
+        # 如果子镜头缺少信息，则需要选择参考图像生成
+        if camera.parent_shot_idx is None or camera.missing_info is not None:
+            async with self.critical_path.run(task_key(first_shot_idx, "first_frame")):
+                await self.generate_frame_image(
+                    shot_idx=first_shot_idx,
+                    frame_type="first_frame",
+                    available_image_path_and_text_pairs=available_image_path_and_text_pairs,
+                    frame_desc=shot_descriptions[first_shot_idx].ff_desc,
                 )
-                ff_image.save(first_shot_ff_path)
-                self.frame_events[first_shot_idx]["first_frame"].set()
-                print(f"☑️ Generated first_frame for shot {first_shot_idx}, saved to {first_shot_ff_path}.")
-            else:
+        else:
+            camera_frame_key = await self.artifacts.akey("first_frame_from_new_camera", files=[new_camera_image_path])
+            if not self.artifacts.restore(camera_frame_key, first_shot_ff_path):
                 shutil.copy(new_camera_image_path, first_shot_ff_path)
-                self.frame_events[first_shot_idx]["first_frame"].set()
-                print(f"☑️ Generated first_frame for shot {first_shot_idx}, saved to {first_shot_ff_path}.")
+                self.artifacts.put(camera_frame_key, first_shot_ff_path)
+            print(f"☑️ Generated first_frame for shot {first_shot_idx}, saved to {first_shot_ff_path}.")
+        self.frame_events[first_shot_idx]["first_frame"].set()
 
 
         # 2. generate the following frames of the camera
-        priority_tasks = []
-        normal_tasks = []
+        # all of them start together; their critical-path rank decides who gets a slot first
+        tasks = []
 
         if shot_descriptions[first_shot_idx].variation_type in ["medium", "large"]:
             task = self.generate_frame_for_single_shot(
@@ -286,7 +299,7 @@ class Script2VideoPipeline:
                 visible_characters=[characters[idx] for idx in shot_descriptions[first_shot_idx].lf_vis_char_idxs],
                 character_portraits_registry=character_portraits_registry,
             )
-            normal_tasks.append(task)
+            tasks.append(task)
 
         for shot_idx in camera.active_shot_idxs[1:]:
             first_frame_task = self.generate_frame_for_single_shot(
@@ -297,10 +310,7 @@ class Script2VideoPipeline:
                     visible_characters=[characters[idx] for idx in shot_descriptions[shot_idx].ff_vis_char_idxs],
                     character_portraits_registry=character_portraits_registry,
                 )
-            if shot_idx in priority_shot_idxs:
-                priority_tasks.append(first_frame_task)
-            else:
-                normal_tasks.append(first_frame_task)
+            tasks.append(first_frame_task)
 
 
             if shot_descriptions[shot_idx].variation_type in ["medium", "large"]:
@@ -312,11 +322,9 @@ class Script2VideoPipeline:
                     visible_characters=[characters[idx] for idx in shot_descriptions[shot_idx].lf_vis_char_idxs],
                     character_portraits_registry=character_portraits_registry,
                 )
-                normal_tasks.append(last_frame_task)
+                tasks.append(last_frame_task)
 
-
-        await asyncio.gather(*priority_tasks)
-        await asyncio.gather(*normal_tasks)
+        await asyncio.gather(*tasks)
 
 
 
@@ -325,24 +333,30 @@ class Script2VideoPipeline:
         shot_description: ShotDescription,
     ):
         video_path = os.path.join(self.working_dir, "shots", f"{shot_description.idx}", "video.mp4")
-        if os.path.exists(video_path):
-            print(f"🚀 Skipped generating video for shot {shot_description.idx}, already exists.")
-        else:
-            await self.frame_events[shot_description.idx]["first_frame"].wait()
-            if shot_description.variation_type in ["medium", "large"]:
-                await self.frame_events[shot_description.idx]["last_frame"].wait()
 
-            frame_paths = []
-            frame_paths.append(os.path.join(self.working_dir, "shots", f"{shot_description.idx}", "first_frame.png"))
-            if shot_description.variation_type in ["medium", "large"]:
-                frame_paths.append(os.path.join(self.working_dir, "shots", f"{shot_description.idx}", "last_frame.png"))
+        await self.frame_events[shot_description.idx]["first_frame"].wait()
+        if shot_description.variation_type in ["medium", "large"]:
+            await self.frame_events[shot_description.idx]["last_frame"].wait()
+
+        frame_paths = []
+        frame_paths.append(os.path.join(self.working_dir, "shots", f"{shot_description.idx}", "first_frame.png"))
+        if shot_description.variation_type in ["medium", "large"]:
+            frame_paths.append(os.path.join(self.working_dir, "shots", f"{shot_description.idx}", "last_frame.png"))
 
+        prompt = shot_description.motion_desc + "\n" + shot_description.audio_desc
+        shot_description_path = os.path.join(self.working_dir, "shots", f"{shot_description.idx}", "shot_description.json")
+        video_key = await self.artifacts.akey("video", prompt=prompt, files=frame_paths + [shot_description_path], model=model_id(self.video_generator))
+        if self.artifacts.restore(video_key, video_path):
+            print(f"🚀 Skipped generating video for shot {shot_description.idx}, already exists.")
+        else:
             print(f"🎬 Starting video generation for shot {shot_description.idx}...")
-            video_output = await self.video_generator.generate_single_video(
-                prompt=shot_description.motion_desc + "\n" + shot_description.audio_desc,
-                reference_image_paths=frame_paths,
-            )
-            video_output.save(video_path)
+            async with self.critical_path.run(task_key(shot_description.idx, "video")):
+                video_output = await self.video_generator.generate_single_video(
+                    prompt=prompt,
+                    reference_image_paths=frame_paths,
+                )
+                await video_output.asave(video_path)
+                self.artifacts.put(video_key, video_path)
             print(f"☑️ Generated video for shot {shot_description.idx}, saved to {video_path}.")
 
     async def generate_frame_for_single_shot(
@@ -353,15 +367,9 @@ class Script2VideoPipeline:
         frame_desc: str,
         visible_characters: List[CharacterInScene],
         character_portraits_registry: Dict[str, Dict[str, Dict[str, str]]],
-    ) -> ImageOutput:
-
-        frame_image_path = os.path.join(self.working_dir, "shots", f"{shot_idx}", f"{frame_type}.png")
-
-        if os.path.exists(frame_image_path):
-            print(f"🚀 Skipped generating {frame_type} for shot {shot_idx}, already exists.")
+    ) -> str:
 
-        else:
-            print(f"🖼️ Starting {frame_type} generation for shot {shot_idx}...")
+        async with self.critical_path.run(task_key(shot_idx, frame_type)):
             available_image_path_and_text_pairs = []
             for visible_character in visible_characters:
                 identifier_in_scene = visible_character.identifier_in_scene
@@ -371,39 +379,166 @@ class Script2VideoPipeline:
 
             available_image_path_and_text_pairs.append(first_shot_ff_path_and_text_pair)
 
-            selector_output_path = os.path.join(self.working_dir, "shots", f"{shot_idx}", f"{frame_type}_selector_output.json")
-            if os.path.exists(selector_output_path):
-                with open(selector_output_path, 'r', encoding='utf-8') as f:
-                    selector_output = json.load(f)
-                print(f"🚀 Loaded existing reference image selection and prompt for {frame_type} frame of shot {shot_idx} from {selector_output_path}.")
+            frame_image_path = await self.generate_frame_image(
+                shot_idx=shot_idx,
+                frame_type=frame_type,
+                available_image_path_and_text_pairs=available_image_path_and_text_pairs,
+                frame_desc=frame_desc,
+            )
+
+        self.frame_events[shot_idx][frame_type].set()
+        return frame_image_path
+
+
+    async def generate_frame_image(
+        self,
+        shot_idx: int,
+        frame_type: Literal["first_frame", "last_frame"],
+        available_image_path_and_text_pairs: List[Tuple[str, str]],
+        frame_desc: str,
+    ) -> str:
+        shot_dir = os.path.join(self.working_dir, "shots", f"{shot_idx}")
+
+        # reference selection is keyed on the candidate images' content and texts, never their
+        # paths, so a new portrait or first frame upstream invalidates it (and the frame generated
+        # from it) while the same candidates in another project's working dir reuse it. It is
+        # stored as indices into the candidates for the same reason.
+        selector_output_path = os.path.join(shot_dir, f"{frame_type}_selector_output.json")
+        available_image_paths = [path for path, _ in available_image_path_and_text_pairs]
+        selector_key = await self.artifacts.akey(
+            "reference_image_selection",
+            available_texts=[text for _, text in available_image_path_and_text_pairs],
+            frame_description=frame_desc,
+            files=available_image_paths + [os.path.join(shot_dir, "shot_description.json")],
+            model=model_id(self.chat_model),
+        )
+        selector_output = self.artifacts.load_json(selector_key, selector_output_path)
+        if selector_output is not None:
+            print(f"🚀 Loaded existing reference image selection and prompt for {frame_type} frame of shot {shot_idx} from {selector_output_path}.")
+        else:
+            print(f"🔍 Selecting reference images and generating prompt for {frame_type} frame of shot {shot_idx}...")
+            selector_output = await self.reference_image_selector.select_reference_images_and_generate_prompt(
+                available_image_path_and_text_pairs=available_image_path_and_text_pairs,
+                frame_description=frame_desc
+            )
+            selector_output = {
+                "reference_image_indices": [available_image_paths.index(path) for path, _ in selector_output["reference_image_path_and_text_pairs"]],
+                "text_prompt": selector_output["text_prompt"],
+            }
+            self.artifacts.save_json(selector_key, selector_output_path, selector_output)
+            print(f"☑️ Selected reference images and generated prompt for {frame_type} frame of shot {shot_idx}, saved to {selector_output_path}.")
+
+        if "reference_image_indices" in selector_output:
+            reference_image_path_and_text_pairs = [available_image_path_and_text_pairs[i] for i in selector_output["reference_image_indices"]]
+        else:
+            # adopted from a run that stored the selected paths themselves
+            reference_image_path_and_text_pairs = selector_output["reference_image_path_and_text_pairs"]
+        prompt = selector_output["text_prompt"]
+        prefix_prompt = ""
+        for i, (image_path, text) in enumerate(reference_image_path_and_text_pairs):
+            prefix_prompt += f"Image {i}: {text}\n"
+        prompt = f"{prefix_prompt}\n{prompt}"
+        reference_image_paths = [item[0] for item in reference_image_path_and_text_pairs]
+
+        frame_image_path = os.path.join(shot_dir, f"{frame_type}.png")
+        frame_key = await self.artifacts.akey(
+            "frame",
+            prompt=prompt,
+            size="1600x900",
+            files=reference_image_paths + [selector_output_path],
+            model=model_id(self.image_generator),
+        )
+        if self.artifacts.restore(frame_key, frame_image_path):
+            print(f"🚀 Skipped generating {frame_type} for shot {shot_idx}, already exists.")
+        else:
+            print(f"🖼️ Starting {frame_type} generation for shot {shot_idx}...")
+            if self.candidate_budget.enabled:
+                await self.generate_best_frame_image(
+                    shot_idx, frame_type, prompt, reference_image_path_and_text_pairs, frame_desc, frame_image_path,
+                )
             else:
-                print(f"🔍 Selecting reference images and generating prompt for {frame_type} frame of shot {shot_idx}...")
-                selector_output = await self.reference_image_selector.select_reference_images_and_generate_prompt(
-                    available_image_path_and_text_pairs=available_image_path_and_text_pairs,
-                    frame_description=frame_desc
+                frame_image: ImageOutput = await self.image_generator.generate_single_image(
+                    prompt=prompt,
+                    reference_image_paths=reference_image_paths,
+                    size="1600x900",
                 )
-                with open(selector_output_path, 'w', encoding='utf-8') as f:
-                    json.dump(selector_output, f, ensure_ascii=False, indent=4)
-                print(f"☑️ Selected reference images and generated prompt for {frame_type} frame of shot {shot_idx}, saved to {selector_output_path}.")
+                await frame_image.asave(frame_image_path)
+            self.artifacts.put(frame_key, frame_image_path)
+            print(f"☑️ Generated {frame_type} frame for shot {shot_idx}, saved to {frame_image_path}.")
 
-            reference_image_path_and_text_pairs, prompt = selector_output["reference_image_path_and_text_pairs"], selector_output["text_prompt"]
-            prefix_prompt = ""
-            for i, (image_path, text) in enumerate(reference_image_path_and_text_pairs):
-                prefix_prompt += f"Image {i}: {text}\n"
-            prompt = f"{prefix_prompt}\n{prompt}"
-            reference_image_paths = [item[0] for item in reference_image_path_and_text_pairs]
+        return frame_image_path
+
+
+    async def generate_best_frame_image(
+        self,
+        shot_idx: int,
+        frame_type: Literal["first_frame", "last_frame"],
+        prompt: str,
+        reference_image_path_and_text_pairs: List[Tuple[str, str]],
+        frame_desc: str,
+        frame_image_path: str,
+    ):
+        candidate_dir = os.path.join(self.working_dir, "shots", f"{shot_idx}", f"{frame_type}_candidates")
+        os.makedirs(candidate_dir, exist_ok=True)
+        reference_image_paths = [path for path, _ in reference_image_path_and_text_pairs]
 
+        async def generate(idx: int) -> str:
             frame_image: ImageOutput = await self.image_generator.generate_single_image(
                 prompt=prompt,
                 reference_image_paths=reference_image_paths,
                 size="1600x900",
             )
-            frame_image.save(frame_image_path)
-            print(f"☑️ Generated {frame_type} frame for shot {shot_idx}, saved to {frame_image_path}.")
+            candidate_path = os.path.join(candidate_dir, f"{idx}.png")
+            await frame_image.asave(candidate_path)
+            return candidate_path
+
+        async def score(candidate_paths: List[str]) -> List[float]:
+            return await self.best_image_selector.score_candidates(
+                reference_image_path_and_text_pairs=reference_image_path_and_text_pairs,
+                target_description=frame_desc,
+                candidate_image_paths=candidate_paths,
+            )
 
+        # fewer candidates when the budget runs low or the image provider has no idle slots
+        n = self.candidate_budget.reserve(getattr(self.image_generator, "_limiter", None))
+        result = await best_of_n(generate, score, n, accept_score=self.candidate_budget.accept_score)
+        self.candidate_budget.refund(n - result.generated)
+        shutil.copyfile(result.path, frame_image_path)
 
-        self.frame_events[shot_idx][frame_type].set()
-        return frame_image_path
+        with open(os.path.join(candidate_dir, "scores.json"), "w", encoding="utf-8") as f:
+            json.dump({"selected": result.index, "candidates": n, "generated": result.generated, "early_accepted": result.early_accepted, "scores": result.scores}, f, ensure_ascii=False, indent=4)
+        scores = ", ".join(f"{idx}: {value:.1f}" for idx, value in sorted(result.scores.items()))
+        print(f"🏅 Kept candidate {result.index} of {n} for {frame_type} of shot {shot_idx}" + (" (accepted early)" if result.early_accepted else "") + (f", scores {scores}." if scores else "."))
+
+
+    def plan_schedule(
+        self,
+        camera_tree: List[Camera],
+        shot_descriptions: List[ShotDescription],
+    ) -> CriticalPathScheduler:
+        # outputs the artifact store will reuse cost nothing in the plan; a file left over
+        # from outdated inputs is not one of them
+        done = []
+        for shot_description in shot_descriptions:
+            shot_dir = os.path.join(self.working_dir, "shots", f"{shot_description.idx}")
+            for task, filename in (("first_frame", "first_frame.png"), ("last_frame", "last_frame.png"), ("video", "video.mp4")):
+                if self.artifacts.is_current(os.path.join(shot_dir, filename)):
+                    done.append(task_key(shot_description.idx, task))
+        for camera in camera_tree:
+            if camera.parent_shot_idx is not None:
+                first_shot_idx = camera.active_shot_idxs[0]
+                if self.artifacts.is_current(os.path.join(self.working_dir, "shots", f"{first_shot_idx}", f"transition_video_from_shot_{camera.parent_shot_idx}.mp4")):
+                    done.append(task_key(first_shot_idx, "transition"))
+
+        # plan with the same in-flight caps the shared limiters enforce
+        budget = {
+            "image": getattr(getattr(self.image_generator, "_limiter", None), "max_in_flight", None),
+            "video": getattr(getattr(self.video_generator, "_limiter", None), "max_in_flight", None),
+        }
+        critical_path = CriticalPathScheduler.from_camera_tree(camera_tree, shot_descriptions, done=done, budget=budget)
+        planned_makespan = critical_path.plan()
+        print(f"🗺️ Planned {len(critical_path.tasks)} frame/video tasks, critical path {' -> '.join(critical_path.critical_path())} ({planned_makespan:.0f}s estimated).")
+        return critical_path
 
 
     async def construct_camera_tree(
@@ -411,10 +546,14 @@ class Script2VideoPipeline:
         shot_descriptions: List[ShotDescription],
     ):
         camera_tree_path = os.path.join(self.working_dir, "camera_tree.json")
+        camera_tree_key = self.artifacts.key(
+            "camera_tree",
+            shot_descriptions=[shot_description.model_dump() for shot_description in shot_descriptions],
+            model=model_id(self.chat_model),
+        )
 
-        if os.path.exists(camera_tree_path):
-            with open(camera_tree_path, "r", encoding="utf-8") as f:
-                camera_tree = json.load(f)
+        camera_tree = self.artifacts.load_json(camera_tree_key, camera_tree_path)
+        if camera_tree is not None:
             camera_tree = [Camera.model_validate(camera) for camera in camera_tree]
             print(f"🚀 Loaded {len(camera_tree)} cameras from existing file.")
             return camera_tree
@@ -427,8 +566,7 @@ class Script2VideoPipeline:
                 cameras[shot_description.cam_idx].active_shot_idxs.append(shot_description.idx)
 
         camera_tree = await self.camera_image_generator.construct_camera_tree(cameras=cameras, shot_descs=shot_descriptions)
-        with open(camera_tree_path, "w", encoding="utf-8") as f:
-            json.dump([camera.model_dump() for camera in camera_tree], f, ensure_ascii=False, indent=4)
+        self.artifacts.save_json(camera_tree_key, camera_tree_path, [camera.model_dump() for camera in camera_tree])
         print(f"✅ Constructed camera tree and saved to {camera_tree_path}.")
         return camera_tree
 
@@ -440,16 +578,15 @@ class Script2VideoPipeline:
         script: str,
     ):
         save_path = os.path.join(self.working_dir, "characters.json")
+        save_key = self.artifacts.key("characters", script=script, model=model_id(self.chat_model))
 
-        if os.path.exists(save_path):
-            with open(save_path, "r", encoding="utf-8") as f:
-                characters = json.load(f)
+        characters = self.artifacts.load_json(save_key, save_path)
+        if characters is not None:
             characters = [CharacterInScene.model_validate(character) for character in characters]
             print(f"🚀 Loaded {len(characters)} characters from existing file.")
         else:
             characters = await self.character_extractor.extract_characters(script)
-            with open(save_path, "w", encoding="utf-8") as f:
-                json.dump([character.model_dump() for character in characters], f, ensure_ascii=False, indent=4)
+            self.artifacts.save_json(save_key, save_path, [character.model_dump() for character in characters])
             print(f"✅ Extracted {len(characters)} characters from script and saved to {save_path}.")
 
         for character in characters:
@@ -466,11 +603,7 @@ class Script2VideoPipeline:
     ):
         character_portraits_registry_path = os.path.join(self.working_dir, "character_portraits_registry.json")
         if character_portraits_registry is None:
-            if os.path.exists(character_portraits_registry_path):
-                with open(character_portraits_registry_path, 'r', encoding='utf-8') as f:
-                    character_portraits_registry = json.load(f)
-            else:
-                character_portraits_registry = {}
+            character_portraits_registry = {}
 
 
         tasks = [
@@ -479,11 +612,16 @@ class Script2VideoPipeline:
             if character.identifier_in_scene not in character_portraits_registry
         ]
         if tasks:
+            self.portrait_timings = []
             for future in asyncio.as_completed(tasks):
                 character_portraits_registry.update(await future)
-                with open(character_portraits_registry_path, 'w', encoding='utf-8') as f:
-                    json.dump(character_portraits_registry, f, ensure_ascii=False, indent=4)
+                atomic_write_json(character_portraits_registry_path, character_portraits_registry)
 
+            for view in ("front", "side", "back"):
+                seconds = [timing["seconds"] for timing in self.portrait_timings if timing["view"] == view]
+                if seconds:
+                    logging.info(f"{view} portraits: {len(seconds)} generated, mean {sum(seconds) / len(seconds):.1f}s, max {max(seconds):.1f}s")
+            atomic_write_json(os.path.join(self.working_dir, "portrait_timings.json"), self.portrait_timings)
             print(f"✅ Completed character portrait generation for {len(characters)} characters.")
         else:
             print("🚀 All characters already have portraits, skipping portrait generation.")
@@ -498,27 +636,34 @@ class Script2VideoPipeline:
         character_dir = os.path.join(self.working_dir, "character_portraits", f"{character.idx}_{character.identifier_in_scene}")
         os.makedirs(character_dir, exist_ok=True)
 
+        # keyed on the character and style, not on the project: portraits are reused across projects
+        model = model_id(self.image_generator)
         front_portrait_path = os.path.join(character_dir, "front.png")
-        if os.path.exists(front_portrait_path):
-            pass
-        else:
-            front_portrait_output = await self.character_portraits_generator.generate_front_portrait(character, style)
-            front_portrait_output.save(front_portrait_path)
-
+        front_key = self.artifacts.key("front_portrait", character=character.model_dump(), style=style, model=model)
+        # side and back only need the front, so every character's front is queued ahead of them
+        token = current_priority.set(1.0)
+        try:
+            await self.generate_portrait_view(
+                character, "front", front_key, front_portrait_path,
+                lambda: self.character_portraits_generator.generate_front_portrait(character, style),
+            )
+        finally:
+            current_priority.reset(token)
 
         side_portrait_path = os.path.join(character_dir, "side.png")
-        if os.path.exists(side_portrait_path):
-            pass
-        else:
-            side_portrait_output = await self.character_portraits_generator.generate_side_portrait(character, front_portrait_path)
-            side_portrait_output.save(side_portrait_path)
-
+        side_key = await self.artifacts.akey("side_portrait", character=character.model_dump(), files=[front_portrait_path], model=model)
         back_portrait_path = os.path.join(character_dir, "back.png")
-        if os.path.exists(back_portrait_path):
-            pass
-        else:
-            back_portrait_output = await self.character_portraits_generator.generate_back_portrait(character, front_portrait_path)
-            back_portrait_output.save(back_portrait_path)
+        back_key = await self.artifacts.akey("back_portrait", character=character.model_dump(), files=[front_portrait_path], model=model)
+        await asyncio.gather(
+            self.generate_portrait_view(
+                character, "side", side_key, side_portrait_path,
+                lambda: self.character_portraits_generator.generate_side_portrait(character, front_portrait_path),
+            ),
+            self.generate_portrait_view(
+                character, "back", back_key, back_portrait_path,
+                lambda: self.character_portraits_generator.generate_back_portrait(character, front_portrait_path),
+            ),
+        )
 
         self.character_portrait_events[character.idx].set()
 
@@ -542,6 +687,26 @@ class Script2VideoPipeline:
         }
 
 
+    async def generate_portrait_view(
+        self,
+        character: CharacterInScene,
+        view: str,
+        key: str,
+        path: str,
+        generate,
+    ):
+        if self.artifacts.restore(key, path):
+            return
+        start = time.perf_counter()
+        output = await generate()
+        await output.asave(path)
+        self.artifacts.put(key, path)
+        # wall time including the wait for an image slot
+        seconds = time.perf_counter() - start
+        self.portrait_timings.append({"character": character.identifier_in_scene, "view": view, "seconds": round(seconds, 2)})
+        print(f"☑️ Generated {view} portrait for {character.identifier_in_scene} in {seconds:.1f}s.")
+
+
 
     async def design_storyboard(
         self,
@@ -550,9 +715,15 @@ class Script2VideoPipeline:
         user_requirement: str,
     ):
         storyboard_path = os.path.join(self.working_dir, "storyboard.json")
-        if os.path.exists(storyboard_path):
-            with open(storyboard_path, 'r', encoding='utf-8') as f:
-                storyboard = json.load(f)
+        storyboard_key = self.artifacts.key(
+            "storyboard",
+            script=script,
+            characters=[character.model_dump() for character in characters],
+            user_requirement=user_requirement,
+            model=model_id(self.chat_model),
+        )
+        storyboard = self.artifacts.load_json(storyboard_key, storyboard_path)
+        if storyboard is not None:
             storyboard = [ShotBriefDescription.model_validate(shot) for shot in storyboard]
             print(f"🚀 Loaded {len(storyboard)} shot brief descriptions from existing file.")
         else:
@@ -563,8 +734,7 @@ class Script2VideoPipeline:
                 user_requirement=user_requirement,
                 retry_timeout=150,
             )
-            with open(storyboard_path, 'w', encoding='utf-8') as f:
-                json.dump([shot.model_dump() for shot in storyboard], f, ensure_ascii=False, indent=4)
+            self.artifacts.save_json(storyboard_key, storyboard_path, [shot.model_dump() for shot in storyboard])
             print(f"✅ Designed storyboard and saved to {storyboard_path}.")
 
         for shot_brief_description in storyboard:
@@ -596,9 +766,15 @@ class Script2VideoPipeline:
         shot_description_path = os.path.join(self.working_dir, "shots", f"{shot_brief_description.idx}", "shot_description.json")
         os.makedirs(os.path.dirname(shot_description_path), exist_ok=True)
 
-        if os.path.exists(shot_description_path):
-            with open(shot_description_path, 'r', encoding='utf-8') as f:
-                shot_description = ShotDescription.model_validate(json.load(f))
+        shot_description_key = self.artifacts.key(
+            "shot_description",
+            shot_brief_description=shot_brief_description.model_dump(),
+            characters=[character.model_dump() for character in characters],
+            model=model_id(self.chat_model),
+        )
+        shot_description = self.artifacts.load_json(shot_description_key, shot_description_path)
+        if shot_description is not None:
+            shot_description = ShotDescription.model_validate(shot_description)
             print(f"🚀 Loaded shot {shot_brief_description.idx} description from existing file.")
         else:
             shot_description = await self.storyboard_artist.decompose_visual_description(
@@ -606,8 +782,7 @@ class Script2VideoPipeline:
                 characters=characters,
                 retry_timeout=120,
             )
-            with open(shot_description_path, 'w', encoding='utf-8') as f:
-                json.dump(shot_description.model_dump(), f, ensure_ascii=False, indent=4)
+            self.artifacts.save_json(shot_description_key, shot_description_path, shot_description.model_dump())
             print(f"✅ Decomposed visual description for shot {shot_brief_description.idx} and saved to {shot_description_path}.")
 
         self.shot_desc_events[shot_brief_description.idx].set()
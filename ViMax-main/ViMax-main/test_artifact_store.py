@@ -0,0 +1,270 @@
+import sys
+import os
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+
+# Add current directory to sys.path
+sys.path.append(os.getcwd())
+
+from utils.artifact_store import ArtifactStore, atomic_write_json, model_id
+from utils.rate_limiter import ResourceScheduler
+
+
+class FakeImageGenerator:
+    def __init__(self):
+        self.model = "fake-image-1"
+        self.calls = []
+
+    def generate(self, prompt, reference_image_paths, path):
+        self.calls.append(prompt)
+        content = prompt + "|" + "|".join(open(p).read() for p in reference_image_paths)
+        with open(path, "w") as f:
+            f.write(content)
+
+
+def run_project(working_dir, cache_dir, generator, character="Alice, red coat", frame_prompt="Alice at the door"):
+    """Portrait -> frame -> video chain, resumed the way the pipelines do it."""
+    store = ArtifactStore(working_dir, cache_dir)
+    model = model_id(generator)
+
+    portrait_path = os.path.join(working_dir, "front.png")
+    key = store.key("front_portrait", character=character, style="anime", model=model)
+    if not store.restore(key, portrait_path):
+        generator.generate(character, [], portrait_path)
+        store.put(key, portrait_path)
+
+    frame_path = os.path.join(working_dir, "first_frame.png")
+    key = store.key("frame", prompt=frame_prompt, files=[portrait_path], model=model)
+    if not store.restore(key, frame_path):
+        generator.generate(frame_prompt, [portrait_path], frame_path)
+        store.put(key, frame_path)
+
+    video_path = os.path.join(working_dir, "video.mp4")
+    key = store.key("video", prompt="walks in", files=[frame_path], model=model)
+    if not store.restore(key, video_path):
+        generator.generate("walks in", [frame_path], video_path)
+        store.put(key, video_path)
+    return store
+
+
+def test_incremental_rebuild_and_cross_project_reuse():
+    root = tempfile.mkdtemp()
+    try:
+        cache_dir = os.path.join(root, "cache")
+        project_a = os.path.join(root, "project_a")
+        generator = FakeImageGenerator()
+
+        run_project(project_a, cache_dir, generator)
+        assert generator.calls == ["Alice, red coat", "Alice at the door", "walks in"]
+
+        # nothing changed: everything is reused
+        generator.calls.clear()
+        run_project(project_a, cache_dir, generator)
+        assert generator.calls == []
+
+        # the frame prompt changed: frame and video are stale, the portrait is not
+        run_project(project_a, cache_dir, generator, frame_prompt="Alice at the window")
+        assert generator.calls == ["Alice at the window", "walks in"]
+        assert "window" in open(os.path.join(project_a, "video.mp4")).read()
+
+        # switching back restores the old outputs from the cache instead of regenerating
+        generator.calls.clear()
+        store = run_project(project_a, cache_dir, generator)
+        assert generator.calls == []
+        assert store.manifest["first_frame.png"]["source"] == "cache"
+
+        # another project asking for the same character shares the portrait
+        project_b = os.path.join(root, "project_b")
+        store = run_project(project_b, cache_dir, generator, frame_prompt="Alice in the garden")
+        assert generator.calls == ["Alice in the garden", "walks in"]
+        assert store.manifest["front.png"]["source"] == "cache"
+
+        with open(os.path.join(project_b, ArtifactStore.MANIFEST)) as f:
+            assert set(json.load(f)) == {"front.png", "first_frame.png", "video.mp4"}
+        print("Unchanged steps reused, stale steps regenerated, portrait shared across projects")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_key_depends_on_file_content_and_model():
+    root = tempfile.mkdtemp()
+    try:
+        store = ArtifactStore(root, os.path.join(root, "cache"))
+        image_path = os.path.join(root, "ref.png")
+        with open(image_path, "w") as f:
+            f.write("v1")
+
+        key = store.key("frame", prompt="p", files=[image_path], model="m")
+        assert key == store.key("frame", model="m", files=[image_path], prompt="p")
+        assert key != store.key("frame", prompt="p", files=[image_path], model="other")
+        assert key != store.key("last_frame", prompt="p", files=[image_path], model="m")
+
+        with open(image_path, "w") as f:
+            f.write("v2 with a different size")
+        assert key != store.key("frame", prompt="p", files=[image_path], model="m")
+
+        generator = FakeImageGenerator()
+        wrapped = ResourceScheduler().wrap_tool(generator, "image")
+        assert model_id(wrapped) == model_id(generator) == 'FakeImageGenerator{"model": "fake-image-1"}'
+        print("Keys change with inputs, file content and model, not with argument order or wrappers")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_akey_hashes_off_the_event_loop():
+    root = tempfile.mkdtemp()
+    try:
+        store = ArtifactStore(root, os.path.join(root, "cache"))
+        video_path = os.path.join(root, "video.mp4")
+        with open(video_path, "wb") as f:
+            f.write(os.urandom(64 * 1024 * 1024))
+
+        async def main():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.001)
+
+            ticker_task = asyncio.create_task(ticker())
+            await asyncio.sleep(0)
+            key = await store.akey("final_video", files=[video_path])
+            ticker_task.cancel()
+            return key, ticks
+
+        key, ticks = asyncio.run(main())
+        assert key == store.key("final_video", files=[video_path])
+        assert ticks >= 5, ticks
+        print(f"akey matches key; event loop ticked {ticks} times while a 64 MB video was hashed")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_cache_links_outputs_and_evicts_least_recently_used():
+    root = tempfile.mkdtemp()
+    try:
+        cache_dir = os.path.join(root, "cache")
+        store = ArtifactStore(os.path.join(root, "project"), cache_dir, max_cache_gb=2.5 / 1024)
+        mb = os.urandom(1024 * 1024)
+
+        def produce(name):
+            path = os.path.join(store.working_dir, f"{name}.mp4")
+            key = store.key("video", prompt=name)
+            if not store.restore(key, path):
+                with open(path, "wb") as f:
+                    f.write(mb + name.encode())
+                store.put(key, path)
+            return key, path
+
+        key_a, path_a = produce("a")
+        # the cache holds the same inode, not a second copy
+        assert os.stat(path_a).st_ino == os.stat(store._object_path(key_a, path_a)).st_ino
+
+        key_b, _ = produce("b")
+        os.utime(store._object_path(key_a, path_a), (time.time() - 60, time.time() - 60))
+        os.utime(store._object_path(key_b, path_a), (time.time() - 30, time.time() - 30))
+        # a is used again: b is now the least recently used one
+        store.restore(key_a, os.path.join(store.working_dir, "copy_of_a.mp4"))
+        key_c, _ = produce("c")
+        assert os.path.exists(store._object_path(key_a, path_a))
+        assert not os.path.exists(store._object_path(key_b, path_a))
+        assert os.path.exists(store._object_path(key_c, path_a))
+
+        # a stale output is replaced, never rewritten through the link into the cache
+        key_a2 = store.key("video", prompt="a, longer")
+        assert not store.restore(key_a2, path_a)
+        with open(path_a, "wb") as f:
+            f.write(b"new a")
+        store.put(key_a2, path_a)
+        with open(store._object_path(key_a, path_a), "rb") as f:
+            assert f.read() == mb + b"a"
+        print("Outputs are hardlinked into the cache, which evicts the least recently used past its cap")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_existing_outputs_are_adopted():
+    root = tempfile.mkdtemp()
+    try:
+        # a working dir from before the manifest existed
+        os.makedirs(os.path.join(root, "shots", "0"))
+        frame_path = os.path.join(root, "shots", "0", "first_frame.png")
+        with open(frame_path, "w") as f:
+            f.write("old frame")
+
+        store = ArtifactStore(root, os.path.join(root, "cache"))
+        assert store.restore(store.key("frame", prompt="p"), frame_path)
+        assert store.manifest[os.path.join("shots", "0", "first_frame.png")]["source"] == "adopted"
+        # once adopted, a changed input makes it stale
+        assert not store.restore(store.key("frame", prompt="changed"), frame_path)
+        print("Outputs from runs without a manifest are adopted, then tracked")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_is_current_follows_input_files():
+    root = tempfile.mkdtemp()
+    try:
+        project = os.path.join(root, "project")
+        generator = FakeImageGenerator()
+        run_project(project, os.path.join(root, "cache"), generator)
+
+        store = ArtifactStore(project, os.path.join(root, "cache"))
+        frame_path = os.path.join(project, "first_frame.png")
+        video_path = os.path.join(project, "video.mp4")
+        assert store.is_current(frame_path) and store.is_current(video_path)
+
+        # a portrait replaced outside the pipeline: the files built on it are still on
+        # disk but no longer current, two steps down as well
+        with open(os.path.join(project, "front.png"), "w") as f:
+            f.write("Alice, blue coat")
+        store = ArtifactStore(project, os.path.join(root, "cache"))
+        assert os.path.exists(video_path)
+        assert not store.is_current(frame_path) and not store.is_current(video_path)
+
+        # unknown to the manifest: not current either
+        with open(os.path.join(project, "last_frame.png"), "w") as f:
+            f.write("stray")
+        assert not store.is_current(os.path.join(project, "last_frame.png"))
+        print("Outputs are current only while every input file behind them is unchanged")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_atomic_write_json():
+    root = tempfile.mkdtemp()
+    try:
+        registry_path = os.path.join(root, "character_portraits_registry.json")
+        atomic_write_json(registry_path, {"Alice": {"front": {"path": "front.png"}}})
+
+        class Unserializable:
+            pass
+
+        # a failed write leaves the previous registry and no temp files behind
+        try:
+            atomic_write_json(registry_path, {"Alice": {}, "Bob": Unserializable()})
+            assert False, "expected TypeError"
+        except TypeError:
+            pass
+        with open(registry_path) as f:
+            assert json.load(f) == {"Alice": {"front": {"path": "front.png"}}}
+        assert os.listdir(root) == ["character_portraits_registry.json"]
+        print("Interrupted JSON writes keep the previous file")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_incremental_rebuild_and_cross_project_reuse()
+    test_key_depends_on_file_content_and_model()
+    test_akey_hashes_off_the_event_loop()
+    test_cache_links_outputs_and_evicts_least_recently_used()
+    test_existing_outputs_are_adopted()
+    test_is_current_follows_input_files()
+    test_atomic_write_json()
+    print("All tests passed!")
@@ -0,0 +1,158 @@
+import sys
+import os
+import asyncio
+import time
+
+# Add current directory to sys.path
+sys.path.append(os.getcwd())
+
+from utils.best_of_n import CandidateBudget, best_of_n
+from utils.rate_limiter import ResourceLimiter
+
+
+class FakeFrameGenerator:
+    """Image calls behind a limiter; candidate quality is decided by `qualities`."""
+
+    def __init__(self, limiter, qualities, delay=0.05, failing=()):
+        self.limiter = limiter
+        self.qualities = qualities
+        self.delay = delay
+        self.failing = set(failing)
+        self.started = []
+
+    async def generate(self, name, idx):
+        async with self.limiter:
+            self.started.append(f"{name}/{idx}")
+            await asyncio.sleep(self.delay * (1 + idx * 0.1))
+            if idx in self.failing:
+                raise RuntimeError("provider error")
+            return f"{name}/{idx}.png"
+
+
+class FakeScorer:
+    def __init__(self, qualities):
+        self.qualities = qualities
+        self.calls = []
+
+    async def __call__(self, paths):
+        self.calls.append(list(paths))
+        await asyncio.sleep(0.01)
+        return [self.qualities[int(path.rsplit("/", 1)[1][:-4])] for path in paths]
+
+
+def test_batched_scoring_keeps_the_best():
+    async def main():
+        limiter = ResourceLimiter("image", max_in_flight=4)
+        qualities = [5.0, 9.0, 6.5, 7.0]
+        generator = FakeFrameGenerator(limiter, qualities)
+        scorer = FakeScorer(qualities)
+
+        start = time.perf_counter()
+        result = await best_of_n(lambda idx: generator.generate("frame", idx), scorer, 4, accept_score=9.5)
+        elapsed = time.perf_counter() - start
+
+        assert result.path == "frame/1.png" and result.index == 1
+        assert result.generated == 4 and not result.early_accepted
+        # the first candidate alone, then all four in one call
+        assert [len(call) for call in scorer.calls] == [1, 4]
+        # candidates run concurrently: about one generation, not four
+        assert elapsed < 2 * generator.delay * 1.3, elapsed
+        print(f"4 candidates generated concurrently and scored in one batch in {elapsed:.2f}s, kept score {result.scores[1]}")
+
+    asyncio.run(main())
+
+
+def test_early_accept_cancels_the_rest():
+    async def main():
+        # two slots: candidate 0 and one extra start, the others queue
+        limiter = ResourceLimiter("image", max_in_flight=2)
+        qualities = [9.0, 5.0, 5.0, 5.0]
+        generator = FakeFrameGenerator(limiter, qualities)
+        scorer = FakeScorer(qualities)
+
+        result = await best_of_n(lambda idx: generator.generate("frame", idx), scorer, 4, accept_score=8.5)
+        await asyncio.sleep(0)
+        assert result.early_accepted and result.path == "frame/0.png"
+        assert scorer.calls == [["frame/0.png"]]
+        assert result.generated < 4, result.generated
+        assert limiter.in_flight == 0
+        early_generated = result.generated
+
+        # a scorer with no score for a lone candidate (e.g. the model left `scores` out) never accepts early
+        async def scores_only_when_comparing(paths):
+            return [] if len(paths) == 1 else await scorer(paths)
+
+        result = await best_of_n(lambda idx: generator.generate("frame", idx), scores_only_when_comparing, 4, accept_score=8.5)
+        assert not result.early_accepted and result.generated == 4
+        print(f"First candidate accepted early, {early_generated} of 4 candidates generated")
+
+    asyncio.run(main())
+
+
+def test_failures_and_scoring_errors():
+    async def main():
+        limiter = ResourceLimiter("image", max_in_flight=4)
+        generator = FakeFrameGenerator(limiter, [0, 0, 0], failing={0, 2})
+
+        async def broken_scorer(paths):
+            raise RuntimeError("chat model down")
+
+        # only candidate 1 survives; it is kept without scoring
+        result = await best_of_n(lambda idx: generator.generate("frame", idx), broken_scorer, 3, accept_score=8.0)
+        assert result.path == "frame/1.png" and result.scores == {}
+
+        # everything failed: the error surfaces like a plain generation
+        generator.failing = {0, 1}
+        try:
+            await best_of_n(lambda idx: generator.generate("frame", idx), broken_scorer, 2)
+            assert False, "expected RuntimeError"
+        except RuntimeError:
+            pass
+        print("Failed candidates are skipped, scoring errors keep the first candidate")
+
+    asyncio.run(main())
+
+
+def test_extra_candidates_yield_to_required_calls():
+    async def main():
+        limiter = ResourceLimiter("image", max_in_flight=1)
+        qualities = [5.0, 6.0, 7.0]
+        generator = FakeFrameGenerator(limiter, qualities, delay=0.02)
+        scorer = FakeScorer(qualities)
+
+        best = asyncio.create_task(best_of_n(lambda idx: generator.generate("a", idx), scorer, 3))
+        await asyncio.sleep(0.005)
+        # another frame's required call arrives while a's extras are queued
+        await generator.generate("b", 0)
+        await best
+        assert generator.started.index("b/0") < generator.started.index("a/1"), generator.started
+        print(f"Required calls are served before queued extra candidates: {generator.started}")
+
+    asyncio.run(main())
+
+
+def test_budget_adapts_to_remaining_and_idle_slots():
+    budget = CandidateBudget(max_candidates=4, extra_candidates=5)
+    assert budget.reserve() == 4 and budget.remaining == 2
+    assert budget.reserve() == 3 and budget.remaining == 0
+    assert budget.reserve() == 1
+    budget.refund(1)
+    assert budget.reserve() == 2
+
+    limiter = ResourceLimiter("image", max_in_flight=4)
+    limiter.in_flight = 2
+    assert CandidateBudget(max_candidates=4).reserve(limiter) == 2
+    limiter.in_flight = 4
+    assert CandidateBudget(max_candidates=4).reserve(limiter) == 1
+    assert CandidateBudget(max_candidates=4).reserve(ResourceLimiter("image")) == 4
+    assert not CandidateBudget().enabled and CandidateBudget().reserve() == 1
+    print("N shrinks with the remaining budget and the idle image slots")
+
+
+if __name__ == "__main__":
+    test_batched_scoring_keeps_the_best()
+    test_early_accept_cancels_the_rest()
+    test_failures_and_scoring_errors()
+    test_extra_candidates_yield_to_required_calls()
+    test_budget_adapts_to_remaining_and_idle_slots()
+    print("All tests passed!")
@@ -0,0 +1,131 @@
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+# Add current directory to sys.path
+sys.path.append(os.getcwd())
+
+from utils.critical_path import CriticalPathScheduler, task_key
+from utils.rate_limiter import ResourceLimiter, current_priority
+
+
+# Scaled-down task durations (seconds) and a fixed concurrency budget.
+IMAGE_SECONDS = 0.02
+VIDEO_SECONDS = 0.08
+BUDGET = {"image": 2, "video": 4}
+ESTIMATES = {"image": IMAGE_SECONDS, "video": VIDEO_SECONDS}
+
+
+def make_scene():
+    """A 40-shot scene: one wide root camera with 24 shots, then a chain of 8 child
+    cameras (2 shots each), each opened by a transition from the previous camera."""
+    cameras, shots = [], []
+
+    def add_camera(num_shots, parent_shot_idx):
+        first = len(shots)
+        idxs = list(range(first, first + num_shots))
+        for idx in idxs:
+            variation_type = "medium" if idx % 3 == 0 else "small"
+            shots.append(SimpleNamespace(idx=idx, variation_type=variation_type))
+        cameras.append(SimpleNamespace(idx=len(cameras), active_shot_idxs=idxs, parent_shot_idx=parent_shot_idx))
+        return first
+
+    parent = add_camera(24, None)
+    for _ in range(8):
+        parent = add_camera(2, parent)
+    return cameras, shots
+
+
+async def execute(scheduler):
+    """Run the graph the way Script2VideoPipeline does: every task starts at once,
+    waits on its dependencies, then queues on the shared provider limiter."""
+    limiters = {kind: ResourceLimiter(f"{kind}/test", max_in_flight=limit) for kind, limit in BUDGET.items()}
+    events = {key: asyncio.Event() for key in scheduler.tasks}
+    seconds = {"image": IMAGE_SECONDS, "video": VIDEO_SECONDS}
+
+    async def run_task(key):
+        task = scheduler.tasks[key]
+        for dep in task.deps:
+            await events[dep].wait()
+        async with scheduler.run(key):
+            async with limiters[task.kind]:
+                await asyncio.sleep(seconds[task.kind])
+        events[key].set()
+
+    await asyncio.gather(*(run_task(key) for key in scheduler.tasks))
+
+
+def test_ranks_and_plan_on_small_graph():
+    shots = [SimpleNamespace(idx=0, variation_type="medium"), SimpleNamespace(idx=1, variation_type="small")]
+    cameras = [
+        SimpleNamespace(idx=0, active_shot_idxs=[0], parent_shot_idx=None),
+        SimpleNamespace(idx=1, active_shot_idxs=[1], parent_shot_idx=0),
+    ]
+    scheduler = CriticalPathScheduler.from_camera_tree(cameras, shots, budget={"image": 1, "video": 1}, estimates={"image": 1, "video": 10})
+
+    assert scheduler.tasks[task_key(1, "transition")].deps == [task_key(0, "first_frame")]
+    assert scheduler.tasks[task_key(0, "video")].deps == [task_key(0, "first_frame"), task_key(0, "last_frame")]
+    # 0/first_frame -> 1/transition -> 1/first_frame -> 1/video
+    assert scheduler.critical_path() == ["0/first_frame", "1/transition", "1/first_frame", "1/video"]
+    assert scheduler.tasks[task_key(0, "first_frame")].rank == 22
+    # the transition is the only video ready at t=1; three 10s videos share one slot
+    assert scheduler.plan() == 31
+    assert scheduler.tasks[task_key(1, "transition")].planned_start == 1
+    assert scheduler.tasks[task_key(0, "video")].planned_start == 11
+
+    done = CriticalPathScheduler.from_camera_tree(cameras, shots, done=["0/first_frame", "1/transition"], estimates={"image": 1, "video": 10})
+    assert done.tasks["1/transition"].duration == 0 and done.tasks["0/first_frame"].rank == 11
+    print("Ranks, critical path and plan match the hand-computed schedule")
+
+
+def test_limiter_serves_highest_priority_first():
+    limiter = ResourceLimiter("image/test", max_in_flight=1)
+    order = []
+
+    async def call(name, priority):
+        current_priority.set(priority)
+        async with limiter:
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(call("first", 0), call("low", 1), call("high", 5), call("mid", 3), call("low again", 1))
+
+    asyncio.run(scenario())
+    assert order == ["first", "high", "mid", "low", "low again"], order
+    print(f"Queued calls served by priority: {order}")
+
+
+def test_critical_path_shortens_large_scene():
+    cameras, shots = make_scene()
+
+    # same graph and budget, but every task at equal priority (first come, first served)
+    fifo = CriticalPathScheduler.from_camera_tree(cameras, shots, budget=BUDGET, estimates=ESTIMATES)
+    for task in fifo.tasks.values():
+        task.rank = 0.0
+    fifo.started_at = None
+    asyncio.run(execute(fifo))
+    fifo_makespan = fifo.report()["actual_makespan"]
+
+    ranked = CriticalPathScheduler.from_camera_tree(cameras, shots, budget=BUDGET, estimates=ESTIMATES)
+    planned = ranked.plan()
+    asyncio.run(execute(ranked))
+    report = ranked.report()
+
+    assert len(shots) >= 40 and all(task["actual_finish"] is not None for task in report["tasks"])
+    assert report["critical_path"][0] == "0/first_frame" and report["critical_path"][-1].endswith("/video")
+    assert report["actual_makespan"] < fifo_makespan * 0.9, (report["actual_makespan"], fifo_makespan)
+    # the run follows the plan closely
+    assert abs(report["actual_makespan"] - planned) < planned * 0.25, (report["actual_makespan"], planned)
+    print(
+        f"{len(shots)} shots, {len(ranked.tasks)} tasks: critical-path order {report['actual_makespan']:.2f}s "
+        f"(planned {planned:.2f}s) vs first-come-first-served {fifo_makespan:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    test_ranks_and_plan_on_small_graph()
+    test_limiter_serves_highest_priority_first()
+    test_critical_path_shortens_large_scene()
+    print("All tests passed!")
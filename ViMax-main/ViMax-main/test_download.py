@@ -0,0 +1,178 @@
+import sys
+import os
+import asyncio
+import base64
+import hashlib
+import shutil
+import tempfile
+import time
+
+from aiohttp import web
+from tenacity import wait_none
+
+# Add current directory to sys.path
+sys.path.append(os.getcwd())
+
+from utils.download import ChecksumMismatch, close_session, download_file
+from interfaces.image_output import ImageOutput
+from interfaces.video_output import VideoOutput
+
+
+# no backoff sleeps in tests
+fast_download = download_file.retry_with(wait=wait_none())
+
+PAYLOAD = os.urandom(5 * 1024 * 1024 + 123)
+
+
+async def start_server(hits):
+    async def video(request):
+        hits["video"] += 1
+        response = web.StreamResponse(headers={"Content-Length": str(len(PAYLOAD))})
+        await response.prepare(request)
+        # slow, chunked body: the event loop must keep running meanwhile
+        for start in range(0, len(PAYLOAD), 1 << 20):
+            await response.write(PAYLOAD[start:start + (1 << 20)])
+            await asyncio.sleep(0.02)
+        return response
+
+    async def flaky(request):
+        hits["flaky"] += 1
+        if hits["flaky"] < 3:
+            return web.Response(status=503)
+        return web.Response(body=PAYLOAD[:1000])
+
+    async def truncated(request):
+        hits["truncated"] += 1
+        response = web.StreamResponse(headers={"Content-Length": "1000"})
+        await response.prepare(request)
+        await response.write(PAYLOAD[:400])
+        request.transport.close()
+        return response
+
+    async def missing(request):
+        hits["missing"] += 1
+        return web.Response(status=404)
+
+    app = web.Application()
+    app.router.add_get("/video.mp4", video)
+    app.router.add_get("/flaky.png", flaky)
+    app.router.add_get("/truncated.png", truncated)
+    app.router.add_get("/missing.png", missing)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_streaming_download_does_not_block():
+    async def main():
+        hits = {"video": 0}
+        runner, base_url = await start_server(hits)
+        work_dir = tempfile.mkdtemp()
+        try:
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            ticker_task = asyncio.create_task(ticker())
+            start = time.perf_counter()
+            path = os.path.join(work_dir, "shots", "0", "video.mp4")
+            await VideoOutput(fmt="url", ext="mp4", data=f"{base_url}/video.mp4").asave(
+                path, sha256=hashlib.sha256(PAYLOAD).hexdigest()
+            )
+            elapsed = time.perf_counter() - start
+            ticker_task.cancel()
+
+            with open(path, "rb") as f:
+                assert f.read() == PAYLOAD
+            assert ticks >= 10, ticks
+            assert os.listdir(os.path.dirname(path)) == ["video.mp4"]
+            print(f"Downloaded {len(PAYLOAD) / 1e6:.1f} MB in {elapsed:.2f}s, event loop ticked {ticks} times meanwhile")
+        finally:
+            await close_session()
+            await runner.cleanup()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    asyncio.run(main())
+
+
+def test_bounded_retries_and_atomic_writes():
+    async def main():
+        hits = {"video": 0, "flaky": 0, "truncated": 0, "missing": 0}
+        runner, base_url = await start_server(hits)
+        work_dir = tempfile.mkdtemp()
+        try:
+            # 503s are retried
+            path = os.path.join(work_dir, "flaky.png")
+            await fast_download(f"{base_url}/flaky.png", path)
+            assert hits["flaky"] == 3 and os.path.getsize(path) == 1000
+
+            # a truncated body is retried, then gives up and leaves nothing behind
+            path = os.path.join(work_dir, "truncated.png")
+            try:
+                await fast_download(f"{base_url}/truncated.png", path)
+                assert False, "expected a payload error"
+            except Exception as e:
+                assert not isinstance(e, AssertionError), e
+            assert hits["truncated"] == 4
+
+            # 404 is not retried
+            try:
+                await fast_download(f"{base_url}/missing.png", os.path.join(work_dir, "missing.png"))
+                assert False, "expected a 404"
+            except Exception as e:
+                assert getattr(e, "status", None) == 404, e
+            assert hits["missing"] == 1
+
+            # a checksum mismatch never replaces the previous file
+            path = os.path.join(work_dir, "frame.png")
+            with open(path, "wb") as f:
+                f.write(b"previous frame")
+            try:
+                await fast_download(f"{base_url}/flaky.png", path, sha256="0" * 64)
+                assert False, "expected ChecksumMismatch"
+            except ChecksumMismatch:
+                pass
+            with open(path, "rb") as f:
+                assert f.read() == b"previous frame"
+            assert sorted(os.listdir(work_dir)) == ["flaky.png", "frame.png"]
+            print("Transient errors retried a bounded number of times, failed downloads leave no partial files")
+        finally:
+            await close_session()
+            await runner.cleanup()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    asyncio.run(main())
+
+
+def test_asave_other_formats():
+    async def main():
+        work_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(work_dir, "image.png")
+            await ImageOutput(fmt="b64", ext="png", data=base64.b64encode(b"png bytes").decode()).asave(path)
+            with open(path, "rb") as f:
+                assert f.read() == b"png bytes"
+
+            path = os.path.join(work_dir, "video.mp4")
+            await VideoOutput(fmt="bytes", ext="mp4", data=b"mp4 bytes").asave(path)
+            with open(path, "rb") as f:
+                assert f.read() == b"mp4 bytes"
+            print("Non-URL outputs are saved from a worker thread")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    test_streaming_download_does_not_block()
+    test_bounded_retries_and_atomic_writes()
+    test_asave_other_formats()
+    print("All tests passed!")
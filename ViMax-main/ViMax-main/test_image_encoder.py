@@ -0,0 +1,109 @@
+import sys
+import os
+import base64
+import shutil
+import tempfile
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+# Add current directory to sys.path
+sys.path.append(os.getcwd())
+
+from utils.image import ImagePayloadEncoder, image_path_to_b64
+
+
+class CountingEncoder(ImagePayloadEncoder):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.encodes = 0
+
+    def _encode(self, data):
+        self.encodes += 1
+        return super()._encode(data)
+
+
+def make_image(path, size, mode="RGB", seed=0):
+    """Photo-like test image: smooth gradients plus sensor-style noise."""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    y, x = np.mgrid[0:height, 0:width]
+    channels = [
+        (127 + 100 * np.sin(x / (40 + 10 * c) + y / 70 + seed)).astype(np.int16)
+        for c in range(3)
+    ]
+    pixels = np.stack(channels, axis=-1) + rng.integers(-12, 12, (height, width, 3))
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB")
+    if mode == "RGBA":
+        alpha = Image.new("L", size, 0)
+        alpha.paste(255, (width // 4, 0, 3 * width // 4, height))
+        image.putalpha(alpha)
+    image.save(path)
+    return path
+
+
+def decoded_size(data_url):
+    data = base64.b64decode(data_url.split(",", 1)[1])
+    return Image.open(BytesIO(data)).size
+
+
+def test_payload_is_downscaled_and_smaller():
+    work_dir = tempfile.mkdtemp()
+    try:
+        frame = make_image(os.path.join(work_dir, "first_frame.png"), (1600, 900))
+        portrait = make_image(os.path.join(work_dir, "front.png"), (1536, 1536), mode="RGBA", seed=1)
+        encoder = ImagePayloadEncoder()
+
+        for path in (frame, portrait):
+            original = image_path_to_b64(path)
+            light = encoder.to_b64(path)
+            assert light.startswith("data:image/jpeg;base64,")
+            assert max(decoded_size(light)) == 1024
+            assert len(light) * 5 < len(original), (len(light), len(original))
+            print(f"{os.path.basename(path)}: {len(original) / 1024:.0f} KB -> {len(light) / 1024:.0f} KB payload")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_variants_are_reused_across_selections():
+    work_dir = tempfile.mkdtemp()
+    try:
+        portraits = [make_image(os.path.join(work_dir, f"portrait_{i}.png"), (1536, 1536), seed=i) for i in range(4)]
+        frames = [make_image(os.path.join(work_dir, f"frame_{i}.png"), (1600, 900), seed=10 + i) for i in range(5)]
+        cache_dir = os.path.join(work_dir, "llm_images")
+        encoder = CountingEncoder(cache_dir=cache_dir)
+
+        # 40 frame selections, each attaching every portrait plus its camera's first frame
+        start = time.perf_counter()
+        payload = 0
+        for shot in range(40):
+            for path in portraits + [frames[shot % len(frames)]]:
+                payload += len(encoder.to_b64(path))
+        elapsed = time.perf_counter() - start
+        baseline = sum(len(image_path_to_b64(path)) for shot in range(40) for path in portraits + [frames[shot % len(frames)]])
+
+        assert encoder.encodes == len(portraits) + len(frames)
+        # a new run (new process) finds the variants on disk
+        restarted = CountingEncoder(cache_dir=cache_dir)
+        assert restarted.to_b64(portraits[0]) == encoder.to_b64(portraits[0])
+        assert restarted.encodes == 0
+
+        # an edited image is re-encoded
+        time.sleep(0.01)
+        make_image(portraits[0], (1536, 1536), seed=99)
+        assert encoder.to_b64(portraits[0]) != restarted.to_b64(os.path.join(work_dir, "portrait_1.png"))
+        assert encoder.encodes == len(portraits) + len(frames) + 1
+        print(
+            f"200 image attachments: {encoder.encodes - 1} encodes in {elapsed:.2f}s, "
+            f"{payload / 1e6:.1f} MB sent instead of {baseline / 1e6:.1f} MB"
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_payload_is_downscaled_and_smaller()
+    test_variants_are_reused_across_selections()
+    print("All tests passed!")
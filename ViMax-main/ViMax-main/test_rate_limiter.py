@@ -0,0 +1,118 @@
+import sys
+import os
+import asyncio
+import time
+
+# Add current directory to sys.path
+sys.path.append(os.getcwd())
+
+from utils.rate_limiter import ResourceLimiter, ResourceScheduler
+
+
+class FakeVideoGenerator:
+    """Records how many generate_single_video calls overlap."""
+
+    def __init__(self, seconds: float = 0.05):
+        self.seconds = seconds
+        self.active = 0
+        self.peak = 0
+        self.model = "fake-veo"
+
+    async def generate_single_video(self, prompt: str, reference_image_paths=()):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.seconds)
+        self.active -= 1
+        return f"video for {prompt}"
+
+
+def test_max_in_flight_on_large_storyboard():
+    scheduler = ResourceScheduler({"video": {"max_in_flight": 3, "requests_per_minute": None}})
+    raw = FakeVideoGenerator()
+    generator = scheduler.wrap_tool(raw, "video", {"class_path": "tools.FakeVideoGenerator"})
+
+    async def storyboard():
+        # like Script2VideoPipeline: gather every shot at once
+        return await asyncio.gather(*(
+            generator.generate_single_video(prompt=f"shot {i}", reference_image_paths=[])
+            for i in range(60)
+        ))
+
+    outputs = asyncio.run(storyboard())
+    assert outputs == [f"video for shot {i}" for i in range(60)]
+    assert raw.peak == 3, raw.peak
+    assert generator.model == "fake-veo"  # non-async attributes are forwarded
+    print(f"60 shots gathered at once, at most {raw.peak} videos in flight")
+
+
+def test_requests_per_period():
+    limiter = ResourceLimiter("chat/test", max_in_flight=None, requests_per_minute=5, period=0.3)
+    starts = []
+
+    async def call():
+        async with limiter:
+            starts.append(time.monotonic())
+
+    async def burst():
+        await asyncio.gather(*(call() for _ in range(12)))
+
+    begin = time.monotonic()
+    asyncio.run(burst())
+    offsets = sorted(start - begin for start in starts)
+
+    # 12 calls at 5 per 0.3s -> three windows
+    assert sum(offset < 0.25 for offset in offsets) == 5, offsets
+    assert sum(offset < 0.55 for offset in offsets) == 10, offsets
+    assert offsets[-1] >= 0.55, offsets
+    print(f"12 calls at 5 per 0.3s finished after {offsets[-1]:.2f}s")
+
+
+def test_shared_limiter_per_provider():
+    scheduler = ResourceScheduler({"image": {"max_in_flight": 2}})
+    config = {"class_path": "tools.ImageGeneratorNanobananaGoogleAPI"}
+    first = scheduler.wrap_tool(FakeVideoGenerator(), "image", config)
+    second = scheduler.wrap_tool(FakeVideoGenerator(), "image", config)
+    other = scheduler.wrap_tool(FakeVideoGenerator(), "image", {"class_path": "tools.Other", "rate_limit": {"max_in_flight": 7}})
+
+    assert first._limiter is second._limiter
+    assert other._limiter is not first._limiter
+    assert first._limiter.max_in_flight == 2 and other._limiter.max_in_flight == 7
+    assert scheduler.wrap_tool(first, "image", config) is first
+
+    async def both():
+        await asyncio.gather(*(
+            tool.generate_single_video(prompt=str(i)) for i in range(10) for tool in (first, second)
+        ))
+
+    asyncio.run(both())
+    assert first._limiter.peak_in_flight == 2
+    print("Two generators with the same class_path share one limiter")
+
+
+def test_cancelled_waiter_releases_slot():
+    limiter = ResourceLimiter("video/test", max_in_flight=1)
+
+    async def scenario():
+        async with limiter:
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                pass
+        # slot must be free again
+        await asyncio.wait_for(limiter.acquire(), timeout=0.5)
+        limiter.release()
+
+    asyncio.run(scenario())
+    assert limiter.in_flight == 0
+    print("Cancelled waiter does not leak a slot")
+
+
+if __name__ == "__main__":
+    test_max_in_flight_on_large_storyboard()
+    test_requests_per_period()
+    test_shared_limiter_per_provider()
+    test_cancelled_waiter_releases_slot()
+    print("All tests passed!")
@@ -0,0 +1,188 @@
+import sys
+import os
+import asyncio
+import time
+
+# Add current directory to sys.path
+sys.path.append(os.getcwd())
+
+from tools.video.video_generator_veo_google_api import VideoGeneratorVeoGoogleAPI
+
+
+# A fake google-genai client: every call awaits like a slow network request,
+# operations finish RENDER_SECONDS after submission.
+RENDER_SECONDS = 1.0
+POLL_INTERVAL = 0.1
+NUM_VIDEOS = 4
+
+
+class FakeVideo:
+    def __init__(self, name):
+        self.name = name
+        self.video_bytes = None
+
+
+class FakeResponse:
+    def __init__(self, name):
+        self.generated_videos = [type("GeneratedVideo", (), {"video": FakeVideo(name)})()]
+
+
+class FakeOperation:
+    def __init__(self, name, finish_at):
+        self.name = name
+        self.finish_at = finish_at
+        self.done = False
+        self.error = None
+        self.response = None
+
+
+class FakeAsyncModels:
+    def __init__(self):
+        self.submitted = 0
+
+    async def generate_videos(self, model, prompt, config, image=None):
+        # staggered submissions: per-video polling loops would tick at different times
+        self.submitted += 1
+        await asyncio.sleep(0.013 * self.submitted)
+        return FakeOperation(prompt, time.perf_counter() + RENDER_SECONDS)
+
+
+class FakeAsyncOperations:
+    def __init__(self):
+        self.calls = 0
+        self.call_times = []
+
+    async def get(self, operation):
+        self.calls += 1
+        self.call_times.append(time.perf_counter())
+        await asyncio.sleep(0.02)
+        if time.perf_counter() >= operation.finish_at:
+            operation.done = True
+            operation.response = FakeResponse(operation.name)
+        return operation
+
+
+class FakeAsyncFiles:
+    async def download(self, file):
+        await asyncio.sleep(0.05)
+        return f"video bytes of {file.name}".encode()
+
+
+class FakeClient:
+    def __init__(self):
+        self.aio = type("Aio", (), {})()
+        self.aio.models = FakeAsyncModels()
+        self.aio.operations = FakeAsyncOperations()
+        self.aio.files = FakeAsyncFiles()
+
+
+def make_generator():
+    generator = VideoGeneratorVeoGoogleAPI(api_key="fake", poll_interval=POLL_INTERVAL)
+    generator.client = FakeClient()
+    generator.poller.client = generator.client
+    return generator
+
+
+async def run_with_heartbeat(generator):
+    """Generate NUM_VIDEOS concurrently while a heartbeat coroutine ticks every 10ms."""
+    ticks = []
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        while not stop.is_set():
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    beat = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    outputs = await asyncio.gather(*(
+        generator.generate_single_video(prompt=f"shot {i}", reference_image_paths=[])
+        for i in range(NUM_VIDEOS)
+    ))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return outputs, ticks, elapsed
+
+
+def test_other_coroutines_progress_while_videos_pending():
+    generator = make_generator()
+    outputs, ticks, elapsed = asyncio.run(run_with_heartbeat(generator))
+
+    assert [output.data for output in outputs] == [f"video bytes of shot {i}".encode() for i in range(NUM_VIDEOS)]
+    # videos rendered concurrently, not one after another
+    assert elapsed < RENDER_SECONDS * 2, elapsed
+
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    assert max(gaps) < 0.1, f"event loop blocked for {max(gaps) * 1000:.0f}ms"
+    assert len(ticks) > elapsed / 0.01 * 0.5
+
+    # one shared poller: each tick refreshes all pending operations at the same moment
+    polls = generator.client.aio.operations.calls
+    poll_ticks = distinct_ticks(generator.client.aio.operations.call_times)
+    rounds = RENDER_SECONDS / POLL_INTERVAL + 2
+    assert poll_ticks <= rounds, poll_ticks
+    assert polls >= poll_ticks * NUM_VIDEOS * 0.8, (polls, poll_ticks)
+    print(
+        f"{NUM_VIDEOS} videos in {elapsed:.2f}s, heartbeat ticked {len(ticks)} times "
+        f"(max gap {max(gaps) * 1000:.0f}ms), {polls} operation polls in {poll_ticks} poll ticks"
+    )
+
+
+def distinct_ticks(call_times, tolerance=0.005):
+    """Polls started together (one gather) count as one tick."""
+    times = sorted(call_times)
+    return sum(1 for i, t in enumerate(times) if i == 0 or t - times[i - 1] > tolerance)
+
+
+def test_poller_restarts_for_later_batches():
+    generator = make_generator()
+
+    async def two_batches():
+        first = await generator.generate_single_video(prompt="first", reference_image_paths=[])
+        second = await generator.generate_single_video(prompt="second", reference_image_paths=[])
+        return first, second
+
+    first, second = asyncio.run(two_batches())
+    assert first.data == b"video bytes of first" and second.data == b"video bytes of second"
+    assert generator.poller._pending == []
+    print("Poller restarted for a second batch and drained its queue")
+
+
+def test_poller_failures_reach_callers():
+    async def generate_two(generator):
+        return await asyncio.wait_for(asyncio.gather(
+            generator.generate_single_video(prompt="a", reference_image_paths=[]),
+            generator.generate_single_video(prompt="b", reference_image_paths=[]),
+            return_exceptions=True,
+        ), timeout=5)
+
+    # the poll call itself breaks (not an error result): every caller gets the error
+    generator = make_generator()
+
+    def broken_get(operation):
+        raise TypeError("unexpected client error")
+
+    generator.client.aio.operations.get = broken_get
+    results = asyncio.run(generate_two(generator))
+    assert all(isinstance(result, TypeError) for result in results), results
+    assert generator.poller._pending == []
+
+    # polls that come back cancelled count as failures instead of crashing the poller
+    generator = make_generator()
+    generator.poller.max_failures = 2
+
+    async def cancelled_get(operation):
+        raise asyncio.CancelledError()
+
+    generator.client.aio.operations.get = cancelled_get
+    results = asyncio.run(generate_two(generator))
+    assert all(isinstance(result, asyncio.CancelledError) for result in results), results
+    print("Poller errors are delivered to every waiting caller instead of hanging them")
+
+
+if __name__ == "__main__":
+    test_other_coroutines_progress_while_videos_pending()
+    test_poller_restarts_for_later_batches()
+    test_poller_failures_reach_callers()
+    print("All tests passed!")
@@ -0,0 +1,99 @@
+import sys
+import os
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+
+# Add current directory to sys.path
+sys.path.append(os.getcwd())
+
+from utils.video_concat import concat_videos, get_ffmpeg_exe, probe_video
+
+
+NUM_CLIPS = 6
+CLIP_SECONDS = 2
+
+
+def make_clip(path, size="1280x720", rate=24, audio=True, seconds=CLIP_SECONDS):
+    """Synthetic shot: test pattern (+ sine tone), encoded like a provider's h264/aac mp4."""
+    args = [get_ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc=size={size}:rate={rate}"]
+    if audio:
+        args += ["-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000", "-c:a", "aac", "-ac", "2"]
+    args += ["-t", str(seconds), "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", path]
+    subprocess.run(args, check=True)
+    return path
+
+
+def measure(func, *args):
+    """Wall time and CPU time of ffmpeg child processes."""
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return result, elapsed, cpu
+
+
+def reencode_all(video_paths, output_path):
+    """What the pipelines did before: decode every shot, re-encode with libx264 medium."""
+    list_path = output_path + ".txt"
+    with open(list_path, "w") as f:
+        f.writelines(f"file '{os.path.abspath(path)}'\n" for path in video_paths)
+    subprocess.run([
+        get_ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y", "-f", "concat", "-safe", "0", "-i", list_path,
+        "-c:v", "libx264", "-preset", "medium", "-c:a", "aac", output_path,
+    ], check=True)
+
+
+def test_stream_copy_benchmark():
+    work_dir = tempfile.mkdtemp()
+    try:
+        clips = [make_clip(os.path.join(work_dir, f"shot_{i}.mp4")) for i in range(NUM_CLIPS)]
+
+        copied = os.path.join(work_dir, "final_copy.mp4")
+        mode, copy_time, copy_cpu = measure(concat_videos, clips, copied)
+        _, reencode_time, reencode_cpu = measure(reencode_all, clips, os.path.join(work_dir, "final_reencode.mp4"))
+
+        assert mode == "copy", mode
+        info = probe_video(copied)
+        assert info.signature == probe_video(clips[0]).signature
+        assert abs(info.duration - NUM_CLIPS * CLIP_SECONDS) < 0.2, info.duration
+        assert copy_time < reencode_time and copy_cpu < reencode_cpu
+        print(
+            f"{NUM_CLIPS} x {CLIP_SECONDS}s 720p shots: stream copy {copy_time:.2f}s wall / {copy_cpu:.2f}s CPU, "
+            f"libx264 re-encode {reencode_time:.2f}s wall / {reencode_cpu:.2f}s CPU "
+            f"({reencode_time / copy_time:.0f}x faster, {reencode_cpu - copy_cpu:.2f}s CPU saved)"
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_mixed_clips_are_normalized():
+    work_dir = tempfile.mkdtemp()
+    try:
+        clips = [
+            make_clip(os.path.join(work_dir, "a.mp4")),
+            make_clip(os.path.join(work_dir, "b.mp4")),
+            make_clip(os.path.join(work_dir, "small.mp4"), size="640x360", rate=30),
+            make_clip(os.path.join(work_dir, "silent.mp4"), audio=False),
+        ]
+        output_path = os.path.join(work_dir, "final.mp4")
+        mode = concat_videos(clips, output_path)
+
+        assert mode == "normalize", mode
+        info = probe_video(output_path)
+        assert info.video[3:5] == (1280, 720) and info.audio is not None
+        assert abs(info.duration - len(clips) * CLIP_SECONDS) < 0.3, info.duration
+        print(f"Mixed resolution / frame rate / missing audio: {mode}, {info.duration:.2f}s at {info.video[3]}x{info.video[4]}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_stream_copy_benchmark()
+    test_mixed_clips_are_normalized()
+    print("All tests passed!")
@@ -1,5 +1,5 @@
 import logging
-from typing import List
+from typing import List, Optional
 import asyncio
 from google import genai
 from google.genai import types
@@ -8,6 +8,79 @@ from interfaces.video_output import VideoOutput
 # https://ai.google.dev/gemini-api/docs/video-generation?hl=zh-cn
 
 
+class VeoOperationPoller:
+    """Polls every outstanding Veo operation from one background task.
+
+    Each caller registers its operation and awaits a future. Every `interval`
+    seconds the poller refreshes all pending operations concurrently through the
+    async client, so N videos in flight cost one timer instead of N loops and
+    never block the event loop.
+    """
+
+    def __init__(self, client: genai.Client, interval: float = 2.0, max_failures: int = 5):
+        self.client = client
+        self.interval = interval
+        self.max_failures = max_failures
+        self._pending = []  # [operation, future, consecutive failures]
+        self._task: Optional[asyncio.Task] = None
+
+    async def wait(self, operation: types.GenerateVideosOperation) -> types.GenerateVideosOperation:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append([operation, future, 0])
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        return await future
+
+    async def _run(self):
+        try:
+            while self._pending:
+                await asyncio.sleep(self.interval)
+                await self._tick()
+        except BaseException as e:
+            # never leave callers awaiting a poller that is gone
+            logging.error(f"Veo operation poller stopped: {e!r}")
+            for _, future, _ in self._pending:
+                self._fail(future, e)
+            self._pending = []
+            if isinstance(e, asyncio.CancelledError):
+                raise
+
+    async def _tick(self):
+        entries = [entry for entry in self._pending if not entry[1].done()]
+        results = await asyncio.gather(
+            *(self.client.aio.operations.get(entry[0]) for entry in entries),
+            return_exceptions=True,
+        )
+        for entry, result in zip(entries, results):
+            future = entry[1]
+            if future.done():
+                continue
+            # CancelledError is a BaseException, not an Exception
+            if isinstance(result, BaseException):
+                entry[2] += 1
+                logging.warning(f"Polling {entry[0].name} failed ({entry[2]}/{self.max_failures}): {result!r}")
+                if entry[2] >= self.max_failures:
+                    self._fail(future, result)
+                continue
+            entry[0], entry[2] = result, 0
+            if result.done:
+                future.set_result(result)
+
+        self._pending = [entry for entry in self._pending if not entry[1].done()]
+        if self._pending:
+            logging.info(f"{len(self._pending)} video generation(s) not completed, waiting {self.interval} seconds...")
+
+    @staticmethod
+    def _fail(future: asyncio.Future, error: BaseException):
+        if future.done():
+            return
+        if isinstance(error, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(error)
+
+
 class VideoGeneratorVeoGoogleAPI:
     def __init__(
         self,
@@ -15,6 +88,7 @@ class VideoGeneratorVeoGoogleAPI:
         t2v_model: str = "veo-3.1-generate-preview",
         ff2v_model: str = "veo-3.1-generate-preview",
         flf2v_model: str = "veo-3.1-generate-preview",
+        poll_interval: float = 2.0,
     ):
         self.api_key = api_key
         self.t2v_model = t2v_model
@@ -24,7 +98,8 @@ class VideoGeneratorVeoGoogleAPI:
         self.client = genai.Client(
             api_key=api_key,
         )
-    
+        self.poller = VeoOperationPoller(self.client, interval=poll_interval)
+
     async def generate_single_video(
         self,
         prompt: str,
@@ -42,36 +117,38 @@ class VideoGeneratorVeoGoogleAPI:
             "aspect_ratio": aspect_ratio,
             "duration_seconds": duration,
         }
+        # image files are read in a worker thread so the event loop keeps running
         if len(reference_image_paths) == 0:
             params["model"] = self.t2v_model
         elif len(reference_image_paths) == 1:
             params["model"] = self.ff2v_model
-            params["image"] = types.Image.from_file(location=reference_image_paths[0])
+            params["image"] = await asyncio.to_thread(types.Image.from_file, location=reference_image_paths[0])
         elif len(reference_image_paths) == 2:
             params["model"] = self.flf2v_model
-            params["image"] = types.Image.from_file(location=reference_image_paths[0])
-            config_params["last_frame"] = types.Image.from_file(location=reference_image_paths[1])
+            params["image"] = await asyncio.to_thread(types.Image.from_file, location=reference_image_paths[0])
+            config_params["last_frame"] = await asyncio.to_thread(types.Image.from_file, location=reference_image_paths[1])
         else:
             raise ValueError("The number of reference images must be no more than 2")
 
         logging.info(f"Calling {params['model']} to generate video...")
 
-        operation = self.client.models.generate_videos(
+        operation = await self.client.aio.models.generate_videos(
             **params,
             config=types.GenerateVideosConfig(**config_params),
         )
 
-        while not operation.done:
-            await asyncio.sleep(2)
-            operation = self.client.operations.get(operation)
-            logging.info(f"Video generation not completed, waiting 2 seconds...")
+        if not operation.done:
+            operation = await self.poller.wait(operation)
+
+        if operation.error or not operation.response or not operation.response.generated_videos:
+            raise RuntimeError(f"Video generation failed: {operation.error}")
 
         generated_video = operation.response.generated_videos[0]
-        self.client.files.download(file=generated_video.video)
+        video_bytes = await self.client.aio.files.download(file=generated_video.video)
 
         video_output = VideoOutput(
             fmt="bytes",
             ext="mp4",
-            data=generated_video.video.video_bytes,
+            data=video_bytes or generated_video.video.video_bytes,
         )
         return video_output
@@ -0,0 +1,292 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def model_id(model: Any) -> str:
+    """Class name plus every `*model*` string attribute (model names) of a tool or
+    chat model, looking through the rate-limit wrappers."""
+    model = getattr(model, "_tool", None) or getattr(model, "chat_model", None) or model
+    try:
+        attributes = vars(model)
+    except TypeError:
+        attributes = {}
+    names = {name: value for name, value in attributes.items() if "model" in name and isinstance(value, str)}
+    return f"{type(model).__name__}{json.dumps(names, sort_keys=True)}"
+
+
+# Size cap of the shared artifact cache; least recently used outputs are evicted past it.
+DEFAULT_MAX_CACHE_GB = 20.0
+
+
+def _atomic_copy(src: str, dst: str):
+    os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dst)), suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _link_or_copy(src: str, dst: str):
+    """Hardlink `src` as `dst` (atomically replacing it), so the cache and the working dir
+    share one copy on disk; falls back to copying (other filesystem, no hardlinks...)."""
+    directory = os.path.dirname(os.path.abspath(dst))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    os.remove(tmp_path)
+    try:
+        os.link(src, tmp_path)
+    except FileNotFoundError:
+        # no `src`: nothing to fall back to
+        raise
+    except OSError:
+        _atomic_copy(src, dst)
+        return
+    try:
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path: str, data: Any):
+    """Write `data` to `path` so readers see either the old or the new file, never a partial one."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ArtifactStore:
+    """Content-addressed store for the outputs of pipeline steps.
+
+    Every step output is keyed on a hash of its inputs: prompt text and params,
+    the model that produced it (see `model_id`) and the content hashes of the
+    input files (reference images, first frames...). Outputs are hardlinked (copied
+    where that is not possible) into a shared `cache_dir`, so identical requests are
+    reused across runs and projects. The cache is kept under `max_cache_gb` by
+    evicting the least recently used outputs; None means no limit.
+
+    Since a working file may share its inode with a cache object, a stale file is
+    removed before its step runs again, never rewritten in place.
+
+    `manifest.json` in the working dir records the key each file was produced
+    with, and the digests of the input files behind it. A file whose key no longer
+    matches its inputs is stale and regenerated. Files from runs made before the
+    manifest existed are adopted as they are.
+
+    Usage (`akey` hashes the files off the event loop; `key` is the sync variant):
+        key = await store.akey("frame", prompt=prompt, files=reference_image_paths, model=model_id(generator))
+        if not store.restore(key, path):
+            (await generator.generate_single_image(...)).save(path)
+            store.put(key, path)
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, working_dir: str, cache_dir: Optional[str] = None, max_cache_gb: Optional[float] = DEFAULT_MAX_CACHE_GB):
+        self.working_dir = working_dir
+        self.cache_dir = cache_dir or os.path.join(working_dir, "artifact_cache")
+        self.max_cache_gb = max_cache_gb
+        os.makedirs(self.working_dir, exist_ok=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.manifest_path = os.path.join(self.working_dir, self.MANIFEST)
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        # input file digests behind each key computed in this run, recorded by _record
+        self._key_inputs: Dict[str, Dict[str, str]] = {}
+        # bytes in cache_dir, scanned on the first put and kept up to date after
+        self._cache_bytes: Optional[int] = None
+
+    def file_digest(self, path: str) -> str:
+        stat = os.stat(path)
+        cache_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        digest = self._digests.get(cache_key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(chunk)
+            digest = self._digests[cache_key] = sha.hexdigest()
+        return digest
+
+    def key(self, step: str, files: Iterable[str] = (), **inputs) -> str:
+        """Hash of the step name, its JSON-serializable inputs and the content of `files`."""
+        files = list(files)
+        return self._key(step, files, [self.file_digest(path) for path in files], inputs)
+
+    async def akey(self, step: str, files: Iterable[str] = (), **inputs) -> str:
+        """`key` with the (possibly large) files hashed in a worker thread, for use on the event loop."""
+        files = list(files)
+        digests = await asyncio.to_thread(lambda: [self.file_digest(path) for path in files])
+        return self._key(step, files, digests, inputs)
+
+    def _key(self, step: str, files: List[str], digests: List[str], inputs: Dict[str, Any]) -> str:
+        payload = {
+            "step": step,
+            "inputs": inputs,
+            "files": digests,
+        }
+        data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        key = hashlib.sha256(data.encode("utf-8")).hexdigest()
+        self._key_inputs[key] = {self._manifest_path_of(path): digest for path, digest in zip(files, digests)}
+        return key
+
+    def _manifest_path_of(self, path: str) -> str:
+        """Working-dir relative path for files of this project, absolute otherwise."""
+        relpath = os.path.relpath(os.path.abspath(path), os.path.abspath(self.working_dir))
+        return os.path.abspath(path) if relpath.startswith(os.pardir) else relpath
+
+    def _object_path(self, key: str, path: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + os.path.splitext(path)[1])
+
+    def _record(self, key: str, path: str, source: str):
+        self.manifest[os.path.relpath(path, self.working_dir)] = {
+            "key": key,
+            "source": source,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "inputs": self._key_inputs.get(key, {}),
+        }
+        atomic_write_json(self.manifest_path, self.manifest)
+
+    def restore(self, key: str, path: str) -> bool:
+        """Make `path` hold the output for `key`. False means the step has to run."""
+        entry = self.manifest.get(os.path.relpath(path, self.working_dir))
+        if os.path.exists(path):
+            if entry is None:
+                # produced before the manifest existed
+                self.put(key, path, source="adopted")
+                return True
+            if entry["key"] == key:
+                if "inputs" not in entry:
+                    # recorded before input digests were kept
+                    self._record(key, path, entry["source"])
+                return True
+            logging.info(f"{path} is stale (inputs changed), regenerating...")
+            # it may be a hardlink to the cache object of its old key
+            os.remove(path)
+
+        object_path = self._object_path(key, path)
+        try:
+            _link_or_copy(object_path, path)
+        except FileNotFoundError:
+            # not cached, or evicted meanwhile
+            return False
+        self._touch(object_path)
+        self._record(key, path, "cache")
+        logging.info(f"Restored {path} from artifact cache.")
+        return True
+
+    def put(self, key: str, path: str, source: str = "generated"):
+        """Record `path` as the output for `key` and link it into the shared cache."""
+        object_path = self._object_path(key, path)
+        if not os.path.exists(object_path):
+            _link_or_copy(path, object_path)
+            if self._cache_bytes is not None:
+                self._cache_bytes += os.path.getsize(object_path)
+            if self._cache_bytes is None or self._over_limit(self._cache_bytes):
+                self.prune()
+        self._record(key, path, source)
+
+    def _over_limit(self, size: int) -> bool:
+        return self.max_cache_gb is not None and size > self.max_cache_gb * 1024 ** 3
+
+    def _touch(self, object_path: str):
+        """Mark a cache object as used (access time only, the mtime is shared with working files)."""
+        try:
+            os.utime(object_path, (time.time(), os.stat(object_path).st_mtime))
+        except OSError:
+            pass
+
+    def prune(self):
+        """Evict least recently used cache objects until the cache fits in `max_cache_gb`.
+
+        Several stores (runs, Idea2Video scenes) may share the cache; each one evicts
+        from the whole directory, and an object evicted under another store only
+        makes that store regenerate it.
+        """
+        objects = []
+        for directory, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                object_path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(object_path)
+                except FileNotFoundError:
+                    continue
+                objects.append((stat.st_atime, stat.st_size, object_path))
+
+        total = sum(size for _, size, _ in objects)
+        evicted = 0
+        for _, size, object_path in sorted(objects):
+            if not self._over_limit(total):
+                break
+            try:
+                os.remove(object_path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        if evicted:
+            logging.info(f"Evicted {evicted} artifacts from {self.cache_dir}, {total / 1024 ** 3:.1f} GB left.")
+        self._cache_bytes = total
+
+    def is_current(self, path: str) -> bool:
+        """Whether `path` would be reused as is: it is in the manifest and no input file
+        behind it (nor behind those, transitively) changed since. Needs no step inputs,
+        so it can be asked before a run. Text inputs are only seen through the files
+        they come from, so steps list those files too (e.g. shot_description.json).
+        """
+        return self._is_current(self._manifest_path_of(path), {})
+
+    def _is_current(self, manifest_path: str, checked: Dict[str, bool]) -> bool:
+        if manifest_path not in checked:
+            checked[manifest_path] = False
+            entry = self.manifest.get(manifest_path)
+            path = os.path.join(self.working_dir, manifest_path)
+            checked[manifest_path] = (
+                entry is not None
+                and "inputs" in entry
+                and os.path.exists(path)
+                and all(
+                    os.path.exists(os.path.join(self.working_dir, input_path))
+                    and self.file_digest(os.path.join(self.working_dir, input_path)) == digest
+                    and (input_path not in self.manifest or self._is_current(input_path, checked))
+                    for input_path, digest in entry["inputs"].items()
+                )
+            )
+        return checked[manifest_path]
+
+    def load_json(self, key: str, path: str) -> Optional[Any]:
+        if not self.restore(key, path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_json(self, key: str, path: str, data: Any):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        self.put(key, path)
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from utils.rate_limiter import ResourceLimiter, current_priority
+
+
+# Extra candidates queue behind every required call (portraits, critical-path
+# frames and videos all run at priority >= 0), so they only use spare capacity.
+EXTRA_CANDIDATE_PRIORITY = -1.0
+
+
+class CandidateBudget:
+    """Best-of-N settings plus the run-wide budget of extra candidates.
+
+    Shared by every frame (and every scene in idea2video), so `extra_candidates`
+    bounds the additional image calls of the whole run. None means no cap.
+    """
+
+    def __init__(
+        self,
+        max_candidates: int = 1,
+        extra_candidates: Optional[int] = None,
+        accept_score: Optional[float] = None,
+    ):
+        self.max_candidates = max(1, max_candidates)
+        self.remaining = extra_candidates
+        self.accept_score = accept_score
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_candidates > 1
+
+    def reserve(self, limiter: Optional[ResourceLimiter] = None) -> int:
+        """Number of candidates for the next frame, at least 1.
+
+        Capped by what is left of the budget and by the idle slots of `limiter`:
+        when the image provider is saturated, only the required candidate runs.
+        """
+        extras = self.max_candidates - 1
+        if self.remaining is not None:
+            extras = min(extras, self.remaining)
+        idle_slots = limiter.idle_slots if limiter is not None else None
+        if idle_slots is not None:
+            # the required candidate takes one of them
+            extras = min(extras, max(idle_slots - 1, 0))
+        extras = max(extras, 0)
+        if self.remaining is not None:
+            self.remaining -= extras
+        return 1 + extras
+
+    def refund(self, unused: int):
+        if self.remaining is not None:
+            self.remaining += unused
+
+
+@dataclass
+class BestOfNResult:
+    path: str
+    index: int
+    scores: Dict[int, float] = field(default_factory=dict)
+    generated: int = 0
+    early_accepted: bool = False
+
+
+def _succeeded(task: asyncio.Task) -> bool:
+    return task.done() and not task.cancelled() and task.exception() is None
+
+
+async def best_of_n(
+    generate: Callable[[int], Awaitable[str]],
+    score: Callable[[List[str]], Awaitable[List[float]]],
+    n: int,
+    accept_score: Optional[float] = None,
+) -> BestOfNResult:
+    """Generate `n` candidates concurrently and keep the highest scoring one.
+
+    `generate(i)` produces candidate i and returns its path; `score(paths)` rates
+    several candidates in one call. Candidate 0 runs at the caller's priority,
+    the others at EXTRA_CANDIDATE_PRIORITY. If the first finished candidate scores
+    at least `accept_score`, the others are cancelled; otherwise every finished
+    candidate is scored together. Failed candidates are skipped.
+    """
+    tasks = [asyncio.create_task(generate(0))]
+    token = current_priority.set(EXTRA_CANDIDATE_PRIORITY)
+    try:
+        tasks += [asyncio.create_task(generate(idx)) for idx in range(1, n)]
+    finally:
+        current_priority.reset(token)
+
+    try:
+        pending = set(tasks)
+        if n > 1 and accept_score is not None:
+            first = None
+            while pending and first is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                first = next((task for task in tasks if task in done and _succeeded(task)), None)
+            if first is not None:
+                # the other candidates keep generating while the first is scored
+                first_idx = tasks.index(first)
+                first_score = await _score_or_none(score, [first.result()])
+                if first_score is not None and first_score[0] >= accept_score:
+                    for task in pending:
+                        task.cancel()
+                    return BestOfNResult(
+                        path=first.result(),
+                        index=first_idx,
+                        scores={first_idx: first_score[0]},
+                        generated=sum(1 for task in tasks if task.done() and not task.cancelled()),
+                        early_accepted=True,
+                    )
+
+        await asyncio.gather(*pending, return_exceptions=True)
+        finished = [(idx, task.result()) for idx, task in enumerate(tasks) if _succeeded(task)]
+        for idx, task in enumerate(tasks):
+            if not _succeeded(task):
+                logging.warning(f"Candidate {idx} failed: {task.exception()!r}")
+        if not finished:
+            raise tasks[0].exception()
+
+        scores = {}
+        if len(finished) > 1:
+            candidate_scores = await _score_or_none(score, [path for _, path in finished])
+            if candidate_scores is not None:
+                scores = {idx: value for (idx, _), value in zip(finished, candidate_scores)}
+        best_idx, best_path = max(finished, key=lambda item: scores.get(item[0], float("-inf")))
+        return BestOfNResult(path=best_path, index=best_idx, scores=scores, generated=len(tasks))
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _score_or_none(score, paths: List[str]) -> Optional[List[float]]:
+    try:
+        scores = await score(paths)
+    except Exception as e:
+        logging.warning(f"Scoring {len(paths)} candidates failed, keeping the first: {e!r}")
+        return None
+    if len(scores) != len(paths):
+        logging.warning(f"Expected {len(paths)} scores, got {len(scores)}; keeping the first candidate")
+        return None
+    return scores
@@ -0,0 +1,222 @@
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Iterable, List, Optional
+
+from utils.rate_limiter import current_priority
+
+
+# Rough seconds per task, used only to rank tasks and to plan the schedule.
+DEFAULT_ESTIMATES = {
+    "image": 30.0,   # reference selection + one image generation
+    "video": 120.0,  # one video generation (shot or transition)
+}
+
+TASK_KINDS = {
+    "first_frame": "image",
+    "last_frame": "image",
+    "transition": "video",
+    "video": "video",
+}
+
+
+def task_key(shot_idx: int, task: str) -> str:
+    return f"{shot_idx}/{task}"
+
+
+@dataclass
+class ScheduledTask:
+    key: str
+    kind: str
+    duration: float
+    deps: List[str] = field(default_factory=list)
+    rank: float = 0.0
+    planned_start: Optional[float] = None
+    planned_finish: Optional[float] = None
+    actual_start: Optional[float] = None
+    actual_finish: Optional[float] = None
+
+
+class CriticalPathScheduler:
+    """Dependency graph of the frame / transition / video tasks of one scene.
+
+    Each task is ranked by the longest estimated path from it to the end of the
+    scene (its own duration included). While a task runs, its rank is the
+    `current_priority` of its calls, so every shared ResourceLimiter serves the
+    tasks that unblock the most downstream work first.
+
+    `plan()` list-schedules the graph under a per-kind concurrency budget;
+    `report()` returns the planned and the actual schedule side by side.
+    """
+
+    def __init__(
+        self,
+        budget: Optional[Dict[str, Optional[int]]] = None,
+        estimates: Optional[Dict[str, float]] = None,
+    ):
+        self.budget = budget or {}
+        self.estimates = {**DEFAULT_ESTIMATES, **(estimates or {})}
+        self.tasks: Dict[str, ScheduledTask] = {}
+        self.started_at: Optional[float] = None
+
+    @classmethod
+    def from_camera_tree(
+        cls,
+        camera_tree,
+        shot_descriptions,
+        done: Iterable[str] = (),
+        budget: Optional[Dict[str, Optional[int]]] = None,
+        estimates: Optional[Dict[str, float]] = None,
+    ) -> "CriticalPathScheduler":
+        """Build the graph Script2VideoPipeline executes.
+
+        - the first frame of a child camera's first shot waits on the transition
+          video from its parent shot, which waits on the parent shot's first frame
+        - every other frame of a camera waits on the first frame of its first shot
+        - a shot video waits on its first (and last) frame
+
+        Tasks listed in `done` (already on disk) get zero duration.
+        """
+        done = set(done)
+        scheduler = cls(budget=budget, estimates=estimates)
+
+        def add(shot_idx: int, task: str, deps: List[str]):
+            key = task_key(shot_idx, task)
+            kind = TASK_KINDS[task]
+            duration = 0.0 if key in done else scheduler.estimates[kind]
+            scheduler.tasks[key] = ScheduledTask(key=key, kind=kind, duration=duration, deps=deps)
+
+        def has_last_frame(shot_idx: int) -> bool:
+            return shot_descriptions[shot_idx].variation_type in ["medium", "large"]
+
+        for camera in camera_tree:
+            first_shot_idx = camera.active_shot_idxs[0]
+            first_frame = task_key(first_shot_idx, "first_frame")
+
+            if camera.parent_shot_idx is not None:
+                add(first_shot_idx, "transition", [task_key(camera.parent_shot_idx, "first_frame")])
+                add(first_shot_idx, "first_frame", [task_key(first_shot_idx, "transition")])
+            else:
+                add(first_shot_idx, "first_frame", [])
+            if has_last_frame(first_shot_idx):
+                add(first_shot_idx, "last_frame", [first_frame])
+
+            for shot_idx in camera.active_shot_idxs[1:]:
+                add(shot_idx, "first_frame", [first_frame])
+                if has_last_frame(shot_idx):
+                    add(shot_idx, "last_frame", [first_frame])
+
+        for shot_description in shot_descriptions:
+            deps = [task_key(shot_description.idx, "first_frame")]
+            if has_last_frame(shot_description.idx):
+                deps.append(task_key(shot_description.idx, "last_frame"))
+            add(shot_description.idx, "video", deps)
+
+        scheduler.compute_ranks()
+        return scheduler
+
+    def successors(self) -> Dict[str, List[str]]:
+        successors = {key: [] for key in self.tasks}
+        for task in self.tasks.values():
+            for dep in task.deps:
+                successors[dep].append(task.key)
+        return successors
+
+    def compute_ranks(self):
+        successors = self.successors()
+        ranks: Dict[str, float] = {}
+
+        def rank(key: str) -> float:
+            if key not in ranks:
+                ranks[key] = self.tasks[key].duration + max((rank(succ) for succ in successors[key]), default=0.0)
+            return ranks[key]
+
+        for key in self.tasks:
+            self.tasks[key].rank = rank(key)
+
+    def critical_path(self) -> List[str]:
+        successors = self.successors()
+        sources = [task for task in self.tasks.values() if not task.deps]
+        if not sources:
+            return []
+        path = [max(sources, key=lambda task: task.rank).key]
+        while successors[path[-1]]:
+            path.append(max(successors[path[-1]], key=lambda key: self.tasks[key].rank))
+        return path
+
+    def plan(self) -> float:
+        """List-schedule by rank under the concurrency budget; returns the planned makespan.
+
+        Also marks the start of execution: actual times are relative to this call.
+        """
+        self.started_at = time.monotonic()
+
+        remaining = {key: len(task.deps) for key, task in self.tasks.items()}
+        successors = self.successors()
+        ready = [key for key, count in remaining.items() if count == 0]
+        running: Dict[str, float] = {}  # key -> planned finish
+        in_use = {kind: 0 for kind in TASK_KINDS.values()}
+        now = 0.0
+
+        while ready or running:
+            ready.sort(key=lambda key: -self.tasks[key].rank)
+            for key in list(ready):
+                task = self.tasks[key]
+                limit = self.budget.get(task.kind)
+                if limit and in_use[task.kind] >= limit:
+                    continue
+                ready.remove(key)
+                in_use[task.kind] += 1
+                task.planned_start = now
+                task.planned_finish = now + task.duration
+                running[key] = task.planned_finish
+
+            now = min(running.values())
+            for key in [key for key, finish in running.items() if finish <= now]:
+                del running[key]
+                in_use[self.tasks[key].kind] -= 1
+                for succ in successors[key]:
+                    remaining[succ] -= 1
+                    if remaining[succ] == 0:
+                        ready.append(succ)
+
+        return max((task.planned_finish for task in self.tasks.values()), default=0.0)
+
+    @asynccontextmanager
+    async def run(self, key: str):
+        """Run one task at its critical-path priority and record when it ran."""
+        task = self.tasks.get(key)
+        if task is None:
+            yield None
+            return
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+
+        token = current_priority.set(task.rank)
+        task.actual_start = time.monotonic() - self.started_at
+        try:
+            yield task
+        finally:
+            task.actual_finish = time.monotonic() - self.started_at
+            current_priority.reset(token)
+
+    def report(self) -> dict:
+        finished = [task.actual_finish for task in self.tasks.values() if task.actual_finish is not None]
+        return {
+            "planned_makespan": max((task.planned_finish or 0.0 for task in self.tasks.values()), default=0.0),
+            "actual_makespan": max(finished, default=0.0),
+            "critical_path": self.critical_path(),
+            "tasks": [
+                asdict(task)
+                for task in sorted(self.tasks.values(), key=lambda task: (task.planned_start is None, task.planned_start, -task.rank))
+            ],
+        }
+
+    def save(self, path: str) -> dict:
+        report = self.report()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        logging.info(f"Saved planned vs actual schedule to {path}")
+        return report
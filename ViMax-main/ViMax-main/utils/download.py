@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import weakref
+from typing import Optional
+
+import aiohttp
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+
+from utils.retry import after_func
+
+
+CHUNK_SIZE = 1 << 20
+MAX_ATTEMPTS = 4
+
+# aiohttp sessions are bound to the event loop they were created on
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Session shared by every download on the running event loop (pooled connections)."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=120),
+            connector=aiohttp.TCPConnector(limit=16),
+        )
+        _sessions[loop] = session
+    return session
+
+
+async def close_session():
+    """Close the running loop's download session; call before the loop shuts down."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def _is_transient(e: BaseException) -> bool:
+    if isinstance(e, aiohttp.ClientResponseError):
+        # client errors other than timeouts / rate limits will not fix themselves
+        return e.status >= 500 or e.status in (408, 429)
+    return isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError, ChecksumMismatch))
+
+
+@retry(
+    stop=stop_after_attempt(MAX_ATTEMPTS),
+    wait=wait_exponential(multiplier=1, max=30),
+    retry=retry_if_exception(_is_transient),
+    after=after_func,
+    reraise=True,
+)
+async def download_file(url: str, save_path: str, sha256: Optional[str] = None) -> str:
+    """Stream `url` to `save_path` without blocking the event loop.
+
+    The body goes to a temp file next to `save_path` and is renamed into place only
+    once complete (and matching `sha256`, if given), so an interrupted download
+    never leaves a partial file behind. Transient errors are retried with backoff.
+    """
+    logging.info(f"Downloading {url} to {save_path}")
+    directory = os.path.dirname(os.path.abspath(save_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, "wb") as f:
+            async with get_session().get(url) as response:
+                response.raise_for_status()
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+                # Content-Length counts the encoded body when the server compresses it
+                expected = None if "Content-Encoding" in response.headers else response.content_length
+
+        if expected is not None and size != expected:
+            raise aiohttp.ClientPayloadError(f"Expected {expected} bytes, got {size}")
+        if sha256 is not None and digest.hexdigest() != sha256.lower():
+            raise ChecksumMismatch(f"sha256 of {url} is {digest.hexdigest()}, expected {sha256}")
+
+        os.replace(tmp_path, save_path)
+        logging.info(f"Downloaded {size / 1e6:.1f} MB to {save_path}")
+        return save_path
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
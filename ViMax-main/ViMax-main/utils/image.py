@@ -1,22 +1,28 @@
 import logging
+import os
+import threading
+import hashlib
 import requests
 import base64
 import mimetypes
-from tenacity import retry
+from collections import OrderedDict
+from typing import Dict, Optional
+from tenacity import retry, stop_after_attempt, wait_exponential
 from io import BytesIO
 import cv2
+from PIL import Image
 
 
-@retry
+@retry(stop=stop_after_attempt(4), wait=wait_exponential(multiplier=1, max=30), reraise=True)
 def download_image(url, save_path):
     try:
         logging.info(f"Downloading image from {url} to {save_path}")
 
-        response = requests.get(url, stream=True)
+        response = requests.get(url, stream=True, timeout=(30, 120))
         response.raise_for_status() # Check for HTTP errors
 
         with open(save_path, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=1024):
+            for chunk in response.iter_content(chunk_size=1 << 20):
                 file.write(chunk)
         logging.info(f"Image downloaded successfully to {save_path}")
 
@@ -38,6 +44,96 @@ def image_path_to_b64(image_path, mime: bool = True) -> str:
     return b64
 
 
+class ImagePayloadEncoder:
+    """Downscaled, re-compressed base64 copies of images sent to multimodal LLMs.
+
+    The same portraits and frames are attached to many selection requests in a
+    run; each variant is encoded once and kept in memory (LRU), and in `cache_dir`
+    on disk when given, keyed by file content and encoding settings. Images are
+    resized so the long side is at most `max_side` (about what the models look at
+    anyway) and stored as JPEG.
+    """
+
+    def __init__(
+        self,
+        max_side: int = 1024,
+        quality: int = 85,
+        cache_dir: Optional[str] = None,
+        max_entries: int = 128,
+    ):
+        self.max_side = max_side
+        self.quality = quality
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _encode(self, data: bytes) -> bytes:
+        image = Image.open(BytesIO(data))
+        image.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+        if image.mode != "RGB":
+            # JPEG has no alpha: flatten transparent portraits onto white
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            image = image.convert("RGBA")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        buffered = BytesIO()
+        image.save(buffered, format="JPEG", quality=self.quality, optimize=True)
+        return buffered.getvalue()
+
+    def to_b64(self, image_path: str, mime: bool = True) -> str:
+        """Drop-in for `image_path_to_b64` that returns the lightweight variant."""
+        stat = os.stat(image_path)
+        memory_key = (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            b64 = self._memory.get(memory_key)
+            if b64 is not None:
+                self._memory.move_to_end(memory_key)
+
+        if b64 is None:
+            with open(image_path, "rb") as f:
+                data = f.read()
+            disk_path = None
+            if self.cache_dir:
+                digest = hashlib.sha256(data).hexdigest()
+                disk_path = os.path.join(self.cache_dir, f"{digest}_{self.max_side}_{self.quality}.jpg")
+
+            if disk_path and os.path.exists(disk_path):
+                with open(disk_path, "rb") as f:
+                    encoded = f.read()
+            else:
+                encoded = self._encode(data)
+                if len(encoded) >= len(data) and data[:3] == b"\xff\xd8\xff":
+                    encoded = data  # already a small JPEG
+                if disk_path:
+                    tmp_path = f"{disk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                    with open(tmp_path, "wb") as f:
+                        f.write(encoded)
+                    os.replace(tmp_path, disk_path)
+
+            b64 = base64.b64encode(encoded).decode("utf-8")
+            with self._lock:
+                self._memory[memory_key] = b64
+                while len(self._memory) > self.max_entries:
+                    self._memory.popitem(last=False)
+
+        if mime:
+            return f"data:image/jpeg;base64,{b64}"
+        return b64
+
+
+_image_encoders: Dict[Optional[str], ImagePayloadEncoder] = {}
+
+
+def get_image_encoder(cache_dir: Optional[str] = None) -> ImagePayloadEncoder:
+    """One shared encoder per cache directory, so every agent in a run reuses the same variants."""
+    if cache_dir not in _image_encoders:
+        _image_encoders[cache_dir] = ImagePayloadEncoder(cache_dir=cache_dir)
+    return _image_encoders[cache_dir]
+
+
 def pil_to_b64(image, mime: bool = True) -> str:
     buffered = BytesIO()
     image.save(buffered, format="PNG")
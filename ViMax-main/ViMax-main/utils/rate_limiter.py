@@ -0,0 +1,230 @@
+import asyncio
+import contextvars
+import heapq
+import inspect
+import itertools
+import logging
+import time
+from collections import deque
+from functools import wraps
+from typing import Any, Dict, Optional
+
+try:
+    from langchain_core.runnables import Runnable
+except ImportError:  # langchain is only needed to wrap chat models
+    Runnable = None
+
+
+# Priority of the calling task when it has to queue for a slot; higher is served
+# first, ties in arrival order. Set per task, e.g. by utils/critical_path.py.
+current_priority: contextvars.ContextVar[float] = contextvars.ContextVar("current_priority", default=0.0)
+
+
+# Used when the YAML config has no `rate_limits` section.
+DEFAULT_LIMITS = {
+    "chat": {"max_in_flight": 8, "requests_per_minute": 120},
+    "image": {"max_in_flight": 4, "requests_per_minute": 30},
+    "video": {"max_in_flight": 2, "requests_per_minute": 10},
+    "rerank": {"max_in_flight": 8, "requests_per_minute": 120},
+}
+
+
+class ResourceLimiter:
+    """Caps concurrent calls and calls started per period for one provider/model.
+
+    Usable as `async with limiter:` anywhere an asyncio.Semaphore was used.
+    None for either limit means unlimited. Queued callers are served by
+    `current_priority`, then first come first served.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+        period: float = 60.0,
+    ):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.requests_per_minute = requests_per_minute
+        self.period = period
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._waiters = []  # heap of (-priority, sequence, future)
+        self._sequence = itertools.count()
+        self._starts = deque()
+
+    async def acquire(self):
+        if self.max_in_flight and (self.in_flight >= self.max_in_flight or self._has_waiters()):
+            # queue by priority (see current_priority); release() hands its slot straight over
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (-current_priority.get(), next(self._sequence), future))
+            try:
+                await future
+            except BaseException:
+                if future.done() and not future.cancelled():
+                    # slot was handed over but we were cancelled before running: pass it on
+                    self.release()
+                else:
+                    future.cancel()
+                raise
+        else:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        try:
+            await self._wait_for_rate()
+        except BaseException:
+            self.release()
+            raise
+
+    async def _wait_for_rate(self):
+        if not self.requests_per_minute:
+            return
+        while True:
+            now = time.monotonic()
+            while self._starts and now - self._starts[0] >= self.period:
+                self._starts.popleft()
+            if len(self._starts) < self.requests_per_minute:
+                self._starts.append(now)
+                return
+            delay = self.period - (now - self._starts[0])
+            logging.debug(f"{self.name}: {self.requests_per_minute} requests per {self.period:.0f}s reached, waiting {delay:.2f} seconds...")
+            await asyncio.sleep(delay)
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _has_waiters(self) -> bool:
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        return bool(self._waiters)
+
+    @property
+    def idle_slots(self) -> Optional[int]:
+        """Calls that would start now without queuing; None when in-flight is unlimited."""
+        if not self.max_in_flight:
+            return None
+        if self._has_waiters():
+            return 0
+        return max(self.max_in_flight - self.in_flight, 0)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+        return False
+
+
+class RateLimitedTool:
+    """Proxy around an image/video generator or reranker.
+
+    Every async method (and an async __call__) runs under the limiter; everything
+    else is forwarded to the wrapped tool untouched.
+    """
+
+    def __init__(self, tool: Any, limiter: ResourceLimiter):
+        self._tool = tool
+        self._limiter = limiter
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._tool, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        @wraps(attr)
+        async def limited(*args, **kwargs):
+            async with self._limiter:
+                return await attr(*args, **kwargs)
+
+        return limited
+
+    async def __call__(self, *args, **kwargs):
+        async with self._limiter:
+            return await self._tool(*args, **kwargs)
+
+
+if Runnable is not None:
+    class RateLimitedChatModel(Runnable):
+        """Runnable wrapper so `prompt | chat_model | parser` chains share the chat limiter.
+
+        Only async calls are limited; the synchronous invoke is passed through.
+        """
+
+        def __init__(self, chat_model, limiter: ResourceLimiter):
+            self.chat_model = chat_model
+            self.limiter = limiter
+
+        def invoke(self, input, config=None, **kwargs):
+            return self.chat_model.invoke(input, config, **kwargs)
+
+        async def ainvoke(self, input, config=None, **kwargs):
+            async with self.limiter:
+                return await self.chat_model.ainvoke(input, config, **kwargs)
+
+        def __getattr__(self, name: str):
+            if name == "chat_model":
+                raise AttributeError(name)
+            return getattr(self.chat_model, name)
+
+
+class ResourceScheduler:
+    """Process-wide registry of limiters keyed by "<kind>/<provider or model>".
+
+    Every pipeline built from a YAML config wraps its chat model and tools through
+    the same scheduler, so one Veo account is capped once no matter how many
+    pipelines or agents share it.
+
+    YAML:
+        rate_limits:                 # defaults per kind
+          video: {max_in_flight: 2, requests_per_minute: 10}
+        video_generator:
+          class_path: ...
+          rate_limit: {max_in_flight: 4}   # overrides for this provider/model
+    """
+
+    def __init__(self, defaults: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.defaults = {kind: dict(limits) for kind, limits in DEFAULT_LIMITS.items()}
+        self.limiters: Dict[str, ResourceLimiter] = {}
+        if defaults:
+            self.configure(defaults)
+
+    def configure(self, defaults: Dict[str, Dict[str, Any]]):
+        for kind, limits in (defaults or {}).items():
+            self.defaults.setdefault(kind, {}).update(limits or {})
+
+    def limiter(self, kind: str, name: str = "default", overrides: Optional[Dict[str, Any]] = None) -> ResourceLimiter:
+        key = f"{kind}/{name}"
+        limiter = self.limiters.get(key)
+        if limiter is None:
+            limits = {**self.defaults.get(kind, {}), **(overrides or {})}
+            limiter = ResourceLimiter(key, **limits)
+            self.limiters[key] = limiter
+            logging.info(f"Rate limit {key}: max_in_flight={limiter.max_in_flight}, requests_per_minute={limiter.requests_per_minute}")
+        return limiter
+
+    def wrap_tool(self, tool: Any, kind: str, tool_config: Optional[Dict[str, Any]] = None) -> Any:
+        if isinstance(tool, RateLimitedTool):
+            return tool
+        tool_config = tool_config or {}
+        name = tool_config.get("class_path") or f"{type(tool).__module__}.{type(tool).__name__}"
+        return RateLimitedTool(tool, self.limiter(kind, name, tool_config.get("rate_limit")))
+
+    def wrap_chat_model(self, chat_model: Any, chat_model_config: Optional[Dict[str, Any]] = None) -> Any:
+        if Runnable is None or isinstance(chat_model, RateLimitedChatModel):
+            return chat_model
+        chat_model_config = chat_model_config or {}
+        init_args = chat_model_config.get("init_args", {})
+        name = f"{init_args.get('model_provider', '')}:{init_args.get('model', '')}"
+        return RateLimitedChatModel(chat_model, self.limiter("chat", name, chat_model_config.get("rate_limit")))
+
+
+scheduler = ResourceScheduler()
@@ -1,18 +1,18 @@
 import logging
 import requests
-from tenacity import retry
+from tenacity import retry, stop_after_attempt, wait_exponential
 
 
-@retry
+@retry(stop=stop_after_attempt(4), wait=wait_exponential(multiplier=1, max=30), reraise=True)
 def download_video(url, save_path):
     try:
         logging.info(f"Downloading video from {url} to {save_path}")
 
-        response = requests.get(url, stream=True)
+        response = requests.get(url, stream=True, timeout=(30, 120))
         response.raise_for_status()  # 检查请求是否成功
     
         with open(save_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
+            for chunk in response.iter_content(chunk_size=1 << 20):
                 f.write(chunk)
 
         logging.info(f"Video downloaded successfully to {save_path}")
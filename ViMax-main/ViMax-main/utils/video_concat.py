@@ -0,0 +1,168 @@
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+_VIDEO_STREAM = re.compile(
+    r"Stream #\d+:\d+.*?: Video: (?P<codec>\w+)(?: \((?P<profile>[^)]*)\))?.*?, "
+    r"(?P<pix_fmt>\w+)(?:\([^)]*\))?, (?P<width>\d+)x(?P<height>\d+).*?"
+    r"(?P<fps>[\d.]+k?) fps.*?(?P<tbn>[\d.]+k?) tbn"
+)
+_AUDIO_STREAM = re.compile(
+    r"Stream #\d+:\d+.*?: Audio: (?P<codec>\w+)(?: \((?P<profile>[^)]*)\))?.*?, "
+    r"(?P<rate>\d+) Hz, (?P<layout>[^,]+), (?P<sample_fmt>\w+)"
+)
+_DURATION = re.compile(r"Duration: (\d+):(\d+):([\d.]+)")
+
+
+def get_ffmpeg_exe() -> str:
+    """System ffmpeg if installed, otherwise the binary bundled with moviepy (imageio-ffmpeg)."""
+    exe = shutil.which("ffmpeg")
+    if exe:
+        return exe
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+@dataclass(frozen=True)
+class StreamInfo:
+    """Parameters that must match for the concat demuxer to stream-copy clips together."""
+
+    video: Optional[tuple]  # (codec, profile, pix_fmt, width, height, fps, tbn)
+    audio: Optional[tuple]  # (codec, profile, rate, layout, sample_fmt)
+    duration: float = 0.0
+
+    @property
+    def signature(self) -> tuple:
+        return self.video, self.audio
+
+
+def probe_video(path: str, ffmpeg: Optional[str] = None) -> StreamInfo:
+    """Read the first video/audio stream parameters from `ffmpeg -i` (ffprobe is not
+    always shipped next to the ffmpeg binary)."""
+    result = subprocess.run(
+        [ffmpeg or get_ffmpeg_exe(), "-hide_banner", "-i", path],
+        capture_output=True, text=True, errors="replace",
+    )
+    output = result.stderr
+
+    video = _VIDEO_STREAM.search(output)
+    audio = _AUDIO_STREAM.search(output)
+    duration = _DURATION.search(output)
+    if video is None:
+        raise ValueError(f"No video stream found in {path}")
+
+    return StreamInfo(
+        video=(video["codec"], video["profile"], video["pix_fmt"], int(video["width"]), int(video["height"]), video["fps"], video["tbn"]),
+        audio=(audio["codec"], audio["profile"], int(audio["rate"]), audio["layout"].strip(), audio["sample_fmt"]) if audio else None,
+        duration=int(duration[1]) * 3600 + int(duration[2]) * 60 + float(duration[3]) if duration else 0.0,
+    )
+
+
+def _run_ffmpeg(args: List[str]):
+    result = subprocess.run(args, capture_output=True, text=True, errors="replace")
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed ({result.returncode}): {result.stderr.strip()[-2000:]}")
+
+
+def _concat_copy(ffmpeg: str, video_paths: List[str], output_path: str, work_dir: str):
+    list_path = os.path.join(work_dir, "concat.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in video_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    _run_ffmpeg([
+        ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-map", "0", "-c", "copy", "-movflags", "+faststart",
+        output_path,
+    ])
+
+
+def _normalize(ffmpeg: str, path: str, info: StreamInfo, target: StreamInfo, output_path: str, preset: str):
+    _, _, _, width, height, fps, tbn = target.video
+    args = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y", "-i", path]
+    if target.audio and not info.audio:
+        # silent track so every clip has the same streams
+        args += ["-f", "lavfi", "-t", f"{info.duration:.3f}", "-i", f"anullsrc=r={target.audio[2]}:cl=stereo"]
+        args += ["-map", "0:v:0", "-map", "1:a:0"]
+    else:
+        args += ["-map", "0:v:0"] + (["-map", "0:a:0"] if target.audio else [])
+
+    args += [
+        "-vf", f"scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps}",
+        "-c:v", "libx264", "-preset", preset, "-crf", "18", "-pix_fmt", "yuv420p",
+        "-video_track_timescale", str(int(float(tbn[:-1]) * 1000)) if tbn.endswith("k") else tbn,
+    ]
+    if target.audio:
+        args += ["-c:a", "aac", "-ar", str(target.audio[2]), "-ac", "2"]
+    else:
+        args += ["-an"]
+    _run_ffmpeg(args + [output_path])
+
+
+def _concat_moviepy(video_paths: List[str], output_path: str):
+    from moviepy import VideoFileClip, concatenate_videoclips
+
+    video_clips = [VideoFileClip(path) for path in video_paths]
+    final_video = concatenate_videoclips(video_clips, method="compose")
+    final_video.write_videofile(output_path, codec="libx264", preset="medium")
+
+
+def concat_videos(video_paths: List[str], output_path: str, preset: str = "medium") -> str:
+    """Concatenate shot videos into `output_path`; returns the strategy used.
+
+    - "copy": every clip has the same stream parameters (the usual case for shots
+      from one provider) -> ffmpeg concat demuxer with stream copy, no re-encode.
+    - "normalize": parameters differ -> each clip is re-encoded in parallel to the
+      parameters of the most common clip, then stream-copied together.
+    - "reencode": ffmpeg could not handle the clips -> MoviePy concatenate + libx264.
+    """
+    if not video_paths:
+        raise ValueError("No videos to concatenate")
+
+    try:
+        ffmpeg = get_ffmpeg_exe()
+        infos = [probe_video(path, ffmpeg) for path in video_paths]
+    except Exception as e:
+        logging.warning(f"Probing videos failed, falling back to re-encoding with MoviePy: {e}")
+        _concat_moviepy(video_paths, output_path)
+        return "reencode"
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as work_dir:
+        if len({info.signature for info in infos}) == 1:
+            try:
+                _concat_copy(ffmpeg, video_paths, output_path, work_dir)
+                logging.info(f"Concatenated {len(video_paths)} videos by stream copy into {output_path}")
+                return "copy"
+            except RuntimeError as e:
+                logging.warning(f"Stream copy failed, normalizing clips first: {e}")
+
+        try:
+            # the most common parameters win; keep audio if any clip has it
+            target_signature = Counter(info.signature for info in infos).most_common(1)[0][0]
+            audio = target_signature[1] or next((info.audio for info in infos if info.audio), None)
+            target = StreamInfo(video=target_signature[0], audio=audio)
+
+            normalized_paths = [os.path.join(work_dir, f"{idx}.mp4") for idx in range(len(video_paths))]
+            with ThreadPoolExecutor(max_workers=min(len(video_paths), os.cpu_count() or 1)) as executor:
+                list(executor.map(
+                    lambda args: _normalize(ffmpeg, *args, preset=preset),
+                    zip(video_paths, infos, [target] * len(infos), normalized_paths),
+                ))
+            _concat_copy(ffmpeg, normalized_paths, output_path, work_dir)
+            logging.info(f"Concatenated {len(video_paths)} videos after normalizing them into {output_path}")
+            return "normalize"
+        except RuntimeError as e:
+            logging.warning(f"Normalizing clips failed, falling back to re-encoding with MoviePy: {e}")
+
+    _concat_moviepy(video_paths, output_path)
+    return "reencode"
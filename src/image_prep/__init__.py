@@ -4,6 +4,8 @@ Xử lý ảnh sản phẩm cho TikTok video generation
 """
 
 from .processor import ImageProcessor, process_image
+from .batch import BatchResult, process_batch
+from .cache import ProcessedImageCache
 
-__all__ = ['ImageProcessor', 'process_image']
+__all__ = ['ImageProcessor', 'process_image', 'BatchResult', 'process_batch', 'ProcessedImageCache']
 __version__ = '1.0.0'
@@ -0,0 +1,215 @@
+"""
+MODULE 1.2: BATCH IMAGE PROCESSOR
+Xử lý hàng loạt ảnh sản phẩm (catalog 5-20k ảnh) bằng process pool
+
+Chức năng:
+- Mỗi worker process giữ 1 ImageProcessor + 1 rembg session (model load 1 lần)
+- Ảnh chạy qua load → CLAHE → rembg → resize → save theo từng worker
+- Thống kê thời gian từng bước + throughput
+- Ảnh lỗi không làm dừng cả batch
+- Có cache_dir → ảnh đã xử lý với cùng cấu hình được bỏ qua (xem cache.py)
+- low_memory=True → pipeline tiết kiệm RAM (catalog ảnh 12MP, nhiều worker)
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .cache import ProcessedImageCache
+from .processor import DEFAULT_REMBG_MODEL, PIPELINE_STAGES, ImageProcessor
+
+
+@dataclass
+class BatchResult:
+    """
+    Kết quả process_batch
+
+    Attributes:
+        outputs: {input_path: output_path} của ảnh thành công
+        errors: {input_path: thông báo lỗi}
+        stage_seconds: Tổng thời gian mỗi bước (cộng dồn mọi worker)
+        elapsed: Thời gian thực của cả batch (giây)
+        cache_hits: Số ảnh lấy từ cache (không xử lý lại)
+    """
+    outputs: Dict[str, str] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    cache_hits: int = 0
+    stage_seconds: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(PIPELINE_STAGES, 0.0))
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Số ảnh xử lý xong mỗi giây"""
+        return len(self.outputs) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        """Tóm tắt dạng text: số ảnh, throughput, thời gian trung bình mỗi bước"""
+        done = max(len(self.outputs), 1)
+        lines = [
+            f"{len(self.outputs)} ảnh OK ({self.cache_hits} từ cache), {len(self.errors)} lỗi, "
+            f"{self.elapsed:.1f}s ({self.throughput:.2f} ảnh/s)"
+        ]
+        for stage in PIPELINE_STAGES:
+            lines.append(f"  {stage:<8} {self.stage_seconds[stage] * 1000 / done:8.1f} ms/ảnh")
+        return "\n".join(lines)
+
+
+# ===== WORKER PROCESS =====
+
+# Processor của worker hiện tại (tạo 1 lần trong _init_worker)
+_worker_processor: Optional[ImageProcessor] = None
+
+
+def _init_worker(
+    target_size: Tuple[int, int],
+    enhancement_enabled: bool,
+    rembg_model: str,
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: int = ProcessedImageCache.DEFAULT_MAX_BYTES,
+    low_memory: bool = False
+):
+    """Chạy 1 lần khi worker khởi động: load model rembg ngay"""
+    global _worker_processor
+    _worker_processor = ImageProcessor(
+        target_size=target_size,
+        enhancement_enabled=enhancement_enabled,
+        rembg_model=rembg_model,
+        cache=ProcessedImageCache(cache_dir, cache_max_bytes) if cache_dir else None,
+        low_memory=low_memory
+    )
+    _ = _worker_processor.session
+
+
+def _process_one(job: Tuple[str, str]) -> tuple:
+    """Xử lý 1 ảnh trong worker → (input, output, timings, lỗi, cache event)"""
+    input_path, output_path = job
+    try:
+        timings = _worker_processor.process_with_timings(input_path, output_path)
+        return input_path, output_path, timings, None, _worker_processor.last_cache_event
+    except Exception as e:
+        return input_path, output_path, None, f"{type(e).__name__}: {e}", None
+
+
+# ===== API =====
+
+def plan_outputs(inputs: Iterable[str], out_dir: str) -> List[Tuple[str, str]]:
+    """
+    Ghép mỗi ảnh input với file output <out_dir>/<tên>.png
+    (trùng tên từ các thư mục khác nhau → thêm hậu tố _2, _3...)
+    """
+    jobs = []
+    used = set()
+    for input_path in inputs:
+        stem = Path(input_path).stem
+        name = stem
+        suffix = 2
+        while name.lower() in used:
+            name = f"{stem}_{suffix}"
+            suffix += 1
+        used.add(name.lower())
+        jobs.append((str(input_path), os.path.join(out_dir, f"{name}.png")))
+    return jobs
+
+
+def process_batch(
+    inputs: Iterable[str],
+    out_dir: str,
+    workers: Optional[int] = None,
+    target_size: Tuple[int, int] = (1080, 1920),
+    enhancement_enabled: bool = True,
+    rembg_model: str = DEFAULT_REMBG_MODEL,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    processor: Optional[ImageProcessor] = None,
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: int = ProcessedImageCache.DEFAULT_MAX_BYTES,
+    low_memory: bool = False
+) -> BatchResult:
+    """
+    Xử lý hàng loạt ảnh sản phẩm
+
+    Example:
+        >>> result = process_batch(glob("catalog/*.jpg"), "output/catalog", workers=4)
+        >>> print(result.summary())
+
+    Args:
+        inputs: Danh sách đường dẫn ảnh
+        out_dir: Thư mục output
+        workers: Số process (None = số CPU; 1 = chạy trong process hiện tại)
+        target_size: Kích thước output (width, height)
+        enhancement_enabled: Có áp dụng CLAHE không
+        rembg_model: Model rembg
+        on_progress: Callback(done, total) sau mỗi ảnh
+        processor: Processor dùng khi workers=1 (None = tạo mới)
+        cache_dir: Thư mục cache kết quả (None = không dùng cache)
+        cache_max_bytes: Dung lượng tối đa của cache
+        low_memory: Dùng pipeline tiết kiệm bộ nhớ (bỏ qua nếu truyền processor)
+
+    Returns:
+        BatchResult
+    """
+    jobs = plan_outputs(inputs, out_dir)
+    total = len(jobs)
+    result = BatchResult()
+    if not jobs:
+        return result
+
+    os.makedirs(out_dir, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, total))
+    cache = ProcessedImageCache(cache_dir, cache_max_bytes) if cache_dir else None
+    print(f"[BatchProcessor] {total} ảnh, {workers} worker, model={rembg_model}")
+
+    start = time.perf_counter()
+    if workers == 1:
+        global _worker_processor
+        _worker_processor = processor or ImageProcessor(
+            target_size=target_size,
+            enhancement_enabled=enhancement_enabled,
+            rembg_model=rembg_model,
+            low_memory=low_memory
+        )
+        if cache is not None:
+            _worker_processor.cache = cache
+        else:
+            cache = _worker_processor.cache
+        results = map(_process_one, jobs)
+        _collect(results, result, total, on_progress, cache)
+    else:
+        # Chia nhỏ job theo chunk để giảm overhead IPC với catalog lớn
+        chunksize = max(1, min(32, total // (workers * 8)))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(target_size, enhancement_enabled, rembg_model, cache_dir, cache_max_bytes, low_memory)
+        ) as executor:
+            results = executor.map(_process_one, jobs, chunksize=chunksize)
+            _collect(results, result, total, on_progress, cache)
+    result.elapsed = time.perf_counter() - start
+
+    # Chỉ process chính ghi manifest + dọn cache
+    if cache is not None:
+        cache.flush()
+
+    print(f"[BatchProcessor] {result.summary()}")
+    return result
+
+
+def _collect(results, result: BatchResult, total: int, on_progress, cache: Optional[ProcessedImageCache]):
+    """Gom kết quả từng ảnh vào BatchResult"""
+    for done, (input_path, output_path, timings, error, cache_event) in enumerate(results, 1):
+        if error:
+            result.errors[input_path] = error
+            print(f"  ✗ {Path(input_path).name}: {error}")
+        else:
+            result.outputs[input_path] = output_path
+            for stage, seconds in timings.items():
+                result.stage_seconds[stage] += seconds
+        if cache_event:
+            key, hit = cache_event
+            result.cache_hits += int(hit)
+            if cache is not None:
+                cache.touch(key, None if hit else input_path)
+        if on_progress:
+            on_progress(done, total)
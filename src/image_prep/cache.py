@@ -0,0 +1,236 @@
+"""
+MODULE 1.3: PROCESSED IMAGE CACHE
+Cache kết quả xử lý ảnh: cùng ảnh gốc + cùng cấu hình → dùng lại PNG đã tạo
+
+Chức năng:
+- Key = hash nội dung ảnh gốc + target_size + enhancement_enabled + phiên bản model rembg
+- Mỗi entry là 1 file <key>.png (ghi atomic → nhiều worker process dùng chung được)
+- manifest.json lưu kích thước + lần dùng cuối, chỉ process chính ghi (flush)
+- Giới hạn dung lượng: vượt max_bytes → xóa entry lâu không dùng nhất (LRU)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash nội dung file (đọc từng chunk, không load cả file)"""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def rembg_model_path(model_name: str) -> Optional[str]:
+    """
+    Đường dẫn file model rembg đã tải về (None nếu chưa có)
+
+    Hỏi session class của rembg (model_dir: ~/.rembg/models/<name>/, hoặc
+    $U2NET_HOME / $REMBG_HOME nếu đặt) thay vì đoán thư mục
+    """
+    try:
+        from rembg.sessions import sessions_class
+    except ImportError:
+        return None
+
+    session_cls = next((cls for cls in sessions_class if cls.name() == model_name), None)
+    if session_cls is None:
+        return None
+
+    # resolve_existing: thư mục theo model trước, rồi layout phẳng cũ (~/.u2net)
+    resolve_existing = getattr(session_cls, "resolve_existing", None)
+    if resolve_existing is not None:
+        existing = resolve_existing(f"{model_name}.onnx")
+        if existing is not None:
+            return existing
+
+    model_dir = getattr(session_cls, "model_dir", None)
+    if model_dir is not None and os.path.isdir(model_dir()):
+        # Một số model không đặt tên <name>.onnx
+        onnx_files = sorted(Path(model_dir()).glob("*.onnx"))
+        if onnx_files:
+            return str(onnx_files[0])
+
+    # rembg cũ (chưa có model_dir): ~/.u2net hoặc $U2NET_HOME
+    home = os.environ.get("U2NET_HOME", os.path.expanduser("~/.u2net"))
+    legacy_file = os.path.join(home, f"{model_name}.onnx")
+    return legacy_file if os.path.exists(legacy_file) else None
+
+
+def rembg_model_version(model_name: str) -> str:
+    """
+    Định danh phiên bản model rembg: tên model + phiên bản rembg
+    + kích thước/mtime file .onnx (đổi model → cache cũ tự hết hiệu lực)
+    """
+    try:
+        import rembg
+        version = getattr(rembg, "__version__", "unknown")
+    except ImportError:
+        version = "missing"
+
+    model_file = rembg_model_path(model_name)
+    if model_file is not None:
+        stat = os.stat(model_file)
+        return f"{model_name}@{version}:{stat.st_size}:{int(stat.st_mtime)}"
+    return f"{model_name}@{version}"
+
+
+class ProcessedImageCache:
+    """
+    Cache PNG đã xử lý trên đĩa
+
+    Attributes:
+        cache_dir (Path): Thư mục cache
+        max_bytes (int): Dung lượng tối đa (byte)
+    """
+
+    MANIFEST_NAME = "manifest.json"
+    DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2GB
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: Thư mục lưu cache
+            max_bytes: Dung lượng tối đa, vượt thì xóa entry cũ nhất
+        """
+        if max_bytes <= 0:
+            raise ValueError(f"Invalid max_bytes: {max_bytes}. Must be positive.")
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._model_versions: Dict[str, str] = {}
+
+        # Thay đổi chưa ghi vào manifest: key → (source, thời điểm dùng)
+        self._pending: Dict[str, Tuple[Optional[str], float]] = {}
+
+    # ===== KEY =====
+
+    def make_key(
+        self,
+        input_path: str,
+        target_size: Tuple[int, int],
+        enhancement_enabled: bool,
+        rembg_model: str,
+        variant: str = ""
+    ) -> str:
+        """
+        Tạo key cache cho 1 ảnh + cấu hình xử lý
+
+        Args:
+            variant: Phân biệt các pipeline cho kết quả khác nhau (VD: low_memory)
+        """
+        if rembg_model not in self._model_versions:
+            self._model_versions[rembg_model] = rembg_model_version(rembg_model)
+
+        parts = [
+            file_sha256(input_path),
+            f"{target_size[0]}x{target_size[1]}",
+            f"enhance={int(bool(enhancement_enabled))}",
+            self._model_versions[rembg_model],
+        ]
+        if variant:
+            parts.append(variant)
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:32]
+
+    def entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.png"
+
+    # ===== LOOKUP / STORE =====
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Đường dẫn PNG trong cache, None nếu chưa có"""
+        path = self.entry_path(key)
+        if not path.exists():
+            return None
+        self.touch(key)
+        return str(path)
+
+    def store(self, key: str, png_path: str, source: Optional[str] = None) -> str:
+        """Copy PNG vừa xử lý vào cache (ghi file tạm rồi đổi tên → atomic)"""
+        final_path = self.entry_path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(png_path, tmp_path)
+            os.replace(tmp_path, final_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.touch(key, source)
+        return str(final_path)
+
+    def touch(self, key: str, source: Optional[str] = None):
+        """Ghi nhận entry vừa được dùng (lưu vào manifest ở lần flush sau)"""
+        old_source = self._pending.get(key, (None, 0))[0]
+        self._pending[key] = (source or old_source, time.time())
+
+    # ===== MANIFEST + EVICTION =====
+
+    def load_manifest(self) -> Dict[str, dict]:
+        path = self.cache_dir / self.MANIFEST_NAME
+        if not path.exists():
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f).get("entries", {})
+        except (OSError, ValueError) as e:
+            print(f"[ImageCache] Manifest hỏng, tạo lại: {e}")
+            return {}
+
+    def flush(self) -> Dict[str, int]:
+        """
+        Ghi các thay đổi vào manifest và xóa entry cũ nếu vượt max_bytes.
+        Chỉ gọi từ 1 process (process chính của batch).
+
+        Returns:
+            Dict: {"entries": số entry, "bytes": tổng dung lượng, "evicted": số entry đã xóa}
+        """
+        entries = self.load_manifest()
+
+        # Đồng bộ với file thực tế: bỏ entry mất file, nhận file chưa có trong manifest
+        on_disk = {p.stem: p for p in self.cache_dir.glob("*.png")}
+        entries = {k: v for k, v in entries.items() if k in on_disk}
+        for key, path in on_disk.items():
+            if key not in entries:
+                entries[key] = {"source": None, "last_used": path.stat().st_mtime}
+
+        for key, (source, used_at) in self._pending.items():
+            if key in entries:
+                entries[key]["last_used"] = max(entries[key].get("last_used", 0), used_at)
+                if source:
+                    entries[key]["source"] = source
+        self._pending.clear()
+
+        for key, entry in entries.items():
+            entry["size"] = on_disk[key].stat().st_size
+
+        # Vượt dung lượng → xóa entry lâu không dùng nhất
+        total = sum(e["size"] for e in entries.values())
+        evicted = 0
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= entries[key]["size"]
+            self.entry_path(key).unlink(missing_ok=True)
+            del entries[key]
+            evicted += 1
+
+        self._write_manifest(entries)
+        if evicted:
+            print(f"[ImageCache] Đã xóa {evicted} entry cũ (giới hạn {self.max_bytes} byte)")
+        return {"entries": len(entries), "bytes": total, "evicted": evicted}
+
+    def _write_manifest(self, entries: Dict[str, dict]):
+        path = self.cache_dir / self.MANIFEST_NAME
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
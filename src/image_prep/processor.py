@@ -7,16 +7,45 @@ Chức năng:
 - Enhance ảnh với CLAHE
 - Resize về 1080x1920 (9:16)
 - Export PNG với alpha channel
+- Chế độ low_memory: tính khung sản phẩm cuối trước, decode JPEG thu nhỏ,
+  xử lý toàn bộ ở kích thước đó và giữ 1 dạng buffer (numpy BGR/BGRA)
 """
 
 import cv2
 import numpy as np
 from PIL import Image
-from rembg import remove
-from typing import Tuple, Optional
+from rembg import remove, new_session
+from typing import Dict, Tuple, Optional
 import os
+import shutil
+import time
 from pathlib import Path
 
+from .cache import ProcessedImageCache
+
+
+# Model rembg mặc định (U²-Net)
+DEFAULT_REMBG_MODEL = "u2net"
+
+# Tên các bước pipeline (dùng cho thống kê thời gian)
+PIPELINE_STAGES = ("cache", "load", "enhance", "rembg", "resize", "save")
+
+# Ảnh input lớn hơn → thu nhỏ khi load (tránh OOM)
+MAX_INPUT_DIMENSION = 2048
+
+# Sản phẩm chiếm tối đa 80% canvas
+PRODUCT_FILL_RATIO = 0.8
+
+# Hệ số decode thu nhỏ của OpenCV (JPEG scale theo DCT → không giải mã full size)
+_REDUCED_READ_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# Tag EXIF Orientation (ảnh chụp dọc bằng điện thoại)
+_EXIF_ORIENTATION = 0x0112
+
 
 class ImageProcessor:
     """
@@ -25,12 +54,20 @@ class ImageProcessor:
     Attributes:
         target_size (Tuple[int, int]): Kích thước output mặc định (width, height)
         enhancement_enabled (bool): Bật/tắt enhancement
+        rembg_model (str): Tên model rembg
+        low_memory (bool): Dùng pipeline tiết kiệm bộ nhớ
     """
     
     def __init__(
         self, 
         target_size: Tuple[int, int] = (1080, 1920),
-        enhancement_enabled: bool = True
+        enhancement_enabled: bool = True,
+        rembg_model: str = DEFAULT_REMBG_MODEL,
+        session=None,
+        cache: Optional[ProcessedImageCache] = None,
+        low_memory: bool = False,
+        matting_max_side: Optional[int] = None,
+        refine_mask: bool = True
     ):
         """
         Khởi tạo ImageProcessor với cấu hình
@@ -38,9 +75,25 @@ class ImageProcessor:
         Args:
             target_size: Kích thước output (width, height), mặc định 9:16 cho TikTok
             enhancement_enabled: Có áp dụng enhancement không
+            rembg_model: Model rembg (mặc định U²-Net)
+            session: rembg session đã tạo sẵn (None = tạo khi xóa background lần đầu)
+            cache: Cache kết quả (None = luôn xử lý lại)
+            low_memory: Pipeline tiết kiệm bộ nhớ (xem _run_pipeline_low_memory)
+            matting_max_side: (low_memory) Cạnh dài tối đa khi tách nền - nhỏ hơn khung
+                              sản phẩm thì mask được tính nhỏ rồi phóng lên (None = bằng khung)
+            refine_mask: (low_memory) Làm mịn mask đã phóng theo cạnh ảnh (guided filter)
         """
         self.target_size = target_size
         self.enhancement_enabled = enhancement_enabled
+        self.rembg_model = rembg_model
+        self._session = session
+        self.cache = cache
+        self.low_memory = low_memory
+        self.matting_max_side = matting_max_side
+        self.refine_mask = refine_mask
+        
+        # (key, hit) của ảnh xử lý gần nhất khi có cache - batch dùng để cập nhật manifest
+        self.last_cache_event: Optional[Tuple[str, bool]] = None
         
         # Validate target size
         if target_size[0] <= 0 or target_size[1] <= 0:
@@ -77,36 +130,297 @@ class ImageProcessor:
             raise FileNotFoundError(f"File không tồn tại: {input_path}")
         
         print(f"[ImageProcessor] Xử lý ảnh: {Path(input_path).name}")
+        self._process(input_path, output_path, verbose=True)
+        print(f"  ✓ Đã lưu: {output_path}")
+        
+        if self.cache is not None:
+            self.cache.flush()
+        
+        return output_path
+    
+    def process_with_timings(self, input_path: str, output_path: str) -> Dict[str, float]:
+        """
+        Xử lý 1 ảnh không in log, trả về thời gian từng bước (dùng cho batch)
+        
+        Returns:
+            Dict[str, float]: {stage: giây} theo PIPELINE_STAGES
+        """
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"File không tồn tại: {input_path}")
+        return self._process(input_path, output_path, verbose=False)
+    
+    @property
+    def session(self):
+        """rembg session - model chỉ load 1 lần cho mỗi processor"""
+        if self._session is None:
+            self._session = new_session(self.rembg_model)
+        return self._session
+    
+    def _process(self, input_path: str, output_path: str, verbose: bool) -> Dict[str, float]:
+        """
+        Tra cache trước khi chạy pipeline: trùng ảnh gốc + cấu hình → copy PNG đã có
+        """
+        self.last_cache_event = None
+        if self.cache is None:
+            return self._run_pipeline(input_path, output_path, verbose)
+        
+        start = time.perf_counter()
+        key = self.cache.make_key(
+            input_path, self.target_size, self.enhancement_enabled, self.rembg_model,
+            variant=self._cache_variant()
+        )
+        cached_path = self.cache.lookup(key)
+        
+        if cached_path:
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            shutil.copyfile(cached_path, output_path)
+            
+            timings = dict.fromkeys(PIPELINE_STAGES, 0.0)
+            timings["cache"] = time.perf_counter() - start
+            self.last_cache_event = (key, True)
+            if verbose:
+                print("  [cache] Ảnh không đổi - dùng kết quả đã xử lý")
+            return timings
+        
+        lookup_time = time.perf_counter() - start
+        timings = self._run_pipeline(input_path, output_path, verbose)
+        
+        start = time.perf_counter()
+        self.cache.store(key, output_path, source=input_path)
+        timings["cache"] = lookup_time + time.perf_counter() - start
+        self.last_cache_event = (key, False)
+        return timings
+    
+    def _cache_variant(self) -> str:
+        """Phân biệt kết quả của pipeline low_memory trong cache key"""
+        if not self.low_memory:
+            return ""
+        return f"lowmem:{self.matting_max_side or 0}:{int(self.refine_mask)}"
+    
+    def _run_pipeline(self, input_path: str, output_path: str, verbose: bool) -> Dict[str, float]:
+        """
+        Chạy load → enhance → rembg → resize → save, đo thời gian từng bước
+        """
+        if self.low_memory:
+            return self._run_pipeline_low_memory(input_path, output_path, verbose)
+        
+        timings = dict.fromkeys(PIPELINE_STAGES, 0.0)
+        log = print if verbose else (lambda *args: None)
         
         # BƯỚC 1: Load ảnh
-        print("  [1/4] Loading image...")
+        log("  [1/4] Loading image...")
+        start = time.perf_counter()
         img_cv = self._load_image(input_path)
+        timings["load"] = time.perf_counter() - start
         
         # BƯỚC 2: Enhance (optional)
         if self.enhancement_enabled:
-            print("  [2/4] Enhancing image...")
+            log("  [2/4] Enhancing image...")
+            start = time.perf_counter()
             img_cv = self._enhance_image(img_cv)
+            timings["enhance"] = time.perf_counter() - start
         else:
-            print("  [2/4] Skipping enhancement")
+            log("  [2/4] Skipping enhancement")
         
         # BƯỚC 3: Remove background
-        print("  [3/4] Removing background...")
+        log("  [3/4] Removing background...")
+        start = time.perf_counter()
         img_pil = self._cv2_to_pil(img_cv)
         img_no_bg = self._remove_background(img_pil)
+        timings["rembg"] = time.perf_counter() - start
         
         # BƯỚC 4: Resize to TikTok format
-        print("  [4/4] Resizing to TikTok format (9:16)...")
+        log("  [4/4] Resizing to TikTok format (9:16)...")
+        start = time.perf_counter()
         img_final = self._resize_to_tiktok(img_no_bg)
+        timings["resize"] = time.perf_counter() - start
         
         # BƯỚC 5: Save output
+        start = time.perf_counter()
         output_dir = os.path.dirname(output_path)
         if output_dir:  # Tạo thư mục nếu cần
             os.makedirs(output_dir, exist_ok=True)
         
         img_final.save(output_path, "PNG")
-        print(f"  ✓ Đã lưu: {output_path}")
+        timings["save"] = time.perf_counter() - start
         
-        return output_path
+        return timings
+    
+    # ===== LOW MEMORY PIPELINE =====
+    
+    def _run_pipeline_low_memory(self, input_path: str, output_path: str, verbose: bool) -> Dict[str, float]:
+        """
+        Pipeline tiết kiệm bộ nhớ - cho kết quả tương đương _run_pipeline
+        
+        Khác biệt:
+        1. Đọc header → tính khung sản phẩm cuối (80% canvas, không phóng to)
+        2. Decode JPEG thu nhỏ (IMREAD_REDUCED_*) rồi resize 1 lần về đúng khung
+        3. CLAHE + tách nền ở kích thước khung (U²-Net chỉ dùng 320px bên trong)
+        4. Ghép BGRA trực tiếp lên canvas numpy, ghi PNG bằng OpenCV
+        
+        Không có ảnh 2048px / canvas PIL / bản copy PIL nào cùng tồn tại.
+        """
+        timings = dict.fromkeys(PIPELINE_STAGES, 0.0)
+        log = print if verbose else (lambda *args: None)
+        
+        # BƯỚC 1: Load thẳng về kích thước khung sản phẩm
+        log("  [1/4] Loading image (reduced decode)...")
+        start = time.perf_counter()
+        img = self._load_image_for_box(input_path)
+        timings["load"] = time.perf_counter() - start
+        
+        # BƯỚC 2: Enhance (ghi đè buffer)
+        if self.enhancement_enabled:
+            log("  [2/4] Enhancing image...")
+            start = time.perf_counter()
+            img = self._enhance_image(img)
+            timings["enhance"] = time.perf_counter() - start
+        else:
+            log("  [2/4] Skipping enhancement")
+        
+        # BƯỚC 3: Chỉ lấy mask (không tạo ảnh RGBA trung gian)
+        log("  [3/4] Computing alpha mask...")
+        start = time.perf_counter()
+        mask = self._compute_mask(img)
+        timings["rembg"] = time.perf_counter() - start
+        
+        # BƯỚC 4: Ghép lên canvas BGRA
+        log("  [4/4] Compositing onto 9:16 canvas...")
+        start = time.perf_counter()
+        canvas = self._compose_on_canvas(img, mask)
+        del img, mask
+        timings["resize"] = time.perf_counter() - start
+        
+        # BƯỚC 5: Save output
+        start = time.perf_counter()
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        if not cv2.imwrite(output_path, canvas):
+            raise ValueError(f"Không ghi được ảnh: {output_path}")
+        timings["save"] = time.perf_counter() - start
+        
+        return timings
+    
+    def _product_box(self, width: int, height: int) -> Tuple[int, int]:
+        """
+        Kích thước sản phẩm trên canvas - giống _load_image + thumbnail của pipeline thường:
+        giới hạn MAX_INPUT_DIMENSION, fit vào 80% canvas, không phóng to
+        """
+        if max(width, height) > MAX_INPUT_DIMENSION:
+            scale = MAX_INPUT_DIMENSION / max(width, height)
+            width, height = int(width * scale), int(height * scale)
+        
+        max_w = int(self.target_size[0] * PRODUCT_FILL_RATIO)
+        max_h = int(self.target_size[1] * PRODUCT_FILL_RATIO)
+        scale = min(1.0, max_w / width, max_h / height)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+    
+    def _load_image_for_box(self, path: str) -> np.ndarray:
+        """
+        Load ảnh ở kích thước khung sản phẩm, decode thu nhỏ nếu được
+        
+        Returns:
+            np.ndarray: Ảnh BGR đúng kích thước _product_box
+        """
+        # Chỉ đọc header để lấy kích thước
+        try:
+            with Image.open(path) as probe:
+                src_w, src_h = probe.size
+                orientation = probe.getexif().get(_EXIF_ORIENTATION, 1)
+        except Exception:
+            raise ValueError(f"Không thể load ảnh từ: {path}")
+
+        # cv2.imread xoay ảnh theo EXIF (orientation 5-8 = xoay 90°) → đổi chiều khung
+        if orientation in (5, 6, 7, 8):
+            src_w, src_h = src_h, src_w
+
+        box_w, box_h = self._product_box(src_w, src_h)
+        
+        # Hệ số thu nhỏ lớn nhất mà vẫn >= khung (tránh mất chi tiết)
+        flag = cv2.IMREAD_COLOR
+        for factor, reduced_flag in _REDUCED_READ_FLAGS:
+            if src_w // factor >= box_w and src_h // factor >= box_h:
+                flag = reduced_flag
+                break
+        
+        img = cv2.imread(path, flag)
+        if img is None:
+            raise ValueError(f"Không thể load ảnh từ: {path}")
+        
+        if (img.shape[1], img.shape[0]) != (box_w, box_h):
+            img = cv2.resize(img, (box_w, box_h), interpolation=cv2.INTER_AREA)
+        return img
+    
+    def _compute_mask(self, img_bgr: np.ndarray) -> np.ndarray:
+        """
+        Alpha mask (uint8, cùng kích thước ảnh) bằng rembg only_mask
+        
+        matting_max_side nhỏ hơn ảnh → tách nền ở ảnh nhỏ, phóng mask lên
+        và (tùy chọn) làm mịn theo cạnh của ảnh gốc.
+        """
+        height, width = img_bgr.shape[:2]
+        matting_img = img_bgr
+        if self.matting_max_side and max(width, height) > self.matting_max_side:
+            scale = self.matting_max_side / max(width, height)
+            matting_img = cv2.resize(
+                img_bgr, (max(1, int(width * scale)), max(1, int(height * scale))),
+                interpolation=cv2.INTER_AREA
+            )
+        
+        rgb = cv2.cvtColor(matting_img, cv2.COLOR_BGR2RGB)
+        mask = remove(Image.fromarray(rgb), session=self.session, only_mask=True)
+        del rgb
+        mask = np.asarray(mask.convert('L') if isinstance(mask, Image.Image) else mask, dtype=np.uint8)
+        
+        if mask.shape[:2] != (height, width):
+            mask = cv2.resize(mask, (width, height), interpolation=cv2.INTER_LINEAR)
+            if self.refine_mask:
+                mask = self._refine_mask(img_bgr, mask)
+        return mask
+    
+    @staticmethod
+    def _refine_mask(guide_bgr: np.ndarray, mask: np.ndarray, radius: int = 8, eps: float = 1e-3) -> np.ndarray:
+        """
+        Guided filter (He et al.) - bám mask đã phóng to theo cạnh của ảnh gốc
+        
+        Dùng kênh sáng làm guide, toàn bộ bằng float32 + boxFilter.
+        """
+        guide = cv2.cvtColor(guide_bgr, cv2.COLOR_BGR2GRAY).astype(np.float32) / 255.0
+        src = mask.astype(np.float32) / 255.0
+        ksize = (2 * radius + 1, 2 * radius + 1)
+        
+        mean_i = cv2.boxFilter(guide, -1, ksize)
+        mean_p = cv2.boxFilter(src, -1, ksize)
+        cov_ip = cv2.boxFilter(guide * src, -1, ksize) - mean_i * mean_p
+        var_i = cv2.boxFilter(guide * guide, -1, ksize) - mean_i * mean_i
+        
+        a = cov_ip / (var_i + eps)
+        b = mean_p - a * mean_i
+        refined = cv2.boxFilter(a, -1, ksize) * guide + cv2.boxFilter(b, -1, ksize)
+        
+        return np.clip(refined * 255.0 + 0.5, 0, 255).astype(np.uint8)
+    
+    def _compose_on_canvas(self, img_bgr: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        Đặt sản phẩm (BGR + mask) vào giữa canvas BGRA trong suốt
+        
+        Returns:
+            np.ndarray: Canvas BGRA kích thước target_size
+        """
+        target_w, target_h = self.target_size
+        canvas = np.zeros((target_h, target_w, 4), dtype=np.uint8)
+        
+        height, width = img_bgr.shape[:2]
+        x_offset = (target_w - width) // 2
+        y_offset = (target_h - height) // 2
+        
+        region = canvas[y_offset:y_offset + height, x_offset:x_offset + width]
+        region[..., :3] = img_bgr
+        region[..., 3] = mask
+        return canvas
     
     def _load_image(self, path: str) -> np.ndarray:
         """
@@ -129,7 +443,7 @@ class ImageProcessor:
             raise ValueError(f"Không thể load ảnh từ: {path}")
         
         # Resize nếu ảnh quá lớn (tránh OOM)
-        max_dimension = 2048
+        max_dimension = MAX_INPUT_DIMENSION
         height, width = img.shape[:2]
         
         if height > max_dimension or width > max_dimension:
@@ -202,8 +516,8 @@ class ImageProcessor:
         Returns:
             Image.Image: Ảnh không background (RGBA)
         """
-        # rembg tự động detect foreground và remove background
-        img_no_bg = remove(img_pil)
+        # rembg tự động detect foreground và remove background (dùng session đã load)
+        img_no_bg = remove(img_pil, session=self.session)
         
         # Ensure RGBA mode
         if img_no_bg.mode != 'RGBA':
@@ -265,8 +579,14 @@ def process_image(input_path: str, output_path: str) -> str:
     Returns:
         str: Đường dẫn ảnh đã xử lý
     """
-    processor = ImageProcessor()
-    return processor.process_product_image(input_path, output_path)
+    global _default_processor
+    if _default_processor is None:
+        _default_processor = ImageProcessor()
+    return _default_processor.process_product_image(input_path, output_path)
+
+
+# Processor dùng chung cho process_image() → model rembg chỉ load 1 lần
+_default_processor: Optional[ImageProcessor] = None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+"""
+BENCHMARK: pipeline thường vs low_memory trên ảnh 12MP
+Đo peak RSS + throughput của từng pipeline (mỗi pipeline chạy trong 1 process riêng)
+
+Usage:
+    python tests/bench_image_prep.py [số ảnh]
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add src to path
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def make_12mp_images(folder: str, count: int) -> list:
+    """Ảnh JPEG 4000x3000 có nhiễu (giống ảnh chụp, JPEG không nén quá nhỏ)"""
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        noise = rng.integers(0, 40, (3000, 4000, 3), dtype=np.uint8)
+        img = Image.fromarray(noise + 200)
+        ImageDraw.Draw(img).ellipse([1000, 600, 3000, 2400], fill=(180, (i * 50) % 256, 40))
+        path = os.path.join(folder, f"product_{i}.jpg")
+        img.save(path, quality=92)
+        paths.append(path)
+    return paths
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS của process hiện tại (MB), -1 nếu không đo được"""
+    if resource is None:
+        return -1.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS trả về byte, Linux trả về KB
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_worker(low_memory: bool, inputs: list, out_dir: str, fake_session: bool):
+    """Chạy trong process con: xử lý ảnh rồi in kết quả dạng JSON"""
+    from src.image_prep.processor import ImageProcessor
+
+    session = None
+    if fake_session:
+        class FakeSession:
+            def predict(self, img, *args, **kwargs):
+                return [Image.new('L', img.size, 255)]
+        session = FakeSession()
+
+    processor = ImageProcessor(session=session, low_memory=low_memory)
+    _ = processor.session  # Load model trước khi đo
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    for i, path in enumerate(inputs):
+        processor.process_with_timings(path, os.path.join(out_dir, f"{i}.png"))
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "elapsed": elapsed,
+        "throughput": len(inputs) / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "baseline_rss_mb": baseline,
+    }))
+
+
+def run_bench(count: int = 6):
+    home = os.environ.get("U2NET_HOME", os.path.expanduser("~/.u2net"))
+    fake_session = not os.path.exists(os.path.join(home, "u2net.onnx"))
+
+    print("=" * 60)
+    print(f"BENCHMARK image_prep: {count} ảnh 12MP (4000x3000)")
+    if fake_session:
+        print("⚠️  Chưa có model U²-Net - dùng session giả (không đo thời gian rembg thật)")
+    print("=" * 60)
+
+    root = tempfile.mkdtemp()
+    try:
+        inputs = make_12mp_images(root, count)
+        for low_memory in (False, True):
+            out_dir = os.path.join(root, f"out_{int(low_memory)}")
+            os.makedirs(out_dir)
+            args = json.dumps([low_memory, inputs, out_dir, fake_session])
+            proc = subprocess.run(
+                [sys.executable, __file__, "--worker", args],
+                capture_output=True, text=True, cwd=ROOT
+            )
+            if proc.returncode != 0:
+                print(proc.stderr)
+                raise RuntimeError("Worker lỗi")
+            stats = json.loads(proc.stdout.strip().splitlines()[-1])
+
+            name = "low_memory" if low_memory else "standard"
+            print(
+                f"{name:<11} peak RSS {stats['peak_rss_mb']:7.1f} MB "
+                f"(sau load model {stats['baseline_rss_mb']:.1f} MB) | "
+                f"{stats['throughput']:.2f} ảnh/s"
+            )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--worker":
+        run_worker(*json.loads(sys.argv[2]))
+    else:
+        run_bench(int(sys.argv[1]) if len(sys.argv) > 1 else 6)
@@ -0,0 +1,200 @@
+"""
+TEST SCRIPT cho process_batch
+Test xử lý hàng loạt ảnh của module image_prep
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.image_prep.batch import process_batch, plan_outputs
+from src.image_prep.cache import rembg_model_path
+from src.image_prep.processor import ImageProcessor, PIPELINE_STAGES
+from PIL import Image, ImageDraw
+
+
+class FakeSession:
+    """rembg session giả: giữ toàn bộ ảnh làm foreground (không cần tải model)"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, img, *args, **kwargs):
+        self.calls += 1
+        return [Image.new('L', img.size, 255)]
+
+
+def make_images(folder: str, count: int) -> list:
+    """Tạo ảnh sản phẩm giả (mỗi ảnh 1 màu khác nhau → nội dung khác nhau)"""
+    paths = []
+    for i in range(count):
+        img = Image.new('RGB', (400, 400), color='white')
+        ImageDraw.Draw(img).rectangle([100, 100, 300, 300], fill=(255, (i * 37) % 256, 0))
+        path = os.path.join(folder, f"product_{i}.jpg")
+        img.save(path)
+        paths.append(path)
+    return paths
+
+
+def u2net_model_available() -> bool:
+    """Model U²-Net đã được tải về chưa (cùng cách tìm với cache.rembg_model_version)"""
+    return rembg_model_path("u2net") is not None
+
+
+def test_plan_outputs_unique_names():
+    """Test trùng tên file từ các thư mục khác nhau"""
+    print("\n=== TEST 1: Plan Outputs ===")
+
+    jobs = plan_outputs(["a/shoe.jpg", "b/shoe.png", "c/bag.jpg"], "out")
+    outputs = [os.path.basename(out) for _, out in jobs]
+
+    assert outputs == ["shoe.png", "shoe_2.png", "bag.png"], outputs
+    print("✓ Test plan outputs PASS")
+
+
+def test_batch_single_session():
+    """Test batch trong process hiện tại: 1 session cho cả batch, lỗi không dừng batch"""
+    print("\n=== TEST 2: Batch + Shared Session ===")
+
+    root = tempfile.mkdtemp()
+    try:
+        inputs = make_images(root, 5) + [os.path.join(root, "missing.jpg")]
+        session = FakeSession()
+        processor = ImageProcessor(target_size=(540, 960), session=session)
+        progress = []
+
+        result = process_batch(
+            inputs, os.path.join(root, "out"),
+            workers=1, processor=processor,
+            on_progress=lambda done, total: progress.append((done, total))
+        )
+
+        assert len(result.outputs) == 5, result.errors
+        assert list(result.errors) == [inputs[-1]]
+        assert session.calls == 5, "Session không được dùng chung"
+        assert progress[-1] == (6, 6)
+        assert set(result.stage_seconds) == set(PIPELINE_STAGES)
+        assert all(result.stage_seconds[stage] > 0 for stage in PIPELINE_STAGES if stage != "cache")
+
+        for output_path in result.outputs.values():
+            assert Image.open(output_path).size == (540, 960)
+
+        print(result.summary())
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print("✓ Test batch single session PASS")
+
+
+def test_batch_process_pool():
+    """Test batch nhiều process (cần model U²-Net đã tải)"""
+    print("\n=== TEST 3: Batch Process Pool ===")
+
+    if not u2net_model_available():
+        print("⚠️  Chưa có model U²-Net - bỏ qua test")
+        return
+
+    root = tempfile.mkdtemp()
+    try:
+        inputs = make_images(root, 8)
+        result = process_batch(inputs, os.path.join(root, "out"), workers=2)
+
+        assert len(result.outputs) == 8, result.errors
+        print(result.summary())
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print("✓ Test batch process pool PASS")
+
+
+def test_low_memory_exif_orientation():
+    """Test ảnh JPEG dọc có EXIF orientation 6: pipeline low_memory không bóp méo sản phẩm"""
+    print("\n=== TEST 5: Low Memory EXIF Orientation ===")
+
+    root = tempfile.mkdtemp()
+    try:
+        # Pixel lưu ngang 400x300, EXIF bảo xoay 90° → ảnh hiển thị dọc 300x400
+        src = os.path.join(root, "phone.jpg")
+        img = Image.new('RGB', (400, 300), color='white')
+        ImageDraw.Draw(img).rectangle([50, 50, 350, 250], fill=(30, 30, 200))
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        img.save(src, exif=exif, quality=95)
+
+        outputs = {}
+        for low_memory in (False, True):
+            processor = ImageProcessor(target_size=(540, 960), session=FakeSession(), low_memory=low_memory)
+            outputs[low_memory] = os.path.join(root, f"out_{low_memory}.png")
+            processor.process_with_timings(src, outputs[low_memory])
+
+        box_std = Image.open(outputs[False]).getchannel('A').getbbox()
+        box_low = Image.open(outputs[True]).getchannel('A').getbbox()
+        width, height = box_low[2] - box_low[0], box_low[3] - box_low[1]
+        assert height > width, box_low  # vẫn dọc, đúng tỉ lệ 3:4
+        assert abs(width / height - 0.75) < 0.01, (width, height)
+        assert all(abs(a - b) <= 1 for a, b in zip(box_std, box_low)), (box_std, box_low)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print("✓ Test low memory EXIF orientation PASS")
+
+
+def test_low_memory_pipeline():
+    """Test pipeline low_memory: cùng kích thước/vị trí sản phẩm như pipeline thường"""
+    print("\n=== TEST 4: Low Memory Pipeline ===")
+
+    root = tempfile.mkdtemp()
+    try:
+        # Ảnh lớn (JPEG 3000x2000) → decode thu nhỏ
+        src = os.path.join(root, "big.jpg")
+        img = Image.new('RGB', (3000, 2000), color='white')
+        ImageDraw.Draw(img).rectangle([750, 500, 2250, 1500], fill=(200, 30, 30))
+        img.save(src, quality=90)
+
+        outputs = {}
+        for low_memory in (False, True):
+            processor = ImageProcessor(target_size=(540, 960), session=FakeSession(), low_memory=low_memory)
+            outputs[low_memory] = os.path.join(root, f"out_{low_memory}.png")
+            processor.process_with_timings(src, outputs[low_memory])
+
+        standard = Image.open(outputs[False])
+        lowmem = Image.open(outputs[True])
+        assert lowmem.mode == 'RGBA' and lowmem.size == standard.size == (540, 960)
+
+        # Vùng alpha (khung sản phẩm) lệch tối đa 1px
+        box_std = standard.getchannel('A').getbbox()
+        box_low = lowmem.getchannel('A').getbbox()
+        assert all(abs(a - b) <= 1 for a, b in zip(box_std, box_low)), (box_std, box_low)
+
+        # Tách nền ở ảnh nhỏ hơn, phóng mask lên khung sản phẩm
+        session = FakeSession()
+        sizes = []
+        session.predict = lambda img, *args, **kwargs: sizes.append(img.size) or [Image.new('L', img.size, 255)]
+        processor = ImageProcessor(target_size=(540, 960), session=session, low_memory=True, matting_max_side=200)
+        processor.process_with_timings(src, os.path.join(root, "out_small.png"))
+        assert max(sizes[0]) == 200, sizes
+        assert Image.open(os.path.join(root, "out_small.png")).getchannel('A').getbbox() == box_low
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print("✓ Test low memory pipeline PASS")
+
+
+if __name__ == "__main__":
+    print("="*60)
+    print("BẮT ĐẦU TEST MODULE 1.2: Batch Processor")
+    print("="*60)
+
+    test_plan_outputs_unique_names()
+    test_batch_single_session()
+    test_batch_process_pool()
+    test_low_memory_pipeline()
+    test_low_memory_exif_orientation()
+
+    print("\n" + "="*60)
+    print("✅ TẤT CẢ TESTS PASS!")
+    print("="*60)
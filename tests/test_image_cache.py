@@ -0,0 +1,151 @@
+"""
+TEST SCRIPT cho ProcessedImageCache
+Test cache kết quả xử lý ảnh của module image_prep
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.image_prep.batch import process_batch
+from src.image_prep.cache import ProcessedImageCache, rembg_model_path, rembg_model_version
+from src.image_prep.processor import ImageProcessor
+from test_batch_processor import FakeSession, make_images
+from PIL import Image
+
+
+def test_rerun_only_processes_new_images():
+    """Test chạy lại catalog sau khi thêm ảnh: chỉ ảnh mới được xử lý"""
+    print("\n=== TEST 1: Re-run Catalog ===")
+
+    root = tempfile.mkdtemp()
+    try:
+        inputs = make_images(root, 7)
+        cache_dir = os.path.join(root, "cache")
+        session = FakeSession()
+        processor = ImageProcessor(target_size=(270, 480), session=session)
+
+        first = process_batch(inputs[:5], os.path.join(root, "out1"), workers=1,
+                              processor=processor, cache_dir=cache_dir)
+        second = process_batch(inputs, os.path.join(root, "out2"), workers=1,
+                               processor=processor, cache_dir=cache_dir)
+
+        assert first.cache_hits == 0
+        assert second.cache_hits == 5
+        assert session.calls == 7, f"Xử lý lại ảnh cũ: {session.calls} lần rembg"
+        for output_path in second.outputs.values():
+            assert Image.open(output_path).size == (270, 480)
+
+        manifest = ProcessedImageCache(cache_dir).load_manifest()
+        assert len(manifest) == 7
+        print(second.summary())
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print("✓ Test re-run catalog PASS")
+
+
+def test_settings_change_misses_cache():
+    """Test đổi target_size / enhancement → không dùng kết quả cũ"""
+    print("\n=== TEST 2: Settings Change ===")
+
+    root = tempfile.mkdtemp()
+    try:
+        input_path = make_images(root, 1)[0]
+        cache = ProcessedImageCache(os.path.join(root, "cache"))
+        session = FakeSession()
+
+        for target_size, enhance in [((270, 480), True), ((270, 480), False), ((540, 960), True)]:
+            processor = ImageProcessor(target_size=target_size, enhancement_enabled=enhance,
+                                       session=session, cache=cache)
+            processor.process_product_image(input_path, os.path.join(root, "out.png"))
+            assert processor.last_cache_event[1] is False
+
+        assert session.calls == 3
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print("✓ Test settings change PASS")
+
+
+def test_eviction_keeps_cache_bounded():
+    """Test vượt max_bytes → xóa entry lâu không dùng nhất"""
+    print("\n=== TEST 3: Eviction ===")
+
+    root = tempfile.mkdtemp()
+    try:
+        cache = ProcessedImageCache(os.path.join(root, "cache"), max_bytes=2500)
+        keys = []
+        for i in range(4):
+            png = os.path.join(root, f"{i}.png")
+            with open(png, "wb") as f:
+                f.write(os.urandom(1000))
+            key = f"key{i}"
+            cache.store(key, png)
+            keys.append(key)
+
+        cache.lookup(keys[0])  # key0 vừa dùng lại → không bị xóa
+        stats = cache.flush()
+
+        assert stats["bytes"] <= 2500
+        assert stats["evicted"] == 2
+        assert cache.lookup(keys[0]) is not None
+        assert cache.lookup(keys[3]) is not None
+        assert cache.lookup(keys[1]) is None
+        assert set(cache.load_manifest()) == {keys[0], keys[3]}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print("✓ Test eviction PASS")
+
+
+def test_model_version_follows_rembg_model_dir():
+    """Test model tìm theo model_dir của rembg (~/.rembg/models/<name>/), đổi file .onnx → đổi key"""
+    print("\n=== TEST 4: Model Version ===")
+
+    root = tempfile.mkdtemp()
+    saved_env = {name: os.environ.pop(name, None) for name in ("U2NET_HOME", "REMBG_HOME", "XDG_DATA_HOME")}
+    try:
+        os.environ["REMBG_HOME"] = root
+        assert rembg_model_path("u2net") is None
+        missing_version = rembg_model_version("u2net")
+
+        model_dir = os.path.join(root, "models", "u2net")
+        os.makedirs(model_dir)
+        model_file = os.path.join(model_dir, "u2net.onnx")
+        with open(model_file, "wb") as f:
+            f.write(b"model v1")
+        assert rembg_model_path("u2net") == model_file
+        v1 = rembg_model_version("u2net")
+        assert v1 != missing_version
+
+        with open(model_file, "wb") as f:
+            f.write(b"model v2, updated")
+        assert rembg_model_version("u2net") != v1
+    finally:
+        for name, value in saved_env.items():
+            os.environ.pop(name, None)
+            if value is not None:
+                os.environ[name] = value
+        shutil.rmtree(root, ignore_errors=True)
+
+    print("✓ Test model version PASS")
+
+
+if __name__ == "__main__":
+    print("="*60)
+    print("BẮT ĐẦU TEST MODULE 1.3: Image Cache")
+    print("="*60)
+
+    test_rerun_only_processes_new_images()
+    test_settings_change_misses_cache()
+    test_eviction_keeps_cache_bounded()
+    test_model_version_follows_rembg_model_dir()
+
+    print("\n" + "="*60)
+    print("✅ TẤT CẢ TESTS PASS!")
+    print("="*60)